@@ -0,0 +1 @@
+"""Performance benchmarks for OpsGuard-AI (run with ``python -m benchmarks.<name>``)."""
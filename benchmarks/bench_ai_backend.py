@@ -0,0 +1,115 @@
+"""Benchmark: AI stage throughput/tail latency offline, and connection pooling.
+
+Usage:
+    python -m benchmarks.bench_ai_backend [--scans 24] [--latency-ms 100]
+
+Part 1 runs ``--scans`` concurrent AI stages (4 chunks each, as batch mode
+or the daemon would) against the mock backend, with jittered latency and
+injected 503s that the backend retries, for several ``max_concurrency``
+limits. Reports scans/s and p50/p95/p99 scan latency.
+
+Part 2 sends sequential requests to the local OpenAI-compatible stub with
+one shared backend (one keep-alive pool) vs a new client per request (what
+a fresh process per scan pays).
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_openai import StubOpenAIServer
+from src.ai import AIEngine
+from src.backends import ALLOW_MOCK_ENV, AIBackend, BackendConfig
+from src.tokens import MAX_CHUNK_TOKENS
+
+
+def _diff(scan: int, files: int) -> str:
+    # Cada fichero llena (casi) un chunk: un escaneo = `files` peticiones
+    lines = MAX_CHUNK_TOKENS // 12
+    out = []
+    for f in range(files):
+        path = f"svc{scan}/mod_{f}.py"
+        out += [f"diff --git a/{path} b/{path}", f"@@ -0,0 +1,{lines} @@"]
+        out += [f"+value_{i} = compute({scan}, {f}, {i})" for i in range(lines)]
+    return "\n".join(out) + "\n"
+
+
+def _percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _mock_run(config: BackendConfig, diffs, jobs: int):
+    backend = AIBackend(config)
+
+    def _scan(diff: str) -> float:
+        start = time.perf_counter()
+        AIEngine(backend=backend, stream=False, max_workers=4).analyze_diff(diff)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            latencies = list(pool.map(_scan, diffs))
+    return time.perf_counter() - start, latencies, backend.retries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scans", type=int, default=24)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--requests", type=int, default=40)
+    args = parser.parse_args()
+
+    os.environ.setdefault(ALLOW_MOCK_ENV, "1")
+    diffs = [_diff(scan, 4) for scan in range(args.scans)]
+    print(
+        f"Mock backend: {args.scans} scans x 4 chunks, latency "
+        f"{args.latency_ms:.0f}ms + up to {args.latency_ms:.0f}ms jitter, 5% 503s"
+    )
+    print(
+        f"{'max_concurrency':>15} {'scans/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'retries':>8}"
+    )
+    for limit in (1, 4, 16):
+        config = BackendConfig(
+            kind="mock",
+            max_concurrency=limit,
+            retries=3,
+            backoff=0.05,
+            mock_latency_ms=args.latency_ms,
+            mock_jitter_ms=args.latency_ms,
+            mock_failure_rate=0.05,
+        )
+        total, latencies, retries = _mock_run(config, diffs, jobs=16)
+        p50, p95, p99 = (_percentile(latencies, q) for q in (0.5, 0.95, 0.99))
+        print(
+            f"{limit:>15} {args.scans / total:>8.1f} {p50 * 1000:>6.0f}ms "
+            f"{p95 * 1000:>6.0f}ms {p99 * 1000:>6.0f}ms {retries:>8}"
+        )
+
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub-key")
+    messages = [{"role": "user", "content": "Analyze this git diff:\n\n+x = 1\n"}]
+    with StubOpenAIServer(first_token_latency=0, token_delay=0) as stub:
+        config = BackendConfig(endpoint=stub.base_url)
+        shared = AIBackend(config)
+        shared.create(messages=messages)  # import de openai + primera conexión
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            shared.create(messages=messages)
+        pooled_t = (time.perf_counter() - start) / args.requests
+
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            AIBackend(config).create(messages=messages)
+        fresh_t = (time.perf_counter() - start) / args.requests
+
+    print(f"Stub endpoint, {args.requests} sequential requests (mean):")
+    print(f"  shared backend (keep-alive pool)  {pooled_t * 1000:7.2f} ms")
+    print(f"  new client per request            {fresh_t * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: blocking vs streaming AI requests against a local SSE stub.
+
+Usage:
+    python -m benchmarks.bench_ai_streaming [--findings 40] [--token-delay 0.005]
+
+Measures TTFT, total latency and output tokens produced by the server for a
+high-risk BLOCK verdict, and checks that streaming mode aborts early.
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.stub_openai import StubOpenAIServer
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1 +1,2 @@
+ import os
++os.system(request.args["cmd"])
+"""
+
+
+def _blocking_verdict(findings: int) -> dict:
+    return {
+        "verdict": "BLOCK",
+        "risk_score": 9,
+        "explanation": "Remote code execution via unsanitized input.",
+        "findings": [
+            {
+                "file": "app.py",
+                "line": str(i),
+                "severity": "CRITICAL",
+                "issue": "User input reaches os.system without validation.",
+            }
+            for i in range(findings)
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--findings", type=int, default=40)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub-key")
+    from src.ai import AIEngine
+
+    print(
+        f"{'mode':>10} | {'verdict':>7} | {'ttft (ms)':>9} | {'total (s)':>9} | {'server tokens':>13}"
+    )
+    for stream in (False, True):
+        with StubOpenAIServer(
+            verdict=_blocking_verdict(args.findings),
+            first_token_latency=args.first_token_latency,
+            token_delay=args.token_delay,
+        ) as stub:
+            engine = AIEngine(base_url=stub.base_url, stream=stream)
+            start = time.perf_counter()
+            result, ok, _ = engine._request_verdict(DIFF)
+            total = time.perf_counter() - start
+            time.sleep(0.05)  # deja al servidor registrar la desconexión
+
+            ttft = f"{min(engine._ttfts) * 1000:.0f}" if engine._ttfts else "-"
+            print(
+                f"{'stream' if stream else 'blocking':>10} | {result['verdict']:>7} | "
+                f"{ttft:>9} | {total:>9.3f} | {stub.tokens_sent:>13}"
+            )
+            assert result["verdict"] == "BLOCK"
+            if stream:
+                assert engine._early_aborts == 1, "streaming mode did not abort early"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark: one ``opsguard scan`` process per target vs ``opsguard batch``.
+
+Usage:
+    python -m benchmarks.bench_batch [--repos 20] [--commits 10] [--jobs 4]
+
+Builds ``--repos`` throwaway repositories with ``--commits`` commits each
+(one commit per repo plants a secret) and compares:
+  * one fresh ``opsguard scan`` process per repo (working tree vs HEAD),
+  * a single ``opsguard batch`` over the same working trees,
+  * a single ``opsguard batch`` walking every commit of every repo,
+checking that batch mode blocks exactly the planted secrets.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_startup import ROOT
+
+SECRET = 'TOKEN = "ghp_' + "c" * 36 + '"\n'
+
+
+def _make_history(path: Path, commits: int, secret_at: int) -> None:
+    """Repo with ``commits`` commits (one plants a secret) + a staged secret."""
+    git = ["git", "-C", str(path), "-c", "user.name=bench", "-c", "user.email=b@x"]
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    for i in range(commits):
+        name = "secret.py" if i == secret_at else f"mod_{i}.py"
+        text = SECRET if i == secret_at else f"value_{i} = compute({i})\n"
+        (path / name).write_text(text)
+        subprocess.run([*git, "add", name], check=True)
+        subprocess.run([*git, "commit", "-qm", f"c{i}"], check=True)
+    (path / "app.py").write_text(SECRET)
+    subprocess.run([*git, "add", "app.py"], check=True)
+
+
+def _batch(manifest: Path, env, jobs: int) -> tuple:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-m", "src.main", "batch", str(manifest)]
+        + ["--jobs", str(jobs), "--config", str(ROOT / "opsguard.yml")],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    ).stdout
+    records = [json.loads(line) for line in out.splitlines()]
+    return time.perf_counter() - start, records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=20)
+    parser.add_argument("--commits", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-bench-"))
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "OPSGUARD_CACHE_DIR": str(workdir / "cache"),
+        "OPENROUTER_API_KEY": "",
+    }
+    env.pop("OPSGUARD_TELEMETRY_DIR", None)
+    try:
+        repos = [workdir / f"repo{n:03d}" for n in range(args.repos)]
+        for n, repo in enumerate(repos):
+            _make_history(repo, args.commits, secret_at=n % args.commits)
+
+        start = time.perf_counter()
+        for repo in repos:
+            subprocess.run(
+                [sys.executable, "-m", "src.main", "scan", "--path", str(repo)]
+                + ["--config", str(ROOT / "opsguard.yml")],
+                cwd=ROOT,
+                env=env,
+                capture_output=True,
+            )
+        per_process_t = time.perf_counter() - start
+
+        worktrees = workdir / "worktrees.jsonl"
+        worktrees.write_text(
+            "".join(json.dumps({"repo": str(r)}) + "\n" for r in repos)
+        )
+        worktree_t, records = _batch(worktrees, env, args.jobs)
+        assert [r["status"] for r in records] == ["block"] * args.repos
+
+        history = workdir / "history.jsonl"
+        history.write_text(
+            "".join(json.dumps({"repo": str(r), "range": "HEAD"}) + "\n" for r in repos)
+        )
+        history_t, records = _batch(history, env, args.jobs)
+        scans = len(records)
+        blocked = sum(r["status"] == "block" for r in records)
+        assert scans == args.repos * args.commits
+        assert blocked == args.repos, f"expected {args.repos} blocks, got {blocked}"
+
+        print(f"{args.repos} repos x {args.commits} commits, jobs={args.jobs}:")
+        print(f"  {args.repos} x `opsguard scan` processes   {per_process_t:7.2f}s")
+        print(
+            f"  `opsguard batch` (working trees)  {worktree_t:7.2f}s  "
+            f"({per_process_t / worktree_t:.1f}x)"
+        )
+        print(
+            f"  `opsguard batch` ({scans} commits)    {history_t:7.2f}s  "
+            f"({scans / history_t:.0f} scans/s)"
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
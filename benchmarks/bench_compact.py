@@ -0,0 +1,137 @@
+"""Benchmark: AI payload size before and after diff compaction.
+
+Usage:
+    python -m benchmarks.bench_compact [--files 40] [--context 2]
+
+Builds a throwaway repo and a "typical noisy PR" on top of it: small edits
+in large files (lots of context), a whitespace-only edit (trailing spaces;
+a re-indent is a real change in Python), a large deletion, a lockfile
+refresh, a minified bundle, a binary asset and the same patch vendored into
+several packages. Reports chars/estimated tokens saved and
+compaction time, and checks that every kept line of the compacted diff still
+sits at the line number its ``@@`` header claims in the new tree.
+"""
+
+import argparse
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from src.compact import compact_diff
+from src.diffparse import iter_hunks
+
+
+def _module(seed: int, lines: int) -> str:
+    rnd = random.Random(seed)
+    body = []
+    for i in range(lines):
+        if i % 12 == 0:
+            body.append(f"def handler_{seed}_{i}(request, timeout=30):")
+        else:
+            body.append(f"    value_{i} = compute(request, {rnd.randint(0, 999)})")
+    return "\n".join(body) + "\n"
+
+
+def _make_pr(path: Path, files: int) -> None:
+    git = ["git", "-C", str(path), "-c", "user.name=bench", "-c", "user.email=b@x"]
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    for i in range(files):
+        (path / f"mod_{i}.py").write_text(_module(i, 400))
+    for pkg in range(4):
+        (path / f"vendor{pkg}").mkdir()
+        (path / f"vendor{pkg}" / "client.py").write_text(_module(999, 200))
+    (path / "package-lock.json").write_text('{"lockfileVersion": 3}\n')
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", "base"], check=True)
+
+    for i in range(files):
+        lines = _module(i, 400).splitlines()
+        if i == 0:
+            # Solo cambia el espaciado final (re-indentar en Python sí es un cambio)
+            lines = [line + "  " if line else line for line in lines]
+        elif i == 1:
+            del lines[50:250]
+        else:
+            for at in (100, 300):
+                lines[at] = f"    value_{at} = compute_safe(request, user_input)"
+        (path / f"mod_{i}.py").write_text("\n".join(lines) + "\n")
+    for pkg in range(4):
+        client = _module(999, 200).splitlines()
+        client[120:120] = ["    session.verify = False", "    session.retries = 5"]
+        (path / f"vendor{pkg}" / "client.py").write_text("\n".join(client) + "\n")
+    (path / "package-lock.json").write_text(
+        "".join(
+            f'{{"name": "dep{i}", "version": "1.{i}.0", "integrity": "sha512-{i:064d}"}}\n'
+            for i in range(3000)
+        )
+    )
+    (path / "bundle.js").write_text(
+        ";".join(f"var a{i}=function(b){{return b*{i}}}" for i in range(5000)) + "\n"
+    )
+    (path / "logo.png").write_bytes(bytes(range(256)) * 64)
+    subprocess.run([*git, "add", "-A"], check=True)
+
+
+def _check_line_numbers(repo: Path, compacted: str) -> int:
+    """Kept new-side lines whose content is not at the claimed line."""
+    bad = 0
+    for hunk in iter_hunks(compacted.splitlines(), max_lines=1 << 30):
+        if not hunk.lines[0].startswith("@@"):
+            continue
+        content = (repo / hunk.path).read_text().splitlines()
+        line_no = hunk.new_start
+        for line in hunk.lines[1:]:
+            if line.startswith(("-", "\\")):
+                continue
+            if line_no > len(content) or content[line_no - 1] != line[1:]:
+                bad += 1
+            line_no += 1
+    return bad
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--context", type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-bench-"))
+    try:
+        repo = workdir / "repo"
+        _make_pr(repo, args.files)
+        diff = subprocess.run(
+            ["git", "-C", str(repo), "diff", "--cached", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+        start = time.perf_counter()
+        compacted, stats = compact_diff(diff, context_lines=args.context)
+        elapsed = time.perf_counter() - start
+        bad = _check_line_numbers(repo, compacted)
+        assert bad == 0, f"{bad} line(s) moved"
+        assert "session.verify = False" in compacted
+
+        print(f"Noisy PR ({args.files} modules, context={args.context}):")
+        print(
+            f"  raw diff        {stats.chars_in:>9} chars  ~{stats.chars_in // 4} tokens"
+        )
+        print(
+            f"  compacted       {stats.chars_out:>9} chars  ~{stats.chars_out // 4} tokens"
+            f"  ({100 * stats.chars_saved / stats.chars_in:.0f}% saved)"
+        )
+        print(
+            f"  files omitted {stats.files_omitted}, whitespace-only hunks dropped "
+            f"{stats.hunks_dropped}, duplicate hunks {stats.hunks_deduped}"
+        )
+        print(f"  compaction time {elapsed * 1000:8.1f} ms, line references intact")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
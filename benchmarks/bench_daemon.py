@@ -0,0 +1,100 @@
+"""Benchmark: per-scan latency of a fresh CLI vs the warm ``opsguard serve``.
+
+Usage:
+    python -m benchmarks.bench_daemon [--repeat 20]
+
+Scans a throwaway repo with a staged secret (regex BLOCK, no AI call):
+  * ``opsguard scan`` in a fresh interpreter (what a pre-commit hook pays),
+  * ``opsguard scan --daemon`` (fresh thin client, work done by the daemon),
+  * a raw socket request to the daemon (the warm per-scan latency itself).
+Every path must report the same findings.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_startup import ROOT, _make_repo, _median_run
+from src.daemon import DaemonError, request, request_scan
+from src.pipeline import ScanOptions
+
+
+def _wait_for(socket_path: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            request(socket_path, {"op": "ping"}, timeout=1.0)
+            return
+        except DaemonError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--config", default=str(ROOT / "opsguard.yml"))
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-bench-"))
+    socket_path = str(workdir / "run" / "daemon.sock")
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "OPSGUARD_CACHE_DIR": str(workdir / "cache"),
+        "OPENROUTER_API_KEY": "",
+    }
+    env.pop("OPSGUARD_TELEMETRY_DIR", None)
+    repo = workdir / "repo"
+    _make_repo(repo)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.main", "serve", "--socket", socket_path],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for(socket_path)
+        cli = [sys.executable, "-m", "src.main", "scan", "--path", str(repo)]
+        cli += ["--config", args.config]
+        cli_t = _median_run(cli, env, max(3, args.repeat // 4))
+        client_t = _median_run(
+            cli + ["--daemon", "--socket", socket_path],
+            env,
+            max(3, args.repeat // 4),
+        )
+
+        options = ScanOptions()
+        expected, _ = request_scan(socket_path, str(repo), args.config, options)
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            regex_result, _ = request_scan(socket_path, str(repo), args.config, options)
+            samples.append(time.perf_counter() - start)
+            assert regex_result == expected
+        raw_t = statistics.median(samples)
+        assert expected is not None and expected.status == "block"
+
+        print("Scan latency (regex BLOCK, no AI), median:")
+        print(f"  fresh `opsguard scan`         {cli_t * 1000:8.1f} ms")
+        print(f"  `opsguard scan --daemon`      {client_t * 1000:8.1f} ms")
+        print(
+            f"  warm daemon request          {raw_t * 1000:8.1f} ms  "
+            f"({cli_t / raw_t:.0f}x vs fresh CLI)"
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark: PR diff size with merge-base diffing and rename detection.
+
+Usage:
+    python -m benchmarks.bench_diff_scope [--files 400] [--moved 0.5]
+
+Builds a repository where a feature branch moves a fraction of the code
+(``--moved``; a quarter of the moves also edit a line), moves a file with a
+secret out of an ignored directory, and adds one new secret, while ``main``
+moves on with unrelated changes to ``--files`` / 4 files. The PR is then
+scanned like CI does (``GITHUB_EVENT_PATH``) three ways: the old
+``base..head`` diff without rename detection, from the merge-base without
+it, and from the merge-base with it. All three must report the branch's two
+secrets; the upstream changes must be gone from the merge-base diffs.
+"""
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_startup import ROOT
+from benchmarks.bench_tree_scan import SECRET, _source
+from src.ignore_matcher import IgnoreMatcher
+from src.ingest import GitManager
+from src.security import SecurityPolicy
+
+
+def make_repo(path: Path, files: int, moved: float) -> Path:
+    """Create the repository; returns the GitHub event file of the PR."""
+    rnd = random.Random(0)
+    git = ["git", "-C", str(path), "-c", "user.name=bench", "-c", "user.email=b@x"]
+    subprocess.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+    for i in range(files):
+        target = path / f"pkg{i % 20}/mod_{i}.py"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(_source(rnd, 4096))
+    (path / "docs").mkdir()
+    (path / "docs/example.py").write_text(SECRET + "\n")
+    (path / ".opsguardignore").write_text("docs/\n")
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", "base"], check=True)
+
+    subprocess.run([*git, "checkout", "-qb", "feature"], check=True)
+    (path / "lib").mkdir()
+    for i in rnd.sample(range(files), int(files * moved)):
+        source, target = f"pkg{i % 20}/mod_{i}.py", f"lib/mod_{i}.py"
+        subprocess.run([*git, "mv", source, target], check=True)
+        if rnd.random() < 0.25:
+            with open(path / target, "a") as f:
+                f.write("edited = True\n")
+    subprocess.run([*git, "mv", "docs/example.py", "lib/example.py"], check=True)
+    (path / "lib/new.py").write_text(SECRET + "\n")
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", "feature"], check=True)
+
+    subprocess.run([*git, "checkout", "-q", "main"], check=True)
+    for i in range(0, files, 4):
+        with open(path / f"pkg{i % 20}/mod_{i}.py", "a") as f:
+            f.write("upstream = 1\n" * 20)
+    subprocess.run([*git, "commit", "-qam", "upstream"], check=True)
+
+    def sha(rev: str) -> str:
+        return subprocess.run(
+            [*git, "rev-parse", rev], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    event = path.parent / "event.json"
+    pr = {"base": {"sha": sha("main")}, "head": {"sha": sha("feature")}}
+    event.write_text(json.dumps({"pull_request": pr}))
+    return event
+
+
+def scan(repo: Path, event: Path, policy, merge_base: bool, threshold: int):
+    environ = {"GITHUB_ACTIONS": "true", "GITHUB_EVENT_PATH": str(event)}
+    revisions = None
+    if not merge_base:
+        # Comportamiento anterior: base..head tal cual
+        pr = json.loads(event.read_text())["pull_request"]
+        revisions = (pr["base"]["sha"], pr["head"]["sha"])
+    manager = GitManager(repo_path=str(repo), environ=environ, revisions=revisions)
+    is_ignored = IgnoreMatcher(["docs/"]).match_file
+    start = time.perf_counter()
+    changes = manager.read_changes(is_ignored, rename_threshold=threshold)
+    chars = 0
+
+    def counted(hunks):
+        nonlocal chars
+        for hunk in hunks:
+            chars += len(hunk.text())
+            yield hunk
+
+    violations = policy.scan_hunks(counted(changes.hunks))
+    elapsed = time.perf_counter() - start
+    return changes, violations, chars, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--moved", type=float, default=0.5)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-scope-"))
+    try:
+        repo = workdir / "repo"
+        event = make_repo(repo, args.files, args.moved)
+        policy = SecurityPolicy(str(ROOT / "opsguard.yml"))
+        print(f"PR moving {int(args.files * args.moved)} of {args.files} files:")
+        for label, merge_base, threshold in (
+            ("base..head, no renames", False, 0),
+            ("merge-base, no renames", True, 0),
+            ("merge-base + renames", True, 50),
+        ):
+            changes, violations, chars, elapsed = scan(
+                repo, event, policy, merge_base, threshold
+            )
+            found = sorted(v["file"] for v in violations)
+            assert found == ["lib/example.py", "lib/new.py"], found
+            upstream = [c for c in changes.changes if c.path.startswith("pkg")]
+            if merge_base:
+                assert not any(c.status == "M" for c in upstream), "upstream leaked"
+            print(
+                f"  {label:<24} {len(changes.targets):5} files  "
+                f"{chars / 1e6:7.2f} MB diff  {elapsed * 1000:8.1f} ms  "
+                f"({len(changes.moved)} pure moves skipped)"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
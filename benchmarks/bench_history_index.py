@@ -0,0 +1,125 @@
+"""Benchmark: batch history scan with and without the history index.
+
+Usage:
+    python -m benchmarks.bench_history_index [--commits 300] [--new 10]
+
+Builds a repository with ``--commits`` commits (a few mid-sized files
+touched per commit, one planted secret), then measures in-process
+``run_batch`` over the whole history:
+  * cold: empty index (every commit scanned, index populated),
+  * warm: nothing new (every commit skipped),
+  * incremental: ``--new`` commits added on top,
+  * rebased: the last ``--new`` commits replayed on a new base (new commit
+    IDs, same blob pairs, so their file changes come from the index),
+against a full rescan without the index. Every run must report the secret.
+"""
+
+import argparse
+import io
+import json
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_regex_engine import ALPHABET
+from benchmarks.bench_startup import ROOT
+from src.batch import Checkpoint, run_batch
+from src.pipeline import ScanOptions
+
+SECRET = 'TOKEN = "ghp_' + "e" * 36 + '"\n'
+
+
+def _commit_files(path: Path, git, rnd: random.Random, n: int, secret: bool) -> None:
+    for f in range(3):
+        lines = [
+            f"value_{n}_{i} = compute('"
+            + " ".join(
+                "".join(rnd.choice(ALPHABET) for _ in range(6)) for _ in range(8)
+            )
+            + "')"
+            for i in range(200)
+        ]
+        (path / f"pkg/mod_{(n + f) % 40:02d}.py").write_text("\n".join(lines) + "\n")
+    if secret:
+        (path / "pkg/settings.py").write_text(SECRET)
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", f"c{n}"], check=True)
+
+
+def _run(repo: Path, rev_range: str, history: bool) -> tuple:
+    out = io.StringIO()
+    start = time.perf_counter()
+    summary = run_batch(
+        [{"repo": str(repo), "range": rev_range}],
+        str(ROOT / "opsguard.yml"),
+        ScanOptions(),
+        out,
+        Checkpoint(None),
+        history=history,
+    )
+    elapsed = time.perf_counter() - start
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    return elapsed, summary, records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=300)
+    parser.add_argument("--new", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-bench-"))
+    repo = workdir / "repo"
+    git = ["git", "-C", str(repo), "-c", "user.name=bench", "-c", "user.email=b@x"]
+    rnd = random.Random(5)
+    try:
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)
+        (repo / "pkg").mkdir()
+        for n in range(args.commits):
+            _commit_files(repo, git, rnd, n, secret=n == args.commits // 2)
+
+        full_t, _, records = _run(repo, "HEAD", history=False)
+        assert sum(r["status"] == "block" for r in records) == 1
+        cold_t, _, records = _run(repo, "HEAD", history=True)
+        assert sum(r["status"] == "block" for r in records) == 1
+        warm_t, summary, _ = _run(repo, "HEAD", history=True)
+        assert summary["indexed"] == args.commits
+
+        for n in range(args.commits, args.commits + args.new):
+            _commit_files(repo, git, rnd, n, secret=False)
+        incr_t, summary, records = _run(repo, "HEAD", history=True)
+        assert len(records) == args.new
+
+        # Mismos cambios sobre una base nueva: commits nuevos, blobs conocidos
+        subprocess.run([*git, "checkout", "-q", "-b", "rebased", f"HEAD~{args.new}"])
+        (repo / "NOTES").write_text("new base\n")
+        subprocess.run([*git, "add", "NOTES"], check=True)
+        subprocess.run([*git, "commit", "-qm", "base"], check=True)
+        subprocess.run(
+            [*git, "cherry-pick", f"master~{args.new}..master"],
+            check=True,
+            capture_output=True,
+        )
+        rebased_t, _, records = _run(repo, "HEAD", history=True)
+        assert len(records) == args.new + 1
+
+        total = args.commits + args.new
+        print(f"History of {total} commits (3 x 200-line files per commit):")
+        print(f"  full rescan, no index      {full_t:7.2f}s")
+        print(f"  cold (building the index)  {cold_t:7.2f}s")
+        print(f"  warm (nothing new)         {warm_t:7.2f}s  ({full_t / warm_t:.0f}x)")
+        print(
+            f"  +{args.new} new commits          {incr_t:7.2f}s  ({full_t / incr_t:.0f}x)"
+        )
+        print(
+            f"  {args.new} rebased commits        {rebased_t:7.2f}s  ({full_t / rebased_t:.0f}x)"
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
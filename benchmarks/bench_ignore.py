@@ -0,0 +1,162 @@
+"""Benchmark: .opsguardignore filtering of a huge changed-file list.
+
+Usage:
+    python -m benchmarks.bench_ignore [--paths 50000] [--cases 3000]
+
+First a property check: ``--cases`` random ignore files (literal names,
+directory patterns, anchored paths, ``*.ext``, negations, plus wildcard,
+character-class and escaped forms that take the regex fallback) are matched
+against random paths with both ``IgnoreMatcher`` and
+``PathSpec.match_file``; every answer must agree. Then times filtering
+``--paths`` paths of a vendoring-style PR (most of them under ignored
+directories) with the repo's ``.opsguardignore`` plus a typical set of
+generated/vendored patterns.
+"""
+
+import argparse
+import random
+import time
+import warnings
+
+from benchmarks.bench_startup import ROOT
+from src.ignore_matcher import IgnoreMatcher
+from src.policy_bundle import DEFAULT_IGNORE_PATTERNS
+
+NAMES = ["a", "b", "src", "lib", "vendor", "node_modules", "build", ".git", "dist"]
+FILES = ["x.py", "y.lock", "a.min.js", "b.tar.gz", "README.md", ".env", "a", "lib"]
+EXTENSIONS = [".py", ".lock", ".js", ".min.js", ".gz", ".md", ".env"]
+
+EXTRA_PATTERNS = [
+    "node_modules/",
+    "vendor/",
+    "third_party/",
+    "**/generated/**",
+    "/build",
+    "dist/",
+    "*.min.js",
+    "*.map",
+    "*.pb.go",
+    "*_pb2.py",
+    "*.snap",
+    "coverage/",
+    "!vendor/modules.txt",
+]
+
+
+def _random_pattern(rnd: random.Random) -> str:
+    name, other = rnd.choice(NAMES + FILES), rnd.choice(NAMES)
+    ext = rnd.choice(EXTENSIONS)
+    pattern = rnd.choice(
+        [
+            name,
+            f"{name}/",
+            f"**/{name}",
+            f"**/{name}/**",
+            f"/{name}",
+            f"/{other}/{name}",
+            f"{other}/{name}/",
+            f"{other}/**",
+            f"*{ext}",
+            f"*{ext}/",
+            f"**/*{ext}",
+            # Formas que usan la regex de pathspec
+            f"{other}/*{ext}",
+            f"{other}/**/{name}",
+            f"{name[0]}?{name[2:]}",
+            f"[ab]{name[1:]}",
+            f"*{name}*",
+            "**",
+            f"\\{name}",
+            f"{name} ",
+            f"# {name}",
+            "",
+        ]
+    )
+    if pattern.strip() and not pattern.startswith("#") and rnd.random() < 0.2:
+        return "!" + pattern
+    return pattern
+
+
+def _random_path(rnd: random.Random) -> str:
+    dirs = [rnd.choice(NAMES) for _ in range(rnd.randrange(4))]
+    path = "/".join(dirs + [rnd.choice(FILES + NAMES)])
+    # Rutas raras (las resuelve pathspec): deben dar lo mismo
+    return (
+        rnd.choice(["", "", "", "", "/", "./"])
+        + path
+        + rnd.choice(["", "/"] + [""] * 8)
+    )
+
+
+def property_check(cases: int, seed: int = 0) -> int:
+    """Compare ``IgnoreMatcher`` with pathspec on random specs and paths."""
+    rnd = random.Random(seed)
+    checked = 0
+    for _ in range(cases):
+        lines = [_random_pattern(rnd) for _ in range(rnd.randrange(1, 8))]
+        matcher = IgnoreMatcher(lines)
+        for _ in range(60):
+            path = _random_path(rnd)
+            expected = matcher.spec.match_file(path)
+            assert matcher.match_file(path) == expected, (lines, path, expected)
+            checked += 1
+    return checked
+
+
+def _changed_files(count: int) -> list:
+    # PR de vendoring: la mayoría bajo directorios ignorados, algo de código
+    rnd = random.Random(1)
+    paths = []
+    for i in range(count):
+        kind = rnd.random()
+        if kind < 0.6:
+            pkg = f"vendor/github.com/org{i % 50}/pkg{i % 300}"
+            paths.append(f"{pkg}/sub{i % 7}/file_{i}.go")
+        elif kind < 0.8:
+            paths.append(f"web/node_modules/mod{i % 400}/lib/index_{i}.js")
+        elif kind < 0.9:
+            paths.append(f"api/gen/v{i % 3}/service_{i}.pb.go")
+        else:
+            paths.append(f"src/pkg{i % 40}/module_{i}.py")
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=50000)
+    parser.add_argument("--cases", type=int, default=3000)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    start = time.perf_counter()
+    checked = property_check(args.cases)
+    print(
+        f"Property check: {checked} paths x {args.cases} random ignore files "
+        f"agree with pathspec ({time.perf_counter() - start:.1f} s)"
+    )
+
+    lines = (ROOT / ".opsguardignore").read_text().splitlines()
+    lines += EXTRA_PATTERNS + DEFAULT_IGNORE_PATTERNS
+    paths = _changed_files(args.paths)
+    matcher = IgnoreMatcher(lines)
+
+    start = time.perf_counter()
+    expected = [p for p in paths if not matcher.spec.match_file(p)]
+    pathspec_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    is_ignored = IgnoreMatcher(lines).match_file
+    kept = [p for p in paths if not is_ignored(p)]
+    matcher_s = time.perf_counter() - start
+    assert kept == expected, "IgnoreMatcher disagrees with pathspec"
+
+    print(f"{args.paths} changed files, {len(lines)} lines, {len(kept)} kept:")
+    print(f"  pathspec        {pathspec_s * 1000:8.1f} ms")
+    print(
+        f"  IgnoreMatcher   {matcher_s * 1000:8.1f} ms  (built per run, "
+        f"{pathspec_s / matcher_s:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
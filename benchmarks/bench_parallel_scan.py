@@ -0,0 +1,105 @@
+"""Benchmark: single-process vs process-pool regex scan on large diffs.
+
+Usage:
+    python -m benchmarks.bench_parallel_scan [--files 200] [--lines 1000] [--workers 2,4,8]
+
+The synthetic diff mixes many mid-sized files (sharded across workers) with
+one very large file (split into overlapping shards). Every run asserts that
+the parallel scan reports exactly the same findings, in the same order, as
+the serial scan. Speedup is bounded by the number of available cores.
+"""
+
+import argparse
+import os
+import random
+import time
+from typing import List
+
+from benchmarks.bench_regex_engine import ALPHABET
+from src.security import PARALLEL_MIN_CHARS, SecurityPolicy
+
+
+def synthetic_multi_file_diff(
+    files: int, lines: int, big_file_lines: int, secret_every: int, seed: int = 7
+) -> str:
+    """Build a diff with ``files`` files plus one oversized generated file."""
+    rnd = random.Random(seed)
+    out: List[str] = []
+
+    def _file(path: str, count: int) -> None:
+        out.extend(
+            [
+                f"diff --git a/{path} b/{path}",
+                f"--- a/{path}",
+                f"+++ b/{path}",
+                f"@@ -1 +1,{count} @@",
+            ]
+        )
+        for i in range(count):
+            if secret_every and rnd.randrange(secret_every) == 0:
+                token = "".join(rnd.choice(ALPHABET) for _ in range(36))
+                out.append(f'+TOKEN_{i} = "ghp_{token}"')
+            else:
+                words = " ".join(
+                    "".join(rnd.choice(ALPHABET) for _ in range(6)) for _ in range(8)
+                )
+                out.append(f"+    value_{i} = compute('{words}')")
+
+    for n in range(files):
+        _file(f"pkg/module_{n:04d}.py", lines)
+    _file("vendor/bundle.min.js", big_file_lines)
+    return "\n".join(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=1000)
+    parser.add_argument("--big-file-lines", type=int, default=100_000)
+    parser.add_argument("--workers", default="2,4,8")
+    parser.add_argument("--config", default="opsguard.yml")
+    args = parser.parse_args()
+
+    policy = SecurityPolicy(config_path=args.config)
+    diff = synthetic_multi_file_diff(
+        args.files, args.lines, args.big_file_lines, secret_every=5_000
+    )
+    print(
+        f"Synthetic diff: {len(diff) / 1e6:.1f} MB, {args.files + 1} files, "
+        f"{os.cpu_count()} CPU cores"
+    )
+
+    start = time.perf_counter()
+    expected = policy.scan_diff(diff)
+    serial_t = time.perf_counter() - start
+    print(f"{'workers':>7} | {'time (s)':>8} | {'speedup':>7} | findings")
+    print(f"{1:>7} | {serial_t:>8.3f} | {1.0:>6.1f}x | {len(expected)}")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        start = time.perf_counter()
+        actual = policy.scan_diff(diff, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert actual == expected, f"parallel scan diverges with {workers} workers"
+        print(
+            f"{workers:>7} | {elapsed:>8.3f} | {serial_t / elapsed:>6.1f}x | "
+            f"{len(actual)}"
+        )
+
+    # Por debajo del umbral no se arranca el pool: el coste debe ser el serial
+    small = diff[: PARALLEL_MIN_CHARS // 2]
+    small = small[: small.rfind("\n")]
+    start = time.perf_counter()
+    serial_small = policy.scan_diff(small)
+    small_serial_t = time.perf_counter() - start
+    start = time.perf_counter()
+    assert policy.scan_diff(small, workers=8) == serial_small
+    small_t = time.perf_counter() - start
+    print(
+        f"\nBelow threshold ({len(small) / 1e6:.1f} MB < "
+        f"{PARALLEL_MIN_CHARS / 1e6:.1f} MB): serial {small_serial_t:.3f}s, "
+        f"workers=8 {small_t:.3f}s (no pool started)"
+    )
+
+
+if __name__ == "__main__":
+    main()
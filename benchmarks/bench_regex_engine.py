@@ -0,0 +1,114 @@
+"""Benchmark: legacy per-rule ``findall`` vs single-pass MultiPatternEngine.
+
+Usage:
+    python -m benchmarks.bench_regex_engine [--lines 200000] [--rules 13,100,300,600]
+
+Besides timing, every run asserts that both implementations report exactly
+the same violations.
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+from typing import List
+
+from src.security import SecurityPolicy
+
+ALPHABET = string.ascii_letters + string.digits
+
+
+def legacy_scan(rules: List[dict], diff_text: str) -> List[str]:
+    """Original ``scan_diff`` algorithm (one findall per rule), kept as baseline."""
+    added = [
+        line[1:]
+        for line in diff_text.splitlines()
+        if line.startswith("+") and not line.startswith("+++")
+    ]
+    added_content = "\n".join(added)
+    violations = []
+    for rule in rules:
+        for match in set(rule["pattern"].findall(added_content)):
+            display = match if len(match) <= 40 else f"{match[:37]}..."
+            violations.append(f"[{rule['name']}] Found pattern: {display}")
+    return violations
+
+
+def synthetic_rules(count: int) -> List[dict]:
+    """Literal-prefixed vendor token rules, similar in shape to real policies."""
+    rules = []
+    for i in range(count):
+        prefix = f"vnd{i:04d}_"
+        rules.append(
+            {
+                "name": f"Vendor Token {i}",
+                "pattern": re.compile(re.escape(prefix) + "[0-9a-f]{32}"),
+            }
+        )
+    return rules
+
+
+def synthetic_diff(lines: int, secret_every: int, seed: int = 42) -> str:
+    """Build a unified diff with mostly benign added lines and sparse secrets."""
+    rnd = random.Random(seed)
+    out = [
+        "diff --git a/app.py b/app.py",
+        "--- a/app.py",
+        "+++ b/app.py",
+        "@@ -1 +1,%d @@" % lines,
+    ]
+    for i in range(lines):
+        if secret_every and i % secret_every == 0:
+            token = "".join(rnd.choice(ALPHABET) for _ in range(36))
+            out.append(f'+GITHUB_TOKEN = "ghp_{token}"')
+        else:
+            words = " ".join(
+                "".join(rnd.choice(ALPHABET) for _ in range(6)) for _ in range(8)
+            )
+            out.append(f"+    value_{i} = compute('{words}')")
+    return "\n".join(out)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--rules", default="13,100,300,600")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--config", default="opsguard.yml")
+    args = parser.parse_args()
+
+    diff = synthetic_diff(args.lines, secret_every=5_000)
+    print(f"Synthetic diff: {len(diff) / 1e6:.1f} MB, {args.lines} added lines")
+    print(f"{'rules':>6} | {'legacy (s)':>10} | {'engine (s)':>10} | {'speedup':>7}")
+
+    for count in (int(c) for c in args.rules.split(",")):
+        policy = SecurityPolicy(config_path=args.config)
+        extra = max(0, count - len(policy.rules))
+        policy.rules.extend(synthetic_rules(extra))
+        # Prefijos, reglas vigiladas y motor se recalculan con las reglas nuevas
+        policy._engine = policy._prefixes = policy._guarded = None
+
+        expected = sorted(set(legacy_scan(policy.rules, diff)))
+        actual = sorted({finding["type"] for finding in policy.scan_diff(diff)})
+        assert expected == actual, "engine output diverges from legacy findall"
+
+        legacy_t = _time(lambda: legacy_scan(policy.rules, diff), args.repeat)
+        engine_t = _time(lambda: policy.scan_diff(diff), args.repeat)
+        print(
+            f"{len(policy.rules):>6} | {legacy_t:>10.3f} | {engine_t:>10.3f} | "
+            f"{legacy_t / engine_t:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
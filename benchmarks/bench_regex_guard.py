@@ -0,0 +1,80 @@
+"""Benchmark: cost of the runtime rule guard, and time to abort a bad rule.
+
+Usage:
+    python -m benchmarks.bench_regex_guard [--lines 100000] [--timeout-ms 500]
+
+Scans the same synthetic diff with the default policy with the guard off
+(``rules: none``) and with every rule guarded (``rules: all``: the whole
+scan goes through the worker process), asserting identical findings. Then
+adds a rule with nested quantifiers and a line that makes it backtrack
+exponentially: the scan must end within about one rule budget, report the
+rule as aborted and still report the other rules' findings.
+"""
+
+import argparse
+import re
+import time
+
+from benchmarks.bench_regex_engine import synthetic_diff
+from src.security import SecurityPolicy
+
+EVIL_RULE = {"name": "Nested Quantifier", "pattern": r"(?:[a-z]+_?)+=", "flags": 0}
+
+
+def _policy(rules, mode: str, timeout_ms: float) -> SecurityPolicy:
+    return SecurityPolicy.from_rules(
+        rules, guard={"rules": mode, "rule_timeout_ms": timeout_ms}
+    )
+
+
+def _timed_scan(policy: SecurityPolicy, diff: str):
+    start = time.perf_counter()
+    findings = policy.scan_diff(diff)
+    return time.perf_counter() - start, findings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--timeout-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    rules = SecurityPolicy("opsguard.yml").rule_specs()
+    diff = synthetic_diff(args.lines, secret_every=997)
+    print(f"Synthetic diff: {args.lines} lines, {len(diff) / 1e6:.1f} MB")
+
+    results = {}
+    for mode in ("none", "all"):
+        policy = _policy(rules, mode, args.timeout_ms)
+        _timed_scan(policy, diff[:4096])  # arranque del worker
+        elapsed, findings = _timed_scan(policy, diff)
+        results[mode] = findings
+        print(
+            f"  guard rules={mode:<5} {elapsed * 1000:8.1f} ms  ({len(findings)} findings)"
+        )
+        if policy.guard is not None:
+            policy.guard.close()
+    assert results["none"] == results["all"], "guarded scan differs"
+
+    policy = _policy(rules + [EVIL_RULE], "risky", args.timeout_ms)
+    assert policy.guarded_rules == [len(rules)], policy.guarded_rules
+    evil_line = "+" + "a" * 40 + "!"
+    bad_diff = diff.replace("\n+", f"\n{evil_line}\n+", 1)
+    elapsed, findings = _timed_scan(policy, bad_diff)
+    aborted = [f for f in findings if f.get("aborted")]
+    assert aborted and len(findings) - len(aborted) == len(results["none"])
+    assert elapsed < 2 * args.timeout_ms / 1000 + 1.0, f"{elapsed:.1f}s"
+    # Sin guard, la misma regla sobre esa línea no termina en tiempo razonable
+    pattern = re.compile(EVIL_RULE["pattern"])
+    start = time.perf_counter()
+    pattern.search("a" * 22 + "!")
+    unguarded = (time.perf_counter() - start) * 2 ** (40 - 22)
+    print(
+        f"Exponential rule aborted ({args.timeout_ms:g} ms budget): whole scan "
+        f"{elapsed * 1000:.0f} ms; unguarded estimate ~{unguarded:.0e} s"
+    )
+    policy.guard.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark: report rendering of a large finding list, per format.
+
+Usage:
+    python -m benchmarks.bench_reporters [--findings 20000]
+
+Renders ``--findings`` regex findings plus an AI verdict with every
+reporter into a throwaway stream and times it. The SARIF and JSON lines
+outputs are parsed back and must hold every finding; a fresh interpreter
+then renders a machine-readable report and must not have imported Rich.
+"""
+
+import argparse
+import io
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_startup import ROOT
+from src.reporters import REPORT_FORMATS, get_reporter
+
+IMPORT_CHECK = """
+import io, sys
+from src.reporters import get_reporter
+for fmt in ("plain", "jsonl", "sarif"):
+    reporter = get_reporter(fmt, io.StringIO())
+    reporter.banner()
+    reporter.regex_findings([{"type": "t", "rule": "r", "file": "f", "line": 1}])
+    reporter.finish("block")
+    reporter.close()
+print(int("rich" in sys.modules))
+"""
+
+
+def _findings(count: int) -> list:
+    return [
+        {
+            "type": f"[GitHub PAT (Classic)] Found pattern: ghp_{i:036d}",
+            "rule": "GitHub PAT (Classic)",
+            "file": f"pkg{i % 50}/mod_{i}.py",
+            "line": i % 400 + 1,
+        }
+        for i in range(count)
+    ]
+
+
+AI_RESULT = {
+    "verdict": "BLOCK",
+    "risk_score": 8,
+    "explanation": "Dynamic code execution on user input.",
+    "findings": [
+        {"severity": "HIGH", "file": "m.py", "line": 2, "issue": "eval() on input"}
+    ],
+}
+
+
+def render(fmt: str, findings: list) -> str:
+    """One run of a reporter; returns what it wrote."""
+    out = io.StringIO()
+    reporter = get_reporter(fmt, out)
+    if fmt == "console":
+        from src import console_ui
+
+        # Rich escribe en su consola, no en ``out``: la redirigimos también
+        console_ui.console.file = out
+    reporter.banner()
+    reporter.regex_findings(findings)
+    reporter.ai_verdict(AI_RESULT)
+    reporter.finish("block")
+    reporter.close()
+    return out.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--findings", type=int, default=20000)
+    args = parser.parse_args()
+
+    findings = _findings(args.findings)
+    expected = args.findings + len(AI_RESULT["findings"])
+    print(f"{args.findings} regex findings + 1 AI verdict:")
+    for fmt in REPORT_FORMATS:
+        start = time.perf_counter()
+        text = render(fmt, findings)
+        elapsed = time.perf_counter() - start
+        if fmt == "sarif":
+            assert len(json.loads(text)["runs"][0]["results"]) == expected
+        elif fmt == "jsonl":
+            records = [json.loads(line) for line in text.splitlines()]
+            assert sum(r["kind"] == "finding" for r in records) == expected
+        print(f"  {fmt:<8} {elapsed * 1000:9.1f} ms  {len(text) / 1e6:6.1f} MB")
+
+    rich_loaded = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    assert rich_loaded == "0", "machine-readable reporters imported Rich"
+    print("plain/jsonl/sarif render without importing Rich")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Benchmark: per-rule profiling overhead and policy hot reload under load.
+
+Usage:
+    python -m benchmarks.bench_rule_profile [--lines 100000] [--scans 60]
+
+Part 1 scans a candidate-heavy diff with quoted GitHub tokens (entropy
+candidates that the blocklist already covers) with and without a
+``ScanProfile``, serially and on a process pool. Findings must be identical,
+the per-rule match counts must add up to the findings, and the covered
+tokens must show up as entropy suppressions. Reports the profiling overhead
+and the most expensive rules.
+
+Part 2 runs ``--scans`` scans on four threads through one ``ScanService``
+while ``opsguard.yml`` is rewritten twice: first with invalid YAML (the
+previous policy must keep serving), then with an extra rule (later scans
+must report it). No scan may fail across the reloads.
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.bench_entropy import candidate_heavy_diff
+from benchmarks.bench_regex_engine import ALPHABET, _time
+from benchmarks.bench_startup import ROOT, _make_repo
+from src.pipeline import ScanOptions, ScanService
+from src.scan_profile import ScanProfile
+from src.security import SecurityPolicy
+from src.telemetry import Telemetry
+
+EXTRA_RULE = '  - name: "Token Assignment"\n    pattern: "TOKEN = \\"ghp_"\n'
+
+
+def _with_tokens(diff: str, count: int) -> str:
+    rnd = random.Random(3)
+    lines = ["diff --git a/keys.py b/keys.py", "+++ b/keys.py", "@@ -0,0 +1 @@"]
+    for i in range(count):
+        token = "".join(rnd.choice(ALPHABET) for _ in range(36))
+        lines.append(f'+    github_token_{i} = "ghp_{token}"')
+    return diff + "\n" + "\n".join(lines)
+
+
+def profile_overhead(lines: int) -> None:
+    diff = _with_tokens(candidate_heavy_diff(lines, secret_every=1_000), 200)
+    policy = SecurityPolicy(str(ROOT / "opsguard.yml"))
+    expected = policy.scan_diff(diff)
+    per_rule = {}
+    for finding in expected:
+        per_rule[finding["rule"]] = per_rule.get(finding["rule"], 0) + 1
+
+    for workers in (1, 2):
+        profile = ScanProfile()
+        found = policy.scan_hunks(
+            iter(_hunks(diff)),
+            workers=workers,
+            parallel_min_chars=1 << 20,
+            profile=profile,
+        )
+        assert found == expected, f"profiled findings differ (workers={workers})"
+        stats = profile.stats()
+        matched = {rule: s.matches for rule, s in stats.items() if s.matches}
+        assert matched == per_rule, (matched, per_rule)
+        assert 0 < stats["High Entropy (base64)"].suppressed <= 200, stats
+
+    plain_t = _time(lambda: policy.scan_diff(diff), 3)
+    profiled_t = _time(lambda: policy.scan_diff(diff, profile=ScanProfile()), 3)
+    mb = len(diff) / 1e6
+    print(f"{mb:.1f} MB diff, {len(expected)} findings:")
+    print(f"  plain scan       {plain_t * 1000:8.1f} ms")
+    print(
+        f"  profiled scan    {profiled_t * 1000:8.1f} ms  "
+        f"({(profiled_t / plain_t - 1) * 100:+.1f}%)"
+    )
+    profile = ScanProfile()
+    policy.scan_diff(diff, profile=profile)
+    print("\n".join(profile.format_table().splitlines()[:6]))
+
+
+def _hunks(diff: str):
+    from src.diffparse import iter_hunks
+
+    return list(iter_hunks(diff.splitlines()))
+
+
+def hot_reload(scans: int) -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-reload-"))
+    try:
+        repo = workdir / "repo"
+        _make_repo(repo)
+        config = workdir / "opsguard.yml"
+        original = (ROOT / "opsguard.yml").read_text()
+        config.write_text(original)
+        service = ScanService()
+        options = ScanOptions(profile_rules=True)
+        results = []
+        lock = threading.Lock()
+
+        def scan(_: int) -> None:
+            regex_result, _ = service.scan(
+                str(repo), str(config), options, Telemetry(), policy_cache=False
+            )
+            with lock:
+                results.append(regex_result)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(scan, i) for i in range(scans)]
+            for step, done in enumerate(futures):
+                done.result()
+                if step == scans // 3:
+                    config.write_text(original + "\nblocklist: [\n")
+                elif step == 2 * scans // 3:
+                    config.write_text(
+                        original.replace("blocklist:\n", "blocklist:\n" + EXTRA_RULE)
+                    )
+            # Los escaneos ya encolados pueden empezar antes de la recarga
+            late = service.scan(
+                str(repo), str(config), options, Telemetry(), policy_cache=False
+            )[0]
+
+        statuses = {result.status for result in results}
+        assert statuses == {"block"}, f"scans failed across reloads: {statuses}"
+        assert service.reload_errors == 1 and service.reloads == 1, (
+            service.reload_errors,
+            service.reloads,
+        )
+        rules = {v["rule"] for v in late.violations}
+        assert "Token Assignment" in rules, rules
+        with_new = sum(
+            any(v["rule"] == "Token Assignment" for v in r.violations) for r in results
+        )
+        print(
+            f"\n{scans} concurrent scans across 2 config rewrites: 0 failed, "
+            f"{service.reload_errors} invalid config kept the previous policy, "
+            f"{service.reloads} hot reload ({with_new} scan(s) on the new rules)"
+        )
+        total = service.rule_profile.stats()
+        print(f"  service profile: {sum(s.matches for s in total.values())} matches")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--scans", type=int, default=60)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    profile_overhead(args.lines)
+    hot_reload(args.scans)
+    print(f"done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark: CLI startup cost, cold vs warm policy bundle.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 5]
+
+Every measurement runs in a fresh interpreter, like a pre-commit hook does:
+  * per-module import time (``python -X importtime``) of the CLI dependencies,
+  * policy load (rules + ignore spec + engine) with an empty vs a populated
+    bundle cache,
+  * a full ``opsguard scan`` of a throwaway repo with a staged secret
+    (regex BLOCK, no AI call), cold vs warm.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ["typer", "rich", "git", "yaml", "pathspec", "dotenv", "openai", "src.ai"]
+
+POLICY_LOAD = """
+import time
+start = time.perf_counter()
+from src.policy_bundle import load_policy_bundle
+bundle = load_policy_bundle({config!r}, {ignore!r})
+bundle.policy.engine, bundle.ignore_matcher
+print(time.perf_counter() - start, int(bundle.from_cache))
+"""
+
+
+def _python(code: str, env: Dict[str, str]) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def import_times(env: Dict[str, str]) -> Dict[str, float]:
+    """Cumulative import time (ms) of each module in a fresh interpreter."""
+    times = {}
+    for module in MODULES:
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        ).stderr
+        for line in stderr.splitlines():
+            fields = [f.strip() for f in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                times[module] = int(fields[1]) / 1000
+    return times
+
+
+def _make_repo(path: Path) -> None:
+    """Repo with one commit (the scan diffs against HEAD) and a staged secret."""
+    git = ["git", "-C", str(path), "-c", "user.name=bench", "-c", "user.email=b@x"]
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    (path / "app.py").write_text("TOKEN = None\n")
+    subprocess.run([*git, "add", "app.py"], check=True)
+    subprocess.run([*git, "commit", "-qm", "init"], check=True)
+    (path / "app.py").write_text('TOKEN = "ghp_' + "a" * 36 + '"\n')
+    subprocess.run([*git, "add", "app.py"], check=True)
+
+
+def _median_run(cmd: List[str], env: Dict[str, str], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--config", default=str(ROOT / "opsguard.yml"))
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-bench-"))
+    cache_dir = workdir / "cache"
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "OPSGUARD_CACHE_DIR": str(cache_dir),
+        "OPENROUTER_API_KEY": "",
+    }
+    env.pop("OPSGUARD_TELEMETRY_DIR", None)
+
+    try:
+        print("Import time (fresh interpreter, cumulative):")
+        for module, ms in sorted(import_times(env).items(), key=lambda kv: -kv[1]):
+            print(f"  {module:<10} {ms:8.1f} ms")
+
+        code = POLICY_LOAD.format(
+            config=args.config, ignore=str(ROOT / ".opsguardignore")
+        )
+        cold, warm = [], []
+        for _ in range(args.repeat):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            elapsed, hit = _python(code, env).split()
+            assert hit == "0", "cold run unexpectedly hit the bundle"
+            cold.append(float(elapsed))
+            elapsed, hit = _python(code, env).split()
+            assert hit == "1", "warm run did not reuse the bundle"
+            warm.append(float(elapsed))
+        cold_t, warm_t = statistics.median(cold), statistics.median(warm)
+        print("\nPolicy load (rules + ignore spec + engine):")
+        print(f"  cold {cold_t * 1000:8.1f} ms")
+        print(f"  warm {warm_t * 1000:8.1f} ms  ({cold_t / warm_t:.1f}x)")
+
+        repo = workdir / "repo"
+        _make_repo(repo)
+        cmd = [
+            sys.executable,
+            "-m",
+            "src.main",
+            "scan",
+            "--path",
+            str(repo),
+            "--config",
+            args.config,
+        ]
+        cold_runs = []
+        for _ in range(args.repeat):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold_runs.append(_median_run(cmd, env, 1))
+        cold_cli = statistics.median(cold_runs)
+        warm_cli = _median_run(cmd, env, args.repeat)
+        print("\n`opsguard scan` wall time (regex BLOCK, no AI):")
+        print(f"  cold {cold_cli * 1000:8.1f} ms")
+        print(f"  warm {warm_cli * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
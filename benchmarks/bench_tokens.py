@@ -0,0 +1,93 @@
+"""Benchmark: character vs token chunk budgets, and local token counting speed.
+
+Usage:
+    python -m benchmarks.bench_tokens [--lines 5000]
+
+For diffs in different "languages" (Python code, JSON config, CJK prose)
+shows how many tokens the old 30000-character chunk really holds, packs
+each diff with the token budget (every chunk must stay within
+``MAX_CHUNK_TOKENS`` and no line may be cut), checks that a tight budget
+is filled source first, then config, then tests, and reports the throughput of
+``count_tokens`` with the active counter (tiktoken or the approximation).
+"""
+
+import argparse
+import random
+import time
+
+from src.diffparse import pack_files
+from src.tokens import (
+    MAX_CHUNK_TOKENS,
+    count_tokens,
+    plan_budget,
+    tokenizer_name,
+)
+
+OLD_CHUNK_CHARS = 30000
+CJK = "安全扫描器检查提交中的密钥和危险代码模式并阻止合并请求"
+
+
+def _diff(path: str, lines: int, make_line) -> str:
+    rnd = random.Random(path)
+    body = [make_line(rnd, i) for i in range(lines)]
+    header = [f"diff --git a/{path} b/{path}", f"@@ -0,0 +1,{lines} @@"]
+    return "\n".join(header + ["+" + line for line in body]) + "\n"
+
+
+LANGUAGES = {
+    "src/app.py": lambda rnd, i: f"    value_{i} = compute(request, {rnd.randint(0, 999)})",
+    "config/settings.json": lambda rnd, i: f'  "feature_{i}": {{"enabled": true, "ttl": {i}}},',
+    "docs/guia.md": lambda rnd, i: "".join(rnd.sample(CJK, 20)),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"Token counter: {tokenizer_name()}")
+    print(
+        f"{'diff':<22} {'chars':>9} {'tokens':>8} {'tokens/30k chars':>17} {'chunks':>7}"
+    )
+    diffs = {}
+    for path, make_line in LANGUAGES.items():
+        diff = _diff(path, args.lines, make_line)
+        diffs[path] = diff
+        tokens = count_tokens(diff)
+        chunks = pack_files({path: diff}, MAX_CHUNK_TOKENS, measure=count_tokens)
+        sizes = [count_tokens(c.text) for c in chunks]
+        assert max(sizes) <= MAX_CHUNK_TOKENS, f"{path}: chunk of {max(sizes)} tokens"
+        original = set(diff.splitlines())
+        assert all(line in original for c in chunks for line in c.text.splitlines())
+        per_old_chunk = tokens * OLD_CHUNK_CHARS // len(diff)
+        print(
+            f"{path:<22} {len(diff):>9} {tokens:>8} {per_old_chunk:>17} {len(chunks):>7}"
+        )
+
+    # Diff en orden inverso de prioridad: el plan debe reordenarlo
+    small = {
+        "docs/guia.md": _diff("docs/guia.md", 300, LANGUAGES["docs/guia.md"]),
+        "tests/test_app.py": _diff("tests/test_app.py", 300, LANGUAGES["src/app.py"]),
+        "config/settings.json": _diff(
+            "config/settings.json", 300, LANGUAGES["config/settings.json"]
+        ),
+        "src/app.py": _diff("src/app.py", 300, LANGUAGES["src/app.py"]),
+    }
+    budget = count_tokens(small["src/app.py"]) * 5 // 2
+    plan = plan_budget(small, budget)
+    assert list(plan.files)[:2] == ["src/app.py", "config/settings.json"]
+    print(
+        f"Plan ({budget} tokens): sent {list(plan.files)}, "
+        f"partial {plan.partial}, left out {plan.left_out}"
+    )
+
+    text = "".join(diffs.values())
+    start = time.perf_counter()
+    count_tokens(text)
+    elapsed = time.perf_counter() - start
+    print(f"count_tokens: {len(text) / elapsed / 1e6:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark: local risk triage of a stream of typical commits.
+
+Usage:
+    python -m benchmarks.bench_triage [--commits 500] [--seed 0]
+
+Generates ``--commits`` synthetic commit diffs mixing the usual kinds of
+file changes (docs, comment-only edits, tests, small source edits, edits
+under sensitive paths, large refactors, and source edits that add a
+dangerous API call) and triages each one with the ``triage`` settings of
+the repo's ``opsguard.yml`` (the defaults while the section is commented
+out). Every file that adds a sink must be sent to the AI and every
+docs/comment-only change approved locally. Reports the share of commits
+that need no model call, the AI calls and tokens avoided, and the triage
+cost per commit.
+"""
+
+import argparse
+import random
+import time
+
+import yaml
+
+from benchmarks.bench_startup import ROOT
+from benchmarks.synth import WORDS
+from src.triage import Triage, TriageConfig
+
+SINK_LINES = [
+    "subprocess.run(cmd, shell=True)",
+    "result = eval(expression)",
+    'cursor.execute("SELECT * FROM users WHERE id = " + user_id)',
+    "data = pickle.loads(payload)",
+    "requests.get(url, verify=False)",
+    "os.system(command)",
+]
+
+# Tipo de cambio -> (peso en la mezcla, ¿debe ir a la IA? None = no se exige)
+KINDS = {
+    "docs": (25, False),
+    "comments": (15, False),
+    "tests": (15, None),
+    "source": (25, None),
+    "sensitive": (8, None),
+    "refactor": (4, None),
+    "sink": (8, True),
+}
+
+
+def _words(rnd: random.Random, count: int) -> str:
+    return "_".join(rnd.choice(WORDS) for _ in range(count))
+
+
+def _file_diff(path: str, added: list, removed: list) -> str:
+    body = [f"-{line}" for line in removed] + [f"+{line}" for line in added]
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -10,{len(removed)} +10,{len(added)} @@\n" + "\n".join(body) + "\n"
+    )
+
+
+def _change(rnd: random.Random, kind: str, n: int) -> str:
+    name = _words(rnd, 2)
+    if kind == "docs":
+        lines = [f"Usage of {_words(rnd, 3)} explained." for _ in range(8)]
+        return _file_diff(f"docs/{name}_{n}.md", lines, lines[:2])
+    if kind == "comments":
+        lines = [f"# {_words(rnd, 4)}" for _ in range(3)]
+        return _file_diff(f"src/{name}_{n}.py", lines, ["# old note"])
+    if kind == "tests":
+        lines = [f"    assert {_words(rnd, 2)}() == {i}" for i in range(6)]
+        return _file_diff(f"tests/test_{name}_{n}.py", lines, [])
+    if kind == "refactor":
+        lines = [f"    {_words(rnd, 2)} = {_words(rnd, 2)}({i})" for i in range(150)]
+        return _file_diff(f"src/{name}_{n}.py", lines, lines[:100])
+    line = f"    {_words(rnd, 2)} = {_words(rnd, 2)}(timeout=30)"
+    if kind == "sensitive":
+        return _file_diff(f"src/auth/{name}_{n}.py", [line], [])
+    if kind == "sink":
+        return _file_diff(f"src/{name}_{n}.py", [line, rnd.choice(SINK_LINES)], [])
+    return _file_diff(f"src/{name}_{n}.py", [line, line.replace("30", "60")], [line])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    policy = yaml.safe_load((ROOT / "opsguard.yml").read_text())
+    triage = Triage(TriageConfig.from_config(policy.get("triage") or {}))
+    rnd = random.Random(args.seed)
+    kinds, weights = list(KINDS), [weight for weight, _ in KINDS.values()]
+
+    local = calls = tokens = files = 0
+    elapsed = 0.0
+    for _ in range(args.commits):
+        changes = rnd.choices(kinds, weights, k=rnd.randint(1, 6))
+        diffs = [_change(rnd, kind, n) for n, kind in enumerate(changes)]
+        start = time.perf_counter()
+        result = triage.triage_diff("".join(diffs), max_chunks=8)
+        elapsed += time.perf_counter() - start
+
+        assert len(result.files) == len(changes)
+        for kind, risk in zip(changes, result.files):
+            expected = KINDS[kind][1]
+            assert expected is None or risk.send == expected, (kind, risk)
+        local += not result.diff
+        calls += result.calls_avoided
+        tokens += result.tokens_avoided
+        files += len(result.approved)
+
+    print(
+        f"{args.commits} commits: {local} ({local / args.commits:.0%}) approved "
+        f"without a model call, {files} file(s) approved locally"
+    )
+    print(f"  AI calls avoided  {calls}")
+    print(f"  tokens avoided    {tokens}")
+    print(f"  triage cost       {elapsed / args.commits * 1000:.2f} ms/commit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Local OpenAI-compatible stub server for offline AI-stage benchmarks.
+
+Serves ``POST .../chat/completions`` with a canned JSON verdict, either as a
+regular JSON response or as an SSE stream (``stream: true``), with
+configurable time-to-first-token and per-token delay. It counts how many
+tokens were actually written before the client hung up, which is how the
+early-BLOCK abort is verified.
+
+Usage:
+    with StubOpenAIServer(verdict={...}, token_delay=0.01) as stub:
+        engine = AIEngine(base_url=stub.base_url)
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+DEFAULT_VERDICT = {
+    "verdict": "APPROVE",
+    "risk_score": 1,
+    "explanation": "No security issues found in the provided diff.",
+    "findings": [],
+}
+
+
+class StubOpenAIServer:
+    """Threaded HTTP server emulating the chat completions endpoint."""
+
+    def __init__(
+        self,
+        verdict: Optional[Dict[str, Any]] = None,
+        first_token_latency: float = 0.05,
+        token_delay: float = 0.005,
+        chars_per_token: int = 4,
+    ) -> None:
+        self.verdict = verdict or DEFAULT_VERDICT
+        self.first_token_latency = first_token_latency
+        self.token_delay = token_delay
+        self.chars_per_token = chars_per_token
+        self.requests = 0
+        self.tokens_sent = 0
+        self.disconnects = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> "StubOpenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def handle(self) -> None:
+                try:
+                    super().handle()
+                except ConnectionResetError:
+                    # El cliente cerró una conexión keep-alive ociosa
+                    pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+
+                prompt_chars = sum(
+                    len(m.get("content", "")) for m in body.get("messages", [])
+                )
+                content = json.dumps(stub.verdict)
+                step = stub.chars_per_token
+                tokens = [content[i : i + step] for i in range(0, len(content), step)]
+                usage = {
+                    "prompt_tokens": prompt_chars // step,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_chars // step + len(tokens),
+                }
+
+                time.sleep(stub.first_token_latency)
+                if body.get("stream"):
+                    self._stream(body, tokens, usage)
+                else:
+                    time.sleep(stub.token_delay * len(tokens))
+                    self._json(body, content, usage)
+
+            def _json(
+                self, body: Dict[str, Any], content: str, usage: Dict[str, int]
+            ) -> None:
+                payload = json.dumps(
+                    {
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": usage,
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                with stub._lock:
+                    stub.tokens_sent += usage["completion_tokens"]
+
+            def _event(self, data: Any) -> None:
+                text = data if isinstance(data, str) else json.dumps(data)
+                chunk = f"data: {text}\n\n".encode()
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+
+            def _stream(
+                self, body: Dict[str, Any], tokens: list, usage: Dict[str, int]
+            ) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                base = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                }
+                try:
+                    for token in tokens:
+                        self._event(
+                            {
+                                **base,
+                                "choices": [
+                                    {
+                                        "index": 0,
+                                        "delta": {"content": token},
+                                        "finish_reason": None,
+                                    }
+                                ],
+                            }
+                        )
+                        with stub._lock:
+                            stub.tokens_sent += 1
+                        time.sleep(stub.token_delay)
+                    if body.get("stream_options", {}).get("include_usage"):
+                        self._event({**base, "choices": [], "usage": usage})
+                    self._event("[DONE]")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    with stub._lock:
+                        stub.disconnects += 1
+                    self.close_connection = True
+
+        return Handler
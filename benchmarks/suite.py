@@ -0,0 +1,315 @@
+"""Benchmark suite: every stage of the gate on one synthetic workload.
+
+Usage:
+    python -m benchmarks.suite [--files 40] [--hunks 4] [--hunk-lines 50]
+        [--line-length 80] [--secret-density 0.002] [--rules 13]
+        [--repeat 5] [--output results.json]
+        [--baseline old.json] [--threshold 0.25]
+
+Builds the workload described in ``benchmarks.synth`` and times each stage
+separately (median of ``--repeat`` runs):
+
+    policy_load    opsguard.yml -> compiled SecurityPolicy (cold, with YAML)
+    ignore_filter  .opsguardignore matcher build + matching 10k paths
+    ingest         GitManager.read_changes on the generated repo
+    regex_scan     SecurityPolicy.scan_diff (blocklist + entropy)
+    compact        compact_diff of the AI payload
+    render         OpsGuardUI tables for the findings and an AI verdict
+    ai_stub        AIEngine.analyze_diff against the local OpenAI stub
+
+The planted secrets must all be reported, and ignored files must not reach
+the diff. Results are written as JSON (``--output``) with the commit they
+were measured on; with ``--baseline`` the run exits 1 when a stage is
+slower than the baseline by more than ``--threshold`` (best times compared,
+by at least ``--min-delta-ms``; a suspect stage is re-measured first).
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.bench_startup import ROOT
+from benchmarks.synth import (
+    IGNORE_LINES,
+    IGNORED_FILES,
+    PLANTED_RULES,
+    WorkloadSpec,
+    make_repo,
+    write_policy,
+)
+
+RESULTS_VERSION = 1
+IGNORE_PATHS = 10000
+
+AI_VERDICT = {
+    "verdict": "BLOCK",
+    "risk_score": 8,
+    "explanation": "Hardcoded credentials and disabled TLS verification.",
+    "findings": [
+        {
+            "severity": "HIGH",
+            "file": f"src/pkg0/module_{i}.py",
+            "line": i,
+            "issue": "Secret",
+        }
+        for i in range(20)
+    ],
+}
+
+
+def _git_revision() -> Dict[str, Any]:
+    def _git(*args: str) -> str:
+        return subprocess.run(
+            ["git", "-C", str(ROOT), *args], capture_output=True, text=True
+        ).stdout.strip()
+
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def _time_stage(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    fn()  # calentamiento (imports, cachés del SO)
+    samples = []
+    for _ in range(repeat):
+        # Basura de la etapa anterior: que no la pague esta muestra
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(samples), "min_s": min(samples)}
+
+
+def _has_rule(policy: Any, name: str) -> bool:
+    return any(rule["name"] == name for rule in policy.rules)
+
+
+def _regression(
+    name: str,
+    stage: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta: float,
+) -> Optional[str]:
+    """Describe the regression of ``stage`` against the baseline, if any.
+
+    Best times are compared: on a shared runner the minimum is far less
+    noisy than the median.
+    """
+    base = baseline["stages"].get(name)
+    if base is None:
+        return None
+    now, before = stage["min_s"], base["min_s"]
+    if now > before * (1 + threshold) and now - before >= min_delta:
+        return (
+            f"{name}: {before * 1000:.1f} -> {now * 1000:.1f} ms "
+            f"(+{(now / before - 1) * 100:.0f}%)"
+        )
+    return None
+
+
+def run_suite(
+    spec: WorkloadSpec,
+    repeat: int,
+    baseline: Optional[Dict[str, Any]] = None,
+    threshold: float = 0.25,
+    min_delta: float = 0.002,
+) -> Dict[str, Any]:
+    """Build the workload, check the gate's results and time every stage.
+
+    With a ``baseline``, a stage that looks regressed is measured again
+    (``2 * repeat`` runs) before it is reported, to filter out one-off noise.
+    """
+    from benchmarks.stub_openai import StubOpenAIServer
+    from src import console_ui
+    from src.ai import AIEngine
+    from src.backends import AIBackend, BackendConfig
+    from src.compact import compact_diff
+    from src.ignore_matcher import IgnoreMatcher
+    from src.ingest import GitManager
+    from src.policy_bundle import DEFAULT_IGNORE_PATTERNS
+    from src.security import SecurityPolicy
+
+    workdir = Path(tempfile.mkdtemp(prefix="opsguard-suite-"))
+    try:
+        repo = workdir / "repo"
+        planted = make_repo(repo, spec)
+        config = str(write_policy(workdir / "opsguard.yml", spec))
+        ignore_lines = IGNORE_LINES + DEFAULT_IGNORE_PATTERNS
+        ignore_matcher = IgnoreMatcher(ignore_lines)
+        paths = [
+            f"src/pkg{i % 8}/module_{i}.py" if i % 4 else IGNORED_FILES[i % 3]
+            for i in range(IGNORE_PATHS)
+        ]
+
+        def ingest() -> str:
+            changes = GitManager(repo_path=str(repo), environ={}).read_changes(
+                is_ignored=ignore_matcher.match_file
+            )
+            return "".join(hunk.text() for hunk in changes.hunks)
+
+        def ignore_filter() -> int:
+            return sum(map(IgnoreMatcher(ignore_lines).match_file, paths))
+
+        diff = ingest()
+        policy = SecurityPolicy(config)
+        findings = policy.scan_diff(diff)
+        expected = [rule for rule in planted if _has_rule(policy, rule)]
+        found = [f for f in findings if f["rule"] in PLANTED_RULES]
+        assert len(found) == len(expected), f"{len(found)} != {len(expected)} secrets"
+        assert not any(path in diff for path in IGNORED_FILES), "ignored file scanned"
+        compacted, _ = compact_diff(diff)
+
+        def render() -> None:
+            console = console_ui.console
+            saved, console.file = console.file, io.StringIO()
+            try:
+                console_ui.OpsGuardUI.print_regex_findings(findings)
+                console_ui.OpsGuardUI.print_ai_analysis(AI_VERDICT)
+            finally:
+                console.file = saved
+
+        os.environ.setdefault("OPENROUTER_API_KEY", "stub-key")
+        stages: Dict[str, Dict[str, Any]] = {}
+        with StubOpenAIServer(first_token_latency=0, token_delay=0) as stub:
+            backend = AIBackend(BackendConfig(endpoint=stub.base_url))
+
+            def ai_stub() -> None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    AIEngine(backend=backend, cache=None).analyze_diff(compacted)
+
+            for name, fn in [
+                ("policy_load", lambda: SecurityPolicy(config).engine),
+                ("ignore_filter", ignore_filter),
+                ("ingest", ingest),
+                ("regex_scan", lambda: policy.scan_diff(diff)),
+                ("compact", lambda: compact_diff(diff)),
+                ("render", render),
+                ("ai_stub", ai_stub),
+            ]:
+                stage = _time_stage(fn, repeat)
+                if baseline and _regression(
+                    name, stage, baseline, threshold, min_delta
+                ):
+                    again = _time_stage(fn, 2 * repeat)
+                    if again["min_s"] < stage["min_s"]:
+                        stage = again
+                stages[name] = stage
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "version": RESULTS_VERSION,
+        **_git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "spec": spec.as_dict(),
+        "repeat": repeat,
+        "workload": {
+            "diff_chars": len(diff),
+            "compacted_chars": len(compacted),
+            "findings": len(findings),
+            "planted": len(expected),
+        },
+        "stages": stages,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta: float,
+) -> List[str]:
+    """Stages of ``current`` that regressed against ``baseline``."""
+    regressions = (
+        _regression(name, stage, baseline, threshold, min_delta)
+        for name, stage in current["stages"].items()
+    )
+    return [line for line in regressions if line]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = WorkloadSpec()
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--hunks", type=int, default=defaults.hunks)
+    parser.add_argument("--hunk-lines", type=int, default=defaults.hunk_lines)
+    parser.add_argument("--line-length", type=int, default=defaults.line_length)
+    parser.add_argument("--secret-density", type=float, default=defaults.secret_density)
+    parser.add_argument("--rules", type=int, default=defaults.rules)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON here.")
+    parser.add_argument("--baseline", help="Results JSON of a previous commit.")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    spec = WorkloadSpec(
+        files=args.files,
+        hunks=args.hunks,
+        hunk_lines=args.hunk_lines,
+        line_length=args.line_length,
+        secret_density=args.secret_density,
+        rules=args.rules,
+        seed=args.seed,
+    )
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("spec") != spec.as_dict():
+            print(f"❌ {args.baseline} was measured on a different workload spec")
+            sys.exit(2)
+
+    min_delta = args.min_delta_ms / 1000
+    results = run_suite(spec, args.repeat, baseline, args.threshold, min_delta)
+    workload = results["workload"]
+    print(
+        f"Workload: {spec.files} files x {spec.hunks} hunks x {spec.hunk_lines} "
+        f"lines, {workload['diff_chars'] / 1e6:.2f} MB diff, {spec.rules} rules, "
+        f"{workload['planted']} planted secrets (all found)"
+    )
+    print(f"{'stage':<14} {'median':>10} {'min':>10} {'base min':>10}")
+    for name, stage in results["stages"].items():
+        base = baseline["stages"].get(name) if baseline else None
+        before = f"{base['min_s'] * 1000:.1f} ms" if base else "-"
+        print(
+            f"{name:<14} {stage['median_s'] * 1000:>7.1f} ms "
+            f"{stage['min_s'] * 1000:>7.1f} ms {before:>10}"
+        )
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, min_delta)
+        if regressions:
+            print(
+                f"❌ Regressions over {args.threshold:.0%} vs {baseline['commit'][:12]}:"
+            )
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"✅ No stage regressed more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
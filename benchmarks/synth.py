@@ -0,0 +1,156 @@
+"""Synthetic workloads for the benchmark suite: repos, diffs and policies.
+
+Everything is derived from a ``WorkloadSpec`` and its seed, so two runs (or
+two commits) with the same spec scan byte-identical input:
+
+- ``make_repo`` builds a throwaway git repository whose working tree
+  differs from ``HEAD`` by ``files`` modified files of ``hunks`` hunks of
+  ``hunk_lines`` added lines each, plus a few files the ignore spec drops;
+- every added line is ~``line_length`` chars, and a fraction
+  ``secret_density`` of them carries a unique token of a blocklisted shape;
+- ``write_policy`` writes an ``opsguard.yml`` with ``rules`` rules (the
+  default policy first, then literal-prefixed vendor rules).
+"""
+
+import random
+import string
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import yaml
+
+from benchmarks.bench_startup import ROOT
+
+ALPHABET = string.ascii_letters + string.digits
+WORDS = ["value", "request", "timeout", "config", "handler", "user", "payload"]
+
+# Secretos plantados: (nombre de la regla que debe detectarlos, generador)
+SECRET_SHAPES = [
+    ("GitHub PAT (Classic)", lambda rnd: "ghp_" + _token(rnd, 36)),
+    ("AWS Access Key", lambda rnd: "AKIA" + _token(rnd, 16, string.ascii_uppercase)),
+    ("Stripe API Key", lambda rnd: "sk_live_" + _token(rnd, 24)),
+]
+PLANTED_RULES = frozenset(name for name, _ in SECRET_SHAPES)
+
+# Ficheros que el .opsguardignore generado descarta (filtro de ignore)
+IGNORED_FILES = ["dist/bundle.min.js", "docs/notes.md", "vendor/lib/util.py"]
+IGNORE_LINES = ["dist/", "*.md", "vendor/"]
+
+# Líneas sin cambios entre hunks (git no los fusiona con el contexto de 3)
+GAP_LINES = 12
+
+
+class WorkloadSpec(NamedTuple):
+    """Shape of a synthetic change set (see module docstring)."""
+
+    files: int = 40
+    hunks: int = 4
+    hunk_lines: int = 50
+    line_length: int = 80
+    secret_density: float = 0.002
+    rules: int = 13
+    seed: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+def _token(rnd: random.Random, length: int, alphabet: str = ALPHABET) -> str:
+    return "".join(rnd.choice(alphabet) for _ in range(length))
+
+
+def _code_line(rnd: random.Random, length: int) -> str:
+    # Identificadores y números cortos: ni el blocklist ni la entropía disparan
+    words = [f"    {rnd.choice(WORDS)}_{rnd.randrange(100)} ="]
+    size = len(words[0])
+    while size < length:
+        word = f"{rnd.choice(WORDS)}({rnd.randrange(1000)})"
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def _added_line(spec: WorkloadSpec, rnd: random.Random, planted: List[str]) -> str:
+    if rnd.random() < spec.secret_density:
+        rule, make = rnd.choice(SECRET_SHAPES)
+        planted.append(rule)
+        return f'    TOKEN_{len(planted)} = "{make(rnd)}"'
+    return _code_line(rnd, spec.line_length)
+
+
+def file_contents(spec: WorkloadSpec) -> Tuple[Dict[str, Tuple[str, str]], List[str]]:
+    """Base and modified text of every file, and the rules of planted secrets.
+
+    Returns:
+        ``({path: (base, modified)}, planted)``; ignored files are included
+        (their secrets are not counted in ``planted``).
+    """
+    rnd = random.Random(spec.seed)
+    planted: List[str] = []
+    files: Dict[str, Tuple[str, str]] = {}
+    base_len = spec.hunks * GAP_LINES + GAP_LINES
+    for i in range(spec.files):
+        base = [_code_line(rnd, spec.line_length) for _ in range(base_len)]
+        modified: List[str] = []
+        for h in range(spec.hunks):
+            modified += base[h * GAP_LINES : (h + 1) * GAP_LINES]
+            modified += [
+                _added_line(spec, rnd, planted) for _ in range(spec.hunk_lines)
+            ]
+        modified += base[spec.hunks * GAP_LINES :]
+        path = f"src/pkg{i % 8}/module_{i}.py"
+        files[path] = ("\n".join(base) + "\n", "\n".join(modified) + "\n")
+    for path in IGNORED_FILES:
+        lines = [_added_line(spec, rnd, []) for _ in range(spec.hunk_lines)]
+        files[path] = ("", "\n".join(lines) + "\n")
+    return files, planted
+
+
+def make_repo(path: Path, spec: WorkloadSpec) -> List[str]:
+    """Create the workload repository at ``path`` (working tree vs HEAD).
+
+    Returns:
+        Rule names of the secrets planted in non-ignored files.
+    """
+    git = ["git", "-C", str(path), "-c", "user.name=bench", "-c", "user.email=b@x"]
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    files, planted = file_contents(spec)
+    for name, (base, _) in files.items():
+        if base:
+            (path / name).parent.mkdir(parents=True, exist_ok=True)
+            (path / name).write_text(base)
+    (path / ".opsguardignore").write_text("\n".join(IGNORE_LINES) + "\n")
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", "base"], check=True)
+    for name, (_, modified) in files.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text(modified)
+    # Ficheros nuevos: sin añadir al índice no aparecen en `git diff HEAD`
+    subprocess.run([*git, "add", "-A"], check=True)
+    return planted
+
+
+def synthetic_rules(count: int) -> List[Dict[str, str]]:
+    """``count`` rules: the default policy first, then vendor token rules."""
+    config = yaml.safe_load((ROOT / "opsguard.yml").read_text())
+    rules = [
+        {"name": rule["name"], "pattern": rule["pattern"]}
+        for rule in config["blocklist"]
+    ][:count]
+    for i in range(count - len(rules)):
+        rules.append(
+            {"name": f"Vendor Token {i}", "pattern": f"vnd{i:04d}_[0-9a-f]{{32}}"}
+        )
+    return rules
+
+
+def write_policy(path: Path, spec: WorkloadSpec) -> Path:
+    """Write the workload ``opsguard.yml`` (entropy stage enabled, AI mock)."""
+    config = {
+        "blocklist": synthetic_rules(spec.rules),
+        "entropy": {"enabled": True},
+        "ai": {"backend": "mock", "mock": {"latency_ms": 0}},
+    }
+    path.write_text(yaml.safe_dump(config, sort_keys=False))
+    return path
@@ -1,27 +1,66 @@
-import os
+import re
+import sys
 import json
 import time
-from openai import OpenAI
-from typing import Dict, Any
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from src.backends import AIBackend, BackendConfig, get_backend
+from src.cache import VerdictCache
+from src.diffparse import DiffChunk, pack_files, split_by_file
+from src.tokens import (
+    DEFAULT_MAX_TOKENS,
+    MAX_CHUNK_TOKENS,
+    count_tokens,
+    plan_budget,
+    tokenizer_name,
+)
+
 load_dotenv()
 
+def _ansi(code: str) -> str:
+    """ANSI color escape, only when stdout is a terminal (not in CI logs or reports)."""
+    return f"\033[{code}m" if sys.stdout.isatty() else ""
+
 class AIEngineError(Exception):
     """Custom exception for AI Engine failures."""
     pass
 
+class AIBudgetError(AIEngineError):
+    """Custom exception for runs refused by the per-scan cost cap."""
+    pass
+
 # --- FINOPS CONFIGURATION (Unit Economic) ---
 # Pricing for google/gemini-2.0-flash-001 (OpenRouter/Google pricing)
 PRICE_PER_1M_INPUT = 0.10
 PRICE_PER_1M_OUTPUT = 0.40
 
+# Tope de tokens de salida por petición (acota el coste estimado por chunk)
+MAX_OUTPUT_TOKENS = 1024
+
+# Presupuesto por ejecución: nº máximo de chunks y peticiones concurrentes
+DEFAULT_MAX_CHUNKS = 8
+DEFAULT_MAX_WORKERS = 4
+
+# Streaming: abortamos la respuesta en cuanto el modelo emite BLOCK con un
+# risk_score >= este umbral (no pagamos el resto de tokens de salida).
+EARLY_ABORT_RISK = 8
+
+# Parsing incremental del JSON en streaming
+_VERDICT_RE = re.compile(r'"verdict"\s*:\s*"(APPROVE|BLOCK)"')
+_RISK_RE = re.compile(r'"risk_score"\s*:\s*(\d+)\s*[,}\n]')
+_EXPLANATION_RE = re.compile(r'"explanation"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
 # SCHEMA ENFORCEMENT & CONTEXT INJECTION
 SYSTEM_PROMPT = """
 ROLE: You are OpsGuard-AI, a Senior Application Security Engineer audit bot.
 CONTEXT: You are auditing the source code of "OpsGuard", a DevSecOps CLI tool.
 
 TASK: Analyze the provided Git Diff for SECURITY VULNERABILITIES.
+The diff may be compacted: context is trimmed, and lines starting with "\\" are notes about omitted content (binary/minified/lockfiles, collapsed deletions, hunks identical to one shown earlier). Hunk headers keep the real line numbers.
 
 CRITICAL CONTEXTUAL RULES (To prevent False Positives):
 1. **Tooling Logic is SAFE**: Code that implements file filtering (e.g., parsing `.opsguardignore`, using `pathspec`), git operations, or config loading is INTENDED FUNCTIONALITY. Do NOT flag this as a "Security Bypass" or "Malicious Filtering".
@@ -48,77 +87,416 @@ OUTPUT FORMAT (Strict JSON):
 }
 """
 
+# Versión del prompt: forma parte de la clave de caché, cualquier cambio la invalida
+SYSTEM_PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def _finding_matches_file(finding: Dict[str, Any], path: str) -> bool:
+    """Check whether an AI finding refers to ``path`` (tolerates a/ b/ prefixes)."""
+    reported = str(finding.get("file") or "").strip()
+    for prefix in ("a/", "b/"):
+        reported = reported.removeprefix(prefix)
+    if not reported or not path:
+        return False
+    return reported == path or path.endswith("/" + reported) or reported.endswith("/" + path)
+
+
+def estimate_cost(input_tok: int, output_tok: int) -> float:
+    """Estimate the USD cost of a request from its token usage."""
+    # Cálculo de costes con precisión float
+    input_cost = (input_tok / 1_000_000) * PRICE_PER_1M_INPUT
+    output_cost = (output_tok / 1_000_000) * PRICE_PER_1M_OUTPUT
+    return input_cost + output_cost
+
+
+def _risk_score(result: Dict[str, Any]) -> int:
+    """Coerce a model-reported risk score to int (unparseable counts as 10)."""
+    try:
+        return int(result.get("risk_score", 0) or 0)
+    except (TypeError, ValueError):
+        return 10
+
+
 class AIEngine:
-    def __init__(self):
-        raw_key = os.getenv("OPENROUTER_API_KEY")
-        if not raw_key:
-            raise AIEngineError("❌ Missing OPENROUTER_API_KEY")
-
-        self.api_key = raw_key.strip().strip('"').strip("'")
-        
-        extra_headers = {
-            "HTTP-Referer": "https://opsguard.local",
-            "X-Title": "OpsGuard-TFM"
-        }
+    def __init__(
+        self,
+        cache: Optional[VerdictCache] = None,
+        max_chunks: int = DEFAULT_MAX_CHUNKS,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        stream: bool = True,
+        early_abort_risk: Optional[int] = EARLY_ABORT_RISK,
+        base_url: Optional[str] = None,
+        backend: Optional[AIBackend] = None,
+        token_budget: int = DEFAULT_MAX_TOKENS,
+        max_cost: Optional[float] = None,
+    ):
+        # Backend compartido por el proceso (pool keep-alive, límite de
+        # concurrencia y reintentos); base_url solo para pruebas locales
+        if backend is None:
+            config = BackendConfig(endpoint=base_url) if base_url else None
+            backend = get_backend(config)
+        self.backend = backend
+        self.model = backend.name
 
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=self.api_key,
-            default_headers=extra_headers,
-            timeout=60.0
-        )
-        
-        # Mantenemos Gemini Flash 2.0 por su ventana de contexto y capacidad de razonamiento
-        self.model = "google/gemini-2.0-flash-001"
+        # Caché de veredictos por fichero (opcional)
+        self.cache = cache
+
+        # Presupuesto de chunks por ejecución y paralelismo acotado
+        self.max_chunks = max(1, max_chunks)
+        self.max_workers = max(1, max_workers)
+
+        # Presupuesto de tokens de entrada por ejecución y tope de coste (USD)
+        self.token_budget = max(1, token_budget)
+        self.max_cost = max_cost
+
+        # Streaming con medición de TTFT y corte temprano ante BLOCK de alto riesgo
+        self.stream = stream
+        self.early_abort_risk = early_abort_risk
+
+        # Uso de la última ejecución (tokens, latencia, coste) para telemetría
+        self.last_usage: Dict[str, Any] = {}
+        # Los workers del pool los actualizan a la vez: protegidos por _stats_lock
+        self._ttfts: List[float] = []
+        self._early_aborts = 0
+        self._stats_lock = threading.Lock()
 
     def analyze_diff(self, diff_text: str) -> Dict[str, Any]:
+        """Analyze a diff in token-budgeted chunks, reusing cached verdicts.
+
+        The diff is split per file; files with a cached verdict are not sent
+        again. The rest is selected in priority order (source, config, tests,
+        docs) up to ``token_budget`` tokens and packed at file/hunk
+        boundaries into chunks of at most ``MAX_CHUNK_TOKENS`` that are
+        analyzed concurrently (at most ``max_workers`` in flight, at most
+        ``max_chunks`` per run). Results are merged: BLOCK wins, highest
+        risk score, findings combined. Files left (fully or partly) out by
+        either budget are listed under ``not_reviewed``.
+
+        Raises:
+            AIBudgetError: If the estimated cost exceeds ``max_cost``; nothing
+                is sent.
+        """
+        files = split_by_file(diff_text)
+        cached: List[Dict[str, Any]] = []
+        pending: Dict[str, str] = {}
+        keys: Dict[str, str] = {}
+
+        for path, file_diff in files.items():
+            if self.cache is None:
+                pending[path] = file_diff
+                continue
+            keys[path] = VerdictCache.make_key(file_diff, self.model, SYSTEM_PROMPT_VERSION)
+            verdict = self.cache.get(keys[path])
+            if verdict is None:
+                pending[path] = file_diff
+            else:
+                cached.append(verdict)
+
+        if self.cache is not None:
+            print(f"🗄️  Verdict Cache: {self.cache.hits} hits / {self.cache.misses} misses")
+
+        if not pending:
+            self._print_finops(0, 0, 0.0)
+            return self._merge_verdicts(cached, [])
+
+        plan = plan_budget(pending, self.token_budget)
+        for path in plan.partial:
+            # Un veredicto sobre parte del fichero no vale para el fichero entero
+            keys.pop(path, None)
+        chunks = pack_files(plan.files, MAX_CHUNK_TOKENS, measure=count_tokens)
+        reviewed, skipped = chunks[: self.max_chunks], chunks[self.max_chunks :]
+
+        # Coste máximo antes de enviar nada: entrada contada + tope de salida
+        prompt_tokens = count_tokens(SYSTEM_PROMPT)
+        input_estimate = sum(count_tokens(c.text) + prompt_tokens for c in reviewed)
+        output_estimate = MAX_OUTPUT_TOKENS * len(reviewed)
+        cost_estimate = estimate_cost(input_estimate, output_estimate)
+        print(
+            f"🧮 Token Budget: {plan.tokens}/{self.token_budget} tokens ({tokenizer_name()}), "
+            f"estimated cost <= ${cost_estimate:.6f}"
+        )
+        if self.max_cost is not None and cost_estimate > self.max_cost:
+            raise AIBudgetError(
+                f"Estimated cost ${cost_estimate:.6f} exceeds the per-scan cap "
+                f"${self.max_cost:.6f} ({input_estimate} input tokens in "
+                f"{len(reviewed)} chunk(s)). Raise --ai-max-cost or lower --ai-max-tokens."
+            )
+
         print(f"🤖 OpsGuard Brain: Sending diff to {self.model}...")
         # Nota: El diff ya viene filtrado desde main.py, optimizando el payload.
-        print(f"📦 Context Payload: {len(diff_text)} chars")
+        print(
+            f"📦 Context Payload: {input_estimate} tokens "
+            f"in {len(reviewed)} chunk(s), {min(self.max_workers, len(reviewed))} in parallel"
+        )
 
+        self._ttfts, self._early_aborts = [], 0
         start_time = time.time()
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    # Mantenemos el truncate defensivo.
-                    {"role": "user", "content": f"Analyze this git diff:\n\n{diff_text[:30000]}"}
-                ],
-                temperature=0.1, # Determinista: reduce alucinaciones
-                max_tokens=1024,
-                response_format={"type": "json_object"} 
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            outcomes = list(pool.map(self._request_verdict, (c.text for c in reviewed)))
+        duration = time.time() - start_time
+        print(f"{_ansi('96')}⏱️  AI Analysis Time: {duration:.2f} seconds{_ansi('0')}")
+
+        # --- FINOPS TELEMETRY EXTRACTION ---
+        self._print_finops(
+            sum(usage[0] for _, _, usage in outcomes),
+            sum(usage[1] for _, _, usage in outcomes),
+            duration,
+        )
+        self.last_usage["estimated_cost_usd"] = cost_estimate
+
+        if self.cache is not None:
+            self._store_file_verdicts(reviewed, outcomes, keys, skipped)
+
+        fresh = [result for result, _, _ in outcomes]
+        merged = self._merge_verdicts(cached, fresh)
+
+        not_reviewed = set(plan.left_out) | set(plan.partial)
+        if skipped:
+            skipped_files = sorted({p for c in skipped for p in c.paths})
+            not_reviewed.update(skipped_files)
+            print(f"⚠️ Chunk budget exhausted: {len(skipped)} chunk(s) not reviewed ({', '.join(skipped_files)})")
+            merged["explanation"] += (
+                f" [Not reviewed by AI (chunk budget {self.max_chunks}): "
+                f"{', '.join(skipped_files)}]"
+            )
+        if plan.left_out or plan.partial:
+            left_out = plan.left_out + [f"{p} (partially)" for p in plan.partial]
+            print(f"⚠️ Token budget exhausted: {len(left_out)} file(s) not fully reviewed ({', '.join(left_out)})")
+            merged["explanation"] += (
+                f" [Not reviewed by AI (token budget {self.token_budget}): "
+                f"{', '.join(left_out)}]"
+            )
+        if not_reviewed:
+            # Para el gate: avisar (o bloquear con fail-closed) en vez de aprobar
+            merged["not_reviewed"] = sorted(not_reviewed)
+
+        return merged
+
+    def _store_file_verdicts(
+        self,
+        chunks: List[DiffChunk],
+        outcomes: List[Tuple[Dict[str, Any], bool, Tuple[int, int]]],
+        keys: Dict[str, str],
+        skipped: List[DiffChunk],
+    ) -> None:
+        """Cache per-file verdicts of files whose every chunk was analyzed OK.
+
+        Files with a chunk in ``skipped`` (over the chunk budget) were only
+        partially reviewed and are not cached.
+        """
+        per_file: Dict[str, List[Dict[str, Any]]] = {}
+        # Un fichero con algún chunk sin revisar no tiene veredicto completo
+        failed = {p for c in skipped for p in c.paths}
+        for chunk, (result, ok, _) in zip(chunks, outcomes):
+            for path in chunk.paths:
+                if not ok:
+                    failed.add(path)
+                    continue
+                per_file.setdefault(path, []).append(self._file_verdict(result, path, chunk.paths))
+
+        # Un fichero partido entre varios chunks solo es cacheable si entró completo
+        complete = {p for p in per_file} - failed
+        reviewed_files = {p for c in chunks for p in c.paths}
+        for path in complete & reviewed_files & keys.keys():
+            verdicts = per_file[path]
+            self.cache.put(keys[path], verdicts[0] if len(verdicts) == 1 else self._merge_verdicts(verdicts, []))
+
+    @staticmethod
+    def _file_verdict(result: Dict[str, Any], path: str, batch: List[str]) -> Dict[str, Any]:
+        """Derive the verdict of a single file from a multi-file model response."""
+        reported = result["findings"] if isinstance(result["findings"], list) else []
+        reported = [f for f in reported if isinstance(f, dict)]
+        findings = [f for f in reported if _finding_matches_file(f, path)]
+
+        # Fail closed: un BLOCK sin hallazgos atribuibles se asigna a todo el lote
+        attributed = any(_finding_matches_file(f, other) for f in reported for other in batch)
+        if findings or (result["verdict"] == "BLOCK" and not attributed):
+            return {
+                "verdict": result["verdict"],
+                "risk_score": result["risk_score"],
+                "explanation": result["explanation"],
+                "findings": findings,
+            }
+        return {"verdict": "APPROVE", "risk_score": 0, "explanation": "", "findings": []}
+
+    @staticmethod
+    def _merge_verdicts(cached: List[Dict[str, Any]], fresh: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge cached per-file verdicts with fresh per-chunk model results."""
+        results = cached + fresh
+        blocked = any(r.get("verdict") == "BLOCK" for r in results)
+
+        notes = [r["explanation"] for r in fresh if r.get("explanation")]
+        explanation = " | ".join(dict.fromkeys(notes)) if fresh else "All files served from verdict cache."
+        cached_notes = [r["explanation"] for r in cached if r.get("explanation")]
+        if cached and fresh:
+            explanation += f" ({len(cached)} file(s) from cache"
+            explanation += f": {' '.join(cached_notes)})" if cached_notes else ")"
+        elif cached_notes:
+            explanation += f" {' '.join(cached_notes)}"
+
+        return {
+            "verdict": "BLOCK" if blocked else "APPROVE",
+            "risk_score": max((_risk_score(r) for r in results), default=0),
+            "explanation": explanation,
+            "findings": [f for r in results for f in (r.get("findings") or [])],
+        }
+
+    def _print_finops(self, input_tok: int, output_tok: int, duration: float) -> None:
+        """Print the FinOps telemetry table (ADR-0003)."""
+        total_cost = estimate_cost(input_tok, output_tok)
+        ttft = min(self._ttfts) if self._ttfts else None
+        self.last_usage = {
+            "input_tokens": input_tok,
+            "output_tokens": output_tok,
+            "latency_s": duration,
+            "ttft_s": ttft,
+            "early_aborts": self._early_aborts,
+            "cost_usd": total_cost,
+        }
+
+        stream_rows = ""
+        if ttft is not None:
+            stream_rows = f"| **TTFT** | `{ttft * 1000:.0f}ms` | N/A |\n"
+        if self._early_aborts:
+            stream_rows += f"| **Early BLOCK Aborts** | `{self._early_aborts}` | N/A |\n"
+
+        cache_rows = ""
+        if self.cache is not None:
+            cache_rows = (
+                f"| **Cache Hits** | `{self.cache.hits}` | $0 |\n"
+                f"| **Cache Misses** | `{self.cache.misses}` | N/A |\n"
             )
 
-            end_time = time.time()
-            duration = end_time - start_time
-            print(f"\033[96m⏱️  AI Analysis Time: {duration:.2f} seconds\033[0m")
-
-            # --- FINOPS TELEMETRY EXTRACTION ---
-            usage = response.usage
-            if usage:
-                input_tok = usage.prompt_tokens
-                output_tok = usage.completion_tokens
-                
-                # Cálculo de costes con precisión float
-                input_cost = (input_tok / 1_000_000) * PRICE_PER_1M_INPUT
-                output_cost = (output_tok / 1_000_000) * PRICE_PER_1M_OUTPUT
-                total_cost = input_cost + output_cost
-                
-                # Visualización de tabla FinOps
-                print(f"""
-\033[92m### 💰 FinOps Telemetry
+        # Visualización de tabla FinOps
+        print(f"""
+{_ansi('92')}### 💰 FinOps Telemetry
 | Metric | Value | Unit Cost |
 | :--- | :--- | :--- |
 | **Input Tokens** | `{input_tok}` | ${PRICE_PER_1M_INPUT}/1M |
 | **Output Tokens** | `{output_tok}` | ${PRICE_PER_1M_OUTPUT}/1M |
-| **Total Latency** | `{duration:.2f}s` | N/A |
+{cache_rows}{stream_rows}| **Total Latency** | `{duration:.2f}s` | N/A |
 | **EXECUTION COST** | **`${total_cost:.6f}`** | **Negligible** |
-\033[0m""")
-            # -----------------------------------
+{_ansi('0')}""")
 
-            content = response.choices[0].message.content
+    def _stream_completion(
+        self, messages: List[Dict[str, str]]
+    ) -> Tuple[str, Tuple[int, int], Optional[Dict[str, Any]]]:
+        """Stream a completion, measuring TTFT and aborting early on BLOCK.
+
+        The JSON is inspected as it arrives: once both ``"verdict": "BLOCK"``
+        and a ``risk_score`` >= ``early_abort_risk`` have been emitted, the
+        HTTP stream is closed and a partial BLOCK verdict is returned.
+
+        Returns:
+            The streamed content, (input, output) token usage and, if the
+            request was aborted early, the partial verdict (else None).
+        """
+        start = time.perf_counter()
+        stream = self.backend.create(
+            messages=messages,
+            temperature=0.1, # Determinista: reduce alucinaciones
+            max_tokens=MAX_OUTPUT_TOKENS,
+            response_format={"type": "json_object"},
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        parts: List[str] = []
+        usage_tokens = (0, 0)
+        first_token = True
+        try:
+            for event in stream:
+                if event.usage:
+                    usage_tokens = (event.usage.prompt_tokens, event.usage.completion_tokens)
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token:
+                    ttft = time.perf_counter() - start
+                    with self._stats_lock:
+                        self._ttfts.append(ttft)
+                    first_token = False
+                parts.append(delta)
+
+                early_result = self._early_block("".join(parts))
+                if early_result is not None:
+                    with self._stats_lock:
+                        self._early_aborts += 1
+                    # Sin usage del servidor: recuento local de tokens
+                    prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+                    usage_tokens = (prompt_tokens, count_tokens("".join(parts)))
+                    return "".join(parts), usage_tokens, early_result
+        finally:
+            stream.close()
+
+        return "".join(parts), usage_tokens, None
+
+    def _early_block(self, partial: str) -> Optional[Dict[str, Any]]:
+        """Return a partial BLOCK verdict if ``partial`` JSON already warrants it."""
+        if self.early_abort_risk is None:
+            return None
+        verdict = _VERDICT_RE.search(partial)
+        if not verdict or verdict.group(1) != "BLOCK":
+            return None
+        risk = _RISK_RE.search(partial)
+        if not risk or int(risk.group(1)) < self.early_abort_risk:
+            return None
+
+        explanation = _EXPLANATION_RE.search(partial)
+        try:
+            summary = json.loads(f'"{explanation.group(1)}"') if explanation else ""
+        except json.JSONDecodeError:
+            summary = ""
+        return {
+            "verdict": "BLOCK",
+            "risk_score": int(risk.group(1)),
+            "explanation": summary or "Early abort: model emitted a high-risk BLOCK verdict.",
+            "findings": [],
+        }
+
+    def _request_verdict(self, diff_text: str) -> Tuple[Dict[str, Any], bool, Tuple[int, int]]:
+        """Analyze one chunk within the backend's process-wide concurrency limit."""
+        with self.backend.slot():
+            return self._analyze_chunk(diff_text)
+
+    def _analyze_chunk(self, diff_text: str) -> Tuple[Dict[str, Any], bool, Tuple[int, int]]:
+        """Send one diff chunk to the model (thread-safe, no console tables).
+
+        Returns:
+            Normalized verdict, whether it came from a successful, parseable
+            response (fail-closed results must not be cached), and the
+            (input, output) token usage.
+        """
+        usage_tokens = (0, 0)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            # Sin truncado: pack_files ya acota cada chunk a MAX_CHUNK_TOKENS
+            {"role": "user", "content": f"Analyze this git diff:\n\n{diff_text}"}
+        ]
+
+        try:
+            if self.stream:
+                content, usage_tokens, early_result = self._stream_completion(messages)
+                if early_result is not None:
+                    # Veredicto parcial: bloquea, pero no se cachea (faltan findings)
+                    return early_result, False, usage_tokens
+            else:
+                response = self.backend.create(
+                    messages=messages,
+                    temperature=0.1, # Determinista: reduce alucinaciones
+                    max_tokens=MAX_OUTPUT_TOKENS,
+                    response_format={"type": "json_object"} 
+                )
+
+                # --- FINOPS TELEMETRY EXTRACTION ---
+                usage = response.usage
+                if usage:
+                    usage_tokens = (usage.prompt_tokens, usage.completion_tokens)
+                # -----------------------------------
+
+                content = response.choices[0].message.content
             clean_content = content.replace("```json", "").replace("```", "").strip()
             
             try:
@@ -130,7 +508,7 @@ class AIEngine:
                     "risk_score": 10,
                     "explanation": "AI output parsing failed. Manual review required.",
                     "findings": []
-                }
+                }, False, usage_tokens
             
             # Normalización
             if isinstance(parsed_data, list):
@@ -141,7 +519,7 @@ class AIEngine:
                 "risk_score": parsed_data.get("risk_score", 0),
                 "explanation": parsed_data.get("explanation", "No explanation provided."),
                 "findings": parsed_data.get("findings", [])
-            }
+            }, True, usage_tokens
 
         except Exception as e:
             print(f"\n❌ EXCEPCIÓN AI CRÍTICA: {str(e)}")
@@ -151,4 +529,4 @@ class AIEngine:
                 "risk_score": 10,
                 "explanation": f"Internal Engine Error: {str(e)}",
                 "findings": []
-            }
\ No newline at end of file
+            }, False, usage_tokens
\ No newline at end of file
@@ -0,0 +1,356 @@
+"""AI backends: the chat-completions endpoint behind the AI gate.
+
+The backend is configured in the ``ai`` section of ``opsguard.yml``::
+
+    ai:
+      backend: openai            # any OpenAI-compatible endpoint | mock
+      model: google/gemini-2.0-flash-001
+      timeout: 60                # seconds per request
+      retries: 2                 # on 408/409/429/5xx and connection errors
+      backoff: 0.5               # base of the jittered exponential backoff
+      max_concurrency: 8         # in-flight requests for the whole process
+      mock:                      # only for backend: mock
+        latency_ms: 200
+        jitter_ms: 50
+        failure_rate: 0.0
+        verdict: APPROVE
+        risk_score: 0
+
+``opsguard.yml`` ships with the repository being scanned, so it cannot say
+where the diff and the API key go: the endpoint and the name of the key
+variable come from the runner's environment (``$OPSGUARD_AI_ENDPOINT``,
+``$OPSGUARD_AI_API_KEY_ENV``; OpenRouter and ``OPENROUTER_API_KEY`` by
+default), and ``backend: mock``, which approves without any review, is only
+honored with ``OPSGUARD_ALLOW_MOCK_BACKEND=1``.
+
+One ``AIBackend`` per configuration is shared by every scan of the process
+(CLI, daemon, batch threads), so they all draw from one keep-alive HTTP
+connection pool and one concurrency limit. The ``mock`` backend answers
+locally with a fixed verdict after a seeded, deterministic latency: it lets
+the throughput and tail latency of the AI stage be measured offline.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+BACKEND_KINDS = ("openai", "mock")
+
+# Del entorno del runner, nunca del opsguard.yml del repositorio escaneado
+ENDPOINT_ENV = "OPSGUARD_AI_ENDPOINT"
+API_KEY_ENV_ENV = "OPSGUARD_AI_API_KEY_ENV"
+ALLOW_MOCK_ENV = "OPSGUARD_ALLOW_MOCK_BACKEND"
+RUNNER_ONLY_KEYS = ("endpoint", "api_key_env")
+
+# Tope de cada espera entre reintentos (s)
+MAX_BACKOFF = 8.0
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class BackendError(Exception):
+    """Custom exception for AI backend configuration and request failures."""
+
+    pass
+
+
+class BackendConfig(NamedTuple):
+    """Validated ``ai`` section of ``opsguard.yml`` (hashable: keys the pool)."""
+
+    kind: str = "openai"
+    endpoint: str = OPENROUTER_BASE_URL
+    model: str = "google/gemini-2.0-flash-001"
+    api_key_env: str = "OPENROUTER_API_KEY"
+    timeout: float = 60.0
+    retries: int = 2
+    backoff: float = 0.5
+    max_concurrency: int = 8
+    mock_latency_ms: float = 200.0
+    mock_jitter_ms: float = 0.0
+    mock_failure_rate: float = 0.0
+    mock_verdict: str = "APPROVE"
+    mock_risk_score: int = 0
+
+    @classmethod
+    def from_config(
+        cls, config: Dict[str, Any], environ: Optional[Dict[str, str]] = None
+    ) -> "BackendConfig":
+        """Build a config from the ``ai`` section of opsguard.yml.
+
+        Args:
+            config: The ``ai`` section.
+            environ: Runner environment for the endpoint and key variable
+                overrides (defaults to ``os.environ``).
+
+        Raises:
+            ValueError: If a value is out of range or of the wrong type, or
+                the section sets ``endpoint`` or ``api_key_env``.
+        """
+        environ = os.environ if environ is None else environ
+        for key in RUNNER_ONLY_KEYS:
+            if key in config:
+                raise ValueError(
+                    f"'{key}' cannot be set in opsguard.yml (it ships with the "
+                    f"scanned repository); use ${ENDPOINT_ENV} or "
+                    f"${API_KEY_ENV_ENV} on the runner"
+                )
+        mock = config.get("mock") or {}
+        if not isinstance(mock, dict):
+            raise ValueError("'mock' must be a mapping")
+        defaults = cls()
+        backend = cls(
+            kind=str(config.get("backend", defaults.kind)),
+            endpoint=environ.get(ENDPOINT_ENV) or defaults.endpoint,
+            model=str(config.get("model", defaults.model)),
+            api_key_env=environ.get(API_KEY_ENV_ENV) or defaults.api_key_env,
+            timeout=float(config.get("timeout", defaults.timeout)),
+            retries=int(config.get("retries", defaults.retries)),
+            backoff=float(config.get("backoff", defaults.backoff)),
+            max_concurrency=int(
+                config.get("max_concurrency", defaults.max_concurrency)
+            ),
+            mock_latency_ms=float(mock.get("latency_ms", defaults.mock_latency_ms)),
+            mock_jitter_ms=float(mock.get("jitter_ms", defaults.mock_jitter_ms)),
+            mock_failure_rate=float(
+                mock.get("failure_rate", defaults.mock_failure_rate)
+            ),
+            mock_verdict=str(mock.get("verdict", defaults.mock_verdict)),
+            mock_risk_score=int(mock.get("risk_score", defaults.mock_risk_score)),
+        )
+        if backend.kind not in BACKEND_KINDS:
+            raise ValueError(f"backend must be one of {', '.join(BACKEND_KINDS)}")
+        if backend.timeout <= 0 or backend.backoff < 0 or backend.retries < 0:
+            raise ValueError("timeout must be > 0, retries and backoff >= 0")
+        if backend.max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        if backend.mock_verdict not in ("APPROVE", "BLOCK"):
+            raise ValueError("mock verdict must be APPROVE or BLOCK")
+        if not 0.0 <= backend.mock_failure_rate <= 1.0:
+            raise ValueError("mock failure_rate must be between 0 and 1")
+        return backend
+
+    def to_config(self) -> Dict[str, Any]:
+        """Serializable configuration (inverse of ``from_config``; the
+        endpoint and key variable are left to the runner's environment)."""
+        config: Dict[str, Any] = {
+            "backend": self.kind,
+            "model": self.model,
+            "timeout": self.timeout,
+            "retries": self.retries,
+            "backoff": self.backoff,
+            "max_concurrency": self.max_concurrency,
+        }
+        if self.kind == "mock":
+            config["mock"] = {
+                "latency_ms": self.mock_latency_ms,
+                "jitter_ms": self.mock_jitter_ms,
+                "failure_rate": self.mock_failure_rate,
+                "verdict": self.mock_verdict,
+                "risk_score": self.mock_risk_score,
+            }
+        return config
+
+    @property
+    def needs_api_key(self) -> bool:
+        return self.kind != "mock"
+
+
+def mock_allowed(environ: Optional[Dict[str, str]] = None) -> bool:
+    """Whether the runner opted in to ``backend: mock`` (``$OPSGUARD_ALLOW_MOCK_BACKEND``)."""
+    environ = os.environ if environ is None else environ
+    return environ.get(ALLOW_MOCK_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def _retryable(error: Exception) -> bool:
+    """Transient failures: rate limits, timeouts, 5xx, dropped connections."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    # openai.APIConnectionError / APITimeoutError no llevan status_code
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(
+        error
+    ).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+class MockBackendError(BackendError):
+    """Custom exception for failures injected by the mock backend."""
+
+    status_code = 503
+
+
+class _MockStream:
+    def __init__(self, events: List[Any]) -> None:
+        self._events = iter(events)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._events
+
+    def close(self) -> None:
+        pass
+
+
+class MockClient:
+    """Local stand-in for an OpenAI chat-completions client.
+
+    Each request sleeps ``latency_ms`` plus a jitter drawn from a generator
+    seeded with the prompt, so a given diff always gets the same latency,
+    failure and verdict. Usage is counted with ``src.tokens.count_tokens``.
+    """
+
+    def __init__(self, config: BackendConfig) -> None:
+        self.config = config
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _create(
+        self, model: str, messages: List[Dict[str, str]], stream: bool = False, **_: Any
+    ) -> Any:
+        from src.tokens import count_tokens
+
+        prompt = "".join(m["content"] for m in messages)
+        seed = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(seed, 0)
+            self._attempts[seed] = attempt + 1
+        rnd = random.Random(f"{seed}:{attempt}")
+
+        config = self.config
+        time.sleep(
+            (config.mock_latency_ms + rnd.random() * config.mock_jitter_ms) / 1000
+        )
+        if rnd.random() < config.mock_failure_rate:
+            raise MockBackendError("Mock backend: injected failure (503)")
+
+        content = json.dumps(
+            {
+                "verdict": config.mock_verdict,
+                "risk_score": config.mock_risk_score,
+                "explanation": f"Mock verdict from {model}.",
+                "findings": [],
+            }
+        )
+        usage = SimpleNamespace(
+            prompt_tokens=count_tokens(prompt), completion_tokens=count_tokens(content)
+        )
+        if not stream:
+            message = SimpleNamespace(content=content)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=message)], usage=usage
+            )
+        events = [
+            SimpleNamespace(
+                choices=[
+                    SimpleNamespace(delta=SimpleNamespace(content=content[i : i + 16]))
+                ],
+                usage=None,
+            )
+            for i in range(0, len(content), 16)
+        ]
+        events.append(SimpleNamespace(choices=[], usage=usage))
+        return _MockStream(events)
+
+
+def _openai_client(config: BackendConfig) -> Any:
+    raw_key = os.getenv(config.api_key_env)
+    if not raw_key:
+        raise BackendError(f"Missing {config.api_key_env}")
+    api_key = raw_key.strip().strip('"').strip("'")
+
+    # Import diferido (~0.5s): solo se paga cuando el gate llega a la fase IA
+    from openai import OpenAI
+
+    # Un único cliente por backend = un único pool keep-alive de conexiones;
+    # la concurrencia la acota AIBackend.slot()
+    return OpenAI(
+        base_url=config.endpoint,
+        api_key=api_key,
+        default_headers={
+            "HTTP-Referer": "https://opsguard.local",
+            "X-Title": "OpsGuard-TFM",
+        },
+        timeout=config.timeout,
+        # Los reintentos los hace AIBackend (backoff con jitter, igual en mock)
+        max_retries=0,
+    )
+
+
+class AIBackend:
+    """A configured chat endpoint: pooled client, retries, concurrency limit."""
+
+    def __init__(self, config: BackendConfig, client: Any = None) -> None:
+        self.config = config
+        self._client = client
+        self._slots = threading.BoundedSemaphore(config.max_concurrency)
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    @property
+    def name(self) -> str:
+        """Model label (verdict cache key, telemetry); mock verdicts never
+        share cache entries with a real model."""
+        if self.config.kind == "mock":
+            return f"mock/{self.config.model}"
+        return self.config.model
+
+    @property
+    def client(self) -> Any:
+        """Underlying client, created on first use (one per backend)."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if self.config.kind == "mock":
+                        if not mock_allowed():
+                            raise BackendError(
+                                f"backend: mock requires {ALLOW_MOCK_ENV}=1"
+                            )
+                        self._client = MockClient(self.config)
+                    else:
+                        self._client = _openai_client(self.config)
+        return self._client
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the ``max_concurrency`` request slots (for streams,
+        until the response has been consumed)."""
+        with self._slots:
+            yield
+
+    def create(self, **kwargs: Any) -> Any:
+        """``chat.completions.create`` with the configured model and retries.
+
+        Transient errors are retried up to ``retries`` times, sleeping a
+        random time in ``[0, backoff * 2**attempt]`` (full jitter) so
+        concurrent scans do not retry in lockstep.
+        """
+        client = self.client
+        for attempt in range(self.config.retries + 1):
+            try:
+                return client.chat.completions.create(model=self.config.model, **kwargs)
+            except Exception as e:
+                if attempt == self.config.retries or not _retryable(e):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                cap = min(MAX_BACKOFF, self.config.backoff * 2**attempt)
+                time.sleep(random.uniform(0, cap))
+
+
+_backends: Dict[BackendConfig, AIBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(config: Optional[BackendConfig] = None) -> AIBackend:
+    """Process-wide backend for ``config`` (one connection pool per config)."""
+    config = config or BackendConfig()
+    with _backends_lock:
+        backend = _backends.get(config)
+        if backend is None:
+            backend = _backends[config] = AIBackend(config)
+        return backend
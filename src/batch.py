@@ -0,0 +1,289 @@
+"""Batch scanning (``opsguard batch``): many repositories and commit ranges
+in one process.
+
+The manifest is JSON lines, one target per line (blank lines and ``#``
+comments are skipped)::
+
+    {"repo": "/srv/git/api"}                          # working tree vs HEAD
+    {"repo": "/srv/git/web", "range": "v1.0..main"}   # every non-merge commit
+
+All scans share one ``ScanService`` (the policy is compiled once, only the
+ignore spec is per repo, and one AI client is reused) and run on a bounded
+thread pool; the work is git subprocesses and AI requests, which release the
+GIL. One JSON record per scan is streamed to the output as each finishes.
+Commits of ranges are also recorded in each repository's history index
+(``src.history_index``), so scheduled runs only scan commits and blob pairs
+they have not seen. With a checkpoint file, finished scans are recorded by
+key and skipped on
+the next run, so an interrupted run resumes where it stopped; scans that
+ended in error are retried. Delivery is at-least-once: a crash between the
+record and the checkpoint write repeats that one record.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from src.pipeline import ScanOptions, ScanResult, ScanService
+from src.telemetry import Telemetry
+
+
+class BatchError(Exception):
+    """Custom exception for invalid manifests or checkpoints."""
+
+    pass
+
+
+class BatchUnit(NamedTuple):
+    """One scan of a batch: a repo's working tree or a single commit."""
+
+    repo: str
+    commit: str = ""
+    revisions: Optional[Tuple[str, str]] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.repo}@{self.commit or 'WORKTREE'}"
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Parse and validate a JSON-lines manifest.
+
+    Raises:
+        BatchError: If the file cannot be read or an entry is invalid.
+    """
+    try:
+        lines = Path(path).read_text().splitlines()
+    except OSError as e:
+        raise BatchError(f"Cannot read manifest '{path}': {e}")
+
+    entries = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise BatchError(f"{path}:{lineno}: invalid JSON: {e}")
+        if not isinstance(entry, dict) or not isinstance(entry.get("repo"), str):
+            raise BatchError(f"{path}:{lineno}: each entry needs a 'repo' string")
+        if not isinstance(entry.get("range", ""), str):
+            raise BatchError(f"{path}:{lineno}: 'range' must be a string")
+        entries.append(entry)
+    return entries
+
+
+def expand_entry(entry: Dict[str, Any]) -> Iterator[BatchUnit]:
+    """Scan units of a manifest entry (one per commit when a range is given).
+
+    Raises:
+        GitIngestError: If the repository or the range is invalid.
+    """
+    from src.ingest import GitManager
+
+    repo = os.path.abspath(entry["repo"])
+    rev_range = entry.get("range")
+    if not rev_range:
+        yield BatchUnit(repo)
+        return
+    for parent, sha in GitManager(repo_path=repo).list_commits(rev_range):
+        yield BatchUnit(repo, sha, (parent, sha))
+
+
+class Checkpoint:
+    """Append-only file of finished scan keys (one per line)."""
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self.done: Set[str] = set()
+        self._file: Optional[IO[str]] = None
+        if path is None:
+            return
+        try:
+            truncated = False
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    # Una última línea truncada (corte a mitad) no es una clave
+                    for line in f:
+                        truncated = not line.endswith("\n")
+                        if not truncated:
+                            self.done.add(line[:-1])
+            self._file = open(path, "a", encoding="utf-8")
+            if truncated:
+                # Se cierra la línea a medias para no pegarle la siguiente clave
+                self._file.write("\n")
+        except OSError as e:
+            raise BatchError(f"Cannot use checkpoint '{path}': {e}")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def add(self, key: str) -> None:
+        self.done.add(key)
+        if self._file is not None:
+            self._file.write(key + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def _scan_unit(
+    service: ScanService,
+    unit: BatchUnit,
+    config: str,
+    options: ScanOptions,
+    policy_cache: bool,
+    telemetry_dir: Optional[str],
+    history: bool,
+) -> Dict[str, Any]:
+    telemetry = Telemetry(out_dir=telemetry_dir)
+    telemetry.label("mode", "batch")
+    start = time.perf_counter()
+    try:
+        # environ vacío: el CI del runner de batch no describe estos repos
+        regex_result, ai_result = service.scan(
+            unit.repo,
+            config,
+            options,
+            telemetry,
+            policy_cache=policy_cache,
+            environ={},
+            revisions=unit.revisions,
+            history=history,
+        )
+        result = regex_result or ai_result
+    except Exception as e:
+        # Un fallo inesperado en un repo no tumba una ejecución de horas
+        result = ScanResult("error", f"❌ Scan Error: {e}")
+        telemetry.outcome = "error"
+    telemetry.flush(result.exit_code)
+    return {
+        "key": unit.key,
+        "repo": unit.repo,
+        "commit": unit.commit or None,
+        "status": result.status,
+        "message": result.message,
+        "violations": list(result.violations),
+        "ai_result": result.ai_result,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+def run_batch(
+    entries: List[Dict[str, Any]],
+    config: str,
+    options: ScanOptions,
+    output: IO[str],
+    checkpoint: Checkpoint,
+    jobs: int = 4,
+    policy_cache: bool = True,
+    telemetry_dir: Optional[str] = None,
+    history: bool = True,
+) -> Dict[str, int]:
+    """Scan every unit of ``entries``, streaming one JSON line per scan.
+
+    Units already in ``checkpoint`` are skipped. At most ``2 * jobs`` scans
+    are queued at a time, so commit lists are expanded lazily. With
+    ``history``, commits of ranges already in the repository's history index
+    are skipped and new ones are added to it. With ``options.profile_rules``
+    the rule profile of the whole run is printed at the end.
+
+    Returns:
+        Number of records per status, plus ``resumed`` (skipped by the
+        checkpoint) and ``indexed`` (skipped by the history index).
+    """
+    service = ScanService()
+    config = os.path.abspath(config)
+    summary: Dict[str, int] = {"resumed": 0, "indexed": 0}
+
+    def _indexed(entry: Dict[str, Any]) -> Callable[[str], bool]:
+        if not history or not entry.get("range"):
+            return lambda sha: False
+        from src.ingest import GitManager
+
+        repo = os.path.abspath(entry["repo"])
+        index = service.history_index(
+            GitManager(repo_path=repo).common_dir,
+            service.repo_bundle(repo, config, policy_cache),
+        )
+        return lambda sha: index.commit_status(sha) is not None
+
+    def _emit(record: Dict[str, Any]) -> None:
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        summary[record["status"]] = summary.get(record["status"], 0) + 1
+
+    def _units() -> Iterator[BatchUnit]:
+        for entry in entries:
+            try:
+                is_indexed = _indexed(entry)
+                for unit in expand_entry(entry):
+                    if unit.key in checkpoint:
+                        summary["resumed"] += 1
+                    elif is_indexed(unit.commit):
+                        summary["indexed"] += 1
+                    else:
+                        yield unit
+            except Exception as e:
+                # No se marca en el checkpoint: se reintenta al reanudar
+                _emit(
+                    {
+                        "key": None,
+                        "repo": os.path.abspath(entry["repo"]),
+                        "range": entry.get("range"),
+                        "status": "error",
+                        "message": f"❌ Init Error: {e}",
+                    }
+                )
+
+    def _collect(pending: Set[Future]) -> Set[Future]:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            record = future.result()
+            _emit(record)
+            # Los errores no se marcan: se reintentan al reanudar
+            if record["status"] != "error":
+                checkpoint.add(record["key"])
+        return pending
+
+    jobs = max(1, jobs)
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for unit in _units():
+            pending.add(
+                pool.submit(
+                    _scan_unit,
+                    service,
+                    unit,
+                    config,
+                    options,
+                    policy_cache,
+                    telemetry_dir,
+                    history,
+                )
+            )
+            if len(pending) >= 2 * jobs:
+                pending = _collect(pending)
+        while pending:
+            pending = _collect(pending)
+    if options.profile_rules and len(service.rule_profile):
+        # Totales de la ejecución; cada escaneo lleva los suyos en su telemetría
+        print(service.rule_profile.format_table())
+    return summary
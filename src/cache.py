@@ -0,0 +1,178 @@
+"""Content-addressed on-disk cache of AI verdicts (ADR-0003: FinOps).
+
+Entries are keyed by a hash of the normalized per-file diff, the model ID and
+the system prompt version, so unchanged files are never re-sent to the model
+on subsequent pushes of the same PR. Storage is a single SQLite file with
+size-bounded LRU eviction and a TTL.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = (
+    Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "opsguard"
+)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# Líneas de cabecera que cambian sin que cambie el contenido revisado
+_INDEX_LINE_RE = re.compile(r"^index [0-9a-f]+\.\.[0-9a-f]+")
+_HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+def normalize_file_diff(diff_text: str) -> str:
+    """Normalize a single-file diff so cosmetic churn keeps the same key.
+
+    Drops ``index`` blob lines, strips hunk line numbers (a rebase that only
+    shifts the hunk must still hit) and trailing whitespace.
+    """
+    normalized = []
+    for line in diff_text.splitlines():
+        if _INDEX_LINE_RE.match(line):
+            continue
+        normalized.append(_HUNK_HEADER_RE.sub("@@", line).rstrip())
+    return "\n".join(normalized)
+
+
+class VerdictCache:
+    """SQLite-backed LRU + TTL cache of per-file AI verdicts.
+
+    Cache failures never break the gate: on any SQLite error the cache
+    disables itself and every lookup becomes a miss.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        """Open (or create) the cache database.
+
+        Args:
+            cache_dir: Directory for the cache file. Defaults to
+                ``$OPSGUARD_CACHE_DIR`` or ``~/.cache/opsguard``.
+            max_bytes: Size bound for stored payloads. Defaults to
+                ``$OPSGUARD_CACHE_MAX_MB`` MiB or 64 MiB.
+            ttl_seconds: Entry lifetime. Defaults to
+                ``$OPSGUARD_CACHE_TTL_HOURS`` hours or 7 days.
+        """
+        cache_dir = (
+            cache_dir or os.getenv("OPSGUARD_CACHE_DIR") or str(DEFAULT_CACHE_DIR)
+        )
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("OPSGUARD_CACHE_MAX_MB", 0)) * 1024 * 1024)
+        if ttl_seconds is None:
+            ttl_seconds = int(float(os.getenv("OPSGUARD_CACHE_TTL_HOURS", 0)) * 3600)
+
+        self.max_bytes = max_bytes or DEFAULT_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or DEFAULT_TTL_SECONDS
+        self.hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+
+        try:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(Path(cache_dir) / "verdicts.sqlite"), timeout=5.0
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " key TEXT PRIMARY KEY, created REAL, accessed REAL,"
+                " size INTEGER, payload TEXT)"
+            )
+            self._db.commit()
+        except (OSError, sqlite3.Error) as e:
+            self._disable(e)
+
+    @staticmethod
+    def make_key(file_diff: str, model: str, prompt_version: str) -> str:
+        """Content address for a file diff reviewed by a given model/prompt."""
+        digest = hashlib.sha256()
+        for part in (model, prompt_version, normalize_file_diff(file_diff)):
+            digest.update(part.encode("utf-8", errors="replace"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _disable(self, error: Exception) -> None:
+        print(f"⚠️ Verdict cache disabled: {error}")
+        if self._db is not None:
+            self._db.close()
+        self._db = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached verdict for ``key`` or None (miss/expired)."""
+        if self._db is None:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        try:
+            row = self._db.execute(
+                "SELECT created, payload FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[0] <= self.ttl_seconds:
+                self._db.execute(
+                    "UPDATE verdicts SET accessed = ? WHERE key = ?", (now, key)
+                )
+                self._db.commit()
+                self.hits += 1
+                return json.loads(row[1])
+            if row:
+                self._db.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+                self._db.commit()
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            self._disable(e)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, verdict: Dict[str, Any]) -> None:
+        """Store a verdict and enforce TTL and the size bound (LRU)."""
+        if self._db is None:
+            return
+
+        payload = json.dumps(verdict)
+        now = time.time()
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(payload), payload),
+            )
+            self._db.execute(
+                "DELETE FROM verdicts WHERE created < ?", (now - self.ttl_seconds,)
+            )
+            self._evict()
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the size bound is met."""
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM verdicts"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        doomed = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM verdicts ORDER BY accessed ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM verdicts WHERE key = ?", doomed)
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
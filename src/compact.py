@@ -0,0 +1,337 @@
+"""Pre-AI diff compaction: drop low-signal content before it is billed.
+
+The regex gate needs the full diff; the model does not. Between ``get_diff``
+and ``AIEngine.analyze_diff`` the payload is compacted:
+
+* ``index``/mode headers and ``---``/``+++`` lines that only repeat the
+  ``diff --git`` paths are dropped (``/dev/null`` sides are kept),
+* context is trimmed to ``context_lines`` around each change,
+* hunks whose only changes are whitespace (re-indent, blank lines) are
+  dropped, and long runs of deleted lines are collapsed (in
+  indentation-sensitive files, such as Python or YAML, a re-indent is a
+  real change and is kept),
+* identical hunks (same lines in several files) are sent once,
+* binary, minified (bundle/asset types only) and lockfile diffs are
+  replaced by a one-line note.
+
+The output is still a unified diff: every ``diff --git`` header is kept and
+every ``@@`` header carries the real old/new line numbers of the lines it
+covers, so findings keep pointing at the right file and line. Notes about
+omitted content are ``\\`` lines, like git's "No newline at end of file".
+"""
+
+import hashlib
+import re
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.diffparse import DiffHunk, iter_hunks
+
+DEFAULT_CONTEXT_LINES = 2
+
+# Runs de líneas borradas más largas se recortan a este nº de líneas
+MAX_DELETED_LINES = 4
+
+# Solo se deduplican hunks con cuerpo de al menos este tamaño (la nota ocupa ~80)
+DEDUPE_MIN_CHARS = 120
+
+# Huecos de hasta este nº de líneas no abren un hunk nuevo (la cabecera @@
+# costaría más que las líneas que ahorra)
+MERGE_GAP_LINES = 2
+
+# Heurística de minificado: una línea añadida muy larga o media muy alta.
+# Solo en tipos de bundle/asset: una línea larga en código fuente se revisa
+MINIFIED_LINE_CHARS = 1000
+MINIFIED_AVG_CHARS = 300
+MINIFIED_SUFFIXES = (".min.js", ".min.css", ".js.map", ".css.map")
+BUNDLE_SUFFIXES = (".js", ".mjs", ".cjs", ".css", ".map", ".svg")
+
+# Ficheros donde la indentación es sintaxis: un re-indentado no es solo espaciado
+INDENT_SENSITIVE_SUFFIXES = (
+    ".py",
+    ".pyi",
+    ".pyw",
+    ".yml",
+    ".yaml",
+    ".coffee",
+    ".haml",
+    ".pug",
+    ".sass",
+    ".nim",
+)
+INDENT_SENSITIVE_NAMES = frozenset({"Makefile", "GNUmakefile"})
+
+LOCKFILE_NAMES = frozenset(
+    {
+        "package-lock.json",
+        "npm-shrinkwrap.json",
+        "yarn.lock",
+        "pnpm-lock.yaml",
+        "poetry.lock",
+        "Pipfile.lock",
+        "uv.lock",
+        "Cargo.lock",
+        "Gemfile.lock",
+        "composer.lock",
+        "go.sum",
+        "mix.lock",
+        "pubspec.lock",
+        "packages.lock.json",
+    }
+)
+
+# Estimación habitual para modelos tipo GPT/Gemini
+CHARS_PER_TOKEN = 4
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+_DROPPED_HEADERS = (
+    "index ",
+    "new file mode ",
+    "deleted file mode ",
+    "similarity index ",
+    "dissimilarity index ",
+    "--- a/",
+    '--- "a/',
+    "+++ b/",
+    '+++ "b/',
+)
+
+
+class CompactStats(NamedTuple):
+    """What a compaction pass removed.
+
+    Attributes:
+        chars_in: Size of the original diff.
+        chars_out: Size of the compacted diff.
+        files_omitted: Binary, minified and lockfile diffs replaced by a note.
+        hunks_dropped: Hunks with no significant change (whitespace only).
+        hunks_deduped: Hunks replaced by a reference to an identical one.
+    """
+
+    chars_in: int
+    chars_out: int
+    files_omitted: int = 0
+    hunks_dropped: int = 0
+    hunks_deduped: int = 0
+
+    @property
+    def chars_saved(self) -> int:
+        return self.chars_in - self.chars_out
+
+    @property
+    def tokens_saved(self) -> int:
+        """Estimated input tokens saved (~``CHARS_PER_TOKEN`` chars/token)."""
+        return self.chars_saved // CHARS_PER_TOKEN
+
+
+class _Line(NamedTuple):
+    kind: str
+    text: str
+    old_no: int
+    new_no: int
+
+
+def _omit_reason(path: str, header: List[str], body: List[str]) -> Optional[str]:
+    """Why a whole file diff is not worth sending, None if it is."""
+    if any(line.startswith(("Binary files ", "GIT binary patch")) for line in header):
+        return "binary file"
+    name = path.rsplit("/", 1)[-1]
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    if path.endswith(MINIFIED_SUFFIXES):
+        return "minified file"
+    if not path.endswith(BUNDLE_SUFFIXES):
+        return None
+    added = [len(line) for line in body if line.startswith("+")]
+    if added and (
+        max(added) > MINIFIED_LINE_CHARS or sum(added) / len(added) > MINIFIED_AVG_CHARS
+    ):
+        return "minified file"
+    return None
+
+
+def _parse_body(lines: List[str], old_no: int, new_no: int) -> List[_Line]:
+    """Tag hunk body lines with the old/new line number they start at."""
+    parsed = []
+    for line in lines:
+        kind = line[:1] or " "
+        if kind == "\\":
+            # "\ No newline at end of file": sin valor para la revisión
+            continue
+        if kind not in "+-":
+            kind = " "
+        parsed.append(_Line(kind, line, old_no, new_no))
+        if kind != "+":
+            old_no += 1
+        if kind != "-":
+            new_no += 1
+    return parsed
+
+
+def _squash(text: str, keep_indent: bool = False) -> str:
+    """Normalize a diff line like ``git diff -b``: runs of whitespace count as
+    one space and trailing whitespace is ignored. Leading indentation is
+    ignored too, unless ``keep_indent``."""
+    content = text[1:]
+    # Sin borrar espacios: "rm -rf ./build" y "rm -rf . /build" no son iguales
+    squashed = " ".join(content.split())
+    if keep_indent and squashed:
+        return content[: len(content) - len(content.lstrip())] + squashed
+    return squashed
+
+
+def _indent_sensitive(path: str) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    return name in INDENT_SENSITIVE_NAMES or name.endswith(INDENT_SENSITIVE_SUFFIXES)
+
+
+def _significant(body: List[_Line], keep_indent: bool = False) -> List[bool]:
+    """Mark changed lines worth reviewing (not whitespace-only changes).
+
+    With ``keep_indent``, a change of leading indentation is significant.
+    """
+    marks = [False] * len(body)
+    i = 0
+    while i < len(body):
+        if body[i].kind == " ":
+            i += 1
+            continue
+        # Bloque de cambios consecutivos: si solo cambia el espaciado, se ignora
+        end = i
+        while end < len(body) and body[end].kind != " ":
+            end += 1
+        block = body[i:end]
+        removed = [
+            _squash(line.text, keep_indent) for line in block if line.kind == "-"
+        ]
+        added = [_squash(line.text, keep_indent) for line in block if line.kind == "+"]
+        if removed != added:
+            for j in range(i, end):
+                marks[j] = bool(_squash(body[j].text))
+        i = end
+    return marks
+
+
+def _windows(marks: List[bool], context: int) -> List[Tuple[int, int]]:
+    """Merge ``[i - context, i + context]`` around significant lines."""
+    windows: List[Tuple[int, int]] = []
+    for i, marked in enumerate(marks):
+        if not marked:
+            continue
+        start, end = max(0, i - context), min(len(marks), i + context + 1)
+        if windows and start <= windows[-1][1] + MERGE_GAP_LINES:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def _header(lines: List[_Line], section: str) -> str:
+    old_count = sum(line.kind != "+" for line in lines)
+    new_count = sum(line.kind != "-" for line in lines)
+    # Convención de git: con 0 líneas, el inicio es la línea anterior
+    old_start = lines[0].old_no - (old_count == 0)
+    new_start = lines[0].new_no - (new_count == 0)
+    return f"@@ -{old_start},{old_count} +{new_start},{new_count} @@{section}"
+
+
+def _collapse_deletions(lines: List[_Line]) -> List[str]:
+    """Diff text of ``lines`` with long runs of deletions cut to a note."""
+    out: List[str] = []
+    run = 0
+    for line in lines:
+        if line.kind != "-":
+            run = 0
+            out.append(line.text)
+            continue
+        run += 1
+        note = f"\\ {run - MAX_DELETED_LINES} more deleted line(s)"
+        if run <= MAX_DELETED_LINES:
+            out.append(line.text)
+        elif run == MAX_DELETED_LINES + 1:
+            out.append(note)
+        else:
+            out[-1] = note
+    return out
+
+
+def compact_diff(
+    diff: str, context_lines: int = DEFAULT_CONTEXT_LINES, dedupe: bool = True
+) -> Tuple[str, CompactStats]:
+    """Compact a unified diff for the AI gate.
+
+    Args:
+        diff: Raw unified diff (``git diff`` output).
+        context_lines: Unchanged lines kept around each change.
+        dedupe: Send identical hunks only once.
+
+    Returns:
+        ``(compacted diff, stats)``.
+    """
+    context = max(0, context_lines)
+    out: List[str] = []
+    seen: Dict[str, Tuple[str, int]] = {}
+    omitted = dropped = deduped = 0
+
+    files: List[List[DiffHunk]] = []
+    for hunk in iter_hunks(diff.splitlines(), max_lines=sys.maxsize):
+        if not files or hunk.lines[0].startswith("diff --git "):
+            files.append([])
+        files[-1].append(hunk)
+
+    for hunks in files:
+        first = hunks[0]
+        if not first.lines[0].startswith("diff --git "):
+            # Texto previo a cualquier cabecera (no es un diff): se deja igual
+            out.extend(line for hunk in hunks for line in hunk.lines)
+            continue
+
+        header = first.lines
+        out.extend(line for line in header if not line.startswith(_DROPPED_HEADERS))
+        body = [line for hunk in hunks[1:] for line in hunk.lines[1:]]
+        reason = _omit_reason(first.path, header, body)
+        if reason is not None:
+            omitted += 1
+            added = sum(line.startswith("+") for line in body)
+            deleted = sum(line.startswith("-") for line in body)
+            out.append(f"\\ {reason} omitted (+{added} -{deleted} lines)")
+            continue
+
+        keep_indent = _indent_sensitive(first.path)
+        for hunk in hunks[1:]:
+            match = _HUNK_RE.match(hunk.lines[0])
+            if match is None:
+                out.extend(hunk.lines)
+                continue
+            old_start, old_count, new_start, new_count = (
+                int(group or 1) for group in match.group(1, 2, 3, 4)
+            )
+            # Con 0 líneas, el inicio es la línea anterior (ver _header)
+            parsed = _parse_body(
+                hunk.lines[1:],
+                old_start + (old_count == 0),
+                new_start + (new_count == 0),
+            )
+            windows = _windows(_significant(parsed, keep_indent), context)
+            if not windows:
+                dropped += 1
+                continue
+            for start, end in windows:
+                lines = parsed[start:end]
+                out.append(_header(lines, match.group(5)))
+                text = _collapse_deletions(lines)
+                key = "\n".join(text)
+                if not dedupe or len(key) < DEDUPE_MIN_CHARS:
+                    out.extend(text)
+                    continue
+                if key in seen:
+                    deduped += 1
+                    path, line_no = seen[key]
+                    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+                    out.append(f"\\ same lines as {path} @@ +{line_no} ({digest})")
+                    continue
+                seen[key] = (first.path, lines[0].new_no)
+                out.extend(text)
+
+    compacted = "\n".join(out)
+    return compacted, CompactStats(len(diff), len(compacted), omitted, dropped, deduped)
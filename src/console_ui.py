@@ -24,9 +24,10 @@ class OpsGuardUI:
         table = Table(show_header=True, header_style="bold white on red", box=box.ROUNDED)
         table.add_column("Type")
         table.add_column("File")
+        table.add_column("Line", style="yellow")
         
         for f in findings:
-            table.add_row(f.get("type"), f.get("file"))
+            table.add_row(f.get("type"), f.get("file"), str(f.get("line", "?")))
         
         console.print(table)
 
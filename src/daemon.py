@@ -0,0 +1,224 @@
+"""Warm scan server (``opsguard serve``) and its thin client (``scan --daemon``).
+
+A pre-commit hook that spawns ``opsguard scan`` pays the interpreter start,
+the imports and the policy compilation on every commit. The daemon keeps all
+of that resident: compiled ``SecurityPolicy`` objects and ignore specs per
+(config, ignore file), revalidated by a ``stat`` per request and hot-swapped
+when ``opsguard.yml`` changes (see ``ScanService.bundle``), and one shared
+OpenAI client whose HTTP pool keeps its connections alive between scans.
+
+Protocol: one request per connection over a Unix socket, a single JSON line
+each way. The client sends the repository path and scan options; the daemon
+reads the diff itself (one ``git diff`` invocation), so multi-MB diffs never
+cross the socket. The socket lives in a 0700 directory owned by the user.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Solo módulos ligeros a nivel de módulo: `scan --daemon` importa este fichero
+# y su arranque es lo único que paga el cliente.
+from src.pipeline import ScanOptions, ScanResult, ScanService
+from src.telemetry import Telemetry
+
+# Variables de CI que el cliente reenvía (el daemon no hereda su entorno)
+FORWARDED_ENV = ("GITHUB_ACTIONS", "GITHUB_EVENT_PATH")
+MAX_REQUEST_BYTES = 1 << 20
+
+
+class DaemonError(Exception):
+    """Custom exception for daemon connection/protocol failures."""
+
+    pass
+
+
+def default_socket_path() -> str:
+    """``$XDG_RUNTIME_DIR/opsguard.sock``, else ``/tmp/opsguard-<uid>/daemon.sock``."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return str(Path(runtime_dir) / "opsguard.sock")
+    return f"/tmp/opsguard-{os.getuid()}/daemon.sock"
+
+
+def _result_to_dict(result: Optional[ScanResult]) -> Optional[Dict[str, Any]]:
+    return None if result is None else result._asdict()
+
+
+def _result_from_dict(data: Optional[Dict[str, Any]]) -> Optional[ScanResult]:
+    return None if data is None else ScanResult(**data)
+
+
+class DaemonService(ScanService):
+    """ScanService answering socket requests, with uptime/scan counters."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.started = time.time()
+        self.scans = 0
+
+    def scan_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Run both gates for a ``scan`` request (telemetry written here)."""
+        telemetry = Telemetry(out_dir=request.get("telemetry_dir"))
+        telemetry.label("mode", "daemon")
+        exit_code = 1
+        try:
+            regex_result, ai_result = self.scan(
+                request["path"],
+                request["config"],
+                ScanOptions(**request.get("options", {})),
+                telemetry,
+                policy_cache=request.get("policy_cache", True),
+                environ=request.get("env", {}),
+            )
+            exit_code = (regex_result or ai_result).exit_code
+        finally:
+            telemetry.flush(exit_code)
+            self.scans += 1
+        return {
+            "regex": _result_to_dict(regex_result),
+            "ai": _result_to_dict(ai_result),
+            # Perfil por regla de este escaneo (--profile-rules), para el cliente
+            "rules": telemetry.rules,
+        }
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "ping":
+            return {
+                "pid": os.getpid(),
+                "uptime_s": round(time.time() - self.started, 3),
+                "scans": self.scans,
+                "bundles": self.bundle_count,
+                "reloads": self.reloads,
+                "reload_errors": self.reload_errors,
+            }
+        if op == "scan":
+            return self.scan_request(request)
+        return {"error": f"unknown op: {op!r}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            response = self.server.service.handle(json.loads(line))
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _prepare_socket(socket_path: str) -> None:
+    """Create the private socket directory and clear a stale socket file."""
+    sock_dir = Path(socket_path).parent
+    sock_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if sock_dir.stat().st_uid != os.getuid():
+        raise DaemonError(f"Socket directory not owned by current user: {sock_dir}")
+    if not os.path.exists(socket_path):
+        return
+    try:
+        request(socket_path, {"op": "ping"}, timeout=1.0)
+    except DaemonError:
+        os.unlink(socket_path)
+        return
+    raise DaemonError(f"Another OpsGuard daemon is listening on {socket_path}")
+
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """Serve scan requests on ``socket_path`` until SIGINT/SIGTERM."""
+    socket_path = socket_path or default_socket_path()
+    _prepare_socket(socket_path)
+
+    server = _Server(socket_path, _Handler)
+    server.service = DaemonService()
+    os.chmod(socket_path, 0o600)
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _stop)
+    print(f"🛡️ OpsGuard daemon listening on {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+def request(
+    socket_path: str, payload: Dict[str, Any], timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """Send one request to the daemon and return its decoded response.
+
+    Raises:
+        DaemonError: If the daemon is unreachable or the response is invalid.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+    except OSError as e:
+        raise DaemonError(f"OpsGuard daemon not reachable at {socket_path}: {e}")
+    try:
+        response = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise DaemonError(f"Invalid response from OpsGuard daemon: {e}")
+    if "error" in response:
+        raise DaemonError(response["error"])
+    return response
+
+
+def request_scan(
+    socket_path: str,
+    path: str,
+    config: str,
+    options: ScanOptions,
+    policy_cache: bool = True,
+    telemetry_dir: Optional[str] = None,
+) -> Tuple[Optional[ScanResult], Optional[ScanResult]]:
+    """Scan ``path`` through the daemon.
+
+    With ``options.profile_rules``, the rule profile of the scan is printed
+    here (the daemon records it in its telemetry).
+
+    Returns:
+        ``(regex_result, ai_result)`` as produced by the two gates.
+
+    Raises:
+        DaemonError: If the daemon is unreachable or fails.
+    """
+    telemetry_dir = telemetry_dir or os.getenv("OPSGUARD_TELEMETRY_DIR")
+    response = request(
+        socket_path,
+        {
+            "op": "scan",
+            "path": os.path.abspath(path),
+            "config": os.path.abspath(config),
+            "options": options._asdict(),
+            "policy_cache": policy_cache,
+            "env": {k: os.environ[k] for k in FORWARDED_ENV if k in os.environ},
+            "telemetry_dir": os.path.abspath(telemetry_dir) if telemetry_dir else None,
+        },
+    )
+    if response.get("rules"):
+        from src.scan_profile import ScanProfile
+
+        print(ScanProfile.from_dict(response["rules"]).format_table())
+    return _result_from_dict(response["regex"]), _result_from_dict(response["ai"])
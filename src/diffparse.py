@@ -0,0 +1,395 @@
+"""Incremental unified-diff parsing (no git dependency).
+
+Turns a stream of raw ``git diff`` output (bytes chunks or lines) into hunks
+without ever materializing the whole diff, so the regex gate can run with
+bounded memory on arbitrarily large PRs.
+"""
+
+import codecs
+import re
+from array import array
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+# Tamaño de lectura del stdout de git.
+DIFF_CHUNK_SIZE = 64 * 1024
+
+# Hunks gigantes (ficheros generados) se parten en piezas de este tamaño
+# para acotar la memoria. El scanner solapa piezas consecutivas del mismo fichero.
+MAX_HUNK_LINES = 5000
+
+# "@@ -a,b +c,d @@": solo nos interesa c (primera línea en el fichero nuevo).
+_HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)")
+
+
+class DiffHunk(NamedTuple):
+    """A slice of a unified diff belonging to a single file.
+
+    Attributes:
+        path: New-file path the lines belong to ("" before any file header).
+        lines: Raw diff lines, including the leading ``diff --git``/``@@``
+            boundary line when the slice starts at one.
+        new_start: New-file line number of the first body line, or 0 for
+            slices outside a ``@@`` hunk (file headers, non-diff text).
+    """
+
+    path: str
+    lines: List[str]
+    new_start: int = 0
+
+    def text(self) -> str:
+        """Return the raw diff text of this slice."""
+        return "\n".join(self.lines) + "\n"
+
+
+def iter_diff_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode byte chunks into lines, buffering lines split across chunks.
+
+    Multi-byte UTF-8 sequences cut at a chunk boundary are handled by an
+    incremental decoder. Line splitting matches ``str.splitlines``.
+
+    Args:
+        chunks: Raw output chunks (e.g. from a subprocess pipe).
+
+    Yields:
+        Diff lines without line terminators.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+
+    for chunk in chunks:
+        text = pending + decoder.decode(chunk)
+        # git termina cada línea con "\n": cortamos en el último y dejamos el
+        # resto pendiente. splitlines() sobre el bloque completo equivale al
+        # splitlines() del diff entero (incluido "\r\n").
+        cut = text.rfind("\n")
+        if cut == -1:
+            pending = text
+            continue
+        pending = text[cut + 1 :]
+        yield from text[: cut + 1].splitlines()
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield from pending.splitlines()
+
+
+# Escapes de C con los que git entrecomilla rutas (core.quotePath)
+_C_ESCAPES = {
+    "a": 7,
+    "b": 8,
+    "t": 9,
+    "n": 10,
+    "v": 11,
+    "f": 12,
+    "r": 13,
+    '"': 34,
+    "\\": 92,
+}
+_OCTAL = set("01234567")
+# Último argumento entrecomillado de una cabecera: "b/caf\303\251.py"
+_QUOTED_TAIL_RE = re.compile(r'"(?:[^"\\]|\\.)*"$')
+
+
+def unquote_path(path: str) -> str:
+    """Undo git's C-quoting of a header path (``"caf\\303\\251.py"``).
+
+    Octal escapes are UTF-8 bytes of the original name; unquoted paths are
+    returned unchanged.
+    """
+    if len(path) < 2 or path[0] != '"' or path[-1] != '"':
+        return path
+    body = path[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char != "\\" or i + 1 == len(body):
+            out += char.encode("utf-8")
+            i += 1
+        elif body[i + 1] in _C_ESCAPES:
+            out.append(_C_ESCAPES[body[i + 1]])
+            i += 2
+        elif len(body) >= i + 4 and set(body[i + 1 : i + 4]) <= _OCTAL:
+            out.append(int(body[i + 1 : i + 4], 8) & 0xFF)
+            i += 4
+        else:
+            out += char.encode("utf-8")
+            i += 1
+    return out.decode("utf-8", errors="replace")
+
+
+def _strip_prefix(path: str, prefix: str) -> str:
+    return path[len(prefix) :] if path.startswith(prefix) else path
+
+
+def _path_from_git_header(line: str) -> str:
+    """Extract the new-file path from a ``diff --git a/x b/x`` line."""
+    rest = line[len("diff --git ") :]
+    quoted = _QUOTED_TAIL_RE.search(rest)
+    if quoted:
+        return _strip_prefix(unquote_path(quoted.group()), "b/")
+    _, sep, new_path = rest.rpartition(" b/")
+    return new_path if sep else rest
+
+
+def _count_new_lines(lines: List[str]) -> int:
+    """Count body lines that exist in the new file (added + context)."""
+    return sum(1 for line in lines if not line or line[0] in "+ ")
+
+
+def iter_hunks(
+    lines: Iterable[str], max_lines: int = MAX_HUNK_LINES
+) -> Iterator[DiffHunk]:
+    """Group diff lines into per-file hunks.
+
+    Every line ends up in exactly one hunk (headers included), so joining
+    all hunks reproduces the original diff. Text that is not a diff at all
+    becomes a single hunk with an empty path.
+
+    Args:
+        lines: Diff lines without terminators.
+        max_lines: Hunks longer than this are split into several slices.
+
+    Yields:
+        DiffHunk slices in diff order.
+    """
+    path = ""
+    in_file_header = False
+    new_start = 0
+    body: List[str] = []
+
+    for line in lines:
+        if line.startswith("diff --git "):
+            if body:
+                yield DiffHunk(path, body, new_start)
+            body = [line]
+            path = _path_from_git_header(line)
+            in_file_header = True
+            new_start = 0
+            continue
+
+        if line.startswith("@@"):
+            if body:
+                yield DiffHunk(path, body, new_start)
+            body = [line]
+            in_file_header = False
+            header = _HUNK_HEADER_RE.match(line)
+            new_start = int(header.group(1)) if header else 0
+            continue
+
+        if in_file_header and line.startswith("+++ ") and line[4:] != "/dev/null":
+            path = _strip_prefix(unquote_path(line[4:]), "b/")
+
+        body.append(line)
+        if len(body) >= max_lines:
+            yield DiffHunk(path, body, new_start)
+            if new_start:
+                new_start += _count_new_lines(body)
+            body = []
+
+    if body:
+        yield DiffHunk(path, body, new_start)
+
+
+def content_hunks(
+    path: str, text: str, max_lines: int = MAX_HUNK_LINES
+) -> Iterator[DiffHunk]:
+    """Present a whole file as added lines (full-tree scans).
+
+    Yields:
+        DiffHunk slices of at most ``max_lines`` ``+`` lines, numbered from
+        line 1, which the scanner treats exactly like a new file's diff.
+    """
+    lines = text.splitlines()
+    for start in range(0, len(lines), max_lines):
+        body = ["+" + line for line in lines[start : start + max_lines]]
+        yield DiffHunk(path, body, start + 1)
+
+
+def split_by_file(diff_text: str) -> Dict[str, str]:
+    """Split a unified diff into per-file raw diff texts (diff order kept)."""
+    files: Dict[str, List[str]] = {}
+    for hunk in iter_hunks(diff_text.splitlines()):
+        files.setdefault(hunk.path, []).append(hunk.text())
+    return {path: "".join(parts) for path, parts in files.items()}
+
+
+class DiffChunk(NamedTuple):
+    """A self-contained piece of a diff sized for one model request.
+
+    Attributes:
+        text: Raw diff text (hunk-level pieces repeat the file header).
+        paths: Files whose changes are (partially) contained in ``text``.
+    """
+
+    text: str
+    paths: List[str]
+
+
+def _split_file(
+    path: str, file_diff: str, max_size: int, measure: Callable[[str], int]
+) -> Iterator[DiffChunk]:
+    """Split one oversized file diff at hunk (and, if needed, line) boundaries."""
+    header = ""
+    header_size = 0
+    pieces: List[Tuple[str, int]] = []
+    for hunk in iter_hunks(file_diff.splitlines()):
+        if not hunk.new_start and not pieces and not header:
+            header = hunk.text()
+            header_size = measure(header)
+            continue
+        text = hunk.text()
+        text_size = measure(text)
+        if header_size + text_size <= max_size:
+            pieces.append((text, text_size))
+            continue
+        # Hunk gigante: cortamos por líneas (la pieza pierde el contexto @@)
+        budget = max(1, max_size - header_size)
+        piece: List[str] = []
+        size = 0
+        for line in hunk.lines:
+            line_size = measure(line + "\n")
+            if piece and size + line_size > budget:
+                pieces.append(("\n".join(piece) + "\n", size))
+                piece, size = [], 0
+            piece.append(line)
+            size += line_size
+        if piece:
+            pieces.append(("\n".join(piece) + "\n", size))
+
+    current, size = header, header_size
+    for text, text_size in pieces:
+        if current != header and size + text_size > max_size:
+            yield DiffChunk(current, [path])
+            current, size = header, header_size
+        current += text
+        size += text_size
+    if current:
+        yield DiffChunk(current, [path])
+
+
+def pack_files(
+    files: Dict[str, str], max_size: int, measure: Callable[[str], int] = len
+) -> List[DiffChunk]:
+    """Pack per-file diffs into chunks of at most ``max_size``.
+
+    Whole files are packed together while they fit; a file larger than the
+    budget is split at hunk boundaries, each piece carrying the file header.
+
+    Args:
+        files: Mapping of path to raw per-file diff (see ``split_by_file``).
+        max_size: Size budget per chunk, in ``measure`` units.
+        measure: Size of a text (characters by default; the AI engine
+            passes ``src.tokens.count_tokens``).
+
+    Returns:
+        Chunks in ``files`` order.
+    """
+    chunks: List[DiffChunk] = []
+    parts: List[str] = []
+    paths: List[str] = []
+    size = 0
+
+    for path, file_diff in files.items():
+        file_size = measure(file_diff)
+        if file_size > max_size:
+            if parts:
+                chunks.append(DiffChunk("".join(parts), paths))
+                parts, paths, size = [], [], 0
+            chunks.extend(_split_file(path, file_diff, max_size, measure))
+            continue
+        if parts and size + file_size > max_size:
+            chunks.append(DiffChunk("".join(parts), paths))
+            parts, paths, size = [], [], 0
+        parts.append(file_diff)
+        paths.append(path)
+        size += file_size
+
+    if parts:
+        chunks.append(DiffChunk("".join(parts), paths))
+    return chunks
+
+
+class DiffIndex:
+    """Compact files → hunks → added lines index over (a window of) a diff.
+
+    Added lines are stored as a flat list of strings plus parallel ``array``
+    columns (offset in the joined text, new-file line number, hunk id), so
+    there are no per-line dicts or tuples. The index is filled in the same
+    pass that extracts the added content for the regex engine, which makes
+    mapping a match offset back to ``(file, line)`` a single bisect.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self.paths: List[str] = []
+        self.hunk_paths = array("I")
+        self.lines: List[str] = []
+        self.line_numbers = array("I")
+        self.line_hunks = array("I")
+        self.offsets = array("Q")
+        self.chars = 0
+        self._path_ids: Dict[str, int] = {}
+        self._current_hunk = -1
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def _new_hunk(self, path: str) -> None:
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            path_id = self._path_ids[path] = len(self.paths)
+            self.paths.append(path)
+        self._current_hunk = len(self.hunk_paths)
+        self.hunk_paths.append(path_id)
+
+    def _append(self, content: str, line_no: int) -> None:
+        self.offsets.append(self.chars)
+        self.line_numbers.append(line_no)
+        self.line_hunks.append(self._current_hunk)
+        self.lines.append(content)
+        self.chars += len(content) + 1
+
+    def add_hunk(self, hunk: DiffHunk) -> None:
+        """Index the added lines of ``hunk`` with their new-file line numbers.
+
+        Inside a ``@@`` hunk every ``+`` line is added content. Outside of
+        one (file headers, non-diff text) ``+++`` header lines are skipped
+        and line numbers are unknown (0).
+        """
+        self._new_hunk(hunk.path)
+        line_no = hunk.new_start
+        in_hunk = line_no > 0
+
+        for line in hunk.lines:
+            if line.startswith("+"):
+                if in_hunk:
+                    self._append(line[1:], line_no)
+                    line_no += 1
+                elif not line.startswith("+++"):
+                    self._append(line[1:], 0)
+            elif in_hunk and (not line or line[0] == " "):
+                line_no += 1
+
+    def text(self) -> str:
+        """Return the added lines joined with newlines (engine input)."""
+        return "\n".join(self.lines)
+
+    def locate(self, offset: int) -> Tuple[str, int]:
+        """Map an offset in ``text()`` to ``(path, new-file line number)``."""
+        idx = bisect_right(self.offsets, offset) - 1
+        path = self.paths[self.hunk_paths[self.line_hunks[idx]]]
+        return path, self.line_numbers[idx]
+
+    def tail(self, count: int) -> "DiffIndex":
+        """Return a new index holding only the last ``count`` added lines."""
+        tail = DiffIndex()
+        last_hunk = -1
+        for idx in range(max(0, len(self.lines) - count), len(self.lines)):
+            hunk_id = self.line_hunks[idx]
+            if hunk_id != last_hunk:
+                tail._new_hunk(self.paths[self.hunk_paths[hunk_id]])
+                last_hunk = hunk_id
+            tail._append(self.lines[idx], self.line_numbers[idx])
+        return tail
@@ -0,0 +1,176 @@
+"""Shannon-entropy secret detector (second stage of the regex gate).
+
+The blocklist only knows secrets with a recognizable shape. This detector
+catches random tokens assigned to arbitrary variables: candidates are
+quoted or assigned values drawn from a hex/base64 alphabet, scored in
+batches from per-token byte histograms. Large batches are vectorized with
+NumPy when it is importable (optional, not a hard dependency); small ones, or
+environments without NumPy, use C-level counting plus a lookup table of
+``c*log2(c)``, never a per-character Python loop.
+"""
+
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MIN_LENGTH = 20
+DEFAULT_THRESHOLDS = {"hex": 3.0, "base64": 4.5}
+CHARSETS = tuple(DEFAULT_THRESHOLDS)
+
+# Tokens puntuados por lote (acota la matriz de histogramas a ~4 MiB).
+BATCH_SIZE = 4096
+# Por debajo de este número de candidatos no compensa importar NumPy (~0.1s).
+NUMPY_MIN_TOKENS = 2048
+
+_HEX_RE = re.compile(r"[0-9a-fA-F]+")
+
+# Candidatos: valores entrecomillados o asignados (x = ..., key: ...) del
+# alfabeto base64/base64url con el padding "=" final. Los filtros van dentro
+# del regex (sin bucle Python por candidato):
+#   - debe mezclar letras y dígitos (descarta identificadores y números);
+#   - digests de integridad ("sha512-..." de lockfiles, "sha256:...") no son
+#     secretos: ni el token puede empezar por uno ni ":" seguir a un dígito.
+_CANDIDATE_TEMPLATE = (
+    r"(?:=\s*[\"'`]?|(?<![0-9]):\s*[\"'`]?|[\"'`])"
+    r"(?!(?:sha|md)[0-9]{1,3}[-:])"
+    r"(?=[A-Za-z0-9+/_\-]*?[0-9])(?=[A-Za-z0-9+/_\-]*?[A-Za-z])"
+    r"([A-Za-z0-9+/_\-]{%d,}={0,2})"
+)
+
+_numpy: Any = None
+
+
+def _load_numpy() -> Any:
+    """Import NumPy on first use; False when it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+
+def _clogc_table(max_count: int) -> array:
+    """``c * log2(c)`` for every count up to ``max_count``."""
+    return array("d", [0.0] + [c * math.log2(c) for c in range(1, max_count + 1)])
+
+
+def _entropy_counter(tokens: Sequence[str]) -> List[float]:
+    table = _clogc_table(max(map(len, tokens)))
+    lookup = table.__getitem__
+    return [
+        math.log2(len(token)) - sum(map(lookup, Counter(token).values())) / len(token)
+        for token in tokens
+    ]
+
+
+def _entropy_numpy(np: Any, tokens: Sequence[str]) -> List[float]:
+    table = np.frombuffer(_clogc_table(max(map(len, tokens))), dtype=np.float64)
+    scores: List[float] = []
+    for start in range(0, len(tokens), BATCH_SIZE):
+        batch = tokens[start : start + BATCH_SIZE]
+        lengths = np.fromiter(map(len, batch), dtype=np.int64, count=len(batch))
+        codes = np.frombuffer("".join(batch).encode("ascii"), dtype=np.uint8)
+        rows = np.repeat(np.arange(len(batch), dtype=np.int64), lengths)
+        # Histograma por token: una fila de 128 contadores (alfabeto ASCII)
+        counts = np.bincount(rows * 128 + codes, minlength=len(batch) * 128)
+        counts = counts.reshape(len(batch), 128)
+        scores.extend((np.log2(lengths) - table[counts].sum(axis=1) / lengths).tolist())
+    return scores
+
+
+def shannon_entropy(tokens: Sequence[str]) -> List[float]:
+    """Shannon entropy (bits per character) of each ASCII token.
+
+    Args:
+        tokens: Non-empty ASCII strings.
+
+    Returns:
+        One score per token, in input order.
+    """
+    if not tokens:
+        return []
+    if len(tokens) >= NUMPY_MIN_TOKENS:
+        np = _load_numpy()
+        if np:
+            return _entropy_numpy(np, tokens)
+    return _entropy_counter(tokens)
+
+
+class EntropyDetector:
+    """Flags high-entropy hex/base64 tokens in added diff content."""
+
+    def __init__(
+        self,
+        thresholds: Optional[Dict[str, Optional[float]]] = None,
+        min_length: int = DEFAULT_MIN_LENGTH,
+    ) -> None:
+        """Create a detector.
+
+        Args:
+            thresholds: Minimum entropy (bits/char) per charset (``hex``,
+                ``base64``); ``None`` turns a charset off. Missing charsets
+                use ``DEFAULT_THRESHOLDS``.
+            min_length: Minimum candidate token length.
+
+        Raises:
+            ValueError: On unknown charsets or invalid values.
+        """
+        thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        unknown = set(thresholds) - set(CHARSETS)
+        if unknown:
+            raise ValueError(f"unknown entropy charset(s): {sorted(unknown)}")
+        if not isinstance(min_length, int) or min_length < 8:
+            raise ValueError("'min_length' must be an integer >= 8")
+
+        self.thresholds = {
+            name: None if value is None else float(value)
+            for name, value in thresholds.items()
+        }
+        self.min_length = min_length
+        self._candidate_re = re.compile(_CANDIDATE_TEMPLATE % min_length)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "EntropyDetector":
+        """Build a detector from the ``entropy`` section of opsguard.yml."""
+        return cls(
+            thresholds=config.get("thresholds"),
+            min_length=config.get("min_length", DEFAULT_MIN_LENGTH),
+        )
+
+    def to_config(self) -> Dict[str, Any]:
+        """Serializable configuration (inverse of ``from_config``)."""
+        return {"thresholds": dict(self.thresholds), "min_length": self.min_length}
+
+    def scan(self, text: str) -> List[Tuple[str, str, int, float]]:
+        """Find high-entropy tokens in ``text``.
+
+        Tokens must mix letters and digits, which rules out identifiers,
+        words and plain numbers. Integrity digests (``sha512-...`` in
+        lockfiles, ``sha256:...``) are skipped.
+
+        Returns:
+            ``(charset, token, offset, entropy)`` tuples in text order.
+        """
+        is_hex = _HEX_RE.fullmatch
+        thresholds = self.thresholds
+        candidates = [
+            (charset, token, match.start(1))
+            for match in self._candidate_re.finditer(text)
+            for token in (match.group(1),)
+            for charset in ("hex" if is_hex(token) else "base64",)
+            # Charset desactivado: ni se puntúa
+            if thresholds[charset] is not None
+        ]
+
+        scores = shannon_entropy([token for _, token, _ in candidates])
+        return [
+            (charset, token, offset, score)
+            for (charset, token, offset), score in zip(candidates, scores)
+            if score >= thresholds[charset]
+        ]
@@ -0,0 +1,243 @@
+"""Persistent index of already-scanned history (``.git/opsguard/index.sqlite``).
+
+Scans of commit ranges record, once the whole scan (both gates) is over,
+every scanned commit with its outcome and every file change, keyed by its
+(old blob, new blob) pair, with its regex findings and the final status of
+the scan. A later scan skips indexed commits entirely and, inside new
+commits, skips file changes already seen (cherry-picks, rebases, reverts,
+the same vendored file landing in several branches), reusing the stored
+findings. A scheduled scan of a busy branch therefore costs time
+proportional to the new commits, not to the whole history.
+
+A blob pair fixes the added lines exactly, so reusing its regex findings
+gives the same result as rescanning it. Only pairs that are settled without
+the AI are reused: pairs of an approved scan, and pairs with regex
+findings. A pair of a scan the AI blocked is scanned (and reviewed) again. The index belongs to one policy digest
+(rules, entropy config, ignore patterns): when ``opsguard.yml`` or
+``.opsguardignore`` change, it is emptied on open. ``opsguard index
+invalidate`` deletes it explicitly. As with the verdict cache, index failures
+never break the gate: on SQLite errors the index disables itself.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.ingest import FileChange
+
+INDEX_DIRNAME = "opsguard"
+INDEX_FILENAME = "index.sqlite"
+NULL_SHA = "0" * 40
+# Versión del esquema: un índice de otra versión se vacía al abrirlo
+INDEX_SCHEMA = "2"
+# Estados finales cuyo resultado no depende de la IA más allá de aprobar
+SETTLED_STATUSES = ("approve", "skip")
+
+
+def index_path(git_common_dir: str) -> Path:
+    """Location of the index inside a repository's git directory."""
+    return Path(git_common_dir) / INDEX_DIRNAME / INDEX_FILENAME
+
+
+def _pair(change: FileChange) -> Optional[Tuple[str, str]]:
+    """Blob pair of a change, None when the new side is not a stored blob."""
+    if not change.blob or change.blob == NULL_SHA:
+        return None
+    return change.old_blob, change.blob
+
+
+def invalidate(git_common_dir: str) -> bool:
+    """Delete the index of a repository; False if there was none."""
+    path = index_path(git_common_dir)
+    removed = False
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            Path(f"{path}{suffix}").unlink()
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+class HistoryIndex:
+    """SQLite index of scanned commits and blob pairs for one repository.
+
+    Safe to share between the threads of a batch run.
+    """
+
+    def __init__(self, git_common_dir: str, policy_digest: str) -> None:
+        """Open (or create) the index of a repository.
+
+        Args:
+            git_common_dir: Repository git directory (``GitManager.common_dir``).
+            policy_digest: ``PolicyBundle.digest`` of the active policy; an
+                index built with another policy is emptied.
+        """
+        self.path = index_path(git_common_dir)
+        self.policy_digest = policy_digest
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(self.path), timeout=5.0, check_same_thread=False
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            meta = dict(self._db.execute("SELECT key, value FROM meta"))
+            if meta.get("schema") != INDEX_SCHEMA:
+                self._db.executescript(
+                    "DROP TABLE IF EXISTS commits; DROP TABLE IF EXISTS blobs;"
+                )
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS commits ("
+                " sha TEXT PRIMARY KEY, status TEXT, scanned REAL);"
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " old_blob TEXT, blob TEXT, status TEXT, findings TEXT,"
+                " PRIMARY KEY (old_blob, blob));"
+            )
+            if (
+                meta.get("schema") != INDEX_SCHEMA
+                or meta.get("policy") != policy_digest
+            ):
+                self._db.executescript("DELETE FROM commits; DELETE FROM blobs;")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("schema", INDEX_SCHEMA), ("policy", policy_digest)],
+                )
+            self._db.commit()
+        except (OSError, sqlite3.Error) as e:
+            self._disable(e)
+
+    def _disable(self, error: Exception) -> None:
+        print(f"⚠️ History index disabled: {error}")
+        if self._db is not None:
+            self._db.close()
+        self._db = None
+
+    def commit_status(self, sha: str) -> Optional[str]:
+        """Outcome recorded for commit ``sha``, None if it was never scanned."""
+        if self._db is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT status FROM commits WHERE sha = ?", (sha,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        return row[0] if row else None
+
+    def record_commit(self, sha: str, status: str) -> None:
+        """Mark commit ``sha`` as scanned with outcome ``status``."""
+        if self._db is None:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO commits VALUES (?, ?, ?)",
+                    (sha, status, time.time()),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def _lookup(self, change: FileChange) -> Optional[List[Dict[str, Any]]]:
+        """Stored findings of a settled blob pair, None if it must be scanned."""
+        pair = _pair(change)
+        if self._db is None or pair is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT status, findings FROM blobs"
+                    " WHERE old_blob = ? AND blob = ?",
+                    pair,
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        if row is None:
+            return None
+        findings = json.loads(row[1])
+        # Sin hallazgos regex, solo un escaneo aprobado deja el par resuelto
+        if not findings and row[0] not in SETTLED_STATUSES:
+            return None
+        return findings
+
+    def is_known(self, change: FileChange) -> bool:
+        """True when this blob pair's result can be reused (``read_changes``
+        hook): it was scanned before and either had regex findings or was
+        part of an approved scan."""
+        return self._lookup(change) is not None
+
+    def findings(self, changes: Iterable[FileChange]) -> List[Dict[str, Any]]:
+        """Stored findings of known changes, relabelled with today's paths.
+
+        Raises:
+            KeyError: If a change vanished from the index (e.g. invalidated
+                mid-scan); its result cannot be reused.
+        """
+        findings = []
+        for change in changes:
+            stored = self._lookup(change)
+            if stored is None:
+                raise KeyError(f"{change.path} is no longer in the history index")
+            findings.extend({**finding, "file": change.path} for finding in stored)
+        return findings
+
+    def record_changes(
+        self,
+        changes: Iterable[FileChange],
+        violations: List[Dict[str, Any]],
+        status: str,
+    ) -> None:
+        """Store the findings of freshly scanned changes per blob pair.
+
+        Args:
+            changes: Changes scanned in full (not known, no aborted rule).
+            violations: Regex findings of the scan.
+            status: Final status of the scan (both gates).
+        """
+        if self._db is None:
+            return
+        by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for violation in violations:
+            entry = {k: v for k, v in violation.items() if k != "file"}
+            by_file.setdefault(violation["file"], []).append(entry)
+        rows = [
+            (*pair, status, json.dumps(by_file.get(change.path, [])))
+            for change in changes
+            for pair in (_pair(change),)
+            if pair is not None
+        ]
+        try:
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)", rows
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of indexed commits and blob pairs."""
+        if self._db is None:
+            return {"commits": 0, "blobs": 0}
+        with self._lock:
+            return {
+                table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("commits", "blobs")
+            }
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
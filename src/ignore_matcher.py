@@ -0,0 +1,243 @@
+"""Compiled ``.opsguardignore`` matcher for very large changed-file lists.
+
+``pathspec.PathSpec.match_file`` runs every pattern's regex on every path,
+so a PR touching 50k files (vendoring, codegen) pays patterns x paths regex
+searches before the scan starts. ``IgnoreMatcher`` gives the same answers
+(gitwildmatch, last matching pattern wins) from an index of the patterns:
+
+- literal names (``node_modules``, ``build/``, ``**/foo``) in hash sets,
+  looked up per path component;
+- ``*.ext`` style suffixes in hash sets, looked up per dot of a component;
+- anchored literal paths (``/dist``, ``docs/api/``, ``out/**``) in a trie
+  keyed by path component;
+- anything else (wildcards in the middle, character classes, escapes) keeps
+  pathspec's own regex, tried only when it could still change the result.
+
+Directory-level decisions are cached per directory: once a directory is
+matched by a pattern that covers its whole subtree and no later pattern
+could re-include a file in it, every file below is decided by one dict
+lookup.
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (índice del patrón, include) del último patrón que casa; (-1, False) si ninguno
+_Hit = Tuple[int, bool]
+_NO_HIT: _Hit = (-1, False)
+_ALTSEP = os.sep != "/"
+
+# Patrones que admiten índice: solo caracteres sin significado especial
+_LITERAL = re.compile(r"[A-Za-z0-9_.+@=,%~-]+")
+
+
+class _TrieNode:
+    """Component of an anchored literal pattern."""
+
+    __slots__ = ("children", "path", "subtree")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        # ``a/b``: casa la ruta exacta y todo lo que cuelga de ella
+        self.path: _Hit = _NO_HIT
+        # ``a/b/``: solo lo que cuelga de ella
+        self.subtree: _Hit = _NO_HIT
+
+
+def _store(table: Dict[str, _Hit], key: str, hit: _Hit) -> None:
+    # Índices únicos: el máximo de las tuplas es el último patrón que casa
+    table[key] = max(table.get(key, _NO_HIT), hit)
+
+
+def _is_literal(text: str) -> bool:
+    return bool(_LITERAL.fullmatch(text)) and text.strip(".") != ""
+
+
+def _parse(body: str) -> Tuple[str, bool, bool, bool]:
+    """Split a pattern (without ``!``) into ``(path, anchored, dir_only,
+    indexable)``: ``path`` without the ``**/``, ``/**`` or ``/`` markers."""
+    leading = body.startswith("**/")
+    if leading:
+        body = body[3:]
+    dir_only = anchored = False
+    if body.endswith("/**"):
+        body, dir_only, anchored = body[:-3], True, not leading
+    elif body.endswith("/"):
+        body, dir_only = body[:-1], True
+    if body.startswith("/") or "/" in body:
+        if leading:
+            # ``**/a/b``: varios componentes en cualquier nivel, solo por regex
+            return body, False, dir_only, False
+        anchored = True
+    return body.lstrip("/") if anchored else body, anchored, dir_only, True
+
+
+class IgnoreMatcher:
+    """Drop-in for ``PathSpec.from_lines("gitwildmatch", lines).match_file``.
+
+    Paths are expected as git reports them (relative, ``/``-separated);
+    anything unusual (a leading ``/`` or ``./``, empty components, a
+    trailing ``/``) is delegated to the equivalent ``PathSpec`` so the answer
+    is always the same.
+    """
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        """
+        Args:
+            lines: Lines of ``.opsguardignore`` (comments and blanks allowed).
+        """
+        self.lines = list(lines)
+        self._names: Dict[str, _Hit] = {}
+        self._dir_names: Dict[str, _Hit] = {}
+        self._suffixes: Dict[str, _Hit] = {}
+        self._dir_suffixes: Dict[str, _Hit] = {}
+        self._root = _TrieNode()
+        # Regex de pathspec para el resto, del último patrón al primero
+        self._regexes: List[Tuple[int, Any]] = []
+        # Negaciones: (índice, prefijo literal anclado o None si en cualquier nivel)
+        self._negations: List[Tuple[int, Optional[str]]] = []
+        self._last_pattern = -1
+        self._dir_cache: Dict[str, Tuple[_Hit, Optional[_TrieNode], bool]] = {}
+
+        import pathspec
+
+        # Mismo parser que PathSpec: comentarios, escapes y negaciones idénticos
+        self.spec = pathspec.PathSpec.from_lines("gitwildmatch", self.lines)
+        for index, pattern in enumerate(self.spec.patterns):
+            if pattern.include is None:
+                continue
+            hit = (index, pattern.include)
+            self._last_pattern = index
+            line = pattern.pattern
+            body = line[1:] if line.startswith("!") else line
+            path, anchored, dir_only, indexable = _parse(body)
+            if not pattern.include:
+                self._negations.append((index, self._anchor(path, anchored)))
+            if not (indexable and self._index(path, anchored, dir_only, hit)):
+                self._regexes.append(hit + (pattern.regex,))
+        self._regexes.reverse()
+        self._suffix_lengths = sorted(
+            {len(suffix) for suffix in [*self._suffixes, *self._dir_suffixes]}
+        )
+
+    @staticmethod
+    def _anchor(path: str, anchored: bool) -> Optional[str]:
+        """Literal leading directories of an anchored pattern (None if it can
+        match at any depth)."""
+        if not anchored:
+            return None
+        literal = []
+        for part in path.split("/"):
+            if not _is_literal(part):
+                break
+            literal.append(part)
+        return "/".join(literal) or None
+
+    def _index(self, path: str, anchored: bool, dir_only: bool, hit: _Hit) -> bool:
+        """Add a pattern to the index; False if it needs its regex."""
+        if not anchored:
+            if _is_literal(path):
+                _store(self._dir_names if dir_only else self._names, path, hit)
+                return True
+            suffix = path[1:]
+            if path.startswith("*") and _is_literal(suffix):
+                _store(self._dir_suffixes if dir_only else self._suffixes, suffix, hit)
+                return True
+            return False
+        parts = path.split("/")
+        if not all(_is_literal(part) for part in parts):
+            return False
+        node = self._root
+        for part in parts:
+            node = node.children.setdefault(part, _TrieNode())
+        if dir_only:
+            node.subtree = max(node.subtree, hit)
+        else:
+            node.path = max(node.path, hit)
+        return True
+
+    def _component(
+        self, name: str, names: Dict[str, _Hit], suffixes: Dict[str, _Hit]
+    ) -> _Hit:
+        """Last pattern of ``names``/``suffixes`` matching one path component."""
+        hit = names.get(name, _NO_HIT)
+        if suffixes:
+            for length in self._suffix_lengths:
+                if length > len(name):
+                    break
+                hit = max(hit, suffixes.get(name[-length:], _NO_HIT))
+        return hit
+
+    def _final(self, directory: str, hit: _Hit) -> bool:
+        """Whether ``hit`` decides every file below ``directory``: no later
+        pattern can change an ignore, or no later pattern exists at all."""
+        index, include = hit
+        if index == self._last_pattern:
+            return True
+        if not include:
+            return False
+        for negation, anchor in self._negations:
+            if negation > index and (
+                anchor is None
+                or f"{directory}/".startswith(f"{anchor}/")
+                or anchor.startswith(f"{directory}/")
+            ):
+                return False
+        return True
+
+    def _directory(self, path: str) -> Tuple[_Hit, Optional[_TrieNode], bool]:
+        """Last subtree-wide pattern matching directory ``path`` (or a parent),
+        its trie node and whether that decides the whole subtree; cached per
+        directory."""
+        cached = self._dir_cache.get(path)
+        if cached is not None:
+            return cached
+        parent, _, name = path.rpartition("/")
+        if parent:
+            hit, node, final = self._directory(parent)
+            if final:
+                # Subárbol ya decidido: ni se mira el componente
+                self._dir_cache[path] = (hit, None, True)
+                return hit, None, True
+        else:
+            hit, node = _NO_HIT, self._root
+        hit = max(hit, self._component(name, self._names, self._suffixes))
+        hit = max(hit, self._component(name, self._dir_names, self._dir_suffixes))
+        if node is not None:
+            node = node.children.get(name)
+            if node is not None:
+                hit = max(hit, node.path, node.subtree)
+        cached = (hit, node, hit[0] >= 0 and self._final(path, hit))
+        self._dir_cache[path] = cached
+        return cached
+
+    def match_file(self, path: str) -> bool:
+        """Whether ``path`` is ignored (same result as ``PathSpec.match_file``)."""
+        if _ALTSEP:
+            path = path.replace(os.sep, "/")
+        if path[:1] == "/" or path[:2] == "./" or path[-1:] in ("", "/"):
+            return self.spec.match_file(path)
+        if "//" in path:
+            return self.spec.match_file(path)
+
+        directory, _, name = path.rpartition("/")
+        if directory:
+            cached = self._dir_cache.get(directory) or self._directory(directory)
+            hit, node, final = cached
+            if final:
+                return hit[1]
+        else:
+            hit, node = _NO_HIT, self._root
+
+        hit = max(hit, self._component(name, self._names, self._suffixes))
+        if node is not None:
+            node = node.children.get(name)
+            if node is not None:
+                hit = max(hit, node.path)
+        for index, include, regex in self._regexes:
+            if index <= hit[0]:
+                break
+            if regex.search(path) is not None:
+                return include
+        return hit[1]
@@ -1,10 +1,45 @@
 import json
 import os
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from git import Repo
-from git.exc import GitCommandError, InvalidGitRepositoryError
+from git.exc import (
+    BadObject,
+    GitCommandError,
+    InvalidGitRepositoryError,
+    NoSuchPathError,
+)
+
+from src.diffparse import (
+    DIFF_CHUNK_SIZE,
+    DiffHunk,
+    content_hunks,
+    iter_diff_lines,
+    iter_hunks,
+)
+
+
+# Árbol vacío de git: "padre" de los commits raíz al recorrer historia
+EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+# Similitud mínima (%) para que git empareje un borrado+alta como rename/copia
+RENAME_THRESHOLD = 50
+
+_NULL_BLOB = "0" * 40
 
 
 class GitIngestError(Exception):
@@ -12,34 +47,223 @@ class GitIngestError(Exception):
     pass
 
 
+class FileChange(NamedTuple):
+    """One entry of ``git diff --raw`` (same information as --name-status).
+
+    Attributes:
+        status: Status letter(s) with score, e.g. ``M``, ``A``, ``D``, ``R087``.
+        path: Path in the new tree (the old path for deletions).
+        old_path: Source path of a rename/copy, "" otherwise.
+        old_blob: Blob ID before the change (all zeros when created).
+        blob: Blob ID after the change (all zeros when deleted or when the
+            new side is the unhashed working tree).
+    """
+
+    status: str
+    path: str
+    old_path: str = ""
+    old_blob: str = ""
+    blob: str = ""
+
+    @property
+    def similarity(self) -> int:
+        """Similarity score of a rename/copy (``R087`` -> 87), 0 otherwise."""
+        if self.status[:1] in ("R", "C") and self.status[1:].isdigit():
+            return int(self.status[1:])
+        return 0
+
+
+class ChangeSet(NamedTuple):
+    """Result of a single ``git diff`` invocation.
+
+    Attributes:
+        changes: Every changed file, in diff order.
+        targets: Paths of ``changes`` to scan (not ignored, not known).
+        hunks: Lazy stream of diff hunks belonging to ``targets`` only.
+        known: Changes skipped because the history index already holds
+            their result.
+        moved: Pure renames/copies (100% similar): no new content, not
+            scanned.
+    """
+
+    changes: List[FileChange]
+    targets: List[str]
+    hunks: Iterator[DiffHunk]
+    known: Sequence[FileChange] = ()
+    moved: Sequence[FileChange] = ()
+
+
+class MergeBase(NamedTuple):
+    """Merge-base used as the start of a PR diff.
+
+    Attributes:
+        sha: Merge-base of the PR base and head ("" if it could not be
+            found, e.g. in a shallow clone: base..head is diffed instead).
+        base: The PR base it replaces.
+        upstream_files: Files changed on the base branch since the
+            merge-base, no longer part of the diff.
+        upstream_lines: Lines added/deleted by those changes.
+    """
+
+    sha: str
+    base: str
+    upstream_files: int = 0
+    upstream_lines: int = 0
+
+
+@lru_cache(maxsize=8)
+def _load_event(event_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the GitHub event JSON once per file version (mtime in the key)."""
+    try:
+        return json.loads(Path(event_path).read_text())
+    except json.JSONDecodeError as e:
+        raise GitIngestError(f"Failed to parse GitHub event JSON: {e}")
+
+
+def _parse_raw(raw: bytes) -> List[FileChange]:
+    """Parse the NUL-separated ``--raw -z`` section into FileChange entries."""
+    tokens = iter(raw.decode("utf-8", errors="replace").split("\0"))
+    changes: List[FileChange] = []
+    for meta in tokens:
+        if not meta.startswith(":"):
+            continue
+        # ":<old mode> <new mode> <old blob> <new blob> <status>"
+        _, _, old_blob, blob, status = meta.split(" ")
+        if status[:1] in ("R", "C"):
+            old_path, path = next(tokens, ""), next(tokens, "")
+            changes.append(FileChange(status, path, old_path, old_blob, blob))
+        else:
+            changes.append(FileChange(status, next(tokens, ""), "", old_blob, blob))
+    return changes
+
+
+def _rename_args(threshold: int) -> List[str]:
+    """Rename/copy detection flags (explicit: ``diff.renames`` may be off)."""
+    if threshold <= 0:
+        return ["--no-renames"]
+    return [f"--find-renames={threshold}%", f"--find-copies={threshold}%"]
+
+
+def _shortstat_counts(stat: str) -> Tuple[int, int]:
+    """``(files, lines)`` of a ``git diff --shortstat`` summary."""
+    files = lines = 0
+    for part in stat.split(","):
+        words = part.split()
+        if len(words) >= 2 and words[0].isdigit():
+            if words[1].startswith("file"):
+                files = int(words[0])
+            else:
+                lines += int(words[0])
+    return files, lines
+
+
+def _select_hunks(
+    hunks: Iterable[DiffHunk],
+    changes: List[FileChange],
+    wanted: Callable[[FileChange], bool],
+) -> Iterator[DiffHunk]:
+    """Keep hunks of ``wanted`` changes and label them with the exact raw path.
+
+    The patch lists files in the same order as the raw section, so each
+    ``diff --git`` header is paired with the next raw entry, whose path is
+    exact (``-z`` disables the C-quoting of non-ASCII names in headers).
+    A typechange (``T``, e.g. symlink -> file) is one raw entry but two
+    patch blocks with the same header, so a repeated header keeps the
+    current entry. Unquoted header paths are checked against the entry and
+    resynchronized on mismatch, so a block is never labeled (and filtered)
+    as another file.
+    """
+    pos = 0
+    header, change, keep = "", FileChange("", ""), True
+    for hunk in hunks:
+        first = hunk.lines[0] if hunk.lines else ""
+        if first.startswith("diff --git "):
+            if first != header:
+                change, pos = _match_entry(changes, pos, first, hunk.path)
+            header = first
+            # Bloque sin entrada raw: se escanea (falla cerrado)
+            keep = wanted(change) if change.status else True
+        if keep:
+            yield hunk._replace(path=change.path) if change.path else hunk
+
+
+def _match_entry(
+    changes: List[FileChange], pos: int, header: str, header_path: str
+) -> Tuple[FileChange, int]:
+    """Raw entry of the patch block starting at ``header`` (and next position).
+
+    Entries from ``pos`` on are candidates: the first one whose paths spell
+    an unquoted header wins (entries without a patch block are skipped);
+    quoted headers, whose paths are escaped, take the next entry.
+    """
+    if '"' not in header:
+        for idx in range(pos, len(changes)):
+            change = changes[idx]
+            old_path = change.old_path or change.path
+            if header == f"diff --git a/{old_path} b/{change.path}":
+                return change, idx + 1
+        return FileChange("", header_path), pos
+    if pos < len(changes):
+        return changes[pos], pos + 1
+    return FileChange("", header_path), pos
+
+
 class GitManager:
     """Encapsulates gitpython operations for reading repository changes."""
 
-    def __init__(self, repo_path: str = ".") -> None:
-        """Initialize GitManager with the repository path."""
+    def __init__(
+        self,
+        repo_path: str = ".",
+        environ: Optional[Dict[str, str]] = None,
+        revisions: Optional[Tuple[str, str]] = None,
+    ) -> None:
+        """Initialize GitManager with the repository path.
+
+        Args:
+            repo_path: Repository to read.
+            environ: Environment holding the CI variables (``GITHUB_ACTIONS``,
+                ``GITHUB_EVENT_PATH``). Defaults to ``os.environ``; the daemon
+                passes the client's environment instead of its own.
+            revisions: Explicit ``(base, head)`` to diff (batch mode); takes
+                precedence over the CI event and the local HEAD diff.
+        """
+        self.environ = os.environ if environ is None else environ
+        self.revisions = revisions
         try:
             self.repo = Repo(repo_path)
-        except InvalidGitRepositoryError as e:
+        except (InvalidGitRepositoryError, NoSuchPathError) as e:
             raise GitIngestError(f"Invalid git repository at '{repo_path}': {e}")
+        self._ci_shas: Optional[Tuple[str, str]] = None
+        # Se calcula con el primer diff de CI (ver _ci_range)
+        self.merge_base: Optional[MergeBase] = None
+
+    @property
+    def common_dir(self) -> str:
+        """Shared git directory (``.git``, also for linked worktrees)."""
+        return self.repo.common_dir
 
     def is_ci(self) -> bool:
         """Check if running in GitHub Actions CI environment."""
-        return os.environ.get("GITHUB_ACTIONS") is not None
+        return self.environ.get("GITHUB_ACTIONS") is not None
 
     def _get_ci_shas(self) -> Tuple[str, str]:
-        """Helper: Extract base and head SHAs from GitHub Event JSON."""
-        event_path = os.environ.get("GITHUB_EVENT_PATH")
+        """Helper: Extract base and head SHAs from GitHub Event JSON.
+
+        The SHAs are memoized per manager and the parsed event per file, so
+        the event JSON is read at most once per run.
+        """
+        if self._ci_shas is not None:
+            return self._ci_shas
+
+        event_path = self.environ.get("GITHUB_EVENT_PATH")
         if not event_path:
             raise GitIngestError("GITHUB_EVENT_PATH environment variable not set")
 
-        event_file = Path(event_path)
-        if not event_file.exists():
-            raise GitIngestError(f"GitHub event file not found: {event_path}")
-
         try:
-            event_data = json.loads(event_file.read_text())
-        except json.JSONDecodeError as e:
-            raise GitIngestError(f"Failed to parse GitHub event JSON: {e}")
+            mtime_ns = Path(event_path).stat().st_mtime_ns
+        except OSError:
+            raise GitIngestError(f"GitHub event file not found: {event_path}")
+        event_data = _load_event(event_path, mtime_ns)
 
         # --- FIX: DETECCIÓN DE EVENTOS NO-PR ---
         pull_request = event_data.get("pull_request")
@@ -58,8 +282,178 @@ class GitManager:
 
         if not base_sha or not head_sha:
             raise GitIngestError("Missing base.sha or head.sha in pull_request event data")
-            
-        return base_sha, head_sha
+
+        self._ci_shas = (base_sha, head_sha)
+        return self._ci_shas
+
+    def _ci_range(self) -> Tuple[str, str]:
+        """PR range from the merge-base of base and head (what the PR really
+        changes, like ``base...head``): a branch behind its base would
+        otherwise carry every upstream change since it forked."""
+        base_sha, head_sha = self._get_ci_shas()
+        if self.merge_base is None:
+            self.merge_base = self._find_merge_base(base_sha, head_sha)
+        return self.merge_base.sha or base_sha, head_sha
+
+    def _find_merge_base(self, base: str, head: str) -> MergeBase:
+        try:
+            sha = self.repo.git.merge_base(base, head).strip()
+        except GitCommandError:
+            # Clon superficial sin el ancestro común: diff directo base..head
+            return MergeBase("", base)
+        if sha == base:
+            return MergeBase(sha, base)
+        try:
+            stat = self.repo.git.diff("--shortstat", "--no-renames", sha, base)
+        except GitCommandError:
+            stat = ""
+        return MergeBase(sha, base, *_shortstat_counts(stat))
+
+    def _diff_range(self) -> List[str]:
+        """Commits to diff: explicit revisions, the PR from its merge-base in
+        CI, or HEAD vs the working tree locally."""
+        if self.revisions is not None:
+            return list(self.revisions)
+        if self.is_ci():
+            return list(self._ci_range())
+        return ["HEAD"]
+
+    def read_changes(
+        self,
+        is_ignored: Optional[Callable[[str], bool]] = None,
+        chunk_size: int = DIFF_CHUNK_SIZE,
+        is_known: Optional[Callable[[FileChange], bool]] = None,
+        rename_threshold: int = RENAME_THRESHOLD,
+    ) -> ChangeSet:
+        """List changed files and stream their diff from ONE git process.
+
+        Runs ``git diff -z --raw -p``: the NUL-separated raw section (status
+        and paths, like ``--name-status``) is parsed eagerly, the patch that
+        follows is streamed lazily. Ignored files are filtered in-process, so
+        no pathspec ever goes on the command line (no ARG_MAX limit).
+
+        Renames and copies are detected, so a moved file is not a full
+        deletion plus addition: an edited move only carries its changed
+        lines, and a pure move (100% similar) is not scanned at all.
+
+        Args:
+            is_ignored: Predicate for paths to exclude (e.g.
+                ``PathSpec.match_file``). Nothing is excluded when None.
+            chunk_size: Bytes read from the git process per iteration.
+            is_known: Predicate for changes whose result is already known
+                (history index); they are listed in ``known``, not scanned.
+            rename_threshold: Minimum similarity (%) of a rename/copy;
+                0 disables the detection.
+
+        Returns:
+            ChangeSet with all changes, the targets, a lazy hunk iterator
+            for the targets, the known changes and the pure moves.
+
+        Raises:
+            GitIngestError: If git fails (also while iterating the hunks).
+        """
+        is_ignored = is_ignored or (lambda path: False)
+        chunks = self._stream_diff(
+            [
+                *self._diff_range(),
+                *_rename_args(rename_threshold),
+                "-z",
+                "--raw",
+                "--no-abbrev",
+                # Prefijos fijos aunque el usuario tenga diff.noprefix
+                "--src-prefix=a/",
+                "--dst-prefix=b/",
+                "-p",
+            ],
+            chunk_size,
+        )
+
+        # La sección raw termina con un NUL extra ("\0\0"); el resto es el patch.
+        raw, rest = b"", b""
+        for chunk in chunks:
+            start = max(0, len(raw) - 1)
+            raw += chunk
+            end = raw.find(b"\0\0", start)
+            if end != -1:
+                raw, rest = raw[: end + 1], raw[end + 2:]
+                break
+
+        changes = _parse_raw(raw)
+        relevant = [c for c in changes if not is_ignored(c.path)]
+        # Traído desde una ruta ignorada: su contenido nunca se escaneó, va entero
+        unmasked = {c for c in relevant if c.similarity and is_ignored(c.old_path)}
+        # Mismo contenido en otra ruta: ni hunks ni nada nuevo que escanear
+        moved = [c for c in relevant if c.similarity == 100 and c not in unmasked]
+        relevant = [c for c in relevant if c.similarity != 100 or c in unmasked]
+        known = [c for c in relevant if is_known(c)] if is_known else []
+        selected = set(relevant).difference(known)
+        targets = [c.path for c in relevant if c in selected]
+        if not targets:
+            # Nada que revisar: cerramos git sin leer el patch
+            chunks.close()
+            return ChangeSet(changes, targets, iter(()), known, moved)
+
+        lines = iter_diff_lines(chain([rest], chunks))
+        diffed = selected.difference(unmasked)
+        hunks = _select_hunks(iter_hunks(lines), changes, diffed.__contains__)
+        full = [c for c in relevant if c in selected and c in unmasked]
+        if full:
+            hunks = chain(hunks, *(self._content_hunks(c) for c in full))
+        return ChangeSet(changes, targets, hunks, known, moved)
+
+    def _content_hunks(self, change: FileChange) -> Iterator[DiffHunk]:
+        """The whole new content of a change, as the diff of a new file."""
+        try:
+            if change.blob and change.blob != _NULL_BLOB:
+                data = self.repo.odb.stream(bytes.fromhex(change.blob)).read()
+            else:
+                data = Path(self.repo.working_dir, change.path).read_bytes()
+        except (OSError, ValueError, BadObject, GitCommandError) as e:
+            raise GitIngestError(f"Failed to read '{change.path}': {e}")
+        # Mismo criterio de binario que git (NUL en los primeros 8000 bytes)
+        if b"\0" in data[:8000]:
+            return
+        path = change.path
+        yield DiffHunk(path, [f"diff --git a/{path} b/{path}", "--- /dev/null", f"+++ b/{path}"])
+        for hunk in content_hunks(path, data.decode("utf-8", errors="replace")):
+            header = f"@@ -0,0 +{hunk.new_start},{len(hunk.lines)} @@"
+            yield hunk._replace(lines=[header, *hunk.lines])
+
+    def blob_bytes(self, changes: Iterable[FileChange]) -> int:
+        """Total size of the content of ``changes`` (new side, or old side
+        when the new one is the unhashed working tree)."""
+        total = 0
+        for change in changes:
+            blob = change.blob if change.blob != _NULL_BLOB else change.old_blob
+            if not blob or blob == _NULL_BLOB:
+                continue
+            try:
+                total += self.repo.odb.info(bytes.fromhex(blob)).size
+            except (ValueError, BadObject, GitCommandError):
+                continue
+        return total
+
+    def list_commits(self, rev_range: str) -> List[Tuple[str, str]]:
+        """Non-merge commits of ``rev_range`` (e.g. ``v1.0..main``), oldest first.
+
+        Returns:
+            ``(parent, sha)`` pairs, ready to use as ``revisions``; root
+            commits are paired with the empty tree.
+
+        Raises:
+            GitIngestError: If the range cannot be resolved.
+        """
+        try:
+            out = self.repo.git.rev_list(
+                "--reverse", "--no-merges", "--parents", rev_range
+            )
+        except GitCommandError as e:
+            raise GitIngestError(f"Failed to list commits of '{rev_range}': {e}")
+        commits = []
+        for line in out.splitlines():
+            sha, *parents = line.split()
+            commits.append((parents[0] if parents else EMPTY_TREE_SHA, sha))
+        return commits
 
     def get_staged_files(self) -> List[str]:
         """Get list of changed filenames (for pre-filtering).
@@ -69,7 +463,7 @@ class GitManager:
         """
         try:
             if self.is_ci():
-                base_sha, head_sha = self._get_ci_shas()
+                base_sha, head_sha = self._ci_range()
                 # Equivalent to: git diff --name-only base head
                 diff_text = self.repo.git.diff(base_sha, head_sha, name_only=True)
             else:
@@ -91,13 +485,14 @@ class GitManager:
         Returns:
             The git diff as a string.
         """
-        # Preparar argumentos extra para gitpython (file filtering)
-        # git diff <commit> -- file1 file2
-        extra_args = ["--"] + files if files else []
+        if files:
+            # Filtrado en proceso: nunca pasamos miles de rutas por argv
+            diff = "".join(hunk.text() for hunk in self.iter_diff_hunks(files))
+            return diff[:-1] if diff.endswith("\n") else diff
 
         if self.is_ci():
-            return self._get_ci_diff(extra_args)
-        return self._get_local_diff(extra_args)
+            return self._get_ci_diff([])
+        return self._get_local_diff([])
 
     def _get_local_diff(self, extra_args: List[str]) -> str:
         """Get diff for local development."""
@@ -109,11 +504,62 @@ class GitManager:
 
     def _get_ci_diff(self, extra_args: List[str]) -> str:
         """Get diff for GitHub Actions CI environment."""
-        base_sha, head_sha = self._get_ci_shas()
+        base_sha, head_sha = self._ci_range()
 
         try:
             return self.repo.git.diff(base_sha, head_sha, *extra_args)
         except GitCommandError as e:
             raise GitIngestError(
                 f"Failed to get diff between {base_sha} and {head_sha}: {e}"
-            )
\ No newline at end of file
+            )
+
+    def iter_diff_hunks(
+        self,
+        files: Optional[List[str]] = None,
+        chunk_size: int = DIFF_CHUNK_SIZE,
+    ) -> Iterator[DiffHunk]:
+        """Stream the git diff as hunks instead of returning one big string.
+
+        The ``git diff`` stdout is read in ``chunk_size`` blocks, so peak
+        memory stays bounded by the largest hunk slice regardless of the
+        total diff size.
+
+        Args:
+            files: Optional list of files to limit the diff to (filtered
+                in-process, see ``read_changes``).
+            chunk_size: Bytes read from the git process per iteration.
+
+        Returns:
+            Lazy iterator of DiffHunk slices.
+
+        Raises:
+            GitIngestError: If git fails (raised while iterating).
+        """
+        if files:
+            wanted = set(files)
+            return self.read_changes(lambda path: path not in wanted, chunk_size).hunks
+
+        return iter_hunks(
+            iter_diff_lines(self._stream_diff(self._diff_range(), chunk_size))
+        )
+
+    def _stream_diff(self, diff_args: List[str], chunk_size: int) -> Iterator[bytes]:
+        """Yield raw ``git diff`` output chunks from the subprocess pipe."""
+        try:
+            proc = self.repo.git.diff(*diff_args, as_process=True)
+        except GitCommandError as e:
+            raise GitIngestError(f"Failed to start git diff: {e}")
+
+        try:
+            while True:
+                chunk = proc.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            proc.wait()
+        except GitCommandError as e:
+            raise GitIngestError(f"Failed to stream diff: {e}")
+        finally:
+            # Si el consumidor abandona el generador, no dejamos git colgado.
+            if proc.poll() is None:
+                proc.kill()
@@ -1,8 +1,8 @@
 """Main CLI entry point for OpsGuard-AI."""
+import contextlib
 import sys
-import os
 import typer
-from typing import Annotated
+from typing import Annotated, Optional
 from pathlib import Path
 
 app = typer.Typer(
@@ -21,113 +21,462 @@ def main_callback():
 def scan(
     path: Annotated[str, typer.Option(help="Path to the repository to scan.")] = ".",
     config: Annotated[str, typer.Option(help="Path to security policy config.")] = "opsguard.yml",
+    stream: Annotated[bool, typer.Option(help="Stream the git diff in chunks (bounded memory for huge PRs).")] = False,
+    cache: Annotated[bool, typer.Option(help="Reuse cached AI verdicts for unchanged files.")] = True,
+    ai_max_chunks: Annotated[int, typer.Option(help="Max diff chunks sent to the AI per run.")] = 8,
+    ai_workers: Annotated[int, typer.Option(help="Max concurrent AI requests.")] = 4,
+    ai_stream: Annotated[bool, typer.Option(help="Stream AI responses (TTFT + early BLOCK abort).")] = True,
+    ai_early_abort_risk: Annotated[int, typer.Option(help="Abort a streamed response once BLOCK with this risk score is emitted (0 = never).")] = 8,
+    telemetry_dir: Annotated[Optional[str], typer.Option(help="Directory for JSONL/OpenMetrics telemetry (or $OPSGUARD_TELEMETRY_DIR).")] = None,
+    policy_cache: Annotated[bool, typer.Option(help="Reuse the compiled policy bundle while opsguard.yml/.opsguardignore are unchanged.")] = True,
+    regex_workers: Annotated[int, typer.Option(help="Processes for the regex scan of large diffs (1 = in-process, 0 = all CPU cores).")] = 1,
+    ai_compact: Annotated[bool, typer.Option(help="Compact the diff before the AI stage (trim context, drop whitespace-only/binary/minified/lockfile noise, dedupe hunks).")] = True,
+    ai_context_lines: Annotated[int, typer.Option(help="Context lines kept around each change when compacting.")] = 2,
+    ai_max_tokens: Annotated[int, typer.Option(help="Token budget sent to the AI per run (files packed source > config > tests).")] = 60000,
+    ai_max_cost: Annotated[float, typer.Option(help="Refuse the AI stage if its estimated cost exceeds this many USD (0 = no cap).")] = 0.0,
+    ai_triage: Annotated[bool, typer.Option(help="Apply the local risk triage of opsguard.yml ('triage' section): low-risk files are approved without the AI.")] = True,
+    ai_fail_closed: Annotated[bool, typer.Option(help="Block when the AI token/chunk budget leaves files unreviewed (default: approve with a warning).")] = False,
+    rename_threshold: Annotated[int, typer.Option(help="Similarity (%) for git to pair a deletion and an addition as a move; pure moves are not rescanned (0 = no detection).")] = 50,
+    profile_rules: Annotated[bool, typer.Option(help="Time every regex rule and print its matches, bytes scanned, match time and suppressions (also in the telemetry record).")] = False,
+    daemon: Annotated[bool, typer.Option(help="Delegate the scan to a running 'opsguard serve' (falls back to in-process).")] = False,
+    socket: Annotated[Optional[str], typer.Option(help="Daemon socket path (default: $XDG_RUNTIME_DIR/opsguard.sock).")] = None,
+    report_format: Annotated[str, typer.Option("--format", help="Report format: console, plain, jsonl or sarif (progress goes to stderr for all but console).")] = "console",
+    output: Annotated[str, typer.Option(help="File the report is written to ('-' = stdout).")] = "-",
 ) -> None:
     """
     Hybrid Security Gate: Regex Shield + AI Brain.
     """
-    # --- LAZY IMPORTS ---
-    import pathspec
-    from src.ai import AIEngine
+    from src.pipeline import ScanOptions
+
+    options = ScanOptions(
+        stream=stream,
+        cache=cache,
+        ai_max_chunks=ai_max_chunks,
+        ai_workers=ai_workers,
+        ai_stream=ai_stream,
+        ai_early_abort_risk=ai_early_abort_risk,
+        regex_workers=regex_workers,
+        ai_compact=ai_compact,
+        ai_context_lines=ai_context_lines,
+        ai_max_tokens=ai_max_tokens,
+        ai_max_cost=ai_max_cost,
+        ai_triage=ai_triage,
+        ai_fail_closed=ai_fail_closed,
+        rename_threshold=rename_threshold,
+        profile_rules=profile_rules,
+    )
+
+    with _reporting(report_format, output) as reporter:
+        if daemon:
+            from src.daemon import DaemonError, default_socket_path, request_scan
+
+            try:
+                regex_result, ai_result = request_scan(
+                    socket or default_socket_path(), path, config, options,
+                    policy_cache=policy_cache, telemetry_dir=telemetry_dir,
+                )
+            except DaemonError as e:
+                typer.secho(f"⚠️ {e}. Scanning in-process.", fg=typer.colors.YELLOW)
+            else:
+                # La telemetría de la ejecución la registra el daemon
+                reporter.banner()
+                _report_regex(regex_result, reporter)
+                _report_ai(ai_result, reporter)
+                return
+
+        _scan_in_process(path, config, options, policy_cache, telemetry_dir, reporter)
+
+
+def _scan_in_process(path: str, config: str, options, policy_cache: bool, telemetry_dir, reporter) -> None:
+    """Run the gates here, with one telemetry record per run."""
+    from src.telemetry import Telemetry
+
+    telemetry = Telemetry(out_dir=telemetry_dir)
+    exit_code = 1
+    try:
+        _run_scan(path, config, options, policy_cache, telemetry, reporter)
+        exit_code = 0
+    except typer.Exit as e:
+        exit_code = e.exit_code
+        raise
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+        raise
+    finally:
+        # Un registro por ejecución, también en BLOCK / error / skip
+        telemetry.flush(exit_code)
+
+
+@app.command()
+def serve(
+    socket: Annotated[Optional[str], typer.Option(help="Socket path (default: $XDG_RUNTIME_DIR/opsguard.sock).")] = None,
+) -> None:
+    """
+    Keep policies and the AI client warm for 'opsguard scan --daemon'.
+    """
+    from src.daemon import DaemonError, serve as serve_forever
+
+    try:
+        serve_forever(socket)
+    except DaemonError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
+        sys.exit(1)
+
+
+@app.command()
+def batch(
+    manifest: Annotated[str, typer.Argument(help="JSON-lines manifest: {\"repo\": path, \"range\": \"base..head\"} per line.")],
+    config: Annotated[str, typer.Option(help="Path to security policy config.")] = "opsguard.yml",
+    output: Annotated[str, typer.Option(help="JSON-lines results file ('-' = stdout).")] = "-",
+    checkpoint: Annotated[Optional[str], typer.Option(help="Checkpoint file: finished scans are skipped when re-run.")] = None,
+    jobs: Annotated[int, typer.Option(help="Concurrent scans.")] = 4,
+    cache: Annotated[bool, typer.Option(help="Reuse cached AI verdicts for unchanged files.")] = True,
+    ai_max_chunks: Annotated[int, typer.Option(help="Max diff chunks sent to the AI per scan.")] = 8,
+    ai_workers: Annotated[int, typer.Option(help="Max concurrent AI requests per scan.")] = 4,
+    ai_compact: Annotated[bool, typer.Option(help="Compact the diff before the AI stage.")] = True,
+    ai_context_lines: Annotated[int, typer.Option(help="Context lines kept around each change when compacting.")] = 2,
+    ai_max_tokens: Annotated[int, typer.Option(help="Token budget sent to the AI per scan.")] = 60000,
+    ai_max_cost: Annotated[float, typer.Option(help="Refuse the AI stage of a scan above this estimated cost in USD (0 = no cap).")] = 0.0,
+    ai_triage: Annotated[bool, typer.Option(help="Apply the local risk triage of opsguard.yml to each scan.")] = True,
+    ai_fail_closed: Annotated[bool, typer.Option(help="Block a scan when the AI budget leaves files unreviewed.")] = False,
+    rename_threshold: Annotated[int, typer.Option(help="Similarity (%) for git to pair a deletion and an addition as a move (0 = no detection).")] = 50,
+    profile_rules: Annotated[bool, typer.Option(help="Profile every regex rule; per-scan counters go to the telemetry, the totals of the run to stderr.")] = False,
+    telemetry_dir: Annotated[Optional[str], typer.Option(help="Directory for JSONL/OpenMetrics telemetry (or $OPSGUARD_TELEMETRY_DIR).")] = None,
+    policy_cache: Annotated[bool, typer.Option(help="Reuse the compiled policy bundle while opsguard.yml/.opsguardignore are unchanged.")] = True,
+    history: Annotated[bool, typer.Option(help="Skip commits and blob changes already in each repo's history index (.git/opsguard).")] = True,
+) -> None:
+    """
+    Scan many repositories / commit ranges in one process (JSON lines out).
+    """
+    import time
+    from src.batch import BatchError, Checkpoint, load_manifest, run_batch
+    from src.pipeline import ScanOptions
+
+    options = ScanOptions(
+        cache=cache, ai_max_chunks=ai_max_chunks, ai_workers=ai_workers,
+        ai_compact=ai_compact, ai_context_lines=ai_context_lines,
+        ai_max_tokens=ai_max_tokens, ai_max_cost=ai_max_cost, ai_triage=ai_triage,
+        ai_fail_closed=ai_fail_closed,
+        rename_threshold=rename_threshold, profile_rules=profile_rules,
+    )
+    start = time.perf_counter()
+    try:
+        entries = load_manifest(manifest)
+        progress = Checkpoint(checkpoint)
+    except BatchError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED, err=True)
+        sys.exit(1)
+
+    out = sys.stdout if output == "-" else open(output, "a", encoding="utf-8")
+    try:
+        # El progreso de cada escaneo (renames, triaje, FinOps...) va a stderr:
+        # stdout solo lleva los resultados JSONL
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = run_batch(
+                entries, config, options, out, progress,
+                jobs=jobs, policy_cache=policy_cache, telemetry_dir=telemetry_dir,
+                history=history,
+            )
+    finally:
+        progress.close()
+        if out is not sys.stdout:
+            out.close()
+
+    resumed, indexed = summary.pop("resumed"), summary.pop("indexed")
+    counts = ", ".join(f"{status}={n}" for status, n in sorted(summary.items()))
+    typer.secho(
+        f"📦 Batch: {sum(summary.values())} scans ({counts or 'none'}), "
+        f"{resumed} resumed from checkpoint, {indexed} already indexed, "
+        f"{time.perf_counter() - start:.1f}s",
+        err=True,
+    )
+    if summary.get("block") or summary.get("error"):
+        sys.exit(1)
+
+
+@app.command()
+def audit(
+    path: Annotated[str, typer.Option(help="Path to the repository to scan.")] = ".",
+    config: Annotated[str, typer.Option(help="Path to security policy config.")] = "opsguard.yml",
+    rev: Annotated[Optional[str], typer.Option(help="Scan this commit's tree instead of the working tree.")] = None,
+    read_workers: Annotated[int, typer.Option(help="Threads reading files/blobs.")] = 8,
+    regex_workers: Annotated[int, typer.Option(help="Processes for the regex scan (1 = in-process, 0 = all CPU cores).")] = 1,
+    policy_cache: Annotated[bool, typer.Option(help="Reuse the compiled policy bundle while opsguard.yml/.opsguardignore are unchanged.")] = True,
+    telemetry_dir: Annotated[Optional[str], typer.Option(help="Directory for JSONL/OpenMetrics telemetry (or $OPSGUARD_TELEMETRY_DIR).")] = None,
+    profile_rules: Annotated[bool, typer.Option(help="Time every regex rule and print its matches, bytes scanned, match time and suppressions (also in the telemetry record).")] = False,
+    report_format: Annotated[str, typer.Option("--format", help="Report format: console, plain, jsonl or sarif (progress goes to stderr for all but console).")] = "console",
+    output: Annotated[str, typer.Option(help="File the report is written to ('-' = stdout).")] = "-",
+) -> None:
+    """
+    Scan every file of the working tree (or of --rev), not just a diff. Regex shield only.
+    """
+    with _reporting(report_format, output) as reporter:
+        _audit(path, config, rev, read_workers, regex_workers, policy_cache, telemetry_dir, profile_rules, reporter)
+
+
+def _audit(path: str, config: str, rev, read_workers: int, regex_workers: int, policy_cache: bool, telemetry_dir, profile_rules: bool, reporter) -> None:
+    """Full-tree scan behind 'opsguard audit'."""
+    import os
+    import time
     from src.ingest import GitManager
-    from src.security import SecurityPolicy
-    from src.console_ui import OpsGuardUI
+    from src.policy_bundle import load_policy_bundle
+    from src.scan_profile import ScanProfile
+    from src.telemetry import Telemetry
+    from src.tree_scan import scan_tree
+
+    reporter.banner()
+    telemetry = Telemetry(out_dir=telemetry_dir)
+    telemetry.label("mode", "tree")
+    exit_code = 1
+    start = time.perf_counter()
+    profile = ScanProfile() if profile_rules else None
+    try:
+        try:
+            with telemetry.stage("config_load"):
+                bundle = load_policy_bundle(
+                    config, str(Path(path) / ".opsguardignore"), use_cache=policy_cache
+                )
+            manager = GitManager(repo_path=path)
+            result = scan_tree(
+                manager, bundle.policy, bundle.ignore_matcher.match_file, telemetry,
+                rev=rev, read_workers=max(1, read_workers),
+                regex_workers=regex_workers or os.cpu_count() or 1,
+                profile=profile,
+            )
+        except Exception as e:
+            reporter.message(f"❌ Audit Error: {e}", "error")
+            reporter.finish("error")
+            sys.exit(1)
 
-    OpsGuardUI.print_banner()
+        reporter.message(
+            f"🌳 Tree {rev or 'working tree'}: {result.files} files, {result.ignored} ignored, "
+            f"{result.skipped} skipped (binary/symlink), {result.duplicates} duplicate(s); "
+            f"{result.scanned} scanned ({result.bytes_scanned / 1e6:.1f} MB) "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        if profile is not None:
+            profile.record(telemetry)
+            print(profile.format_table())
+        with telemetry.stage("report"):
+            reporter.regex_findings(result.violations)
+        if result.violations:
+            telemetry.outcome = "block"
+            reporter.finish("block")
+            sys.exit(1)
+        telemetry.outcome = "approve"
+        reporter.finish("approve")
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+        raise
+    finally:
+        telemetry.flush(exit_code)
 
-    def _load_ignore_spec(root: Path) -> pathspec.PathSpec:
-        """Carga patrones de exclusión."""
-        ignore_path = root / ".opsguardignore"
-        lines = []
-        if ignore_path.exists():
-            with open(ignore_path, "r") as f:
-                lines = f.read().splitlines()
-        lines.extend([".git/", "*.lock"]) 
-        return pathspec.PathSpec.from_lines("gitwildmatch", lines)
 
-    # 1. Init & Git Context
+index_app = typer.Typer(help="Manage the per-repo history index used by 'opsguard batch'.", no_args_is_help=True)
+app.add_typer(index_app, name="index")
+
+
+@index_app.command("status")
+def index_status(
+    path: Annotated[str, typer.Option(help="Path to the repository.")] = ".",
+    config: Annotated[str, typer.Option(help="Path to security policy config.")] = "opsguard.yml",
+) -> None:
+    """
+    Show how many commits and blob changes are indexed for the current policy.
+    """
+    from src.history_index import index_path
+    from src.ingest import GitIngestError, GitManager
+
     try:
-        root_path = Path(path)
-        policy = SecurityPolicy(config_path=config)
-        manager = GitManager(repo_path=str(root_path))
-        
-        # Pre-filtering Stage
-        ignore_spec = _load_ignore_spec(root_path)
-        
-        # [SECURITY AUDIT NOTE]
-        # Implementation of Standard Ignore Mechanism.
-        # This uses 'pathspec' to filter non-code artifacts.
-        all_staged_files = manager.get_staged_files() 
-        
-        target_files = [
-            f for f in all_staged_files 
-            if not ignore_spec.match_file(f)
-        ]
-
-        if not target_files:
-            print("✨ No relevant changes detected (filtered by .opsguardignore).")
-            # Esto lanza una excepción 'Exit' que debemos dejar pasar
-            raise typer.Exit(code=0)
-
-        diff = manager.get_diff(files=target_files)
-
-    # --- FIX 1: Graceful Exit Signal ---
-    except typer.Exit:
-        # Re-lanzamos la señal de salida limpia para que Typer termine con código 0.
-        raise 
-
-    except AttributeError:
-        typer.secho("❌ API Mismatch: Asegúrate de que GitManager tenga 'get_staged_files()'.", fg=typer.colors.RED)
+        common_dir = GitManager(repo_path=path).common_dir
+    except GitIngestError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
         sys.exit(1)
+    if not index_path(common_dir).exists():
+        print(f"No history index at {index_path(common_dir)}")
+        return
 
-    # --- FIX 2: Catch Generic Exceptions & SKIP_SCAN Signal ---
-    except Exception as e:
-        # Si ingest.py lanza SKIP_SCAN (ej. borrado de rama), salimos en verde.
-        if "SKIP_SCAN" in str(e):
-            print(f"⏭️  {e}")
-            raise typer.Exit(code=0)
-            
-        typer.secho(f"❌ Init Error: {e}", fg=typer.colors.RED)
+    from src.pipeline import ScanService
+
+    service = ScanService()
+    index = service.history_index(common_dir, service.repo_bundle(path, config))
+    stats = index.stats()
+    print(f"{index.path}: {stats['commits']} commits, {stats['blobs']} blob changes")
+
+
+@index_app.command("invalidate")
+def index_invalidate(
+    path: Annotated[str, typer.Option(help="Path to the repository.")] = ".",
+) -> None:
+    """
+    Delete the history index (e.g. after editing opsguard.yml) so the next batch rescans everything.
+    """
+    from src.history_index import index_path, invalidate
+    from src.ingest import GitIngestError, GitManager
+
+    try:
+        common_dir = GitManager(repo_path=path).common_dir
+    except GitIngestError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
         sys.exit(1)
+    if invalidate(common_dir):
+        print(f"🗑️  Removed {index_path(common_dir)}")
+    else:
+        print(f"No history index at {index_path(common_dir)}")
 
-    if not diff.strip():
-        print("✨ Empty diff content.")
-        raise typer.Exit(code=0)
 
-    # 2. FASE 1: Deterministic Shield (Regex)
-    violations = policy.scan_diff(diff)
+policy_app = typer.Typer(help="Inspect the security policy (opsguard.yml).", no_args_is_help=True)
+app.add_typer(policy_app, name="policy")
 
-    if violations:
-        formatted_findings = [{"file": "Diff", "line": "?", "type": v} for v in violations]
-        OpsGuardUI.print_regex_findings(formatted_findings)
-        OpsGuardUI.print_block_message()
+
+@policy_app.command("lint")
+def policy_lint(
+    config: Annotated[str, typer.Option(help="Path to security policy config.")] = "opsguard.yml",
+    timeout: Annotated[float, typer.Option(help="Seconds each rule may run before it is reported as catastrophic.")] = 5.0,
+) -> None:
+    """
+    Benchmark every rule on large and adversarial inputs; exit 1 on superlinear rules.
+    """
+    from src.regex_lint import lint_policy
+    from src.security import SecurityPolicy, SecurityPolicyError
+
+    try:
+        policy = SecurityPolicy(config_path=config)
+    except SecurityPolicyError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
         sys.exit(1)
 
-    OpsGuardUI.print_regex_findings([]) 
+    guarded = set(policy.guarded_rules)
+    print(f"{'rule':<28} {'status':<13} {'ms/MB':>8} {'growth':>7}  guard  issues")
+    failing = 0
+    for idx, profile in enumerate(lint_policy(policy.rules, timeout)):
+        ms = f"{profile.ms_per_mb:.1f}" if profile.ms_per_mb is not None else "-"
+        growth = f"n^{profile.exponent:.1f}" if profile.exponent is not None else "-"
+        issues = "; ".join(f"{i.severity}: {i.detail}" for i in profile.issues)
+        color = {"ok": None, "slow": typer.colors.YELLOW}.get(profile.status, typer.colors.RED)
+        typer.secho(
+            f"{profile.name[:28]:<28} {profile.status:<13} {ms:>8} {growth:>7}  "
+            f"{'yes' if idx in guarded else 'no':<5}  {issues or '-'}",
+            fg=color,
+        )
+        failing += profile.status in ("superlinear", "catastrophic")
+    print(
+        f"Runtime guard: rules={policy.guard_config.rules}, "
+        f"{policy.guard_config.rule_timeout_ms:g} ms per rule, {len(guarded)} rule(s) guarded"
+    )
+    if failing:
+        typer.secho(f"❌ {failing} rule(s) can backtrack superlinearly.", fg=typer.colors.RED)
+        sys.exit(1)
 
-    # 3. FASE 2: Semantic Brain (AI Analysis)
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        typer.secho("⚠️ Missing OPENROUTER_API_KEY. Skipping AI.", fg=typer.colors.YELLOW)
-        return
 
+@contextlib.contextmanager
+def _reporting(report_format: str, output: str):
+    """Reporter for one run. For machine-readable formats everything else the
+    run prints (progress, FinOps table...) is sent to stderr, so stdout (or
+    --output) holds nothing but the report."""
+    from src.reporters import get_reporter
+
+    out = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
     try:
-        ai_engine = AIEngine()
-        ai_result = ai_engine.analyze_diff(diff)
+        reporter = get_reporter(report_format, out)
+    except ValueError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED, err=True)
+        sys.exit(2)
+    if report_format == "console":
+        progress = contextlib.nullcontext()
+    else:
+        progress = contextlib.redirect_stdout(sys.stderr)
+    try:
+        with progress:
+            yield reporter
+    finally:
+        reporter.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+def _run_scan(path: str, config: str, options, policy_cache: bool, telemetry, reporter) -> None:
+    """Pipeline del gate; cada etapa se cronometra en `telemetry`."""
+    # --- LAZY IMPORTS ---
+    with telemetry.stage("imports"):
+        from src.ingest import GitManager
+        from src.pipeline import ai_gate, regex_gate
+        from src.policy_bundle import load_policy_bundle
+
+    reporter.banner()
+
+    # 1. Init & Git Context
+    try:
+        root_path = Path(path)
+        with telemetry.stage("config_load"):
+            # Reglas validadas + .opsguardignore desde el bundle en caché
+            bundle = load_policy_bundle(
+                config, str(root_path / ".opsguardignore"), use_cache=policy_cache
+            )
+        manager = GitManager(repo_path=str(root_path))
     except Exception as e:
-        typer.secho(f"❌ AI Engine Error: {e}", fg=typer.colors.RED)
+        reporter.message(f"❌ Init Error: {e}", "error")
+        reporter.finish("error")
         sys.exit(1)
 
+    # 2. FASE 1: Deterministic Shield (Regex)
+    result, diff = regex_gate(manager, bundle, options, telemetry)
+    if telemetry.rules:
+        from src.scan_profile import ScanProfile
+
+        print(ScanProfile.from_dict(telemetry.rules).format_table())
+    if result is not None:
+        telemetry.outcome = result.status
+    with telemetry.stage("report"):
+        _report_regex(result, reporter)
+
+    # 3. FASE 2: Semantic Brain (AI Analysis)
+    result = ai_gate(diff, options, telemetry, bundle.backend_config, bundle.triage_config)
+    telemetry.outcome = result.status
+
     # 4. Reporte
-    OpsGuardUI.print_ai_analysis(ai_result)
+    with telemetry.stage("report"):
+        _report_ai(result, reporter)
 
-    risk_score = ai_result.get("risk_score", 0)
-    verdict = ai_result.get("verdict", "APPROVE")
-    
-    if verdict == "BLOCK" or risk_score >= 7:
-        OpsGuardUI.print_block_message()
+
+def _report_regex(result, reporter) -> None:
+    """Report the regex gate outcome; exits unless the AI gate must run."""
+    if result is None:
+        reporter.regex_findings([])
+        return
+    if result.status == "skip":
+        reporter.message(result.message)
+        reporter.finish("skip")
+        # Esto lanza una excepción 'Exit' que debemos dejar pasar
+        raise typer.Exit(code=0)
+    if result.status == "error":
+        reporter.message(result.message, "error")
+        reporter.finish("error")
+        sys.exit(1)
+
+    reporter.regex_findings(result.violations)
+    reporter.finish("block")
+    sys.exit(1)
+
+
+def _report_ai(result, reporter) -> None:
+    """Report the AI gate outcome; exits with 1 on BLOCK or error."""
+    if result.status == "error":
+        reporter.message(result.message, "error")
+        reporter.finish("error")
+        sys.exit(1)
+    if result.ai_result is None:
+        reporter.message(result.message, "warning")
+        reporter.finish(result.status)
+        return
+
+    if result.message:
+        reporter.message(result.message, "warning")
+    reporter.ai_verdict(result.ai_result)
+    reporter.finish(result.status)
+    if result.status == "block":
         sys.exit(1)
-    else:
-        OpsGuardUI.print_success_message()
 
 if __name__ == "__main__":
     app(prog_name="opsguard")
\ No newline at end of file
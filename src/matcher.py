@@ -0,0 +1,202 @@
+"""Single-pass multi-pattern matcher for the regex gate (ADR-0001).
+
+Most blocklist rules start with a fixed literal (``AKIA``, ``ghp_``, ``xox``,
+``sk_live_``, ``AIza``, ``-----BEGIN ``...). Instead of running every rule's
+``findall`` over the whole diff, the engine makes ONE pass with a combined
+literal prefilter and only evaluates the full regex at candidate offsets.
+Rules without a usable literal prefix fall back to a classic ``finditer``.
+"""
+
+import re
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+# Prefijos más cortos generan demasiados candidatos y no compensan el prefiltro.
+MIN_PREFIX_LEN = 3
+
+
+def literal_prefix(pattern: "re.Pattern[str]") -> str:
+    """Return the literal text that every match of ``pattern`` must start with.
+
+    Args:
+        pattern: Compiled regular expression.
+
+    Returns:
+        The required literal prefix, or an empty string if there is none
+        (leading class, group, alternation, anchor or case-insensitive flag).
+    """
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return ""
+
+    if parsed.state.flags & re.IGNORECASE:
+        return ""
+
+    chars: List[str] = []
+    for op, av in parsed:
+        if op is not sre_parse.LITERAL:
+            break
+        chars.append(chr(av))
+    return "".join(chars)
+
+
+def findall_value(match: "re.Match[str]") -> Union[str, Tuple[str, ...]]:
+    """Return what ``re.findall`` would have reported for ``match``."""
+    groups = match.re.groups
+    if groups == 0:
+        return match.group(0)
+    if groups == 1:
+        return match.group(1) or ""
+    return match.groups(default="")
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a prefix-factored alternation (``gh(?:o_|p_)``) for fixed literals.
+
+    Factoring shared prefixes lets ``re`` reject most offsets on the first
+    character instead of trying every alternative in turn.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def _render(node: Dict[str, Any]) -> str:
+        branches = [
+            re.escape(char) + _render(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        if "" in node:
+            branches.append("")
+        return "(?:" + "|".join(branches) + ")"
+
+    return _render(trie)
+
+
+class MultiPatternEngine:
+    """Evaluates a list of compiled rules against a text in a single pass.
+
+    The engine yields exactly the matches that ``rule["pattern"].findall``
+    would produce for every rule, in rule order.
+    """
+
+    def __init__(
+        self, rules: List[dict], prefixes: Optional[Sequence[str]] = None
+    ) -> None:
+        """Build the literal prefilter for the given rules.
+
+        Args:
+            rules: List of ``{"name": str, "pattern": re.Pattern}`` dicts.
+            prefixes: Precomputed ``literal_prefix`` per rule (e.g. from the
+                policy bundle). Computed from the patterns when omitted.
+        """
+        self.rules = rules
+        if prefixes is None:
+            prefixes = [literal_prefix(rule["pattern"]) for rule in rules]
+        self.prefixes: List[str] = list(prefixes)
+
+        by_literal: Dict[str, List[int]] = {}
+        fallback: List[int] = []
+        for idx, prefix in enumerate(self.prefixes):
+            if len(prefix) >= MIN_PREFIX_LEN:
+                by_literal.setdefault(prefix, []).append(idx)
+            else:
+                fallback.append(idx)
+
+        self._fallback: FrozenSet[int] = frozenset(fallback)
+
+        # Los literales se indexan por su "cabeza" (primeros MIN_PREFIX_LEN chars).
+        # El prefiltro solo busca cabezas; la confirmación del literal completo
+        # y el regex real se evalúan únicamente en esos offsets.
+        self._heads: Dict[str, List[Tuple[str, Tuple[int, ...]]]] = {}
+        for literal in sorted(by_literal):
+            head = literal[:MIN_PREFIX_LEN]
+            self._heads.setdefault(head, []).append(
+                (literal, tuple(by_literal[literal]))
+            )
+
+        self._prefilter = re.compile(_trie_regex(self._heads)) if self._heads else None
+
+    @property
+    def prefiltered_rules(self) -> int:
+        """Number of rules served by the literal prefilter."""
+        return len(self.rules) - len(self._fallback)
+
+    def candidates(self, text: str) -> Dict[int, List[int]]:
+        """Collect candidate start offsets per rule in one pass over ``text``."""
+        candidates: Dict[int, List[int]] = {}
+        if self._prefilter is None:
+            return candidates
+
+        heads = self._heads
+        search = self._prefilter.search
+        hit = search(text)
+        while hit:
+            pos = hit.start()
+            for literal, indexes in heads[hit.group()]:
+                if text.startswith(literal, pos):
+                    for idx in indexes:
+                        candidates.setdefault(idx, []).append(pos)
+            # Reanudamos en pos + 1 para no perder ocurrencias solapadas ("xoxox").
+            hit = search(text, pos + 1)
+        return candidates
+
+    def scan(self, text: str) -> Iterator[Tuple[int, "re.Match[str]"]]:
+        """Yield ``(rule_index, match)`` pairs for every findall-equivalent match.
+
+        Args:
+            text: Content to scan.
+
+        Yields:
+            Rule index and match object, grouped by rule in rule order.
+        """
+        if not text:
+            return
+
+        candidates = self.candidates(text)
+
+        for idx in range(len(self.rules)):
+            for match in self.scan_rule(idx, text, candidates):
+                yield idx, match
+
+    def scan_rule(
+        self, idx: int, text: str, candidates: Dict[int, List[int]]
+    ) -> Iterator["re.Match[str]"]:
+        """Matches of one rule, given the prefilter ``candidates`` of ``text``.
+
+        Lets a caller time (or abort) each rule separately, see regex_guard.py.
+        """
+        pattern = self.rules[idx]["pattern"]
+
+        if idx in self._fallback:
+            yield from pattern.finditer(text)
+            return
+
+        # Misma semántica que findall: matches no solapados, de izquierda a
+        # derecha. Todo match empieza por el literal, así que basta con
+        # probar los offsets candidatos posteriores al último match.
+        last_end = 0
+        for pos in candidates.get(idx, ()):
+            if pos < last_end:
+                continue
+            match = pattern.match(text, pos)
+            if match:
+                yield match
+                last_end = match.end()
@@ -0,0 +1,590 @@
+"""Two-gate scan pipeline shared by the CLI, the daemon and batch mode.
+
+Gate 1 (deterministic regex/entropy shield) and gate 2 (AI analysis) are
+plain functions returning a ``ScanResult``; rendering and process exit codes
+are left to the caller. Every stage is timed on the given ``Telemetry``.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+from src.diffparse import DiffHunk
+from src.scan_profile import ScanProfile
+from src.telemetry import Telemetry
+
+# Las dependencias pesadas (gitpython, openai/dotenv, sqlite) se importan al
+# usarse: el cliente de `scan --daemon` solo necesita ScanOptions/ScanResult.
+if TYPE_CHECKING:
+    from src.backends import BackendConfig
+    from src.history_index import HistoryIndex
+    from src.ingest import ChangeSet, FileChange, GitManager
+    from src.policy_bundle import PolicyBundle
+    from src.security import SecurityPolicy
+    from src.triage import TriageConfig
+
+
+class ScanOptions(NamedTuple):
+    """Tunables of a scan (mirrors the ``opsguard scan`` options)."""
+
+    stream: bool = False
+    cache: bool = True
+    ai_max_chunks: int = 8
+    ai_workers: int = 4
+    ai_stream: bool = True
+    ai_early_abort_risk: int = 8
+    regex_workers: int = 1
+    ai_compact: bool = True
+    ai_context_lines: int = 2
+    ai_max_tokens: int = 60000
+    ai_max_cost: float = 0.0
+    ai_triage: bool = True
+    # Bloquear si el presupuesto IA deja ficheros sin revisar (si no, aviso)
+    ai_fail_closed: bool = False
+    # Similitud mínima de renames/copias (ingest.RENAME_THRESHOLD); 0 = sin detección
+    rename_threshold: int = 50
+    # Perfil por regla del regex gate en la telemetría (scan_profile.py)
+    profile_rules: bool = False
+
+
+class ScanResult(NamedTuple):
+    """Outcome of a scan.
+
+    Attributes:
+        status: ``approve`` | ``block`` | ``skip`` | ``error``.
+        message: Human-readable note for skip/error/no-AI outcomes.
+        violations: Regex gate findings (see ``SecurityPolicy.scan_hunks``).
+        ai_result: AI verdict dict, when the AI gate ran.
+    """
+
+    status: str
+    message: str = ""
+    violations: Sequence[dict] = ()
+    ai_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def exit_code(self) -> int:
+        return 1 if self.status in ("block", "error") else 0
+
+
+# Ficheros aprobados por el triaje que se listan uno a uno
+TRIAGE_LISTED_FILES = 20
+
+
+# Modo stream: chars retenidos por token de presupuesto IA. Holgado a propósito
+# (la compactación y el empaquetado por tokens recortan después).
+CAPTURE_CHARS_PER_TOKEN = 8
+
+
+def _capture_payload(
+    hunks: Iterable[DiffHunk], sink: List[str], limit: int, telemetry: Telemetry
+) -> Iterator[DiffHunk]:
+    """Deja pasar los hunks y guarda hasta `limit` chars, en líneas completas."""
+    captured = 0
+    for hunk in hunks:
+        sizes = [len(line) + 1 for line in hunk.lines]
+        telemetry.count("diff_lines", len(hunk.lines))
+        telemetry.count("diff_chars", sum(sizes))
+        if captured < limit:
+            # Nunca se corta una línea (ni un carácter multibyte) a medias
+            kept = 0
+            while kept < len(sizes) and captured + sizes[kept] <= limit:
+                captured += sizes[kept]
+                kept += 1
+            if kept:
+                sink.append(DiffHunk(hunk.path, hunk.lines[:kept]).text())
+            if kept < len(sizes):
+                captured = limit
+        yield hunk
+
+
+def _report_diff_scope(
+    manager: "GitManager", changes: "ChangeSet", telemetry: Telemetry
+) -> None:
+    """Report what the merge-base and rename detection kept out of the scan."""
+    merge_base = manager.merge_base
+    if merge_base is not None and not merge_base.sha:
+        print(
+            "⚠️ No merge-base between the PR base and head (shallow clone?): "
+            "diffing base..head directly."
+        )
+    elif merge_base is not None and merge_base.upstream_files:
+        telemetry.count("upstream_files_excluded", merge_base.upstream_files)
+        telemetry.count("upstream_lines_excluded", merge_base.upstream_lines)
+        print(
+            f"🧬 Merge-base {merge_base.sha[:12]}: {merge_base.upstream_files} "
+            f"file(s) / {merge_base.upstream_lines} line(s) changed upstream since "
+            f"the branch point left out of the diff"
+        )
+
+    targets = set(changes.targets)
+    edited = [
+        c for c in changes.changes if c.path in targets and 0 < c.similarity < 100
+    ]
+    if not (changes.moved or edited):
+        return
+    moved_bytes = manager.blob_bytes([*changes.moved, *edited])
+    telemetry.count("files_moved", len(changes.moved))
+    telemetry.count("files_moved_edited", len(edited))
+    telemetry.count("moved_bytes_skipped", moved_bytes)
+    print(
+        f"🔀 Renames/copies: {len(changes.moved)} pure move(s) skipped, "
+        f"{len(edited)} edited (changed lines only); ~{moved_bytes / 1024:.0f} KB "
+        f"of moved content not rescanned"
+    )
+
+
+def regex_gate(
+    manager: "GitManager",
+    bundle: "PolicyBundle",
+    options: ScanOptions,
+    telemetry: Telemetry,
+    index: Optional["HistoryIndex"] = None,
+    fresh: Optional[List["FileChange"]] = None,
+) -> Tuple[Optional[ScanResult], str]:
+    """Gate 1: read the changes once and run the deterministic shield.
+
+    With a history ``index``, file changes it already holds are not read nor
+    scanned (their stored findings are reused), and ``fresh`` is filled with
+    the changes scanned in full: the caller adds them to the index once the
+    whole scan is over (see ``ScanService.scan``). With
+    ``options.profile_rules`` the per-rule profile of the scan is added to
+    ``telemetry`` (``Telemetry.rules``).
+
+    Returns:
+        ``(result, diff)``: ``result`` is set when the pipeline ends here
+        (skip, error or regex BLOCK); otherwise ``diff`` is the payload for
+        the AI gate.
+    """
+    policy = bundle.policy
+    telemetry.count("policy_rules", len(policy.rules))
+    telemetry.count("policy_bundle_hits", int(bundle.from_cache))
+    regex_workers = options.regex_workers or os.cpu_count() or 1
+    profile = ScanProfile() if options.profile_rules else None
+
+    try:
+        # [SECURITY AUDIT NOTE]
+        # Implementation of Standard Ignore Mechanism.
+        # This uses 'pathspec' semantics (indexed in IgnoreMatcher) to filter
+        # non-code artifacts.
+        with telemetry.stage("ignore_filter"):
+            ignore_matcher = bundle.ignore_matcher
+
+        # Una sola invocación de git (-z --raw -p): lista de cambios + patch,
+        # con el filtro de .opsguardignore aplicado en proceso.
+        with telemetry.stage("get_changes"):
+            changes = manager.read_changes(
+                is_ignored=ignore_matcher.match_file,
+                is_known=index.is_known if index is not None else None,
+                rename_threshold=options.rename_threshold,
+            )
+            known_violations = (
+                index.findings(changes.known) if index is not None else []
+            )
+        telemetry.count("files_changed", len(changes.changes))
+        telemetry.count("files_scanned", len(changes.targets))
+        if index is not None:
+            telemetry.count("files_indexed", len(changes.known))
+        _report_diff_scope(manager, changes, telemetry)
+
+        if not changes.targets:
+            if known_violations:
+                telemetry.count("regex_violations", len(known_violations))
+                return ScanResult("block", violations=known_violations), ""
+            if changes.known:
+                return (
+                    ScanResult(
+                        "skip", "✨ All changes already scanned (history index)."
+                    ),
+                    "",
+                )
+            return (
+                ScanResult(
+                    "skip",
+                    "✨ No relevant changes detected (filtered by .opsguardignore).",
+                ),
+                "",
+            )
+
+        if options.stream:
+            # El diff nunca se materializa: el regex gate consume hunks y solo
+            # retenemos el fragmento que de todos modos se enviaría a la IA.
+            payload: List[str] = []
+            limit = options.ai_max_tokens * CAPTURE_CHARS_PER_TOKEN
+            # En modo stream la lectura de git y el regex gate van fusionados
+            with telemetry.stage("regex_scan"):
+                violations = policy.scan_hunks(
+                    _capture_payload(changes.hunks, payload, limit, telemetry),
+                    workers=regex_workers,
+                    profile=profile,
+                )
+            diff = "".join(payload)
+        else:
+            with telemetry.stage("get_diff"):
+                diff = "".join(hunk.text() for hunk in changes.hunks)
+                diff = diff[:-1] if diff.endswith("\n") else diff
+            telemetry.count("diff_chars", len(diff))
+            telemetry.count("diff_lines", diff.count("\n") + 1 if diff else 0)
+            violations = None
+
+    # --- FIX 2: Catch Generic Exceptions & SKIP_SCAN Signal ---
+    except Exception as e:
+        # Si ingest.py lanza SKIP_SCAN (ej. borrado de rama), salimos en verde.
+        if "SKIP_SCAN" in str(e):
+            return ScanResult("skip", f"⏭️  {e}"), ""
+        return ScanResult("error", f"❌ Init Error: {e}"), ""
+
+    if violations is None and diff.strip():
+        with telemetry.stage("regex_scan"):
+            violations = policy.scan_diff(diff, workers=regex_workers, profile=profile)
+    if profile is not None:
+        profile.record(telemetry)
+    violations = violations or []
+    if index is not None and fresh is not None:
+        # Un fichero con una regla abortada no queda indexado: su resultado
+        # depende del tiempo, se vuelve a escanear la próxima vez
+        scanned = set(changes.targets) - {
+            v["file"] for v in violations if v.get("aborted")
+        }
+        fresh.extend(c for c in changes.changes if c.path in scanned)
+    violations = violations + known_violations
+    telemetry.count("regex_violations", len(violations))
+    telemetry.count(
+        "regex_rules_aborted", sum(1 for v in violations if v.get("aborted"))
+    )
+
+    if violations:
+        return ScanResult("block", violations=violations), diff
+    if not diff.strip():
+        return ScanResult("skip", "✨ Empty diff content."), ""
+    return None, diff
+
+
+def ai_gate(
+    diff: str,
+    options: ScanOptions,
+    telemetry: Telemetry,
+    backend_config: Optional["BackendConfig"] = None,
+    triage_config: Optional["TriageConfig"] = None,
+) -> ScanResult:
+    """Gate 2: semantic analysis of a diff that passed the regex gate.
+
+    Args:
+        diff: Diff payload returned by ``regex_gate``.
+        options: Scan options (AI budget, concurrency, streaming, cache,
+            diff compaction, triage).
+        telemetry: Run telemetry.
+        backend_config: AI backend (``PolicyBundle.backend_config``); the
+            process-wide backend of that config is reused across scans.
+        triage_config: Local risk triage (``PolicyBundle.triage_config``);
+            when enabled, only the files it scores high enough reach the AI.
+    """
+    from src.backends import ALLOW_MOCK_ENV, BackendConfig, get_backend, mock_allowed
+
+    backend_config = backend_config or BackendConfig()
+    if backend_config.kind == "mock" and not mock_allowed():
+        # Un opsguard.yml del repo no puede aprobarse a sí mismo con el mock
+        return ScanResult("error", f"❌ backend: mock requires {ALLOW_MOCK_ENV}=1")
+    if not (options.ai_triage and triage_config is not None and triage_config.enabled):
+        triage_config = None
+    missing_key = backend_config.needs_api_key and not os.getenv(
+        backend_config.api_key_env
+    )
+    if missing_key and triage_config is None:
+        return ScanResult(
+            "approve", f"⚠️ Missing {backend_config.api_key_env}. Skipping AI."
+        )
+
+    if options.ai_compact:
+        from src.compact import compact_diff
+
+        with telemetry.stage("compact"):
+            diff, stats = compact_diff(diff, context_lines=options.ai_context_lines)
+        telemetry.count("ai_compact_chars_saved", stats.chars_saved)
+        telemetry.count("ai_compact_tokens_saved", stats.tokens_saved)
+        print(
+            f"🗜️  Diff Compaction: {stats.chars_in} -> {stats.chars_out} chars "
+            f"(~{stats.tokens_saved} tokens saved, {stats.files_omitted} file(s) "
+            f"omitted, {stats.hunks_deduped} duplicate hunk(s))"
+        )
+
+    approved: List[str] = []
+    if triage_config is not None:
+        from src.triage import Triage
+
+        with telemetry.stage("triage"):
+            triaged = Triage(triage_config).triage_diff(diff, options.ai_max_chunks)
+        approved = [risk.path for risk in triaged.approved]
+        telemetry.count("ai_triage_files_approved", len(approved))
+        telemetry.count("ai_triage_tokens_avoided", triaged.tokens_avoided)
+        telemetry.count("ai_triage_calls_avoided", triaged.calls_avoided)
+        print(
+            f"🧭 AI Triage: {len(approved)}/{len(triaged.files)} file(s) approved "
+            f"locally (~{triaged.tokens_avoided} tokens, {triaged.calls_avoided} "
+            f"AI call(s) avoided)"
+        )
+        for risk in triaged.approved[:TRIAGE_LISTED_FILES]:
+            print(f"   ✓ {risk.path} (score {risk.score}: {', '.join(risk.reasons)})")
+        if len(approved) > TRIAGE_LISTED_FILES:
+            print(f"   ... and {len(approved) - TRIAGE_LISTED_FILES} more")
+        if not triaged.diff:
+            return ScanResult(
+                "approve",
+                f"🧭 Low-risk changes ({len(approved)} file(s)) approved by the "
+                f"local triage; AI skipped.",
+            )
+        diff = triaged.diff
+
+    if missing_key:
+        return ScanResult(
+            "approve", f"⚠️ Missing {backend_config.api_key_env}. Skipping AI."
+        )
+
+    from src.ai import AIEngine
+    from src.cache import VerdictCache
+
+    cache = VerdictCache() if options.cache else None
+    try:
+        ai_engine = AIEngine(
+            cache=cache,
+            max_chunks=options.ai_max_chunks,
+            max_workers=options.ai_workers,
+            stream=options.ai_stream,
+            early_abort_risk=options.ai_early_abort_risk or None,
+            backend=get_backend(backend_config),
+            token_budget=options.ai_max_tokens,
+            max_cost=options.ai_max_cost or None,
+        )
+        telemetry.label("model", ai_engine.model)
+        with telemetry.stage("ai_analysis"):
+            ai_result = ai_engine.analyze_diff(diff)
+    except Exception as e:
+        return ScanResult("error", f"❌ AI Engine Error: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+    usage = ai_engine.last_usage
+    telemetry.count("ai_input_tokens", usage.get("input_tokens", 0))
+    telemetry.count("ai_output_tokens", usage.get("output_tokens", 0))
+    telemetry.count("ai_cost_usd", usage.get("cost_usd", 0.0))
+    telemetry.count("ai_early_aborts", usage.get("early_aborts", 0))
+    telemetry.count("ai_estimated_cost_usd", usage.get("estimated_cost_usd", 0.0))
+    if usage.get("ttft_s") is not None:
+        telemetry.count("ai_ttft_seconds", usage["ttft_s"])
+    if cache is not None:
+        telemetry.count("ai_cache_hits", cache.hits)
+        telemetry.count("ai_cache_misses", cache.misses)
+
+    if approved:
+        ai_result["explanation"] = (
+            f"{ai_result.get('explanation', '')} "
+            f"[Approved by local triage: {', '.join(approved)}]"
+        )
+
+    risk_score = ai_result.get("risk_score", 0)
+    verdict = ai_result.get("verdict", "APPROVE")
+    blocked = verdict == "BLOCK" or risk_score >= 7
+    message = ""
+    not_reviewed = ai_result.get("not_reviewed") or []
+    if not_reviewed:
+        telemetry.count("ai_files_not_reviewed", len(not_reviewed))
+        message = (
+            f"⚠️ AI budget exhausted: {len(not_reviewed)} file(s) not reviewed "
+            f"({', '.join(not_reviewed)})"
+        )
+        if options.ai_fail_closed and not blocked:
+            blocked = True
+            message += "; blocking (fail-closed)"
+    return ScanResult("block" if blocked else "approve", message, ai_result=ai_result)
+
+
+class ScanService:
+    """Warm state reused across scans (daemon, batch): compiled policy
+    bundles per (config, ignore file) and history indexes. The AI backend
+    (client and connection pool) is shared process-wide by ``get_backend``.
+
+    ``rule_profile`` accumulates the per-rule profile of every scan run with
+    ``profile_rules``, across policy reloads."""
+
+    def __init__(self) -> None:
+        self._bundles: Dict[Tuple[str, str, bool], Tuple[Any, "PolicyBundle"]] = {}
+        self._policies: Dict[str, Tuple[Any, "SecurityPolicy"]] = {}
+        self._indexes: Dict[str, "HistoryIndex"] = {}
+        self._loading: Dict[Tuple[str, str, bool], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.rule_profile = ScanProfile()
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def bundle(
+        self, config: str, ignore: str, use_cache: bool = True
+    ) -> "PolicyBundle":
+        """Resident bundle for (config, ignore); reloaded when either changes.
+
+        The reload is a hot swap: the new bundle is compiled outside the
+        service lock (scans of unchanged bundles go on meanwhile) and then
+        replaces the old one in one assignment. Scans in progress finish with
+        the bundle they started with. If the changed files do not load (a
+        half-written or invalid ``opsguard.yml``), the last good bundle keeps
+        serving until they change again.
+
+        Raises:
+            SecurityPolicyError: If the first load of the bundle fails.
+        """
+        from src.policy_bundle import load_policy_bundle, source_fingerprint
+        from src.security import SecurityPolicyError
+
+        key = (config, ignore, use_cache)
+        stamp = (
+            source_fingerprint(Path(config)),
+            source_fingerprint(Path(ignore)),
+        )
+        with self._lock:
+            cached = self._bundles.get(key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        # Una sola compilación por clave: las peticiones concurrentes de la
+        # misma clave esperan a la nueva política, las demás no se enteran
+        with loading:
+            with self._lock:
+                cached = self._bundles.get(key)
+                if cached is not None and cached[0] == stamp:
+                    return cached[1]
+                shared = self._policies.get(config)
+            try:
+                bundle = load_policy_bundle(config, ignore, use_cache=use_cache)
+                # Un mismo opsguard.yml para muchos repos (batch): una sola
+                # compilación del SecurityPolicy, solo el ignore spec es por repo.
+                if shared is not None and shared[0] == stamp[0]:
+                    bundle.with_policy(shared[1])
+                # Compilamos ya: las siguientes peticiones no pagan nada
+                bundle.policy.engine
+                bundle.ignore_matcher
+            except SecurityPolicyError as e:
+                if cached is None:
+                    raise
+                with self._lock:
+                    self.reload_errors += 1
+                    # Sin reintentos hasta el próximo cambio de los ficheros
+                    self._bundles[key] = (stamp, cached[1])
+                print(f"⚠️ Policy reload failed, keeping the previous policy: {e}")
+                return cached[1]
+
+            with self._lock:
+                if shared is None or shared[0] != stamp[0]:
+                    self._policies[config] = (stamp[0], bundle.policy)
+                self._bundles[key] = (stamp, bundle)
+                if cached is not None:
+                    self.reloads += 1
+            if cached is not None:
+                print(
+                    f"🔄 Policy reloaded: {len(bundle.policy.rules)} rule(s) "
+                    f"from {config}"
+                )
+            return bundle
+
+    def repo_bundle(
+        self, path: str, config: str, use_cache: bool = True
+    ) -> "PolicyBundle":
+        """Bundle for ``config`` plus the repository's .opsguardignore."""
+        return self.bundle(config, str(Path(path) / ".opsguardignore"), use_cache)
+
+    @property
+    def bundle_count(self) -> int:
+        return len(self._bundles)
+
+    def history_index(self, common_dir: str, bundle: "PolicyBundle") -> "HistoryIndex":
+        """Shared history index of a repository for the bundle's policy."""
+        from src.history_index import HistoryIndex
+
+        digest = bundle.digest
+        with self._lock:
+            index = self._indexes.get(common_dir)
+            if index is None or index.policy_digest != digest:
+                index = self._indexes[common_dir] = HistoryIndex(common_dir, digest)
+            return index
+
+    def scan(
+        self,
+        path: str,
+        config: str,
+        options: ScanOptions,
+        telemetry: Telemetry,
+        policy_cache: bool = True,
+        environ: Optional[Dict[str, str]] = None,
+        revisions: Optional[Tuple[str, str]] = None,
+        history: bool = False,
+    ) -> Tuple[Optional[ScanResult], Optional[ScanResult]]:
+        """Run both gates on one repository (``telemetry.outcome`` is set).
+
+        Args:
+            path: Repository path.
+            config: Policy config path.
+            options: Scan options.
+            telemetry: Telemetry of this scan (flushing is left to the caller).
+            policy_cache: Use the on-disk policy bundle cache.
+            environ: CI environment for ``GitManager`` (default ``os.environ``).
+            revisions: Explicit ``(base, head)`` to diff.
+            history: With ``revisions``, use and update the repository's
+                history index (see ``src.history_index``).
+
+        Returns:
+            ``(regex_result, ai_result)``: the gate 1 result when the pipeline
+            ended there (else None) and the gate 2 result (else None).
+        """
+        from src.ingest import GitManager
+
+        regex_result: Optional[ScanResult] = None
+        ai_result: Optional[ScanResult] = None
+        index = None
+        fresh: List["FileChange"] = []
+        try:
+            with telemetry.stage("config_load"):
+                bundle = self.repo_bundle(path, config, policy_cache)
+            manager = GitManager(repo_path=path, environ=environ, revisions=revisions)
+            if history and revisions is not None:
+                index = self.history_index(manager.common_dir, bundle)
+        except Exception as e:
+            regex_result = ScanResult("error", f"❌ Init Error: {e}")
+        else:
+            regex_result, diff = regex_gate(
+                manager, bundle, options, telemetry, index, fresh
+            )
+            if telemetry.rules:
+                with self._lock:
+                    self.rule_profile.merge(ScanProfile.from_dict(telemetry.rules))
+            if regex_result is None:
+                ai_result = ai_gate(
+                    diff,
+                    options,
+                    telemetry,
+                    bundle.backend_config,
+                    bundle.triage_config,
+                )
+        final = regex_result or ai_result
+        telemetry.outcome = final.status
+        if index is not None and final.status != "error":
+            # Solo con el escaneo completo: si el gate IA falla, el reintento
+            # vuelve a escanear (y revisar) estos cambios
+            violations = list(regex_result.violations) if regex_result else []
+            # Lo que el presupuesto IA dejó sin revisar no cuenta como conocido
+            unreviewed = set((final.ai_result or {}).get("not_reviewed", ()))
+            fresh = [change for change in fresh if change.path not in unreviewed]
+            index.record_changes(fresh, violations, final.status)
+            index.record_commit(revisions[1], final.status)
+        return regex_result, ai_result
@@ -0,0 +1,246 @@
+"""Compiled policy bundle: validated rules + ignore patterns cached on disk.
+
+Parsing ``opsguard.yml`` with PyYAML and validating every rule dominates the
+policy load of a pre-commit run. The bundle stores the validated result as
+JSON (no pickle: the cache must not become a code-execution vector), keyed
+on the size/mtime of ``opsguard.yml`` and ``.opsguardignore`` with a SHA-256
+fallback, so warm runs skip YAML (and its import) entirely. Regexes and the
+ignore matcher are only built when first used.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.backends import BackendConfig
+from src.cache import DEFAULT_CACHE_DIR
+from src.ignore_matcher import IgnoreMatcher
+from src.security import SecurityPolicy
+from src.triage import TriageConfig
+
+BUNDLE_VERSION = 6
+
+# Patrones de exclusión que se añaden siempre a .opsguardignore
+DEFAULT_IGNORE_PATTERNS = [".git/", "*.lock"]
+
+
+def _fingerprint(path: Path, with_hash: bool = True) -> Optional[Dict[str, Any]]:
+    """Return size/mtime (and optionally SHA-256) of a source file, or None."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    fingerprint: Dict[str, Any] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        fingerprint["sha256"] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return fingerprint
+
+
+def source_fingerprint(path: Path) -> Optional[Dict[str, Any]]:
+    """Cheap size/mtime stamp of a source file (None if it is missing), to
+    tell when a resident bundle must be reloaded."""
+    return _fingerprint(path, with_hash=False)
+
+
+def _source_unchanged(path: Path, stored: Optional[Dict[str, Any]]) -> bool:
+    """Cheap stat check first; hash only if size/mtime moved (e.g. a touch)."""
+    current = _fingerprint(path, with_hash=False)
+    if current is None or stored is None:
+        return current is None and stored is None
+    if current["size"] == stored["size"] and current["mtime_ns"] == stored["mtime_ns"]:
+        return True
+    if current["size"] != stored["size"]:
+        return False
+    return hashlib.sha256(path.read_bytes()).hexdigest() == stored["sha256"]
+
+
+class PolicyBundle:
+    """Validated policy + ignore patterns, with lazily built matchers."""
+
+    def __init__(
+        self,
+        rules: List[Dict[str, Any]],
+        prefixes: List[str],
+        ignore_lines: List[str],
+        entropy: Optional[Dict[str, Any]] = None,
+        ai: Optional[Dict[str, Any]] = None,
+        guard: Optional[Dict[str, Any]] = None,
+        guarded: Optional[List[int]] = None,
+        triage: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.rules = rules
+        self.prefixes = prefixes
+        self.ignore_lines = ignore_lines
+        self.entropy = entropy
+        self.ai = ai
+        self.guard = guard
+        self.guarded = guarded
+        self.triage = triage
+        self.from_cache = False
+        self._policy: Optional[SecurityPolicy] = None
+        self._ignore_matcher: Optional[IgnoreMatcher] = None
+
+    @property
+    def policy(self) -> SecurityPolicy:
+        """SecurityPolicy built from the bundle (compiled on first access)."""
+        if self._policy is None:
+            self._policy = SecurityPolicy.from_rules(
+                self.rules, self.prefixes, self.entropy, self.guard, self.guarded
+            )
+        return self._policy
+
+    def with_policy(self, policy: SecurityPolicy) -> "PolicyBundle":
+        """Adopt an already compiled ``policy`` built from the same
+        ``opsguard.yml`` (skips compiling it again) and return the bundle."""
+        self._policy = policy
+        return self
+
+    @property
+    def backend_config(self) -> BackendConfig:
+        """AI backend of the ``ai`` section (defaults when there is none), with
+        the runner's endpoint and key variable."""
+        return BackendConfig.from_config(self.ai or {})
+
+    @property
+    def triage_config(self) -> TriageConfig:
+        """Local AI triage of the ``triage`` section (disabled when there is none)."""
+        return TriageConfig.from_config(self.triage) if self.triage else TriageConfig()
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of everything that decides a scan result (rules, entropy
+        config, runtime guard, AI backend and triage, ignore patterns);
+        identifies results stored elsewhere."""
+        payload = json.dumps(
+            [
+                self.rules,
+                self.entropy,
+                self.guard,
+                self.ai,
+                self.triage,
+                self.ignore_lines,
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def ignore_matcher(self) -> IgnoreMatcher:
+        """Indexed matcher for the ignore patterns (built on first access)."""
+        if self._ignore_matcher is None:
+            self._ignore_matcher = IgnoreMatcher(self.ignore_lines)
+        return self._ignore_matcher
+
+    @property
+    def ignore_spec(self):
+        """``pathspec.PathSpec`` for the ignore patterns (built on first access)."""
+        return self.ignore_matcher.spec
+
+
+def _bundle_path(
+    config_file: Path, ignore_file: Path, cache_dir: Optional[str]
+) -> Path:
+    base = Path(cache_dir or os.getenv("OPSGUARD_CACHE_DIR") or DEFAULT_CACHE_DIR)
+    key = hashlib.sha1(
+        f"{config_file.resolve()}\0{ignore_file.resolve()}".encode()
+    ).hexdigest()
+    return base / "bundles" / f"policy-{key}.json"
+
+
+def _read_ignore_lines(ignore_file: Path) -> List[str]:
+    lines: List[str] = []
+    if ignore_file.exists():
+        lines = ignore_file.read_text().splitlines()
+    return lines + DEFAULT_IGNORE_PATTERNS
+
+
+def load_policy_bundle(
+    config_path: str,
+    ignore_path: str,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True,
+) -> PolicyBundle:
+    """Load the policy bundle, rebuilding it when a source file changed.
+
+    Args:
+        config_path: Path to ``opsguard.yml``.
+        ignore_path: Path to ``.opsguardignore`` (may not exist).
+        cache_dir: Bundle cache directory (defaults to the verdict cache dir).
+        use_cache: If False, always parse/validate from source (no writes).
+
+    Returns:
+        The PolicyBundle (``from_cache`` tells whether YAML was skipped).
+
+    Raises:
+        SecurityPolicyError: If the configuration is missing or invalid.
+    """
+    config_file, ignore_file = Path(config_path), Path(ignore_path)
+    bundle_file = _bundle_path(config_file, ignore_file, cache_dir)
+
+    if use_cache:
+        try:
+            data = json.loads(bundle_file.read_text(encoding="utf-8"))
+            sources = data["sources"]
+            if (
+                data.get("version") == BUNDLE_VERSION
+                and _source_unchanged(config_file, sources["config"])
+                and _source_unchanged(ignore_file, sources["ignore"])
+            ):
+                bundle = PolicyBundle(
+                    data["rules"],
+                    data["prefixes"],
+                    data["ignore_lines"],
+                    data["entropy"],
+                    data["ai"],
+                    data["guard"],
+                    data["guarded"],
+                    data["triage"],
+                )
+                bundle.from_cache = True
+                return bundle
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    # Cold path: YAML + validación completa (lanza SecurityPolicyError si falla)
+    policy = SecurityPolicy(config_path=config_path)
+    bundle = PolicyBundle(
+        rules=policy.rule_specs(),
+        prefixes=policy.literal_prefixes,
+        ignore_lines=_read_ignore_lines(ignore_file),
+        entropy=policy.entropy_config,
+        ai=policy.ai.to_config() if policy.ai else None,
+        guard=policy.guard_config.to_config(),
+        # Resultado del linter estático: el arranque en caliente no lo repite
+        guarded=policy.guarded_rules,
+        triage=policy.triage_config.to_config(),
+    )
+    bundle._policy = policy
+
+    if use_cache:
+        data = {
+            "version": BUNDLE_VERSION,
+            "sources": {
+                "config": _fingerprint(config_file),
+                "ignore": _fingerprint(ignore_file),
+            },
+            "rules": bundle.rules,
+            "prefixes": bundle.prefixes,
+            "ignore_lines": bundle.ignore_lines,
+            "entropy": bundle.entropy,
+            "ai": bundle.ai,
+            "guard": bundle.guard,
+            "guarded": bundle.guarded,
+            "triage": bundle.triage,
+        }
+        try:
+            bundle_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = bundle_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            # Reemplazo atómico: procesos concurrentes nunca leen un bundle a medias
+            os.replace(tmp, bundle_file)
+        except OSError as e:
+            print(f"⚠️ Policy bundle cache not written: {e}")
+
+    return bundle
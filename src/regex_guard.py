@@ -0,0 +1,199 @@
+"""Runtime time budget for blocklist rules (catastrophic-backtracking guard).
+
+``re`` cannot be interrupted from Python while it backtracks, so guarded
+rules are evaluated in a resident worker process: the window text is sent
+once, the worker runs the rules one by one and streams each rule's matches
+back, and the scanner waits at most ``rule_timeout_ms`` for every rule. A
+rule that overruns its budget gets the worker killed (and restarted for the
+remaining rules), is not evaluated again for the rest of the scan, and is
+reported as an "aborted" finding: the gate fails closed rather than let an
+unevaluated rule pass a commit.
+
+Configured in the ``regex_guard`` section of ``opsguard.yml``::
+
+    regex_guard:
+      rules: risky          # risky (flagged by ``opsguard policy lint``) | all | none
+      rule_timeout_ms: 1000 # per rule and scan window
+"""
+
+import multiprocessing
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from src.matcher import MultiPatternEngine, findall_value
+
+GUARD_MODES = ("risky", "all", "none")
+
+# (rule_idx, valor findall, inicio, fin) de cada match
+_Match = Tuple[int, Any, int, int]
+
+
+class GuardConfig(NamedTuple):
+    """Validated ``regex_guard`` section of ``opsguard.yml``."""
+
+    rules: str = "risky"
+    rule_timeout_ms: float = 1000.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "GuardConfig":
+        """Build a config from the ``regex_guard`` section.
+
+        Raises:
+            ValueError: If a value is out of range or of the wrong type.
+        """
+        defaults = cls()
+        guard = cls(
+            rules=str(config.get("rules", defaults.rules)),
+            rule_timeout_ms=float(
+                config.get("rule_timeout_ms", defaults.rule_timeout_ms)
+            ),
+        )
+        if guard.rules not in GUARD_MODES:
+            raise ValueError(f"rules must be one of {', '.join(GUARD_MODES)}")
+        if guard.rule_timeout_ms <= 0:
+            raise ValueError("rule_timeout_ms must be > 0")
+        return guard
+
+    def to_config(self) -> Dict[str, Any]:
+        """Serializable configuration (inverse of ``from_config``)."""
+        return {"rules": self.rules, "rule_timeout_ms": self.rule_timeout_ms}
+
+
+def _guard_worker(conn: Any, rule_specs: List[Dict[str, Any]]) -> None:
+    """Worker process: for each ``(text, indexes)`` request, send the matches
+    and match time of every rule as soon as that rule is done (indexes into
+    ``rule_specs``)."""
+    import re
+
+    rules = [
+        {"name": spec["name"], "pattern": re.compile(spec["pattern"], spec["flags"])}
+        for spec in rule_specs
+    ]
+    engine = MultiPatternEngine(rules)
+    while True:
+        try:
+            text, indexes = conn.recv()
+        except EOFError:
+            return
+        candidates = engine.candidates(text)
+        for idx in indexes:
+            start = time.perf_counter()
+            found = [
+                (findall_value(m), m.start(), m.end())
+                for m in engine.scan_rule(idx, text, candidates)
+            ]
+            conn.send((idx, found, time.perf_counter() - start))
+
+
+class RuleGuard:
+    """Evaluates a subset of a policy's rules under a per-rule time budget.
+
+    Thread-safe (one request at a time); the worker is started on first use
+    and lives as long as the guard.
+    """
+
+    def __init__(
+        self,
+        rule_specs: List[Dict[str, Any]],
+        guarded: Sequence[int],
+        timeout_ms: float,
+    ) -> None:
+        """
+        Args:
+            rule_specs: ``{"name", "pattern", "flags"}`` of every policy rule.
+            guarded: Indexes of the rules to run in the worker.
+            timeout_ms: Budget of each rule on each text.
+        """
+        self.rule_specs = rule_specs
+        self.guarded = list(guarded)
+        self.timeout = timeout_ms / 1000
+        self.timeout_ms = timeout_ms
+        # Abortos acumulados por regla (para diagnóstico)
+        self.aborts: Dict[int, int] = {}
+        self._worker: Optional[Any] = None
+        self._conn: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        parent, child = multiprocessing.Pipe()
+        # El worker solo compila (y prefiltra) las reglas vigiladas
+        specs = [self.rule_specs[idx] for idx in self.guarded]
+        self._worker = multiprocessing.Process(
+            target=_guard_worker, args=(child, specs), daemon=True
+        )
+        self._worker.start()
+        child.close()
+        self._conn = parent
+
+    def _kill(self) -> None:
+        if self._worker is not None:
+            self._worker.kill()
+            self._worker.join()
+            self._conn.close()
+        self._worker = self._conn = None
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        with self._lock:
+            self._kill()
+
+    def __del__(self) -> None:
+        # Política sustituida por una recarga en caliente: cuando el último
+        # escaneo en curso la suelta, su worker se va con ella
+        try:
+            self._kill()
+        except Exception:
+            pass
+
+    def run(
+        self,
+        text: str,
+        skip: Set[int],
+        timings: Optional[Dict[int, float]] = None,
+    ) -> Tuple[List[_Match], List[int]]:
+        """Matches of the guarded rules on ``text``.
+
+        Args:
+            text: Content to scan.
+            skip: Rules aborted earlier in the same scan (not run again);
+                rules that overrun their budget now are added to it.
+            timings: If given, filled with the match time (seconds) of every
+                rule evaluated on ``text``; a rule aborted now is charged
+                its whole budget.
+
+        Returns:
+            ``(matches, skipped)``: matches as ``(rule_idx, value, start,
+            end)`` in rule order, and the guarded rules that were not
+            evaluated on ``text``.
+        """
+        matches: List[_Match] = []
+        skipped = [idx for idx in self.guarded if idx in skip]
+        pending = [idx for idx in self.guarded if idx not in skip]
+        position = {idx: pos for pos, idx in enumerate(self.guarded)}
+        with self._lock:
+            while pending:
+                if self._worker is None:
+                    self._start()
+                self._conn.send((text, [position[idx] for idx in pending]))
+                while pending:
+                    if not self._conn.poll(self.timeout):
+                        # La regla en curso agota su presupuesto: se mata el
+                        # worker y se sigue con las restantes en uno nuevo
+                        idx = pending.pop(0)
+                        self.aborts[idx] = self.aborts.get(idx, 0) + 1
+                        if timings is not None:
+                            timings[idx] = self.timeout
+                        skip.add(idx)
+                        skipped.append(idx)
+                        self._kill()
+                        break
+                    pos, found, elapsed = self._conn.recv()
+                    idx = self.guarded[pos]
+                    pending.remove(idx)
+                    if timings is not None:
+                        timings[idx] = elapsed
+                    matches.extend((idx, value, a, b) for value, a, b in found)
+        matches.sort(key=lambda match: match[0])
+        skipped.sort()
+        return matches, skipped
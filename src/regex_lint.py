@@ -0,0 +1,471 @@
+"""Performance linter for blocklist regexes (``opsguard policy lint``).
+
+Python's ``re`` is a backtracking engine: a rule with nested or ambiguous
+quantifiers (``(\\w+\\s?)+``, ``(\\w+|\\d+)+``, ``\\w+\\d+x``) can take exponential
+or polynomial time on a crafted line and pin a CI runner for minutes. Rules
+are vetted in two ways:
+
+- ``lint_pattern`` inspects the parsed pattern: an unbounded repeat whose
+  body can start with a character that may also follow it inside an outer
+  repeat (or an alternation with overlapping branches under a repeat) can
+  backtrack exponentially; two adjacent unbounded repeats over overlapping
+  characters are polynomial.
+- ``profile_rule`` measures the rule in a child process: throughput on a
+  large synthetic diff, and the growth of the match time on adversarial
+  "pump" inputs of doubling size built from the pattern itself. A rule that
+  does not finish within the time budget is reported as catastrophic.
+
+Rules flagged by ``lint_pattern`` are the ones the scanner runs under the
+runtime guard by default (see regex_guard.py).
+"""
+
+import math
+import multiprocessing
+import random
+import re
+import time
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+# Repeticiones acotadas por encima de esto se tratan como no acotadas
+LARGE_REPEAT = 32
+
+# Alfabeto de muestra para razonar sobre conjuntos de caracteres
+SAMPLE = frozenset([chr(c) for c in range(128)] + ["é", "ß", "Ж", "中", " ", " "])
+
+# Perfilado: tamaños de la entrada "pump" (se duplican hasta el máximo o
+# hasta que una medida supera MEASURE_LIMIT_S) y tamaño del diff sintético.
+PUMP_START = 8
+PUMP_MAX = 1 << 14
+MEASURE_LIMIT_S = 0.25
+BENIGN_CHARS = 1 << 20
+DEFAULT_TIMEOUT_S = 5.0
+
+# Exponente de crecimiento (t ~ n^k) a partir del cual una regla es superlineal
+SUPERLINEAR_EXPONENT = 1.5
+# Coste en texto normal a partir del cual una regla se marca como lenta
+SLOW_MS_PER_MB = 250.0
+
+_CATEGORIES = {
+    sre_parse.CATEGORY_DIGIT: r"\d",
+    sre_parse.CATEGORY_NOT_DIGIT: r"\D",
+    sre_parse.CATEGORY_SPACE: r"\s",
+    sre_parse.CATEGORY_NOT_SPACE: r"\S",
+    sre_parse.CATEGORY_WORD: r"\w",
+    sre_parse.CATEGORY_NOT_WORD: r"\W",
+}
+_CATEGORY_SETS = {
+    category: frozenset(c for c in SAMPLE if re.match(regex, c))
+    for category, regex in _CATEGORIES.items()
+}
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+# Preferencias al elegir un carácter de un conjunto (legible, típico de diff)
+_PREFERRED = "a0A_-. =:'\"/+!#\x00"
+
+_Chars = FrozenSet[str]
+
+
+class LintIssue(NamedTuple):
+    """A construct of a pattern that can backtrack superlinearly.
+
+    Attributes:
+        kind: ``nested-quantifier`` | ``ambiguous-alternation`` |
+            ``overlapping-repeats``.
+        severity: ``exponential`` | ``polynomial``.
+        detail: Human-readable explanation.
+    """
+
+    kind: str
+    severity: str
+    detail: str
+
+
+class _Site(NamedTuple):
+    # Repetición no acotada: texto que la alcanza, su primer conjunto y lo
+    # que puede seguirla (para construir la entrada adversaria)
+    prefix: str
+    body: _Chars
+    follow: _Chars
+
+
+def _pick(chars: _Chars) -> str:
+    for char in _PREFERRED:
+        if char in chars:
+            return char
+    return min(chars) if chars else ""
+
+
+def _case_variants(chars: _Chars) -> _Chars:
+    return chars | frozenset(c.swapcase() for c in chars if c.swapcase() in SAMPLE)
+
+
+class _Analyzer:
+    """Walks a parsed pattern collecting issues and pump sites."""
+
+    def __init__(self, flags: int) -> None:
+        self.flags = flags
+        self.issues: List[LintIssue] = []
+        self.sites: List[_Site] = []
+
+    def chars(self, op: Any, av: Any) -> _Chars:
+        """Sample characters a single-character node accepts."""
+        if op is sre_parse.LITERAL:
+            chars = frozenset([chr(av)])
+        elif op is sre_parse.NOT_LITERAL:
+            chars = SAMPLE - {chr(av)}
+        elif op is sre_parse.ANY:
+            chars = SAMPLE if self.flags & re.DOTALL else SAMPLE - {"\n"}
+        else:
+            chars = frozenset()
+            negate = False
+            for item_op, item_av in av:
+                if item_op is sre_parse.NEGATE:
+                    negate = True
+                elif item_op is sre_parse.LITERAL:
+                    chars |= {chr(item_av)}
+                elif item_op is sre_parse.RANGE:
+                    lo, hi = item_av
+                    chars |= frozenset(c for c in SAMPLE if lo <= ord(c) <= hi)
+                elif item_op is sre_parse.CATEGORY:
+                    chars |= _CATEGORY_SETS.get(item_av, SAMPLE)
+            if self.flags & re.IGNORECASE:
+                chars = _case_variants(chars)
+            return SAMPLE - chars if negate else chars
+        return _case_variants(chars) if self.flags & re.IGNORECASE else chars
+
+    def first(self, seq: Any) -> Tuple[_Chars, bool]:
+        """Characters a sequence can start with, and whether it can be empty."""
+        chars: _Chars = frozenset()
+        for op, av in seq:
+            item, nullable = self.item_first(op, av)
+            chars |= item
+            if not nullable:
+                return chars, False
+        return chars, True
+
+    def item_first(self, op: Any, av: Any) -> Tuple[_Chars, bool]:
+        if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY):
+            return self.chars(op, av), False
+        if op is sre_parse.IN:
+            return self.chars(op, av), False
+        if op in _REPEATS or op is sre_parse.POSSESSIVE_REPEAT:
+            chars, nullable = self.first(av[2])
+            return chars, nullable or av[0] == 0
+        if op is sre_parse.SUBPATTERN:
+            return self.first(av[3])
+        if op is sre_parse.ATOMIC_GROUP:
+            return self.first(av)
+        if op is sre_parse.BRANCH:
+            results = [self.first(branch) for branch in av[1]]
+            return (
+                frozenset().union(*(chars for chars, _ in results)),
+                any(nullable for _, nullable in results),
+            )
+        if op is sre_parse.GROUPREF_EXISTS:
+            yes = self.first(av[1])
+            no = self.first(av[2]) if av[2] is not None else (frozenset(), True)
+            return yes[0] | no[0], yes[1] or no[1]
+        if op is sre_parse.GROUPREF:
+            return SAMPLE, True
+        # Anclas y lookarounds no consumen texto
+        return frozenset(), True
+
+    def witness(self, seq: Any) -> str:
+        """A short string matched by ``seq`` (to reach a repeat)."""
+        out = []
+        for op, av in seq:
+            if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY):
+                out.append(_pick(self.chars(op, av)))
+            elif op is sre_parse.IN:
+                out.append(_pick(self.chars(op, av)))
+            elif op in _REPEATS or op is sre_parse.POSSESSIVE_REPEAT:
+                out.append(self.witness(av[2]) * av[0])
+            elif op is sre_parse.SUBPATTERN:
+                out.append(self.witness(av[3]))
+            elif op is sre_parse.ATOMIC_GROUP:
+                out.append(self.witness(av))
+            elif op is sre_parse.BRANCH:
+                out.append(self.witness(av[1][0]))
+            elif op is sre_parse.GROUPREF_EXISTS:
+                out.append(self.witness(av[1]))
+        return "".join(out)
+
+    def walk(self, seq: Any, follow: _Chars, in_repeat: bool, prefix: str) -> None:
+        """Visit ``seq`` knowing what may follow it and whether an outer
+        unbounded repeat encloses it."""
+        items = list(seq)
+        for i, (op, av) in enumerate(items):
+            rest, rest_nullable = self.first(items[i + 1 :])
+            after = rest | follow if rest_nullable else rest
+            before = prefix + self.witness(items[:i])
+
+            if op in _REPEATS:
+                lo, hi, body = av
+                large = hi == sre_parse.MAXREPEAT or hi >= LARGE_REPEAT
+                body_first, _ = self.first(body)
+                if large:
+                    self.sites.append(_Site(before, body_first, after))
+                    overlap = body_first & after
+                    if in_repeat and overlap:
+                        self.issues.append(
+                            LintIssue(
+                                "nested-quantifier",
+                                "exponential",
+                                "unbounded repeat inside another one can match "
+                                f"{_pick(overlap)!r} in more than one way",
+                            )
+                        )
+                    self._check_adjacent(items, i, body_first)
+                self.walk(
+                    body,
+                    body_first | after if large else after,
+                    in_repeat or large,
+                    before,
+                )
+            elif op is sre_parse.SUBPATTERN:
+                self.walk(av[3], after, in_repeat, before)
+            elif op is sre_parse.BRANCH:
+                if in_repeat:
+                    self._check_branches(av[1])
+                for branch in av[1]:
+                    self.walk(branch, after, in_repeat, before)
+            elif op is sre_parse.GROUPREF_EXISTS:
+                self.walk(av[1], after, in_repeat, before)
+                if av[2] is not None:
+                    self.walk(av[2], after, in_repeat, before)
+            elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+                self.walk(av[1], frozenset(), in_repeat, before)
+            # ATOMIC_GROUP / POSSESSIVE_REPEAT: sin vuelta atrás dentro
+
+    def _check_adjacent(self, items: List[Any], i: int, body_first: _Chars) -> None:
+        # \w+\d+: dos repeticiones no acotadas separadas solo por elementos
+        # opcionales y con caracteres comunes -> O(n^2) por posición de inicio
+        for op, av in items[i + 1 :]:
+            if op in _REPEATS and (
+                av[1] == sre_parse.MAXREPEAT or av[1] >= LARGE_REPEAT
+            ):
+                overlap = body_first & self.first(av[2])[0]
+                if overlap:
+                    self.issues.append(
+                        LintIssue(
+                            "overlapping-repeats",
+                            "polynomial",
+                            "adjacent unbounded repeats both match "
+                            f"{_pick(overlap)!r}",
+                        )
+                    )
+                return
+            if not self.item_first(op, av)[1]:
+                return
+
+    def _check_branches(self, branches: List[Any]) -> None:
+        firsts = [self.first(branch)[0] for branch in branches]
+        for a in range(len(firsts)):
+            for b in range(a + 1, len(firsts)):
+                overlap = firsts[a] & firsts[b]
+                if overlap:
+                    self.issues.append(
+                        LintIssue(
+                            "ambiguous-alternation",
+                            "exponential",
+                            "alternatives under an unbounded repeat both start "
+                            f"with {_pick(overlap)!r}",
+                        )
+                    )
+                    return
+
+
+def _analyze(pattern: "re.Pattern[str]") -> _Analyzer:
+    analyzer = _Analyzer(pattern.flags)
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return analyzer
+    analyzer.flags = parsed.state.flags
+    analyzer.walk(parsed, frozenset(), False, "")
+    # Un mismo constructo puede señalarse desde varias repeticiones
+    analyzer.issues = list(dict.fromkeys(analyzer.issues))
+    return analyzer
+
+
+def lint_pattern(pattern: "re.Pattern[str]") -> List[LintIssue]:
+    """Static check of a compiled pattern for superlinear backtracking.
+
+    Args:
+        pattern: Compiled regular expression.
+
+    Returns:
+        The issues found (empty when the pattern looks linear).
+    """
+    return _analyze(pattern).issues
+
+
+def pump_inputs(pattern: "re.Pattern[str]") -> List[Tuple[str, str, str]]:
+    """Adversarial inputs for a pattern as ``(prefix, pump, suffix)``.
+
+    For every unbounded repeat: the text that reaches it, a character its
+    body accepts (preferably one that may also follow it, the ambiguous
+    case) and a final character that makes the overall match fail.
+    """
+    inputs: List[Tuple[str, str, str]] = []
+    for site in _analyze(pattern).sites:
+        if not site.body:
+            continue
+        pump = _pick(site.body & site.follow or site.body)
+        killers = SAMPLE - site.body - site.follow
+        suffix = _pick(killers - {"\n"} or killers)
+        entry = (site.prefix, pump, suffix)
+        if entry not in inputs:
+            inputs.append(entry)
+    return inputs
+
+
+def benign_text(chars: int = BENIGN_CHARS, seed: int = 0) -> str:
+    """Synthetic added lines shaped like a typical diff (code, config, prose)."""
+    rnd = random.Random(seed)
+    words = ["value", "request", "timeout", "config", "user", "token", "id"]
+    lines: List[str] = []
+    size = 0
+    while size < chars:
+        kind = rnd.randrange(4)
+        word = rnd.choice(words)
+        if kind == 0:
+            line = f"    {word}_{rnd.randrange(999)} = compute({word}, {rnd.randrange(1 << 20)})"
+        elif kind == 1:
+            line = f'  "{word}": "{rnd.randrange(1 << 30):x}",'
+        elif kind == 2:
+            line = f"# {' '.join(rnd.choices(words, k=8))}"
+        else:
+            line = f"{word.upper()}_URL: https://example.com/{word}/{rnd.randrange(99)}"
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+class RuleProfile(NamedTuple):
+    """Measured cost of one rule (see ``profile_rule``).
+
+    Attributes:
+        name: Rule name.
+        status: ``ok`` | ``slow`` | ``superlinear`` | ``catastrophic``.
+        issues: Static issues (``lint_pattern``).
+        ms_per_mb: Scan time of the synthetic diff, per MB.
+        exponent: Growth ``k`` of the match time (``t ~ n^k``) on the worst
+            pump input, or None when it could not be measured.
+        worst_input: Size (chars) of the largest pump input completed.
+    """
+
+    name: str
+    status: str
+    issues: List[LintIssue]
+    ms_per_mb: Optional[float]
+    exponent: Optional[float]
+    worst_input: int
+
+
+def _time_scan(pattern: "re.Pattern[str]", text: str) -> float:
+    start = time.perf_counter()
+    for _ in pattern.finditer(text):
+        pass
+    return time.perf_counter() - start
+
+
+def _profile_worker(conn: Any, source: str, flags: int, benign_chars: int) -> None:
+    """Child process: stream measurements to the parent as they complete."""
+    pattern = re.compile(source, flags)
+    text = benign_text(benign_chars)
+    conn.send(("benign", len(text), _time_scan(pattern, text)))
+    for site, (prefix, pump, suffix) in enumerate(pump_inputs(pattern)):
+        n = PUMP_START
+        while n <= PUMP_MAX:
+            line = prefix + pump * n + suffix
+            elapsed = min(_time_scan(pattern, line) for _ in range(3))
+            conn.send(("pump", site, len(line), elapsed))
+            if elapsed > MEASURE_LIMIT_S:
+                break
+            n *= 2
+    conn.send(("done",))
+
+
+def _growth(points: List[Tuple[int, float]]) -> Optional[float]:
+    """Exponent between the two largest measurable sizes of a pump input."""
+    points = [(n, t) for n, t in points if t >= 1e-4]
+    if len(points) < 2:
+        return None
+    (n1, t1), (n2, t2) = points[-2], points[-1]
+    return math.log(t2 / t1) / math.log(n2 / n1)
+
+
+def profile_rule(
+    name: str,
+    pattern: "re.Pattern[str]",
+    timeout: float = DEFAULT_TIMEOUT_S,
+    benign_chars: int = BENIGN_CHARS,
+) -> RuleProfile:
+    """Benchmark one rule in a child process, killed after ``timeout`` s.
+
+    Args:
+        name: Rule name (for the report).
+        pattern: Compiled rule.
+        timeout: Time budget for the whole profile of the rule.
+        benign_chars: Size of the synthetic diff used for throughput.
+
+    Returns:
+        The RuleProfile.
+    """
+    issues = lint_pattern(pattern)
+    parent, child = multiprocessing.Pipe(duplex=False)
+    worker = multiprocessing.Process(
+        target=_profile_worker,
+        args=(child, pattern.pattern, pattern.flags, benign_chars),
+        daemon=True,
+    )
+    worker.start()
+    child.close()
+
+    ms_per_mb: Optional[float] = None
+    pumps: Dict[int, List[Tuple[int, float]]] = {}
+    finished = False
+    deadline = time.monotonic() + timeout
+    try:
+        while parent.poll(max(0.0, deadline - time.monotonic())):
+            message = parent.recv()
+            if message[0] == "done":
+                finished = True
+                break
+            if message[0] == "benign":
+                ms_per_mb = message[2] * 1000 / (message[1] / 1e6)
+            else:
+                pumps.setdefault(message[1], []).append(message[2:])
+    except EOFError:
+        pass
+    finally:
+        worker.terminate()
+        worker.join()
+        parent.close()
+
+    growths = [g for g in map(_growth, pumps.values()) if g is not None]
+    exponent = max(growths) if growths else None
+    worst_input = max((n for points in pumps.values() for n, _ in points), default=0)
+    if not finished:
+        status = "catastrophic"
+    elif exponent is not None and exponent >= SUPERLINEAR_EXPONENT:
+        status = "superlinear"
+    elif ms_per_mb is not None and ms_per_mb >= SLOW_MS_PER_MB:
+        status = "slow"
+    else:
+        status = "ok"
+    return RuleProfile(name, status, issues, ms_per_mb, exponent, worst_input)
+
+
+def lint_policy(
+    rules: List[dict], timeout: float = DEFAULT_TIMEOUT_S
+) -> List[RuleProfile]:
+    """Profile every ``{"name", "pattern"}`` rule of a policy, in order."""
+    return [profile_rule(rule["name"], rule["pattern"], timeout) for rule in rules]
+
+
+def risky_rules(rules: List[dict]) -> List[int]:
+    """Indexes of the rules ``lint_pattern`` flags (guarded at runtime)."""
+    return [idx for idx, rule in enumerate(rules) if lint_pattern(rule["pattern"])]
@@ -0,0 +1,270 @@
+"""Report outputs of a scan: console, plain text, JSON lines or SARIF.
+
+The gates hand their outcomes to a ``Reporter`` in pipeline order (regex
+findings, then the AI verdict, then the final status). Only the console
+reporter renders Rich tables, and ``src.console_ui`` (and with it Rich) is
+imported the first time it draws something; the other formats write each
+finding as soon as they receive it, so thousands of findings from a
+full-tree or batch scan stream out without building any table:
+
+    plain    one line per finding/verdict, no colors (CI logs, grep)
+    jsonl    one JSON object per finding/verdict/message/status
+    sarif    a SARIF 2.1.0 log (code scanning upload); results are streamed
+             and the rule list is written when the report is closed
+"""
+
+import json
+import sys
+from typing import IO, Any, Dict, Iterable, List, Optional
+
+REPORT_FORMATS = ("console", "plain", "jsonl", "sarif")
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+TOOL_NAME = "OpsGuard-AI"
+TOOL_URI = "https://github.com/oscaar90/OpsGuard-AI"
+AI_RULE_ID = "opsguard-ai"
+
+# Severidad del hallazgo IA -> nivel SARIF
+_SARIF_LEVELS = {"CRITICAL": "error", "HIGH": "error", "MEDIUM": "warning"}
+
+
+class Reporter:
+    """Receives the outcome of a scan, piece by piece (base: no output)."""
+
+    def __init__(self, out: IO[str]) -> None:
+        """
+        Args:
+            out: Text stream the report is written to.
+        """
+        self.out = out
+
+    def banner(self) -> None:
+        """Start of a scan."""
+
+    def regex_findings(self, findings: Iterable[dict]) -> None:
+        """Findings of the regex gate (see ``SecurityPolicy.scan_hunks``)."""
+
+    def ai_verdict(self, result: Dict[str, Any]) -> None:
+        """Verdict of the AI gate (``verdict``, ``risk_score``, ``findings``...)."""
+
+    def message(self, text: str, level: str = "info") -> None:
+        """Note about the run; ``level`` is ``info``, ``warning`` or ``error``."""
+
+    def finish(self, status: str) -> None:
+        """Final status (``approve``, ``block``, ``skip`` or ``error``)."""
+
+    def close(self) -> None:
+        """Flush the report (and terminate documents that need it)."""
+        self.out.flush()
+
+
+class ConsoleReporter(Reporter):
+    """Rich panels and tables (``OpsGuardUI``), for humans at a terminal."""
+
+    def __init__(self, out: IO[str]) -> None:
+        super().__init__(out)
+        self._ai_shown = False
+
+    def _ui(self):
+        from src import console_ui
+
+        if self.out is not sys.stdout:
+            # --output a fichero: las tablas van allí (sin colores)
+            console_ui.console.file = self.out
+        return console_ui.OpsGuardUI
+
+    def banner(self) -> None:
+        self._ui().print_banner()
+
+    def regex_findings(self, findings: Iterable[dict]) -> None:
+        self._ui().print_regex_findings(list(findings))
+
+    def ai_verdict(self, result: Dict[str, Any]) -> None:
+        self._ui().print_ai_analysis(result)
+        self._ai_shown = True
+
+    def message(self, text: str, level: str = "info") -> None:
+        import typer
+
+        color = {"warning": typer.colors.YELLOW, "error": typer.colors.RED}
+        typer.secho(text, fg=color.get(level), file=self.out)
+
+    def finish(self, status: str) -> None:
+        if status == "block":
+            self._ui().print_block_message()
+        elif status == "approve" and self._ai_shown:
+            self._ui().print_success_message()
+
+
+class PlainReporter(Reporter):
+    """One uncolored line per finding, verdict and message."""
+
+    def _line(self, text: str) -> None:
+        self.out.write(text + "\n")
+
+    def regex_findings(self, findings: Iterable[dict]) -> None:
+        for finding in findings:
+            self._line(
+                f"VIOLATION {finding.get('file')}:{finding.get('line', '?')} "
+                f"{finding.get('type')}"
+            )
+
+    def ai_verdict(self, result: Dict[str, Any]) -> None:
+        self._line(
+            f"AI {result.get('verdict', 'UNKNOWN')} "
+            f"risk={result.get('risk_score', 0)}/10 {result.get('explanation', '')}"
+        )
+        for finding in result.get("findings", []):
+            self._line(
+                f"AI-FINDING {finding.get('severity', 'UNK')} "
+                f"{finding.get('file', '-')}:{finding.get('line', '?')} "
+                f"{finding.get('issue', '')}"
+            )
+
+    def message(self, text: str, level: str = "info") -> None:
+        self._line(f"{level.upper()} {text}")
+
+    def finish(self, status: str) -> None:
+        self._line(f"STATUS {status}")
+
+
+class JsonLinesReporter(Reporter):
+    """One JSON object per line, tagged with ``kind``."""
+
+    def _record(self, kind: str, **fields: Any) -> None:
+        self.out.write(json.dumps({"kind": kind, **fields}, ensure_ascii=False) + "\n")
+
+    def regex_findings(self, findings: Iterable[dict]) -> None:
+        for finding in findings:
+            self._record("finding", source="regex", **finding)
+
+    def ai_verdict(self, result: Dict[str, Any]) -> None:
+        verdict = {k: v for k, v in result.items() if k != "findings"}
+        self._record("ai_verdict", **verdict)
+        for finding in result.get("findings", []):
+            self._record("finding", source="ai", **finding)
+
+    def message(self, text: str, level: str = "info") -> None:
+        self._record("message", level=level, message=text)
+
+    def finish(self, status: str) -> None:
+        self._record("status", status=status)
+
+
+def _sarif_location(path: Optional[str], line: Any) -> Dict[str, Any]:
+    location: Dict[str, Any] = {"artifactLocation": {"uri": path or "Diff"}}
+    if isinstance(line, int) and line > 0:
+        location["region"] = {"startLine": line}
+    return {"physicalLocation": location}
+
+
+class SarifReporter(Reporter):
+    """SARIF 2.1.0 log with a single run; results are written as they come."""
+
+    def __init__(self, out: IO[str]) -> None:
+        super().__init__(out)
+        self._rules: Dict[str, str] = {}
+        self._results = 0
+        self._status: Optional[str] = None
+        self._notes: List[Dict[str, Any]] = []
+        self.out.write(
+            f'{{"version": "2.1.0", "$schema": "{SARIF_SCHEMA}", '
+            f'"runs": [{{"results": [\n'
+        )
+
+    def _result(self, rule: str, level: str, text: str, location: Dict) -> None:
+        self._rules.setdefault(rule, rule)
+        result = {
+            "ruleId": rule,
+            "level": level,
+            "message": {"text": text},
+            "locations": [location],
+        }
+        separator = ",\n" if self._results else ""
+        self.out.write(separator + json.dumps(result, ensure_ascii=False))
+        self._results += 1
+
+    def regex_findings(self, findings: Iterable[dict]) -> None:
+        for finding in findings:
+            self._result(
+                finding.get("rule") or "opsguard-regex",
+                "error",
+                finding.get("type", ""),
+                _sarif_location(finding.get("file"), finding.get("line")),
+            )
+
+    def ai_verdict(self, result: Dict[str, Any]) -> None:
+        self._rules.setdefault(AI_RULE_ID, "AI semantic review")
+        for finding in result.get("findings", []):
+            severity = str(finding.get("severity", "")).upper()
+            self._result(
+                AI_RULE_ID,
+                _SARIF_LEVELS.get(severity, "note"),
+                f"[{severity or 'UNK'}] {finding.get('issue', '')}",
+                _sarif_location(finding.get("file"), finding.get("line")),
+            )
+        self._notes.append(
+            {
+                "level": "note",
+                "message": {
+                    "text": (
+                        f"AI verdict {result.get('verdict', 'UNKNOWN')} "
+                        f"(risk {result.get('risk_score', 0)}/10): "
+                        f"{result.get('explanation', '')}"
+                    )
+                },
+            }
+        )
+
+    def message(self, text: str, level: str = "info") -> None:
+        sarif_level = {"warning": "warning", "error": "error"}.get(level, "note")
+        self._notes.append({"level": sarif_level, "message": {"text": text}})
+
+    def finish(self, status: str) -> None:
+        self._status = status
+
+    def close(self) -> None:
+        rules = [
+            {"id": rule, "name": name, "shortDescription": {"text": name}}
+            for rule, name in self._rules.items()
+        ]
+        invocation = {
+            "executionSuccessful": self._status != "error",
+            "toolExecutionNotifications": self._notes,
+        }
+        tail = {
+            "tool": {
+                "driver": {
+                    "name": TOOL_NAME,
+                    "informationUri": TOOL_URI,
+                    "rules": rules,
+                }
+            },
+            "invocations": [invocation],
+            "properties": {"status": self._status},
+        }
+        # Cerramos "results" y añadimos el resto del run tras los resultados
+        self.out.write("\n], " + json.dumps(tail, ensure_ascii=False)[1:] + "]}\n")
+        super().close()
+
+
+_REPORTERS = {
+    "console": ConsoleReporter,
+    "plain": PlainReporter,
+    "jsonl": JsonLinesReporter,
+    "sarif": SarifReporter,
+}
+
+
+def get_reporter(fmt: str, out: IO[str]) -> Reporter:
+    """Reporter for ``fmt`` (one of ``REPORT_FORMATS``) writing to ``out``.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    try:
+        return _REPORTERS[fmt](out)
+    except KeyError:
+        raise ValueError(
+            f"Unknown report format '{fmt}' (expected: {', '.join(REPORT_FORMATS)})"
+        )
@@ -0,0 +1,143 @@
+"""Per-rule hit and cost profile of the regex gate (``--profile-rules``).
+
+``opsguard policy lint`` measures rules on synthetic input; this measures them
+on real diffs. With a ``ScanProfile`` passed to ``SecurityPolicy.scan_hunks``
+every rule is timed on every window it runs on, and the profile records per
+rule (entropy charsets included):
+
+    matches         findings reported (a match repeated by window or shard
+                    overlap counts once)
+    bytes_scanned   chars of added text the rule was evaluated on
+    time            cumulative match time (guarded rules: measured in the
+                    guard's worker; an aborted rule is charged its budget)
+    suppressed      matches dropped before the report: entropy tokens
+                    already covered by a blocklist match
+
+The passes shared by all rules are charged to two pseudo-rules,
+``(prefilter)`` and ``(entropy)``. Profiles merge (process pool shards, the
+scans of a batch, a daemon's lifetime), so rules that cost a lot and never
+fire can be pruned or rewritten from real data. Profiling is opt-in: it
+costs two clock reads per rule and window.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+PREFILTER = "(prefilter)"
+ENTROPY = "(entropy)"
+SHARED_PASSES = (PREFILTER, ENTROPY)
+
+# Orden de los contadores en las listas internas y en los registros
+_FIELDS = ("matches", "bytes_scanned", "time_ms", "suppressed")
+
+
+class RuleStats(NamedTuple):
+    """Counters of one rule (see the module docstring)."""
+
+    matches: int = 0
+    bytes_scanned: int = 0
+    time_s: float = 0.0
+    suppressed: int = 0
+
+    @property
+    def ms_per_mb(self) -> Optional[float]:
+        """Match time per MB scanned (None when nothing was scanned)."""
+        if not self.bytes_scanned:
+            return None
+        return self.time_s * 1000 / (self.bytes_scanned / 1e6)
+
+
+class ScanProfile:
+    """Per-rule counters keyed by rule name.
+
+    Not thread-safe: each scan fills its own profile, and profiles shared
+    across threads are merged under the owner's lock (see ``ScanService``).
+    Picklable, so process pool workers return theirs.
+    """
+
+    def __init__(self) -> None:
+        # nombre -> [matches, bytes, segundos, suprimidos]
+        self._rules: Dict[str, List[float]] = {}
+
+    def add(
+        self,
+        rule: str,
+        matches: int = 0,
+        bytes_scanned: int = 0,
+        time_s: float = 0.0,
+        suppressed: int = 0,
+    ) -> None:
+        """Add to the counters of ``rule``."""
+        counters = self._rules.get(rule)
+        if counters is None:
+            counters = self._rules[rule] = [0, 0, 0.0, 0]
+        counters[0] += matches
+        counters[1] += bytes_scanned
+        counters[2] += time_s
+        counters[3] += suppressed
+
+    def merge(self, other: "ScanProfile") -> None:
+        """Add every counter of ``other`` to this profile."""
+        for rule, counters in other._rules.items():
+            self.add(rule, *counters)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def stats(self) -> Dict[str, RuleStats]:
+        """Counters per rule, in first-seen order."""
+        return {
+            rule: RuleStats(int(m), int(b), t, int(s))
+            for rule, (m, b, t, s) in self._rules.items()
+        }
+
+    def ranked(self) -> List[Tuple[str, RuleStats]]:
+        """Rules by cumulative time, most expensive first."""
+        return sorted(self.stats().items(), key=lambda item: (-item[1].time_s, item[0]))
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """JSON-able form (``rule -> {matches, bytes_scanned, time_ms,
+        suppressed}``), as stored in the telemetry record."""
+        return {
+            rule: dict(zip(_FIELDS, (m, b, round(t * 1000, 3), s)))
+            for rule, (m, b, t, s) in self._rules.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, Any]]) -> "ScanProfile":
+        """Inverse of ``to_dict``."""
+        profile = cls()
+        for rule, counters in data.items():
+            profile.add(
+                rule,
+                int(counters.get("matches", 0)),
+                int(counters.get("bytes_scanned", 0)),
+                counters.get("time_ms", 0) / 1000,
+                int(counters.get("suppressed", 0)),
+            )
+        return profile
+
+    def record(self, telemetry: Any) -> None:
+        """Add the counters to a ``Telemetry`` run (per-rule series)."""
+        for rule, counters in self.to_dict().items():
+            for name, value in counters.items():
+                telemetry.rule(rule, name, value)
+
+    def format_table(self) -> str:
+        """Text table of the profile, most expensive rule first."""
+        lines = [
+            f"{'rule':<32} {'matches':>8} {'suppr.':>7} {'MB':>8} "
+            f"{'time ms':>9} {'ms/MB':>8}"
+        ]
+        idle = []
+        for rule, stats in self.ranked():
+            ms_per_mb = stats.ms_per_mb
+            lines.append(
+                f"{rule[:32]:<32} {stats.matches:>8} {stats.suppressed:>7} "
+                f"{stats.bytes_scanned / 1e6:>8.2f} {stats.time_s * 1000:>9.2f} "
+                f"{f'{ms_per_mb:.2f}' if ms_per_mb is not None else '-':>8}"
+            )
+            if rule not in SHARED_PASSES and not stats.matches and stats.bytes_scanned:
+                idle.append(rule)
+        if idle:
+            lines.append(f"{len(idle)} rule(s) scanned text but never matched.")
+        return "\n".join(lines)
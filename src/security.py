@@ -1,10 +1,34 @@
 """Security policy engine for OpsGuard-AI (ADR-0001: Local Gatekeeper Pattern)."""
 
 import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
-import yaml
+from src.backends import BackendConfig
+from src.diffparse import DiffHunk, DiffIndex, iter_hunks
+from src.entropy import CHARSETS, EntropyDetector
+from src.matcher import MultiPatternEngine, findall_value, literal_prefix
+from src.regex_guard import GuardConfig, RuleGuard
+from src.scan_profile import ENTROPY, PREFILTER, ScanProfile
+from src.triage import TriageConfig
+
+# Ventana de escaneo por fichero (chars) y solape entre ventanas consecutivas.
+SCAN_WINDOW_CHARS = 1 << 20
+SCAN_OVERLAP_LINES = 16
+
+# Modo paralelo: por debajo de este tamaño de diff no compensa arrancar el pool.
+PARALLEL_MIN_CHARS = 8 << 20
+# Tamaño aproximado de cada shard (ficheros agrupados) enviado a un worker.
+PARALLEL_SHARD_CHARS = 2 << 20
+
+_Hits = Dict[Tuple[int, Any, str, int], None]
+
+# Política del proceso worker (se envía una sola vez, en el initializer del pool)
+_WORKER_POLICY: Optional["SecurityPolicy"] = None
 
 
 class SecurityPolicyError(Exception):
@@ -30,8 +54,130 @@ class SecurityPolicy:
             SecurityPolicyError: If config file is missing or invalid.
         """
         self.rules: List[dict] = []
+        self.entropy: Optional[EntropyDetector] = None
+        self.ai: Optional[BackendConfig] = None
+        self.guard_config = GuardConfig()
+        self.triage_config = TriageConfig()
+        self._prefixes: Optional[Sequence[str]] = None
+        self._guarded: Optional[List[int]] = None
+        self._engine: Optional[MultiPatternEngine] = None
+        self._unguarded: List[int] = []
+        self._guard: Optional[RuleGuard] = None
         self._load_config(config_path)
 
+    @classmethod
+    def from_rules(
+        cls,
+        rules: List[Dict[str, Any]],
+        prefixes: Optional[Sequence[str]] = None,
+        entropy: Optional[Dict[str, Any]] = None,
+        guard: Optional[Dict[str, Any]] = None,
+        guarded: Optional[Sequence[int]] = None,
+    ) -> "SecurityPolicy":
+        """Build a policy from already validated rules (see policy_bundle.py).
+
+        Args:
+            rules: ``{"name", "pattern", "flags"}`` dicts with source patterns.
+            prefixes: Precomputed literal prefix per rule, if available.
+            entropy: Entropy detector config (``EntropyDetector.to_config``),
+                or None to disable it.
+            guard: Runtime guard config (``GuardConfig.to_config``), or None
+                for the defaults.
+            guarded: Precomputed ``guarded_rules``, if available.
+
+        Raises:
+            SecurityPolicyError: If a pattern no longer compiles.
+        """
+        policy = cls.__new__(cls)
+        policy.rules = []
+        policy.entropy = None
+        policy.ai = None
+        policy.guard_config = GuardConfig(**guard) if guard else GuardConfig()
+        policy._prefixes = prefixes
+        policy._guarded = list(guarded) if guarded is not None else None
+        policy._engine = None
+        policy._unguarded = []
+        policy._guard = None
+        if entropy is not None:
+            policy._load_entropy(entropy)
+        for rule in rules:
+            try:
+                compiled = re.compile(rule["pattern"], rule.get("flags", 0))
+            except re.error as e:
+                raise SecurityPolicyError(
+                    f"Invalid regex in rule '{rule['name']}': {e}"
+                )
+            policy.rules.append({"name": rule["name"], "pattern": compiled})
+        return policy
+
+    def rule_specs(self) -> List[Dict[str, Any]]:
+        """Picklable/JSON-able form of the rules (see ``from_rules``)."""
+        return [
+            {
+                "name": rule["name"],
+                "pattern": rule["pattern"].pattern,
+                "flags": rule["pattern"].flags,
+            }
+            for rule in self.rules
+        ]
+
+    @property
+    def entropy_config(self) -> Optional[Dict[str, Any]]:
+        """Serializable entropy detector config (None when disabled)."""
+        return self.entropy.to_config() if self.entropy else None
+
+    @property
+    def engine(self) -> MultiPatternEngine:
+        """Single-pass engine: one literal prefilter for all rules not under
+        the runtime guard (see matcher.py).
+
+        Built on first scan so that loading a policy stays cheap.
+        """
+        if self._engine is None:
+            guarded = set(self.guarded_rules)
+            self._unguarded = [
+                idx for idx in range(len(self.rules)) if idx not in guarded
+            ]
+            prefixes = self.literal_prefixes
+            self._engine = MultiPatternEngine(
+                [self.rules[idx] for idx in self._unguarded],
+                [prefixes[idx] for idx in self._unguarded],
+            )
+        return self._engine
+
+    @property
+    def literal_prefixes(self) -> List[str]:
+        """Literal prefix of every rule, as used by the engine prefilter."""
+        if self._prefixes is None:
+            self._prefixes = [literal_prefix(rule["pattern"]) for rule in self.rules]
+        return list(self._prefixes)
+
+    @property
+    def guarded_rules(self) -> List[int]:
+        """Indexes of the rules evaluated under the runtime time budget
+        (``regex_guard.rules``: the ones the linter flags, all or none)."""
+        if self._guarded is None:
+            if self.guard_config.rules == "all":
+                self._guarded = list(range(len(self.rules)))
+            elif self.guard_config.rules == "risky":
+                from src.regex_lint import risky_rules
+
+                self._guarded = risky_rules(self.rules)
+            else:
+                self._guarded = []
+        return self._guarded
+
+    @property
+    def guard(self) -> Optional[RuleGuard]:
+        """Worker-process guard of the guarded rules (None if there are none)."""
+        if self._guard is None and self.guarded_rules:
+            self._guard = RuleGuard(
+                self.rule_specs(),
+                self.guarded_rules,
+                self.guard_config.rule_timeout_ms,
+            )
+        return self._guard
+
     def _load_config(self, config_path: str) -> None:
         """Load security rules from YAML configuration file.
 
@@ -41,6 +187,9 @@ class SecurityPolicy:
         Raises:
             SecurityPolicyError: If file is missing, unreadable, or invalid.
         """
+        # Import diferido: con el bundle de política en caché no hace falta YAML
+        import yaml
+
         config_file = Path(config_path)
 
         if not config_file.exists():
@@ -85,7 +234,63 @@ class SecurityPolicy:
                     f"Invalid regex in rule '{rule['name']}': {e}"
                 )
 
-    def scan_diff(self, diff_text: str) -> List[str]:
+        entropy = config.get("entropy")
+        if entropy is not None:
+            if not isinstance(entropy, dict):
+                raise SecurityPolicyError("'entropy' must be a mapping")
+            if entropy.get("enabled", True):
+                self._load_entropy(entropy)
+
+        ai = config.get("ai")
+        if ai is not None:
+            if not isinstance(ai, dict):
+                raise SecurityPolicyError("'ai' must be a mapping")
+            try:
+                self.ai = BackendConfig.from_config(ai)
+            except (TypeError, ValueError) as e:
+                raise SecurityPolicyError(f"Invalid 'ai' configuration: {e}")
+
+        guard = config.get("regex_guard")
+        if guard is not None:
+            if not isinstance(guard, dict):
+                raise SecurityPolicyError("'regex_guard' must be a mapping")
+            try:
+                self.guard_config = GuardConfig.from_config(guard)
+            except (TypeError, ValueError) as e:
+                raise SecurityPolicyError(
+                    f"Invalid 'regex_guard' configuration: {e}"
+                )
+
+        triage = config.get("triage")
+        if triage is not None:
+            if not isinstance(triage, dict):
+                raise SecurityPolicyError("'triage' must be a mapping")
+            try:
+                self.triage_config = TriageConfig.from_config(triage)
+            except (TypeError, ValueError) as e:
+                raise SecurityPolicyError(
+                    f"Invalid 'triage' configuration: {e}"
+                )
+
+    def _load_entropy(self, config: Dict[str, Any]) -> None:
+        """Enable the entropy detector (second stage, see entropy.py)."""
+        try:
+            self.entropy = EntropyDetector.from_config(config)
+        except (TypeError, ValueError) as e:
+            raise SecurityPolicyError(f"Invalid 'entropy' configuration: {e}")
+
+    def rule_name(self, idx: int) -> str:
+        """Name of a blocklist rule or, past the blocklist, of an entropy charset."""
+        if idx < len(self.rules):
+            return self.rules[idx]["name"]
+        return f"High Entropy ({CHARSETS[idx - len(self.rules)]})"
+
+    def scan_diff(
+        self,
+        diff_text: str,
+        workers: int = 1,
+        profile: Optional[ScanProfile] = None,
+    ) -> List[dict]:
         """Scan a git diff for security violations.
 
         Only scans added lines (starting with '+') to detect new secrets.
@@ -94,35 +299,318 @@ class SecurityPolicy:
 
         Args:
             diff_text: Raw git diff string to analyze.
+            workers: Worker processes for large diffs (see ``scan_hunks``).
+            profile: Per-rule profile to fill (see ``scan_hunks``).
 
         Returns:
-            List of violation messages. Empty list if no violations found.
+            List of findings (see ``scan_hunks``). Empty list if clean.
         """
-        violations: List[str] = []
-
         if not diff_text:
-            return violations
-
-        # Extract only added lines (excluding diff headers like +++ )
-        added_lines = []
-        for line in diff_text.splitlines():
-            if line.startswith("+") and not line.startswith("+++"):
-                # Remove the leading '+' for pattern matching
-                added_lines.append(line[1:])
-
-        # Join added lines for multiline pattern matching
-        added_content = "\n".join(added_lines)
-
-        # Check each rule against the added content
-        for rule in self.rules:
-            matches = rule["pattern"].findall(added_content)
-            if matches:
-                # Report each unique match
-                for match in set(matches):
-                    # Truncate long matches for readability
-                    display_match = match if len(match) <= 40 else f"{match[:37]}..."
-                    violations.append(
-                        f"[{rule['name']}] Found pattern: {display_match}"
-                    )
-
-        return violations
+            return []
+
+        return self.scan_hunks(
+            iter_hunks(diff_text.splitlines()), workers=workers, profile=profile
+        )
+
+    def scan_hunks(
+        self,
+        hunks: Iterable[DiffHunk],
+        workers: int = 1,
+        parallel_min_chars: int = PARALLEL_MIN_CHARS,
+        profile: Optional[ScanProfile] = None,
+    ) -> List[dict]:
+        """Scan a stream of diff hunks for security violations.
+
+        Added lines are buffered per file into a DiffIndex window of at most
+        ``SCAN_WINDOW_CHARS``; consecutive windows of the same file overlap by
+        ``SCAN_OVERLAP_LINES`` lines so multi-line matches across window (or
+        hunk slice) boundaries are still found. Memory stays bounded by the
+        window size, not by the diff size.
+
+        With ``workers > 1`` and a diff of at least ``parallel_min_chars``,
+        the hunks are sharded by file across a process pool; results are
+        identical to the single-process scan.
+
+        Args:
+            hunks: Iterable of DiffHunk slices (e.g. GitManager.iter_diff_hunks).
+            workers: Number of worker processes (1 = scan in-process).
+            parallel_min_chars: Diff size below which the scan stays serial.
+            profile: If given, every rule is timed and its matches, bytes
+                scanned and suppressions are added to it (see
+                scan_profile.py); the findings are the same.
+
+        Returns:
+            List of findings ordered by file and line, each a dict with
+            ``type`` (violation message), ``rule``, ``file`` and ``line``.
+            Unknown locations are reported as ``"Diff"`` / ``"?"``. A
+            guarded rule that overran its time budget on a file is reported
+            once for that file with ``aborted`` set (see regex_guard.py).
+        """
+        # (rule_idx, match, path, line) -> None: una entrada por ocurrencia,
+        # lo que además absorbe los duplicados del solape entre ventanas.
+        hits: _Hits = {}
+        if workers > 1:
+            self._collect_hits_parallel(
+                hunks, hits, workers, parallel_min_chars, profile
+            )
+        else:
+            self._collect_hits(hunks, hits, set(), profile)
+
+        file_order: Dict[str, int] = {}
+        for _, _, path, _ in hits:
+            file_order.setdefault(path, len(file_order))
+
+        findings: List[dict] = []
+        for idx, match, path, line in sorted(
+            hits, key=lambda hit: (file_order[hit[2]], hit[3], hit[0])
+        ):
+            name = self.rule_name(idx)
+            if profile is not None and match is not None:
+                profile.add(name, matches=1)
+            if match is None:
+                # Regla abortada por el guard: no evaluada, el gate falla cerrado
+                findings.append({
+                    "type": (
+                        f"[{name}] Rule aborted: exceeded "
+                        f"{self.guard_config.rule_timeout_ms:g} ms budget"
+                    ),
+                    "rule": name,
+                    "file": path or "Diff",
+                    "line": "?",
+                    "aborted": True,
+                })
+                continue
+            # Truncate long matches for readability
+            display_match = match if len(match) <= 40 else f"{match[:37]}..."
+            findings.append({
+                "type": f"[{name}] Found pattern: {display_match}",
+                "rule": name,
+                "file": path or "Diff",
+                "line": line or "?",
+            })
+
+        return findings
+
+    def _collect_hits(
+        self,
+        hunks: Iterable[DiffHunk],
+        hits: _Hits,
+        aborted: Set[int],
+        profile: Optional[ScanProfile] = None,
+    ) -> None:
+        """Single-process scan: per-file windows over the hunk stream.
+
+        ``aborted`` holds the guarded rules that overran their budget so far.
+        """
+        window = DiffIndex()
+        for hunk in hunks:
+            if window.paths and hunk.path != window.paths[-1]:
+                self._scan_window(window, hits, aborted, profile)
+                window = DiffIndex()
+
+            window.add_hunk(hunk)
+
+            if window.chars >= SCAN_WINDOW_CHARS:
+                self._scan_window(window, hits, aborted, profile)
+                window = window.tail(SCAN_OVERLAP_LINES)
+
+        self._scan_window(window, hits, aborted, profile)
+
+    def _collect_hits_parallel(
+        self,
+        hunks: Iterable[DiffHunk],
+        hits: _Hits,
+        workers: int,
+        min_chars: int,
+        profile: Optional[ScanProfile] = None,
+    ) -> None:
+        """Shard hunks across a process pool once the diff is big enough.
+
+        Hunks are buffered until ``min_chars`` is reached; smaller diffs are
+        scanned in-process. Shards are merged in submission order, so the
+        insertion order of ``hits`` (and therefore the report) matches the
+        serial scan. At most ``2 * workers`` shards are in flight. Workers
+        return their shard's profile along with its hits.
+        """
+        hunks = iter(hunks)
+        head: List[DiffHunk] = []
+        size = 0
+        for hunk in hunks:
+            head.append(hunk)
+            size += _hunk_chars(hunk)
+            if size >= min_chars:
+                break
+        else:
+            self._collect_hits(head, hits, set(), profile)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                self.rule_specs(),
+                self.literal_prefixes,
+                self.entropy_config,
+                self.guard_config.to_config(),
+                self.guarded_rules,
+            ),
+        ) as pool:
+            pending: deque = deque()
+
+            def merge() -> None:
+                keys, shard_profile = pending.popleft().result()
+                hits.update(dict.fromkeys(keys))
+                if profile is not None:
+                    profile.merge(shard_profile)
+
+            profiled = profile is not None
+            for shard in _iter_shards(chain(head, hunks), PARALLEL_SHARD_CHARS):
+                pending.append(pool.submit(_scan_shard, shard, profiled))
+                if len(pending) >= 2 * workers:
+                    merge()
+            while pending:
+                merge()
+
+    def _scan_window(
+        self,
+        window: DiffIndex,
+        hits: _Hits,
+        aborted: Set[int],
+        profile: Optional[ScanProfile] = None,
+    ) -> None:
+        """Run all rules in a single pass over a window of added lines.
+
+        Guarded rules run in the guard's worker under their time budget; a
+        rule not evaluated on the window is recorded as an aborted hit. The
+        entropy detector then scores the same text; tokens already covered by
+        a blocklist match are not reported twice.
+        """
+        if not len(window):
+            return
+
+        # Added lines joined with newlines for multiline pattern matching
+        text = window.text()
+        spans: List[Tuple[int, int]] = []
+        engine, unguarded = self.engine, self._unguarded
+        if profile is None:
+            found: Iterable[Tuple[int, Any]] = engine.scan(text)
+        else:
+            found = self._profiled_scan(text, profile)
+        for idx, match in found:
+            path, line = window.locate(match.start())
+            hits[(unguarded[idx], findall_value(match), path, line)] = None
+            spans.append(match.span())
+
+        guard = self.guard
+        if guard is not None:
+            timings: Optional[Dict[int, float]] = None if profile is None else {}
+            matches, skipped = guard.run(text, aborted, timings)
+            for idx, elapsed in (timings or {}).items():
+                profile.add(
+                    self.rule_name(idx), bytes_scanned=len(text), time_s=elapsed
+                )
+            for idx, value, start, end in matches:
+                path, line = window.locate(start)
+                hits[(idx, value, path, line)] = None
+                spans.append((start, end))
+            for idx in skipped:
+                hits[(idx, None, window.paths[0], 0)] = None
+
+        if self.entropy is None:
+            return
+        base = len(self.rules)
+        start_time = time.perf_counter()
+        tokens = self.entropy.scan(text)
+        if profile is not None:
+            elapsed = time.perf_counter() - start_time
+            profile.add(ENTROPY, bytes_scanned=len(text), time_s=elapsed)
+        for charset, token, start, _ in tokens:
+            idx = base + CHARSETS.index(charset)
+            end = start + len(token)
+            if any(a < end and start < b for a, b in spans):
+                if profile is not None:
+                    profile.add(self.rule_name(idx), suppressed=1)
+                continue
+            path, line = window.locate(start)
+            hits[(idx, token, path, line)] = None
+
+    def _profiled_scan(
+        self, text: str, profile: ScanProfile
+    ) -> List[Tuple[int, Any]]:
+        """``engine.scan`` with the prefilter pass and every rule timed."""
+        engine, unguarded = self.engine, self._unguarded
+        start = time.perf_counter()
+        candidates = engine.candidates(text)
+        profile.add(
+            PREFILTER, bytes_scanned=len(text), time_s=time.perf_counter() - start
+        )
+        found: List[Tuple[int, Any]] = []
+        for idx in range(len(engine.rules)):
+            start = time.perf_counter()
+            matches = list(engine.scan_rule(idx, text, candidates))
+            profile.add(
+                self.rule_name(unguarded[idx]),
+                bytes_scanned=len(text),
+                time_s=time.perf_counter() - start,
+            )
+            found.extend((idx, match) for match in matches)
+        return found
+
+
+def _hunk_chars(hunk: DiffHunk) -> int:
+    return sum(len(line) + 1 for line in hunk.lines)
+
+
+def _iter_shards(
+    hunks: Iterable[DiffHunk], shard_chars: int
+) -> Iterator[List[DiffHunk]]:
+    """Group hunks into shards of about ``shard_chars`` (several files each).
+
+    A file larger than a shard is split across shards; the next shard then
+    re-includes the trailing hunks of that file holding at least
+    ``SCAN_OVERLAP_LINES`` added lines, mirroring the window overlap of the
+    serial scan (duplicate hits are absorbed by the hit keys).
+    """
+    shard: List[DiffHunk] = []
+    size = 0
+    for hunk in hunks:
+        if shard and size >= shard_chars:
+            yield shard
+            carry: List[DiffHunk] = []
+            added = 0
+            for prev in reversed(shard):
+                if prev.path != hunk.path or added >= SCAN_OVERLAP_LINES:
+                    break
+                carry.insert(0, prev)
+                added += sum(1 for line in prev.lines if line.startswith("+"))
+            shard = carry
+            size = sum(_hunk_chars(prev) for prev in carry)
+        shard.append(hunk)
+        size += _hunk_chars(hunk)
+    if shard:
+        yield shard
+
+
+def _init_worker(
+    rule_specs: List[Dict[str, Any]],
+    prefixes: List[str],
+    entropy: Optional[Dict[str, Any]],
+    guard: Dict[str, Any],
+    guarded: List[int],
+) -> None:
+    """Pool initializer: compile the policy once per worker process."""
+    global _WORKER_POLICY
+    _WORKER_POLICY = SecurityPolicy.from_rules(
+        rule_specs, prefixes, entropy, guard, guarded
+    )
+
+
+def _scan_shard(
+    shard: List[DiffHunk], profiled: bool = False
+) -> Tuple[List[Tuple[int, Any, str, int]], Optional[ScanProfile]]:
+    """Worker task: scan one shard; returns its hit keys in scan order and,
+    when ``profiled``, the shard's rule profile."""
+    hits: _Hits = {}
+    profile = ScanProfile() if profiled else None
+    _WORKER_POLICY._collect_hits(shard, hits, set(), profile)
+    return list(hits), profile
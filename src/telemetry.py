@@ -0,0 +1,189 @@
+"""Structured performance telemetry for the security gate (ADR-0003).
+
+Times every stage of ``opsguard scan`` and exports one machine-readable record
+per run, both as a JSON line (appended) and as an OpenMetrics text file, so
+runners can aggregate p50/p95 gate latency across pipelines.
+"""
+
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+JSONL_FILENAME = "opsguard-telemetry.jsonl"
+OPENMETRICS_FILENAME = "opsguard-metrics.prom"
+
+
+# Contador por regla -> (métrica OpenMetrics, factor de escala)
+_RULE_METRICS = {
+    "matches": ("opsguard_rule_matches", 1),
+    "bytes_scanned": ("opsguard_rule_bytes_scanned", 1),
+    "time_ms": ("opsguard_rule_match_seconds", 0.001),
+    "suppressed": ("opsguard_rule_suppressed", 1),
+}
+
+
+def _escape_label(value: Any) -> str:
+    """Escape a label value for the OpenMetrics text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Telemetry:
+    """Collects per-stage timings and counters for a single gate run.
+
+    Collection is always on (it is just a few ``perf_counter`` calls); files
+    are only written when an output directory is configured.
+    """
+
+    def __init__(self, out_dir: Optional[str] = None) -> None:
+        """Start a telemetry run.
+
+        Args:
+            out_dir: Directory for the JSONL/OpenMetrics files. Defaults to
+                ``$OPSGUARD_TELEMETRY_DIR``; when unset nothing is written.
+        """
+        self.out_dir = out_dir or os.getenv("OPSGUARD_TELEMETRY_DIR")
+        self.run_id = uuid.uuid4().hex
+        self.timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.stages: Dict[str, float] = {}
+        self.stage_status: Dict[str, str] = {}
+        self.counters: Dict[str, float] = {}
+        self.labels: Dict[str, str] = {}
+        # Series por regla (--profile-rules): regla -> contador -> valor
+        self.rules: Dict[str, Dict[str, float]] = {}
+        # approve | block | skip | error (se actualiza según avanza el pipeline)
+        self.outcome = "error"
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage; re-entering a stage accumulates its time."""
+        start = time.perf_counter()
+        status = "success"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            self.stage_status[name] = status
+
+    def count(self, name: str, value: float) -> None:
+        """Add ``value`` to a counter (bytes, lines, tokens, ...)."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def rule(self, rule: str, name: str, value: float) -> None:
+        """Add ``value`` to a per-rule counter (see ``ScanProfile.record``)."""
+        counters = self.rules.setdefault(rule, {})
+        counters[name] = counters.get(name, 0) + value
+
+    def label(self, name: str, value: str) -> None:
+        """Attach a descriptive label to the run (model, mode, ...)."""
+        self.labels[name] = value
+
+    def record(self, exit_code: int) -> Dict[str, Any]:
+        """Build the run record (ADR-0003 telemetry format).
+
+        Per-rule counters, when a rule profile was recorded, go under
+        ``rules``.
+        """
+        record = {
+            "telemetry": {
+                "run_id": self.run_id,
+                "timestamp": self.timestamp,
+                "status": self.outcome,
+                "exit_code": exit_code,
+                "total_latency_ms": round(
+                    (time.perf_counter() - self._start) * 1000, 3
+                ),
+                "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+                "stage_status": dict(self.stage_status),
+                "counters": dict(self.counters),
+                "labels": dict(self.labels),
+            }
+        }
+        if self.rules:
+            record["telemetry"]["rules"] = {
+                rule: dict(counters) for rule, counters in self.rules.items()
+            }
+        return record
+
+    def to_openmetrics(self, record: Dict[str, Any]) -> str:
+        """Render a run record in the OpenMetrics text exposition format."""
+        data = record["telemetry"]
+        # Sin run_id como label: evita cardinalidad ilimitada al agregar runs
+        base = {"status": data["status"], **data["labels"]}
+
+        def _labels(extra: Optional[Dict[str, str]] = None) -> str:
+            merged = {**base, **(extra or {})}
+            body = ",".join(
+                f'{key}="{_escape_label(value)}"'
+                for key, value in sorted(merged.items())
+            )
+            return "{" + body + "}"
+
+        lines = [
+            "# TYPE opsguard_run_duration_seconds gauge",
+            "# UNIT opsguard_run_duration_seconds seconds",
+            "# HELP opsguard_run_duration_seconds Wall-clock duration of the gate run.",
+            f"opsguard_run_duration_seconds{_labels()} {data['total_latency_ms'] / 1000:.6f}",
+            "# TYPE opsguard_stage_duration_seconds gauge",
+            "# UNIT opsguard_stage_duration_seconds seconds",
+            "# HELP opsguard_stage_duration_seconds Duration of each gate stage.",
+        ]
+        for stage, ms in data["stages_ms"].items():
+            lines.append(
+                f"opsguard_stage_duration_seconds{_labels({'stage': stage})} {ms / 1000:.6f}"
+            )
+
+        lines.append("# TYPE opsguard_run_exit_code gauge")
+        lines.append(f"opsguard_run_exit_code{_labels()} {data['exit_code']}")
+
+        for name, value in sorted(data["counters"].items()):
+            metric = f"opsguard_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{_labels()} {value}")
+
+        rules = data.get("rules", {})
+        for name, (metric, scale) in _RULE_METRICS.items():
+            if not any(name in counters for counters in rules.values()):
+                continue
+            lines.append(f"# TYPE {metric} gauge")
+            for rule, counters in sorted(rules.items()):
+                if name in counters:
+                    value = round(counters[name] * scale, 6)
+                    lines.append(f"{metric}{_labels({'rule': rule})} {value}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def flush(self, exit_code: int) -> Optional[Dict[str, Any]]:
+        """Write the run record to the configured directory.
+
+        Telemetry must never break the gate: write errors are reported and
+        swallowed.
+
+        Returns:
+            The record, or None when no output directory is configured.
+        """
+        if not self.out_dir:
+            return None
+
+        record = self.record(exit_code)
+        try:
+            out = Path(self.out_dir)
+            out.mkdir(parents=True, exist_ok=True)
+            with open(out / JSONL_FILENAME, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            (out / OPENMETRICS_FILENAME).write_text(
+                self.to_openmetrics(record), encoding="utf-8"
+            )
+        except OSError as e:
+            print(f"⚠️ Telemetry write failed: {e}")
+        return record
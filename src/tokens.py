@@ -0,0 +1,186 @@
+"""Local token counting and per-scan token budgeting for the AI gate.
+
+Chunks and budgets used to be measured in characters, which over- or
+undershoots the model window depending on the language and can cut a hunk
+in half. Tokens are counted locally instead: with ``tiktoken`` when it is
+installed and its encoding is available (optional, not a hard dependency),
+otherwise with a regex approximation of BPE pre-tokenization that needs no
+data files. The encoder is loaded once, on first use.
+
+``plan_budget`` packs per-file diffs in priority order (source, then
+configuration, then tests, then docs) until the token budget is full and
+reports which files were left out or only partially included.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple
+
+from src.diffparse import iter_hunks
+
+ENCODING = "cl100k_base"
+
+# Presupuesto por defecto: equivale a los antiguos 8 chunks x 30000 chars
+DEFAULT_MAX_TOKENS = 60000
+# Tamaño máximo de cada chunk enviado al modelo
+MAX_CHUNK_TOKENS = 7500
+
+# Por debajo de esto no compensa incluir parte de un fichero que no cabe
+MIN_PARTIAL_TOKENS = 200
+
+# Prioridades de empaquetado (menor = antes)
+SOURCE, CONFIG, TESTS, DOCS = range(4)
+
+_TEST_RE = re.compile(
+    r"(?:^|/)(?:tests?|__tests__|spec|testing)/"
+    r"|(?:^|/)(?:test_[^/]*|conftest\.py)$"
+    r"|_test\.[^/]+$|\.(?:test|spec)\.[^/]+$"
+)
+CONFIG_SUFFIXES = (
+    ".yml",
+    ".yaml",
+    ".json",
+    ".toml",
+    ".ini",
+    ".cfg",
+    ".conf",
+    ".env",
+    ".properties",
+    ".xml",
+    ".tf",
+    ".tfvars",
+    ".lock",
+)
+CONFIG_NAMES = frozenset(
+    {"Dockerfile", "Makefile", "Jenkinsfile", "Procfile", ".env", ".gitignore"}
+)
+DOC_SUFFIXES = (".md", ".rst", ".txt", ".adoc")
+
+# Aproximación sin tiktoken: palabras (con su espacio previo), grupos de hasta
+# 3 dígitos, rachas de puntuación y de espacios cuentan 1; cada carácter no
+# ASCII cuenta 1 y las palabras largas 1 más por cada 8 letras.
+_PIECE_RE = re.compile(
+    r" ?[A-Za-z]+| ?[0-9]{1,3}| ?[^\sA-Za-z0-9\x80-\U0010ffff]+"
+    r"|[\x80-\U0010ffff]|\s+"
+)
+_LONG_WORD_RE = re.compile(r"[A-Za-z]{8,}")
+
+_ADDED_LINE_RE = re.compile(r"^\+(?!\+\+ )", re.MULTILINE)
+
+_encoder: Any = None
+
+
+def _load_encoder() -> Any:
+    """Load the tiktoken encoding on first use; False when unavailable."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+
+            _encoder = tiktoken.get_encoding(ENCODING)
+        except Exception:
+            # Sin tiktoken, o sin el fichero BPE (entornos sin red)
+            _encoder = False
+    return _encoder
+
+
+def tokenizer_name() -> str:
+    """Name of the active counter (``tiktoken:<encoding>`` or ``approx``)."""
+    return f"tiktoken:{ENCODING}" if _load_encoder() else "approx"
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens ``text`` costs (exact with tiktoken, else estimated)."""
+    encoder = _load_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    long_words = sum(len(word) // 8 for word in _LONG_WORD_RE.findall(text))
+    return len(_PIECE_RE.findall(text)) + long_words
+
+
+def file_priority(path: str) -> int:
+    """Packing priority of a file: ``SOURCE`` < ``CONFIG`` < ``TESTS`` < ``DOCS``."""
+    if _TEST_RE.search(path):
+        return TESTS
+    name = path.rsplit("/", 1)[-1]
+    if name in CONFIG_NAMES or name.endswith(CONFIG_SUFFIXES):
+        return CONFIG
+    if name.endswith(DOC_SUFFIXES):
+        return DOCS
+    return SOURCE
+
+
+class TokenPlan(NamedTuple):
+    """Files selected for the AI under a token budget.
+
+    Attributes:
+        files: Path to diff text, in packing (priority) order.
+        tokens: Tokens of the selected diff texts.
+        left_out: Files not sent at all.
+        partial: Files of which only a leading part was sent.
+    """
+
+    files: Dict[str, str]
+    tokens: int
+    left_out: List[str]
+    partial: List[str]
+
+
+def _leading_part(file_diff: str, budget: int) -> str:
+    """Leading part of ``file_diff`` that fits ``budget``, cut at a line."""
+    kept: List[str] = []
+    used = 0
+    for hunk in iter_hunks(file_diff.splitlines()):
+        text = hunk.text()
+        size = count_tokens(text)
+        if used + size <= budget:
+            kept.append(text)
+            used += size
+            continue
+        # El prefijo de un hunk conserva la numeración de sus líneas
+        for line in hunk.lines:
+            size = count_tokens(line + "\n")
+            if used + size > budget:
+                break
+            kept.append(line + "\n")
+            used += size
+        break
+    head = "".join(kept)
+    # Solo cabeceras, sin líneas añadidas, no aporta nada
+    return head if _ADDED_LINE_RE.search(head) else ""
+
+
+def plan_budget(files: Dict[str, str], max_tokens: int) -> TokenPlan:
+    """Pack per-file diffs in priority order until ``max_tokens`` is used.
+
+    Files keep their diff order within a priority. A file that does not fit
+    whole is included up to the last hunk (or line) that fits when at least
+    ``MIN_PARTIAL_TOKENS`` remain, and is left out otherwise; smaller files
+    after it may still fit.
+
+    Args:
+        files: Mapping of path to per-file diff (see ``split_by_file``).
+        max_tokens: Token budget for the whole scan.
+
+    Returns:
+        The TokenPlan.
+    """
+    selected: Dict[str, str] = {}
+    left_out: List[str] = []
+    partial: List[str] = []
+    used = 0
+    for path in sorted(files, key=file_priority):
+        size = count_tokens(files[path])
+        if used + size <= max_tokens:
+            selected[path] = files[path]
+            used += size
+            continue
+        head = ""
+        if max_tokens - used >= MIN_PARTIAL_TOKENS:
+            head = _leading_part(files[path], max_tokens - used)
+        if head:
+            selected[path] = head
+            used += count_tokens(head)
+            partial.append(path)
+        else:
+            left_out.append(path)
+    return TokenPlan(selected, used, left_out, partial)
@@ -0,0 +1,276 @@
+"""Full-tree scan: audit every file of a checkout or of a commit's tree.
+
+The diff gates only see what changed; onboarding a repository or rolling
+out a new policy needs the whole tree. ``scan_tree`` lists the files once
+(``git ls-files`` for the working tree, ``git ls-tree`` for a commit), drops
+``.opsguardignore`` matches, reads the rest on a thread pool and runs the
+policy over each file's content as if it were a new file's diff:
+
+- working tree: files are read with large buffered reads, the first
+  ``BINARY_SNIFF_BYTES`` first so binaries are skipped without reading them
+  whole (git's own NUL heuristic);
+- commit tree: blobs are read from ``git cat-file --batch``, one process per
+  reader thread;
+- identical content is scanned once: files are keyed by their git blob ID
+  (known up front for a commit, hashed after reading for the working tree)
+  and the findings of a blob are reported for every path that holds it.
+
+Reading overlaps with scanning (at most ``4 * read_workers`` files in
+flight); the regex scan itself can be spread over processes with
+``regex_workers`` exactly like ``scan_hunks``.
+"""
+
+import hashlib
+import os
+import stat
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+from git.exc import GitCommandError
+
+from src.diffparse import content_hunks
+from src.ingest import GitIngestError
+from src.telemetry import Telemetry
+
+if TYPE_CHECKING:
+    from src.ingest import GitManager
+    from src.scan_profile import ScanProfile
+    from src.security import SecurityPolicy
+
+# Lecturas grandes: pocos syscalls por fichero
+READ_BUFFER = 1 << 20
+# Mismo criterio que git: un NUL en los primeros 8000 bytes = binario
+BINARY_SNIFF_BYTES = 8000
+_GIT_SYMLINK_MODE = "120000"
+
+# (ruta, blob ID o "" si aún no se conoce)
+_Entry = Tuple[str, str]
+
+
+class TreeScanResult(NamedTuple):
+    """Outcome of a full-tree scan.
+
+    Attributes:
+        violations: Findings (see ``SecurityPolicy.scan_hunks``), in tree
+            order; a finding in duplicated content is reported per path.
+        files: Files listed in the tree (submodules, and for a commit
+            symlinks, excluded).
+        ignored: Files dropped by ``.opsguardignore``.
+        skipped: Files not scanned: binary, symlinks (working tree) or
+            unreadable.
+        duplicates: Files whose content had already been scanned.
+        scanned: Distinct blobs scanned.
+        bytes_scanned: Size of the scanned blobs.
+    """
+
+    violations: List[dict]
+    files: int
+    ignored: int
+    skipped: int
+    duplicates: int
+    scanned: int
+    bytes_scanned: int
+
+
+def blob_id(data: bytes) -> str:
+    """Git blob ID (SHA-1 of ``blob <size>\\0<data>``) of some content."""
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def list_tree(manager: "GitManager", rev: Optional[str] = None) -> List[_Entry]:
+    """Regular files of the working tree (tracked and untracked, minus
+    ``.gitignore``) or of ``rev``'s tree, in path order.
+
+    Returns:
+        ``(path, blob)`` pairs; ``blob`` is "" for the working tree.
+
+    Raises:
+        GitIngestError: If git fails (e.g. unknown revision).
+    """
+    git = manager.repo.git
+    try:
+        if rev is None:
+            out = git.ls_files("-z", "--cached", "--others", "--exclude-standard")
+            # git lista los no versionados primero: se ordena por ruta, y un
+            # fichero con cambios sin indexar aparece una sola vez igualmente
+            return [(path, "") for path in sorted(set(out.split("\0"))) if path]
+        out = git.ls_tree("-r", "-z", "--full-tree", rev)
+    except GitCommandError as e:
+        raise GitIngestError(f"Failed to list the tree of '{rev or 'HEAD'}': {e}")
+    entries: List[_Entry] = []
+    for record in out.split("\0"):
+        if not record:
+            continue
+        # "<mode> <type> <blob>\t<path>"
+        meta, _, path = record.partition("\t")
+        mode, kind, blob = meta.split(" ")
+        if kind == "blob" and mode != _GIT_SYMLINK_MODE:
+            entries.append((path, blob))
+    return entries
+
+
+def _read_worktree(root: str) -> Callable[[_Entry], Tuple[str, str, Optional[bytes]]]:
+    def read(entry: _Entry) -> Tuple[str, str, Optional[bytes]]:
+        path = entry[0]
+        full_path = os.path.join(root, path)
+        try:
+            # Symlinks (git guarda su destino, no un contenido) y no-ficheros
+            if not stat.S_ISREG(os.lstat(full_path).st_mode):
+                return path, "", None
+            with open(full_path, "rb", buffering=READ_BUFFER) as f:
+                head = f.read(BINARY_SNIFF_BYTES)
+                if b"\0" in head:
+                    return path, "", None
+                data = head + f.read()
+        except OSError:
+            # Borrado en el árbol de trabajo (sigue en el índice), sin permisos...
+            return path, "", None
+        return path, blob_id(data), data
+
+    return read
+
+
+def _read_blobs(
+    manager: "GitManager",
+) -> Callable[[_Entry], Tuple[str, str, Optional[bytes]]]:
+    # Un `git cat-file --batch` por hilo: el de GitPython no es thread-safe
+    local = threading.local()
+    git_class = type(manager.repo.git)
+    working_dir = manager.repo.working_dir
+
+    def read(entry: _Entry) -> Tuple[str, str, Optional[bytes]]:
+        path, blob = entry
+        git = getattr(local, "git", None)
+        if git is None:
+            git = local.git = git_class(working_dir)
+        try:
+            data = git.get_object_data(blob)[3]
+        except (GitCommandError, ValueError) as e:
+            raise GitIngestError(f"Failed to read blob {blob} ({path}): {e}")
+        if b"\0" in data[:BINARY_SNIFF_BYTES]:
+            return path, blob, None
+        return path, blob, data
+
+    return read
+
+
+def _read_ahead(
+    entries: Iterable[_Entry],
+    read: Callable[[_Entry], Tuple[str, str, Optional[bytes]]],
+    workers: int,
+) -> Iterator[Tuple[str, str, Optional[bytes]]]:
+    """Read entries on a thread pool, in order, with bounded read-ahead."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for entry in entries:
+            pending.append(pool.submit(read, entry))
+            if len(pending) >= 4 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def scan_tree(
+    manager: "GitManager",
+    policy: "SecurityPolicy",
+    is_ignored: Callable[[str], bool],
+    telemetry: Telemetry,
+    rev: Optional[str] = None,
+    read_workers: int = 8,
+    regex_workers: int = 1,
+    profile: Optional["ScanProfile"] = None,
+) -> TreeScanResult:
+    """Scan every file of the working tree (or of ``rev``) with ``policy``.
+
+    Args:
+        manager: Repository to scan.
+        policy: Rules (blocklist, entropy, runtime guard) to apply.
+        is_ignored: Predicate for paths to skip (``IgnoreMatcher.match_file``).
+        telemetry: Run telemetry (``list_tree`` and ``tree_scan`` stages).
+        rev: Commit whose tree is scanned; the working tree when None.
+        read_workers: Reader threads.
+        regex_workers: Processes for the regex scan (see ``scan_hunks``).
+        profile: Per-rule profile to fill (see ``scan_hunks``).
+
+    Raises:
+        GitIngestError: If the tree cannot be listed or a blob read.
+    """
+    with telemetry.stage("list_tree"):
+        listing = list_tree(manager, rev)
+        entries = [entry for entry in listing if not is_ignored(entry[0])]
+
+    seen: Dict[str, str] = {}
+    # Ruta escaneada -> otras rutas con el mismo contenido
+    aliases: Dict[str, List[str]] = {}
+    counts = {"skipped": 0, "duplicates": 0, "bytes": 0}
+    if rev is None:
+        reads = _read_ahead(
+            entries, _read_worktree(manager.repo.working_dir), read_workers
+        )
+    else:
+        # El blob ID se conoce antes de leer: cada contenido se lee una vez
+        unique: List[_Entry] = []
+        for path, blob in entries:
+            if blob in seen:
+                aliases.setdefault(seen[blob], []).append(path)
+                counts["duplicates"] += 1
+            else:
+                seen[blob] = path
+                unique.append((path, blob))
+        reads = _read_ahead(unique, _read_blobs(manager), read_workers)
+
+    def hunks() -> Iterator:
+        for path, blob, data in reads:
+            if data is None:
+                counts["skipped"] += 1
+                continue
+            if rev is None:
+                if blob in seen:
+                    aliases.setdefault(seen[blob], []).append(path)
+                    counts["duplicates"] += 1
+                    continue
+                seen[blob] = path
+            counts["bytes"] += len(data)
+            yield from content_hunks(path, data.decode("utf-8", errors="replace"))
+
+    with telemetry.stage("tree_scan"):
+        violations = policy.scan_hunks(hunks(), workers=regex_workers, profile=profile)
+
+    expanded: List[dict] = []
+    for violation in violations:
+        expanded.append(violation)
+        expanded.extend(
+            {**violation, "file": alias} for alias in aliases.get(violation["file"], ())
+        )
+    order = {path: pos for pos, (path, _) in enumerate(listing)}
+    expanded.sort(key=lambda violation: order.get(violation["file"], len(order)))
+
+    scanned = len(seen) - counts["skipped"] if rev is not None else len(seen)
+    result = TreeScanResult(
+        violations=expanded,
+        files=len(listing),
+        ignored=len(listing) - len(entries),
+        skipped=counts["skipped"],
+        duplicates=counts["duplicates"],
+        scanned=scanned,
+        bytes_scanned=counts["bytes"],
+    )
+    telemetry.count("files_listed", result.files)
+    telemetry.count("files_scanned", result.scanned)
+    telemetry.count("tree_bytes_scanned", result.bytes_scanned)
+    telemetry.count("regex_violations", len(expanded))
+    return result
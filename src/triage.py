@@ -0,0 +1,346 @@
+"""Local risk triage: decide which files of a diff the AI has to see.
+
+Most commits that pass the regex gate are low risk (docs, comments, small
+changes away from anything sensitive), yet each one paid a model call. The
+triage scores every file of the (compacted) diff from cheap local signals
+and only the files that reach ``min_score`` go to the model; the others are
+approved locally, with the reasons recorded:
+
+    sinks     +3 per kind of dangerous API on an added line (process
+              execution, ``eval``, ``shell=True``, SQL built from strings,
+              unsafe deserialization, TLS verification off, token and
+              signature verification, weak crypto, auth/session APIs...)
+    guards    +3 per kind of check removed and not re-added elsewhere in
+              the file (permission/auth checks, ``raise PermissionDenied``,
+              ``abort(403)``, auth decorators, signature/CSRF validation)
+    path      +2 for sensitive paths (auth, crypto, CI workflows, IaC,
+              Dockerfiles, shell scripts...)
+    type      +1 for source and config files, 0 for tests and docs
+    churn     +2 at ``churn_lines`` changed lines or more
+
+A file whose changes are only comments or blank lines, or that has no
+changed line left at all (rename, mode change, omitted lockfile), scores 0.
+Everything is opt-in: without a ``triage`` section in opsguard.yml every
+file is sent, as before.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.diffparse import pack_files, split_by_file
+from src.tokens import (
+    CONFIG,
+    DOCS,
+    MAX_CHUNK_TOKENS,
+    SOURCE,
+    count_tokens,
+    file_priority,
+)
+
+SINK_WEIGHT = 3
+GUARD_WEIGHT = 3
+PATH_WEIGHT = 2
+CHURN_WEIGHT = 2
+TYPE_WEIGHTS = {SOURCE: 1, CONFIG: 1}
+
+# Tipos de sink -> regex sobre las líneas añadidas
+SINKS: Dict[str, str] = {
+    "process execution": (
+        r"\bsubprocess\.|\bos\.(?:system|popen|exec\w*|spawn\w*)\s*\(|"
+        r"\bchild_process\b|\bRuntime\.getRuntime\(\)\.exec|\bexec\.Command\(|"
+        r"\bshell_exec\s*\(|\bpopen\s*\("
+    ),
+    "shell=True": r"\bshell\s*=\s*True\b",
+    "dynamic code": r"(?<![\w.])(?:eval|exec)\s*\(|\bnew\s+Function\s*\(",
+    "unsafe deserialization": (
+        r"\b(?:pickle|cPickle|marshal|dill)\.loads?\s*\(|\byaml\.load\s*\(|"
+        r"\bObjectInputStream\b|\bunserialize\s*\("
+    ),
+    "TLS verification off": (
+        r"\bverify\s*=\s*False\b|\bInsecureSkipVerify\s*:\s*true\b|"
+        r"\brejectUnauthorized\s*:\s*false\b|\bCERT_NONE\b"
+    ),
+    "HTML injection": (
+        r"\.innerHTML\s*=|\bdangerouslySetInnerHTML\b|\bv-html\b|"
+        r"\bmark_safe\s*\(|\|\s*safe\b"
+    ),
+    "remote script": r"\b(?:curl|wget)\b[^|\n]*\|\s*(?:sudo\s+)?(?:ba|z)?sh\b",
+    "world-writable": r"\bchmod\s+(?:-R\s+)?0?777\b|\b0o777\b",
+    "privileged container": (
+        r"\bprivileged\s*:\s*true\b|\brunAsUser\s*:\s*0\b|"
+        r"\bhostNetwork\s*:\s*true\b|^\s*USER\s+root\b"
+    ),
+    "token/signature verification": (
+        r"\bjwt\.(?:decode|encode)\s*\(|\bverify_(?:signature|exp|aud|iss)\b|"
+        r"\balgorithms?\s*=\s*\[?\s*[\"']none[\"']|\bjwt\.verify\s*\(|"
+        r"\b(?:hmac\.compare_digest|verify_signature|check_signature)\s*\("
+    ),
+    "weak crypto": (
+        r"\bhashlib\.(?:md5|sha1)\s*\(|\b(?:MD5|SHA1?|DES|ARC4|Blowfish)\.new\s*\(|"
+        r"\bMODE_ECB\b|\bcreateHash\(\s*[\"'](?:md5|sha1)[\"']|"
+        r"\bMessageDigest\.getInstance\(\s*\"(?:MD5|SHA-?1)\""
+    ),
+    "auth/session API": (
+        r"\b(?:check_password|set_password|make_password|authenticate|"
+        r"login_user|logout_user)\s*\(|\bbcrypt\.|\bcsrf_exempt\b|"
+        r"\bAllowAny\b|\bpermission_classes\b|\bSESSION_COOKIE_\w+|"
+        r"\bsecure\s*=\s*False\b|\bhttponly\s*=\s*False\b"
+    ),
+}
+
+# Tipos de guarda -> regex sobre las líneas borradas: quitar una comprobación
+# es tan arriesgado como añadir un sink
+GUARDS: Dict[str, str] = {
+    "permission check": (
+        r"\b(?:is_admin|is_staff|is_superuser|is_authenticated|has_perms?|"
+        r"has_permission|has_role|check_permission|authorize\w*|"
+        r"can_\w+|is_owner|is_allowed|require_\w+)\b"
+    ),
+    "access denial": (
+        r"\braise\s+\w*(?:PermissionDenied|Forbidden|Unauthori[sz]ed|"
+        r"AuthenticationFailed|NotAuthenticated|AccessDenied)\w*|"
+        r"\babort\s*\(\s*40[13]\b|\bstatus(?:_code)?\s*=\s*40[13]\b|"
+        r"\bHTTP_40[13]_\w+|\bres\.status\(\s*40[13]\s*\)"
+    ),
+    "auth decorator": (
+        r"^\s*@\w*(?:login_required|permission_required|requires?_\w+|"
+        r"user_passes_test|staff_member_required|csrf_protect|authenticated|"
+        r"jwt_required|roles_required|PreAuthorize|Secured|RolesAllowed)\b"
+    ),
+    "validation": (
+        r"\b(?:verify|validate|check)_(?:\w*(?:token|signature|csrf|otp|"
+        r"password|origin|nonce|hmac))\w*\s*\(|\bcompare_digest\s*\("
+    ),
+}
+
+# SQL montado a mano: una sentencia y, en la misma línea, concatenación o formato
+_SQL_RE = re.compile(
+    r"(?i)\b(?:select\b.+\bfrom|insert\s+into|update\b.+\bset|delete\s+from)\b"
+)
+_STRING_BUILD_RE = re.compile(r"[\"']\s*(?:\+|%|\|\|)|\.format\(|\bf[\"']|\$\{")
+SQL_SINK = "SQL string building"
+
+SENSITIVE_PATH_RE = (
+    r"(?i)(?:^|/)(?:auth\w*|login|session|oauth|sso|crypto\w*|security|"
+    r"permissions?|acl|iam|rbac|secrets?|credentials?|passwords?|tokens?)"
+    r"(?:[/._-]|$)|(?:^|/)\.github/workflows/|(?:^|/)\.gitlab-ci\.yml$|"
+    r"(?:^|/)Jenkinsfile$|(?:^|/)Dockerfile[^/]*$|\.(?:tf|tfvars|sh|bash|ps1)$|"
+    r"(?:^|/)(?:k8s|kubernetes|helm|charts|terraform|ansible)/"
+)
+
+# Prefijos de comentario de línea por extensión (sin extensión conocida no hay
+# detección de "solo comentarios": '#' es código en C, '--' en un .py...)
+_HASH = ("#",)
+# "*" solo seguido de espacio: "*ptr = x;" es código
+_SLASH = ("//", "/*", "* ", "*/")
+COMMENT_PREFIXES: Dict[str, Tuple[str, ...]] = {
+    **dict.fromkeys(
+        ("py", "sh", "bash", "rb", "pl", "yml", "yaml", "toml", "tf", "r", "cfg"),
+        _HASH,
+    ),
+    **dict.fromkeys(
+        ("js", "jsx", "ts", "tsx", "java", "go", "c", "cc", "cpp", "h", "hpp"),
+        _SLASH,
+    ),
+    **dict.fromkeys(("cs", "kt", "swift", "rs", "scala", "dart"), _SLASH),
+    "php": _SLASH + _HASH,
+    "sql": ("--",) + _SLASH,
+    "ini": ("#", ";"),
+    "html": ("<!--", "-->"),
+    "xml": ("<!--", "-->"),
+}
+
+
+class TriageConfig(NamedTuple):
+    """Validated ``triage`` section of ``opsguard.yml``."""
+
+    enabled: bool = False
+    min_score: int = 3
+    churn_lines: int = 200
+    sinks: Tuple[str, ...] = ()
+    sensitive_paths: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "TriageConfig":
+        """Build a config from the ``triage`` section (present = enabled).
+
+        Raises:
+            ValueError: If a value is out of range or of the wrong type, or a
+                pattern does not compile.
+        """
+        defaults = cls()
+        sinks = config.get("sinks") or []
+        paths = config.get("sensitive_paths") or []
+        if not isinstance(sinks, list) or not isinstance(paths, list):
+            raise ValueError("'sinks' and 'sensitive_paths' must be lists of regexes")
+        triage = cls(
+            enabled=bool(config.get("enabled", True)),
+            min_score=int(config.get("min_score", defaults.min_score)),
+            churn_lines=int(config.get("churn_lines", defaults.churn_lines)),
+            sinks=tuple(str(p) for p in sinks),
+            sensitive_paths=tuple(str(p) for p in paths),
+        )
+        if triage.min_score < 0 or triage.churn_lines < 1:
+            raise ValueError("min_score must be >= 0 and churn_lines >= 1")
+        for pattern in triage.sinks + triage.sensitive_paths:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"invalid pattern '{pattern}': {e}")
+        return triage
+
+    def to_config(self) -> Dict[str, Any]:
+        """Serializable configuration (inverse of ``from_config``)."""
+        return {
+            "enabled": self.enabled,
+            "min_score": self.min_score,
+            "churn_lines": self.churn_lines,
+            "sinks": list(self.sinks),
+            "sensitive_paths": list(self.sensitive_paths),
+        }
+
+
+class FileRisk(NamedTuple):
+    """Triage score of one file.
+
+    Attributes:
+        path: File path.
+        score: Sum of the signal weights.
+        reasons: Signals that scored, or why the file scored nothing.
+        send: Whether the file goes to the AI (``score >= min_score``).
+    """
+
+    path: str
+    score: int
+    reasons: List[str]
+    send: bool
+
+
+class TriageResult(NamedTuple):
+    """Outcome of the triage of a diff.
+
+    Attributes:
+        diff: Diff of the files sent to the AI ("" if none).
+        files: Score of every file, in diff order.
+        tokens_avoided: Tokens of the files approved locally.
+        calls_avoided: AI requests the approved files would have needed
+            (capped at the engine's chunk limit).
+    """
+
+    diff: str
+    files: List[FileRisk]
+    tokens_avoided: int
+    calls_avoided: int
+
+    @property
+    def approved(self) -> List[FileRisk]:
+        return [risk for risk in self.files if not risk.send]
+
+
+class Triage:
+    """Scores files with the built-in signals plus the configured ones."""
+
+    def __init__(self, config: TriageConfig) -> None:
+        """
+        Args:
+            config: Thresholds and extra patterns.
+        """
+        self.config = config
+        sinks = dict(SINKS)
+        for index, pattern in enumerate(config.sinks):
+            sinks[f"custom sink #{index + 1}"] = pattern
+        self._sinks = [
+            (name, re.compile(pattern, re.MULTILINE)) for name, pattern in sinks.items()
+        ]
+        self._guards = [(name, re.compile(p)) for name, p in GUARDS.items()]
+        self._paths = [re.compile(SENSITIVE_PATH_RE)]
+        self._paths += [re.compile(p) for p in config.sensitive_paths]
+
+    def _sink_hits(self, added: List[str]) -> List[str]:
+        text = "\n".join(added)
+        found = {name for name, regex in self._sinks if regex.search(text)}
+        if any(_SQL_RE.search(l) and _STRING_BUILD_RE.search(l) for l in added):
+            found.add(SQL_SINK)
+        return sorted(found)
+
+    def _guard_hits(self, removed: List[str], added: List[str]) -> List[str]:
+        # Una guarda movida (misma línea añadida en otro sitio) no cuenta
+        kept = {line.strip() for line in added}
+        gone = [line for line in removed if line.strip() not in kept]
+        return sorted(
+            {name for name, regex in self._guards for l in gone if regex.search(l)}
+        )
+
+    def score_file(self, path: str, file_diff: str) -> FileRisk:
+        """Score one file's diff (see the module docstring for the weights)."""
+        added, removed = [], []
+        for line in file_diff.splitlines():
+            if line.startswith("+") and not line.startswith("+++ "):
+                added.append(line[1:])
+            elif line.startswith("-") and not line.startswith("--- "):
+                removed.append(line[1:])
+        changed = [line.strip() for line in added + removed]
+        changed = [line for line in changed if line]
+        if not changed:
+            return FileRisk(path, 0, ["no content change"], self.config.min_score == 0)
+        prefixes = COMMENT_PREFIXES.get(path.rsplit(".", 1)[-1].lower())
+        if prefixes and all(
+            line.startswith(prefixes) or line == "*" for line in changed
+        ):
+            return FileRisk(path, 0, ["comments only"], self.config.min_score == 0)
+
+        score, reasons = 0, []
+        sinks = self._sink_hits(added)
+        if sinks:
+            score += SINK_WEIGHT * len(sinks)
+            reasons.append(f"sinks: {', '.join(sinks)}")
+        guards = self._guard_hits(removed, added)
+        if guards:
+            score += GUARD_WEIGHT * len(guards)
+            reasons.append(f"removed guards: {', '.join(guards)}")
+        if any(regex.search(path) for regex in self._paths):
+            score += PATH_WEIGHT
+            reasons.append("sensitive path")
+        kind = file_priority(path)
+        if TYPE_WEIGHTS.get(kind):
+            score += TYPE_WEIGHTS[kind]
+            reasons.append("config file" if kind == CONFIG else "source file")
+        elif kind == DOCS:
+            reasons.append("docs")
+        else:
+            reasons.append("tests")
+        if len(changed) >= self.config.churn_lines:
+            score += CHURN_WEIGHT
+            reasons.append(f"churn {len(changed)} lines")
+        return FileRisk(path, score, reasons, score >= self.config.min_score)
+
+    def triage_diff(self, diff: str, max_chunks: Optional[int] = None) -> TriageResult:
+        """Score every file of ``diff`` and keep the ones the AI must see.
+
+        Args:
+            diff: Unified diff (usually compacted).
+            max_chunks: The engine's chunk limit, to cap ``calls_avoided``.
+        """
+        files = split_by_file(diff)
+        risks = [self.score_file(path, text) for path, text in files.items()]
+        kept = {r.path: files[r.path] for r in risks if r.send}
+        approved = {r.path: files[r.path] for r in risks if not r.send}
+
+        # Mismo troceado que AIEngine: peticiones que se habrían hecho
+        sizes: Dict[str, int] = {}
+
+        def measure(text: str) -> int:
+            if text not in sizes:
+                sizes[text] = count_tokens(text)
+            return sizes[text]
+
+        def calls(part: Dict[str, str]) -> int:
+            count = len(pack_files(part, MAX_CHUNK_TOKENS, measure)) if part else 0
+            return min(count, max_chunks) if max_chunks else count
+
+        return TriageResult(
+            diff="".join(kept.values()),
+            files=risks,
+            tokens_avoided=sum(measure(text) for text in approved.values()),
+            calls_avoided=max(0, calls(files) - calls(kept)) if approved else 0,
+        )
@@ -0,0 +1,74 @@
+"""Tests for the chunked AI gate (``AIEngine.analyze_diff``) on the mock backend."""
+
+from pathlib import Path
+
+import pytest
+
+from src.ai import AIEngine
+from src.backends import ALLOW_MOCK_ENV, AIBackend, BackendConfig
+from src.cache import VerdictCache
+from src.pipeline import ScanOptions, ai_gate
+from src.telemetry import Telemetry
+
+MOCK = BackendConfig(kind="mock", mock_latency_ms=0.0)
+
+
+@pytest.fixture(autouse=True)
+def allow_mock(monkeypatch) -> None:
+    monkeypatch.setenv(ALLOW_MOCK_ENV, "1")
+
+
+def _file_diff(path: str, lines: int) -> str:
+    body = "\n".join(f"+value_{i} = compute({i}, 'field_{i}')" for i in range(lines))
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -0,0 +1,{lines} @@\n{body}\n"
+    )
+
+
+def _engine(tmp_path: Path, **kwargs) -> AIEngine:
+    return AIEngine(
+        cache=VerdictCache(str(tmp_path)), backend=AIBackend(MOCK), **kwargs
+    )
+
+
+def test_file_over_chunk_budget_is_not_cached(tmp_path: Path) -> None:
+    diff = _file_diff("big.py", 2500)
+
+    first = _engine(tmp_path, max_chunks=1)
+    result = first.analyze_diff(diff)
+    assert "Not reviewed by AI (chunk budget 1): big.py" in result["explanation"]
+    assert result["not_reviewed"] == ["big.py"]
+
+    second = _engine(tmp_path, max_chunks=1)
+    result = second.analyze_diff(diff)
+    assert second.cache.hits == 0
+    assert "big.py" in result["explanation"]
+
+
+def test_fully_reviewed_file_is_cached(tmp_path: Path) -> None:
+    diff = _file_diff("small.py", 20)
+
+    _engine(tmp_path).analyze_diff(diff)
+    second = _engine(tmp_path)
+    result = second.analyze_diff(diff)
+
+    assert second.cache.hits == 1
+    assert result["explanation"] == "All files served from verdict cache."
+
+
+@pytest.mark.parametrize("fail_closed", [False, True])
+def test_files_over_budget_warn_or_fail_closed(fail_closed: bool) -> None:
+    diff = _file_diff("small.py", 20) + _file_diff("big.py", 2500)
+    options = ScanOptions(
+        cache=False, ai_compact=False, ai_max_chunks=1, ai_fail_closed=fail_closed
+    )
+    telemetry = Telemetry()
+
+    result = ai_gate(diff, options, telemetry, MOCK)
+
+    assert result.ai_result["verdict"] == "APPROVE"
+    assert result.status == ("block" if fail_closed else "approve")
+    assert result.message.startswith("⚠️ AI budget exhausted: 1 file(s)")
+    assert "big.py" in result.message and "small.py" not in result.message
+    assert telemetry.counters["ai_files_not_reviewed"] == 1
@@ -0,0 +1,94 @@
+"""Tests for the streamed AI requests against the local SSE stub."""
+
+import json
+import time
+
+import pytest
+
+from benchmarks.stub_openai import StubOpenAIServer
+from src.ai import AIEngine
+
+DIFF = "diff --git a/app.py b/app.py\n@@ -1 +1,2 @@\n import os\n+os.system(cmd)\n"
+
+BLOCK = {
+    "verdict": "BLOCK",
+    "risk_score": 9,
+    "explanation": "Remote code execution via unsanitized input.",
+    "findings": [
+        {"file": "app.py", "line": str(i), "severity": "CRITICAL", "issue": "RCE"}
+        for i in range(12)
+    ],
+}
+APPROVE = {"verdict": "APPROVE", "risk_score": 1, "explanation": "ok", "findings": []}
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch) -> None:
+    monkeypatch.setenv("OPENROUTER_API_KEY", "stub-key")
+
+
+def _stub(verdict: dict, **kwargs) -> StubOpenAIServer:
+    kwargs.setdefault("first_token_latency", 0.05)
+    kwargs.setdefault("token_delay", 0.001)
+    return StubOpenAIServer(verdict=verdict, **kwargs)
+
+
+def test_stream_measures_ttft() -> None:
+    with _stub(APPROVE) as stub:
+        engine = AIEngine(base_url=stub.base_url, stream=True)
+        result, ok, usage = engine._request_verdict(DIFF)
+
+    assert ok and result["verdict"] == "APPROVE"
+    assert len(engine._ttfts) == 1 and 0.05 <= engine._ttfts[0] < 5
+    assert engine._early_aborts == 0
+    assert usage[1] > 0
+
+
+def test_stream_aborts_early_on_high_risk_block() -> None:
+    with _stub(BLOCK) as stub:
+        engine = AIEngine(base_url=stub.base_url, stream=True, early_abort_risk=8)
+        result, ok, _ = engine._request_verdict(DIFF)
+        time.sleep(0.1)  # el servidor registra la desconexión
+        total_tokens = -(-len(json.dumps(BLOCK)) // 4)
+
+        assert result["verdict"] == "BLOCK" and result["risk_score"] == 9
+        # Veredicto parcial: bloquea pero no es cacheable
+        assert not ok
+        assert engine._early_aborts == 1
+        assert stub.tokens_sent < total_tokens
+
+
+def test_low_risk_block_is_not_aborted() -> None:
+    verdict = {**BLOCK, "risk_score": 5}
+    with _stub(verdict) as stub:
+        engine = AIEngine(base_url=stub.base_url, stream=True, early_abort_risk=8)
+        result, ok, _ = engine._request_verdict(DIFF)
+
+    assert ok and result["verdict"] == "BLOCK" and len(result["findings"]) == 12
+    assert engine._early_aborts == 0
+
+
+def test_non_stream_mode_returns_full_verdict() -> None:
+    with _stub(BLOCK) as stub:
+        engine = AIEngine(base_url=stub.base_url, stream=False)
+        result, ok, usage = engine._request_verdict(DIFF)
+
+    assert ok and result["verdict"] == "BLOCK" and len(result["findings"]) == 12
+    assert engine._ttfts == [] and engine._early_aborts == 0
+    assert usage[1] > 0
+
+
+def test_concurrent_chunks_record_every_ttft() -> None:
+    diff = "".join(
+        f"diff --git a/m{i}.py b/m{i}.py\n@@ -0,0 +1 @@\n"
+        + "".join(f"+value_{j} = compute({j}, 'field_{j}')\n" for j in range(700))
+        for i in range(6)
+    )
+    with _stub(APPROVE, token_delay=0) as stub:
+        engine = AIEngine(base_url=stub.base_url, stream=True, max_workers=6)
+        engine.analyze_diff(diff)
+        requests = stub.requests
+
+    assert requests > 1
+    assert engine.last_usage["ttft_s"] is not None
+    assert len(engine._ttfts) == requests
@@ -0,0 +1,57 @@
+"""Tests for the AI backend configuration (``src.backends``)."""
+
+import pytest
+
+from src.backends import (
+    ALLOW_MOCK_ENV,
+    API_KEY_ENV_ENV,
+    ENDPOINT_ENV,
+    OPENROUTER_BASE_URL,
+    AIBackend,
+    BackendConfig,
+    BackendError,
+)
+from src.pipeline import ScanOptions, ai_gate
+from src.telemetry import Telemetry
+
+
+@pytest.mark.parametrize("key", ["endpoint", "api_key_env"])
+def test_policy_cannot_redirect_endpoint_or_key(key: str) -> None:
+    with pytest.raises(ValueError, match=key):
+        BackendConfig.from_config({key: "https://attacker.example/v1"}, environ={})
+
+
+def test_endpoint_and_key_variable_come_from_the_runner() -> None:
+    environ = {ENDPOINT_ENV: "http://127.0.0.1:9/v1", API_KEY_ENV_ENV: "MY_KEY"}
+
+    config = BackendConfig.from_config({"model": "m"}, environ=environ)
+
+    assert (config.endpoint, config.api_key_env, config.model) == (
+        "http://127.0.0.1:9/v1",
+        "MY_KEY",
+        "m",
+    )
+    assert BackendConfig.from_config({}, environ={}).endpoint == OPENROUTER_BASE_URL
+    assert "endpoint" not in config.to_config()
+    assert BackendConfig.from_config(config.to_config(), environ=environ) == config
+
+
+def test_mock_backend_requires_runner_opt_in(monkeypatch) -> None:
+    monkeypatch.delenv(ALLOW_MOCK_ENV, raising=False)
+    config = BackendConfig.from_config({"backend": "mock"}, environ={})
+
+    with pytest.raises(BackendError, match=ALLOW_MOCK_ENV):
+        AIBackend(config).client
+    result = ai_gate("diff --git a/x b/x\n+x\n", ScanOptions(), Telemetry(), config)
+    assert result.status == "error"
+
+    monkeypatch.setenv(ALLOW_MOCK_ENV, "1")
+    assert AIBackend(config).client is not None
+
+
+def test_runner_endpoint_applies_without_an_ai_section(monkeypatch) -> None:
+    from src.policy_bundle import PolicyBundle
+
+    monkeypatch.setenv(ENDPOINT_ENV, "http://127.0.0.1:9/v1")
+
+    assert PolicyBundle([], [], []).backend_config.endpoint == "http://127.0.0.1:9/v1"
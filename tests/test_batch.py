@@ -0,0 +1,113 @@
+"""Tests for batch scanning (``src.batch``): manifest, checkpoint and resume."""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from src.batch import BatchError, Checkpoint, load_manifest, run_batch
+from src.pipeline import ScanOptions
+from tests.conftest import CONFIG, SECRET, GitRepo
+
+
+@pytest.fixture
+def repo(git_repo: GitRepo, monkeypatch) -> GitRepo:
+    """Three commits, the middle one adding a secret."""
+    # Sin clave del backend el gate IA aprueba sin llamar a nadie
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    for i, content in enumerate(["x = 1\n", "x = 1\n" + SECRET, "y = 2\n"]):
+        git_repo.write("app.py", content)
+        git_repo.commit(f"c{i}")
+    return git_repo
+
+
+def _run(entries, checkpoint: Checkpoint, history: bool = True):
+    output = io.StringIO()
+    summary = run_batch(
+        entries,
+        CONFIG,
+        ScanOptions(cache=False),
+        output,
+        checkpoint,
+        jobs=2,
+        policy_cache=False,
+        history=history,
+    )
+    checkpoint.close()
+    return summary, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_load_manifest(tmp_path: Path) -> None:
+    manifest = tmp_path / "targets.jsonl"
+    manifest.write_text(
+        '# repos\n\n{"repo": "a"}\n{"repo": "b", "range": "v1..main"}\n'
+    )
+
+    assert load_manifest(str(manifest)) == [
+        {"repo": "a"},
+        {"repo": "b", "range": "v1..main"},
+    ]
+
+    for bad, message in [
+        ("{not json", "invalid JSON"),
+        ('["a"]', "needs a 'repo'"),
+        ('{"repo": "a", "range": 3}', "'range' must be a string"),
+    ]:
+        manifest.write_text(bad + "\n")
+        with pytest.raises(BatchError, match=f"targets.jsonl:1: .*{message}"):
+            load_manifest(str(manifest))
+    with pytest.raises(BatchError, match="Cannot read manifest"):
+        load_manifest(str(tmp_path / "missing.jsonl"))
+
+
+def test_checkpoint_ignores_a_truncated_last_line(tmp_path: Path) -> None:
+    path = tmp_path / "done.txt"
+    path.write_text("a@WORKTREE\nb@1234")
+
+    checkpoint = Checkpoint(str(path))
+    checkpoint.add("c@WORKTREE")
+    checkpoint.close()
+
+    assert "a@WORKTREE" in checkpoint and "b@1234" not in checkpoint
+    assert "c@WORKTREE" in Checkpoint(str(path))
+
+
+def test_batch_scans_each_commit_and_resumes(repo: GitRepo, tmp_path: Path) -> None:
+    entries = [{"repo": str(repo), "range": "HEAD"}, {"repo": str(tmp_path / "nope")}]
+    checkpoint_path = str(tmp_path / "done.txt")
+
+    summary, records = _run(entries, Checkpoint(checkpoint_path), history=False)
+
+    commits = repo.git("rev-list", "--reverse", "HEAD").split()
+    by_commit = {r["commit"]: r["status"] for r in records if r["commit"]}
+    assert by_commit == {
+        commits[0]: "approve",
+        commits[1]: "block",
+        commits[2]: "approve",
+    }
+    missing = f"{tmp_path / 'nope'}@WORKTREE"
+    assert [r["key"] for r in records if r["status"] == "error"] == [missing]
+    assert summary == {
+        "resumed": 0,
+        "indexed": 0,
+        "approve": 2,
+        "block": 1,
+        "error": 1,
+    }
+
+    # Al reanudar solo se reintenta el error
+    summary, records = _run(entries, Checkpoint(checkpoint_path), history=False)
+    assert summary == {"resumed": 3, "indexed": 0, "error": 1}
+    assert [r["key"] for r in records] == [missing]
+
+
+def test_batch_skips_commits_in_the_history_index(repo: GitRepo) -> None:
+    entries = [{"repo": str(repo), "range": "HEAD"}]
+
+    first, _ = _run(entries, Checkpoint(None))
+    second, records = _run(entries, Checkpoint(None))
+
+    assert first["indexed"] == 0 and first["block"] == 1
+    assert second == {"resumed": 0, "indexed": 3}
+    assert records == []
@@ -0,0 +1,69 @@
+"""Tests for the benchmark suite's workload (``benchmarks.synth``) and its
+regression check (``benchmarks.suite.compare``)."""
+
+from benchmarks.suite import compare, run_suite
+from benchmarks.synth import (
+    IGNORED_FILES,
+    PLANTED_RULES,
+    WorkloadSpec,
+    file_contents,
+    synthetic_rules,
+)
+
+
+def _results(**stages):
+    return {"stages": {name: {"min_s": t, "median_s": t} for name, t in stages.items()}}
+
+
+def test_workload_is_deterministic_per_seed() -> None:
+    spec = WorkloadSpec(files=4, hunks=2, hunk_lines=20, secret_density=0.1)
+
+    files, planted = file_contents(spec)
+
+    assert file_contents(spec) == (files, planted)
+    assert file_contents(spec._replace(seed=1))[0] != files
+    assert len(files) == spec.files + len(IGNORED_FILES)
+    assert planted and set(planted) <= PLANTED_RULES
+    base, modified = files["src/pkg0/module_0.py"]
+    added = len(modified.splitlines()) - len(base.splitlines())
+    assert added == spec.hunks * spec.hunk_lines
+
+
+def test_synthetic_rules_extend_the_default_policy() -> None:
+    rules = synthetic_rules(20)
+
+    assert len(rules) == 20
+    assert PLANTED_RULES <= {rule["name"] for rule in rules}
+    assert rules[-1]["name"].startswith("Vendor Token")
+    assert len(synthetic_rules(2)) == 2
+
+
+def test_compare_flags_only_significant_regressions() -> None:
+    baseline = _results(scan=0.100, load=0.010, ingest=0.050)
+    current = _results(scan=0.130, load=0.0135, ingest=0.055, render=0.5)
+
+    regressions = compare(current, baseline, threshold=0.25, min_delta=0.004)
+
+    # load supera el umbral relativo pero no el absoluto; render no tiene base
+    assert regressions == ["scan: 100.0 -> 130.0 ms (+30%)"]
+    assert compare(baseline, baseline, threshold=0.0, min_delta=0.0) == []
+
+
+def test_suite_runs_on_a_small_workload(monkeypatch) -> None:
+    # La suite fija una clave para el stub si falta; que no se quede puesta
+    monkeypatch.setenv("OPENROUTER_API_KEY", "stub-key")
+    spec = WorkloadSpec(files=3, hunks=1, hunk_lines=10, secret_density=0.2)
+
+    results = run_suite(spec, repeat=1)
+
+    assert results["spec"] == spec.as_dict()
+    assert results["workload"]["findings"] >= results["workload"]["planted"] > 0
+    assert set(results["stages"]) == {
+        "policy_load",
+        "ignore_filter",
+        "ingest",
+        "regex_scan",
+        "compact",
+        "render",
+        "ai_stub",
+    }
@@ -0,0 +1,69 @@
+"""Tests for the on-disk verdict cache (``src.cache``)."""
+
+import json
+from pathlib import Path
+
+from src.cache import VerdictCache
+
+DIFF = (
+    "diff --git a/a.py b/a.py\n"
+    "index 1111111..2222222 100644\n"
+    "@@ -1,2 +1,3 @@\n"
+    " x = 1\n"
+    "+y = 2\n"
+)
+VERDICT = {"verdict": "APPROVE", "risk_score": 0, "explanation": "", "findings": []}
+
+
+def test_key_ignores_cosmetic_churn_but_not_content() -> None:
+    key = VerdictCache.make_key(DIFF, "model", "v1")
+    shifted = DIFF.replace("index 1111111..2222222", "index 3333333..4444444")
+    shifted = shifted.replace("@@ -1,2 +1,3 @@", "@@ -40,2 +41,3 @@")
+    shifted = shifted.replace("+y = 2", "+y = 2  ")
+
+    assert VerdictCache.make_key(shifted, "model", "v1") == key
+    assert VerdictCache.make_key(DIFF.replace("y = 2", "y = 3"), "model", "v1") != key
+    assert VerdictCache.make_key(DIFF, "other", "v1") != key
+    assert VerdictCache.make_key(DIFF, "model", "v2") != key
+
+
+def test_put_get_persists_and_counts(tmp_path: Path) -> None:
+    cache = VerdictCache(str(tmp_path))
+    assert cache.get("k") is None
+    cache.put("k", VERDICT)
+    cache.close()
+
+    reopened = VerdictCache(str(tmp_path))
+    assert reopened.get("k") == VERDICT
+    assert (reopened.hits, reopened.misses) == (1, 0)
+
+
+def test_expired_entries_are_misses(tmp_path: Path) -> None:
+    cache = VerdictCache(str(tmp_path), ttl_seconds=1)
+    cache.put("k", VERDICT)
+    cache._db.execute("UPDATE verdicts SET created = created - 10")
+
+    assert cache.get("k") is None
+    assert cache.misses == 1
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path: Path) -> None:
+    size = len(json.dumps(VERDICT))
+    cache = VerdictCache(str(tmp_path), max_bytes=2 * size)
+    cache.put("a", VERDICT)
+    cache.put("b", VERDICT)
+    cache._db.execute("UPDATE verdicts SET accessed = accessed - 10 WHERE key = 'a'")
+    cache.get("b")
+    cache.put("c", VERDICT)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == VERDICT and cache.get("c") == VERDICT
+
+
+def test_unusable_directory_disables_the_cache(tmp_path: Path) -> None:
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = VerdictCache(str(blocker / "sub"))
+
+    cache.put("k", VERDICT)
+    assert cache.get("k") is None
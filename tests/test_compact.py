@@ -0,0 +1,58 @@
+"""Tests for the pre-AI diff compaction (``src.compact``)."""
+
+from src.compact import compact_diff
+
+
+def _diff(path: str, body: str, old: str = "1,2", new: str = "1,2") -> str:
+    return f"diff --git a/{path} b/{path}\n@@ -{old} +{new} @@\n{body}"
+
+
+REINDENT = "-if ok:\n-    run()\n+if ok:\n+run()\n"
+
+
+def test_reindent_is_kept_in_python_and_yaml() -> None:
+    for path in ("app.py", "deploy/values.yaml", "Makefile"):
+        compacted, stats = compact_diff(_diff(path, REINDENT))
+
+        assert stats.hunks_dropped == 0, path
+        assert "+run()" in compacted.splitlines()
+
+
+def test_reindent_is_dropped_where_indentation_is_not_syntax() -> None:
+    compacted, stats = compact_diff(_diff("app.js", REINDENT))
+
+    assert stats.hunks_dropped == 1
+    assert "+run()" not in compacted.splitlines()
+
+
+def test_trailing_whitespace_only_change_is_dropped_in_python() -> None:
+    _, stats = compact_diff(_diff("app.py", "-x = 1\n+x = 1   \n", "1", "1"))
+
+    assert stats.hunks_dropped == 1
+
+
+def test_spacing_change_is_dropped_but_inserted_space_is_kept() -> None:
+    _, spacing = compact_diff(_diff("run.sh", "-a  =  1\n+a = 1\n", "1", "1"))
+    compacted, split = compact_diff(
+        _diff("run.sh", "-rm -rf ./build\n+rm -rf . /build\n", "1", "1")
+    )
+
+    assert spacing.hunks_dropped == 1
+    assert split.hunks_dropped == 0
+    assert "+rm -rf . /build" in compacted.splitlines()
+
+
+def test_long_line_in_source_is_not_omitted_as_minified() -> None:
+    body = "+key = '" + "a" * 1500 + "'\n+x = 1\n"
+    compacted, stats = compact_diff(_diff("app.py", body, "0,0", "1,2"))
+
+    assert stats.files_omitted == 0
+    assert "+x = 1" in compacted.splitlines()
+
+
+def test_long_line_in_bundle_is_omitted_as_minified() -> None:
+    body = "+!function(){" + "a;" * 800 + "}();\n+x;\n"
+    compacted, stats = compact_diff(_diff("dist/app.js", body, "0,0", "1,2"))
+
+    assert stats.files_omitted == 1
+    assert "\\ minified file omitted (+2 -0 lines)" in compacted
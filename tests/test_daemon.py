@@ -0,0 +1,131 @@
+"""Tests for the scan daemon (``src.daemon``) and its warm ``ScanService``."""
+
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from src import daemon
+from src.daemon import DaemonError, DaemonService
+from src.pipeline import ScanOptions, ScanService
+from src.telemetry import Telemetry
+from tests.conftest import CONFIG, GitRepo
+
+
+@pytest.fixture
+def socket_path():
+    """Served socket (short path: AF_UNIX paths are limited to ~100 bytes)."""
+    sock_dir = tempfile.mkdtemp(prefix="og-")
+    path = str(Path(sock_dir) / "d.sock")
+    daemon._prepare_socket(path)
+    server = daemon._Server(path, daemon._Handler)
+    server.service = DaemonService()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(sock_dir, ignore_errors=True)
+
+
+def test_daemon_scan_matches_in_process_scan(
+    secret_repo: GitRepo, socket_path: str
+) -> None:
+    config = CONFIG
+    options = ScanOptions(cache=False)
+    expected, _ = ScanService().scan(
+        str(secret_repo), config, options, Telemetry(), policy_cache=False
+    )
+
+    for _ in range(2):
+        regex_result, ai_result = daemon.request_scan(
+            socket_path, str(secret_repo), config, options, policy_cache=False
+        )
+        assert regex_result == expected
+        assert regex_result.status == "block"
+        assert ai_result is None
+
+    stats = daemon.request(socket_path, {"op": "ping"})
+    assert stats["scans"] == 2
+    # El segundo escaneo reutiliza la política compilada
+    assert stats["bundles"] == 1 and stats["reloads"] == 0
+
+
+def test_daemon_errors(socket_path: str, tmp_path: Path) -> None:
+    with pytest.raises(DaemonError, match="unknown op"):
+        daemon.request(socket_path, {"op": "nope"})
+    with pytest.raises(DaemonError, match="not reachable"):
+        daemon.request(str(tmp_path / "missing.sock"), {"op": "ping"})
+    # Un segundo daemon no pisa el socket de uno vivo
+    with pytest.raises(DaemonError, match="Another OpsGuard daemon"):
+        daemon._prepare_socket(socket_path)
+
+
+def test_stale_socket_is_replaced(tmp_path: Path) -> None:
+    path = tmp_path / "stale.sock"
+    path.write_text("")
+
+    daemon._prepare_socket(str(path))
+
+    assert not path.exists()
+
+
+def test_bundle_hot_reload_keeps_last_good_policy(tmp_path: Path) -> None:
+    config = tmp_path / "opsguard.yml"
+    ignore = str(tmp_path / ".opsguardignore")
+    original = Path(CONFIG).read_text()
+    config.write_text(original)
+    service = ScanService()
+    first = service.bundle(str(config), ignore, use_cache=False)
+    assert service.bundle(str(config), ignore, use_cache=False) is first
+
+    config.write_text(original + "\nblocklist: [\n")
+    assert service.bundle(str(config), ignore, use_cache=False) is first
+    assert service.reload_errors == 1
+
+    config.write_text(
+        original.replace(
+            "blocklist:\n",
+            'blocklist:\n  - name: "Extra Rule"\n    pattern: "extra_secret"\n',
+        )
+    )
+    reloaded = service.bundle(str(config), ignore, use_cache=False)
+    assert reloaded is not first
+    assert service.reloads == 1
+    assert "Extra Rule" in {rule["name"] for rule in reloaded.policy.rules}
+
+
+def test_concurrent_scans_across_a_policy_reload(
+    secret_repo: GitRepo, tmp_path: Path
+) -> None:
+    config = tmp_path / "opsguard.yml"
+    original = Path(CONFIG).read_text()
+    config.write_text(original)
+    service = ScanService()
+    options = ScanOptions(cache=False, profile_rules=True)
+
+    def scan(_: int):
+        return service.scan(
+            str(secret_repo), str(config), options, Telemetry(), policy_cache=False
+        )[0]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        before = list(pool.map(scan, range(8)))
+        config.write_text(
+            original.replace(
+                "blocklist:\n",
+                'blocklist:\n  - name: "Key Assignment"\n    pattern: "key = "\n',
+            )
+        )
+        after = list(pool.map(scan, range(8)))
+
+    assert {r.status for r in before + after} == {"block"}
+    assert service.reloads == 1 and service.reload_errors == 0
+    assert all("Key Assignment" in {v["rule"] for v in r.violations} for r in after)
+    # El perfil del servicio acumula los 16 escaneos, antes y después de recargar
+    stats = service.rule_profile.stats()
+    assert stats["AWS Access Key"].matches == 16
+    assert stats["Key Assignment"].matches == 8
@@ -0,0 +1,85 @@
+"""Tests for the incremental diff parsing (``src.diffparse``)."""
+
+import random
+
+from src.diffparse import iter_diff_lines, iter_hunks, unquote_path
+
+DIFF = (
+    "diff --git a/app.py b/app.py\n"
+    "index 1111111..2222222 100644\n"
+    "--- a/app.py\n"
+    "+++ b/app.py\n"
+    "@@ -1,2 +10,3 @@ def main():\n"
+    " context\n"
+    "+añadido = 'ü'\r\n"
+    "-removed\n"
+    "@@ -20 +30 @@\n"
+    "+second\n"
+    "diff --git a/docs/a b.md b/docs/a b.md\n"
+    "+++ b/docs/a b.md\n"
+    "@@ -0,0 +1 @@\n"
+    "+doc\n"
+)
+
+
+def test_lines_match_splitlines_for_any_chunking() -> None:
+    data = DIFF.encode("utf-8")
+    rnd = random.Random(0)
+    for _ in range(200):
+        cuts = sorted(rnd.sample(range(1, len(data)), rnd.randrange(0, 12)))
+        chunks = [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+        assert list(iter_diff_lines(chunks)) == DIFF.splitlines()
+
+
+def test_unterminated_last_line_is_kept() -> None:
+    assert list(iter_diff_lines([b"+a\n+b", b"c"])) == ["+a", "+bc"]
+
+
+def test_hunks_cover_every_line_with_path_and_start() -> None:
+    hunks = list(iter_hunks(DIFF.splitlines()))
+
+    assert [line for h in hunks for line in h.lines] == DIFF.splitlines()
+    assert [(h.path, h.new_start) for h in hunks] == [
+        ("app.py", 0),
+        ("app.py", 10),
+        ("app.py", 30),
+        ("docs/a b.md", 0),
+        ("docs/a b.md", 1),
+    ]
+
+
+def test_long_hunks_are_sliced_with_running_line_numbers() -> None:
+    lines = ["diff --git a/x b/x", "@@ -0,0 +5,7 @@"] + [f"+{i}" for i in range(7)]
+
+    hunks = list(iter_hunks(lines, max_lines=3))
+
+    assert [len(h.lines) for h in hunks] == [1, 3, 3, 2]
+    assert [h.new_start for h in hunks[1:]] == [5, 7, 10]
+
+
+def test_text_without_headers_is_one_pathless_hunk() -> None:
+    hunks = list(iter_hunks(["just", "text"]))
+
+    assert [(h.path, h.lines) for h in hunks] == [("", ["just", "text"])]
+
+
+def test_quoted_paths_are_unquoted() -> None:
+    diff = (
+        'diff --git "a/caf\\303\\251.py" "b/caf\\303\\251.py"\n'
+        '--- "a/caf\\303\\251.py"\n'
+        '+++ "b/caf\\303\\251.py"\n'
+        "@@ -0,0 +1 @@\n"
+        "+x = 1\n"
+        'diff --git "a/tab\\there.py" "b/tab\\there.py"\n'
+        "deleted file mode 100644\n"
+        '--- "a/tab\\there.py"\n'
+        "+++ /dev/null\n"
+    )
+
+    assert [hunk.path for hunk in iter_hunks(diff.splitlines())] == [
+        "café.py",
+        "café.py",
+        "tab\there.py",
+    ]
+    assert unquote_path('"say \\"hi\\"\\\\.txt"') == 'say "hi"\\.txt'
+    assert unquote_path("plain.py") == "plain.py"
@@ -0,0 +1,103 @@
+"""Tests for the Shannon-entropy detector (``src.entropy``)."""
+
+import math
+import random
+import string
+import uuid
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src import entropy
+from src.entropy import EntropyDetector, shannon_entropy
+
+ALPHABET = string.ascii_letters + string.digits
+SHIPPED = Path(__file__).resolve().parent.parent / "opsguard.yml"
+
+
+def _reference(token: str) -> float:
+    return -sum(
+        token.count(c) / len(token) * math.log2(token.count(c) / len(token))
+        for c in set(token)
+    )
+
+
+def test_entropy_matches_the_definition() -> None:
+    rnd = random.Random(0)
+    tokens = ["aaaa", "abab", "abcd"] + [
+        "".join(rnd.choice(ALPHABET) for _ in range(rnd.randrange(1, 60)))
+        for _ in range(100)
+    ]
+
+    scores = shannon_entropy(tokens)
+
+    assert scores[:3] == pytest.approx([0.0, 1.0, 2.0])
+    assert scores == pytest.approx([_reference(t) for t in tokens])
+    assert shannon_entropy([]) == []
+
+
+def test_numpy_batches_match_the_counter_path(monkeypatch) -> None:
+    pytest.importorskip("numpy")
+    rnd = random.Random(1)
+    tokens = ["".join(rnd.choice(ALPHABET) for _ in range(40)) for _ in range(50)]
+    monkeypatch.setattr(entropy, "NUMPY_MIN_TOKENS", 1)
+    monkeypatch.setattr(entropy, "BATCH_SIZE", 7)
+
+    assert shannon_entropy(tokens) == pytest.approx(entropy._entropy_counter(tokens))
+
+
+def test_detector_flags_random_tokens_only() -> None:
+    rnd = random.Random(2)
+    secret = "".join(rnd.choice(ALPHABET) for _ in range(40))
+    hex_key = "".join(rnd.choice("0123456789abcdef") for _ in range(40))
+    text = "\n".join(
+        [
+            f'api_key = "{secret}"',
+            f"digest: {hex_key}",
+            'name = "configuration_manager_value"',
+            'integrity = "sha512-' + secret + '"',
+            "count = 1234567890123456789012",
+        ]
+    )
+
+    found = EntropyDetector().scan(text)
+
+    assert [(charset, token) for charset, token, _, _ in found] == [
+        ("base64", secret),
+        ("hex", hex_key),
+    ]
+    assert text[found[0][2] :].startswith(secret)
+
+
+def test_shipped_config_ignores_uuids_but_flags_random_keys() -> None:
+    config = yaml.safe_load(SHIPPED.read_text())["entropy"]
+    rnd = random.Random(3)
+    secret = "".join(rnd.choice(ALPHABET) for _ in range(40))
+    text = "\n".join(
+        [
+            'request_id = "550e8400e29b41d4a716446655440000"',
+            f'trace = "{uuid.UUID(int=rnd.getrandbits(128)).hex}"',
+            f'token = "{secret}"',
+        ]
+    )
+
+    found = EntropyDetector.from_config(config).scan(text)
+
+    assert [token for _, token, _, _ in found] == [secret]
+
+
+def test_config_round_trip_and_validation() -> None:
+    detector = EntropyDetector.from_config({"thresholds": {"hex": 3.5}})
+
+    assert detector.thresholds == {"hex": 3.5, "base64": 4.5}
+    assert EntropyDetector.from_config(detector.to_config()).to_config() == (
+        detector.to_config()
+    )
+    off = EntropyDetector(thresholds={"hex": None})
+    assert EntropyDetector.from_config(off.to_config()).thresholds["hex"] is None
+    assert off.scan('digest: "' + "0123456789abcdef" * 2 + '"') == []
+    with pytest.raises(ValueError):
+        EntropyDetector(thresholds={"base32": 4.0})
+    with pytest.raises(ValueError):
+        EntropyDetector(min_length=4)
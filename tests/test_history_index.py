@@ -0,0 +1,182 @@
+"""Tests for the history index (``src.history_index``)."""
+
+from pathlib import Path
+
+import pytest
+
+from src import pipeline
+from src.history_index import NULL_SHA, HistoryIndex, index_path, invalidate
+from src.ingest import FileChange
+from src.pipeline import ScanOptions, ScanResult, ScanService
+from src.telemetry import Telemetry
+from tests.conftest import CONFIG, SECRET, GitRepo
+
+OLD, NEW = "1" * 40, "2" * 40
+
+
+def test_findings_are_reused_per_blob_pair(tmp_path: Path) -> None:
+    index = HistoryIndex(str(tmp_path), "digest")
+    change = FileChange("M", "a.py", old_blob=OLD, blob=NEW)
+    finding = {"file": "a.py", "rule": "AWS Key", "line": 3}
+
+    index.record_changes(
+        [change, FileChange("M", "b.py", old_blob=OLD, blob=NULL_SHA)],
+        [finding],
+        "block",
+    )
+    index.record_commit("abc", "block")
+
+    moved = change._replace(status="R100", path="lib/a.py", old_path="a.py")
+    assert index.is_known(moved)
+    assert index.findings([moved]) == [{**finding, "file": "lib/a.py"}]
+    # El árbol de trabajo no tiene blob: nunca se indexa
+    assert not index.is_known(FileChange("M", "b.py", old_blob=OLD, blob=NULL_SHA))
+    with pytest.raises(KeyError):
+        index.findings([FileChange("M", "c.py", old_blob=NEW, blob=OLD)])
+    assert index.commit_status("abc") == "block"
+    assert index.commit_status("def") is None
+    assert index.stats() == {"commits": 1, "blobs": 1}
+    index.close()
+
+
+def test_only_settled_pairs_are_known(tmp_path: Path) -> None:
+    index = HistoryIndex(str(tmp_path), "digest")
+    approved = FileChange("M", "a.py", old_blob=OLD, blob=NEW)
+    blocked = FileChange("M", "b.py", old_blob=NEW, blob=OLD)
+
+    index.record_changes([approved], [], "approve")
+    index.record_changes([blocked], [], "block")
+
+    assert index.is_known(approved) and index.findings([approved]) == []
+    # Bloqueado por la IA sin hallazgos regex: no es un par limpio
+    assert not index.is_known(blocked)
+
+
+def test_policy_change_empties_the_index(tmp_path: Path) -> None:
+    index = HistoryIndex(str(tmp_path), "v1")
+    index.record_commit("abc", "approve")
+    index.close()
+
+    reopened = HistoryIndex(str(tmp_path), "v1")
+    assert reopened.commit_status("abc") == "approve"
+    reopened.close()
+    changed = HistoryIndex(str(tmp_path), "v2")
+    assert changed.stats() == {"commits": 0, "blobs": 0}
+    changed.close()
+
+    assert invalidate(str(tmp_path))
+    assert not index_path(str(tmp_path)).exists()
+    assert not invalidate(str(tmp_path))
+
+
+def test_unusable_index_disables_itself(tmp_path: Path) -> None:
+    # El directorio del índice es un fichero: no se puede crear la base
+    (tmp_path / "opsguard").write_text("")
+
+    index = HistoryIndex(str(tmp_path), "digest")
+    index.record_commit("abc", "approve")
+
+    assert index.commit_status("abc") is None
+    assert index.stats() == {"commits": 0, "blobs": 0}
+
+
+def _scan(service: ScanService, repo: GitRepo, rev: str):
+    telemetry = Telemetry()
+    result = service.scan(
+        str(repo),
+        CONFIG,
+        ScanOptions(cache=False),
+        telemetry,
+        policy_cache=False,
+        environ={},
+        revisions=(f"{rev}~1", rev),
+        history=True,
+    )
+    return result, telemetry.counters
+
+
+def _cherry_pick(repo: GitRepo, content: str) -> str:
+    """Commit ``content`` to app.py on a branch and cherry-pick it onto main
+    after an unrelated commit; returns the original commit."""
+    repo.write("app.py", "x = 1\n")
+    repo.commit("init")
+    repo.git("checkout", "-qb", "feature")
+    repo.write("app.py", "x = 1\n" + content)
+    picked = repo.commit("change")
+    repo.git("checkout", "-q", "main")
+    repo.write("other.py", "y = 2\n")
+    repo.commit("other")
+    repo.git("cherry-pick", picked)
+    return picked
+
+
+@pytest.fixture(autouse=True)
+def no_ai_key(monkeypatch) -> None:
+    # Sin clave del backend el gate IA aprueba sin llamar a nadie
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+
+
+def test_cherry_pick_reuses_indexed_findings(git_repo: GitRepo) -> None:
+    picked = _cherry_pick(git_repo, SECRET)
+    service = ScanService()
+
+    (first, _), first_counters = _scan(service, git_repo, picked)
+    (second, _), second_counters = _scan(service, git_repo, "HEAD")
+
+    assert first.status == second.status == "block"
+    assert second.violations == first.violations
+    assert first_counters["files_indexed"] == 0
+    assert second_counters["files_indexed"] == 1
+    assert second_counters["files_scanned"] == 0
+
+
+def test_failed_ai_gate_leaves_nothing_indexed(git_repo: GitRepo, monkeypatch) -> None:
+    git_repo.write("app.py", "x = 1\n")
+    git_repo.commit("init")
+    git_repo.write("app.py", "x = 2\n")
+    git_repo.commit("change")
+    service = ScanService()
+    monkeypatch.setattr(pipeline, "ai_gate", lambda *a: ScanResult("error", "down"))
+
+    (_, failed), _ = _scan(service, git_repo, "HEAD")
+    monkeypatch.undo()
+    (_, retried), counters = _scan(service, git_repo, "HEAD")
+
+    assert failed.status == "error"
+    # El reintento vuelve a pasar por el gate IA
+    assert retried.status == "approve" and counters["files_indexed"] == 0
+
+
+def test_ai_blocked_change_is_reviewed_again(git_repo: GitRepo, monkeypatch) -> None:
+    picked = _cherry_pick(git_repo, "verify = False\n")
+    calls = []
+
+    def ai_gate(*args):
+        calls.append(args[0])
+        return ScanResult("block", ai_result={"verdict": "BLOCK"})
+
+    monkeypatch.setattr(pipeline, "ai_gate", ai_gate)
+    service = ScanService()
+
+    (_, first), _ = _scan(service, git_repo, picked)
+    (_, second), counters = _scan(service, git_repo, "HEAD")
+
+    assert first.status == second.status == "block"
+    assert len(calls) == 2 and "verify = False" in calls[1]
+    assert counters["files_indexed"] == 0
+
+
+def test_files_over_the_ai_budget_are_not_indexed(
+    git_repo: GitRepo, monkeypatch
+) -> None:
+    picked = _cherry_pick(git_repo, "y = 3\n")
+    verdict = {"verdict": "APPROVE", "not_reviewed": ["app.py"]}
+    monkeypatch.setattr(
+        pipeline, "ai_gate", lambda *a: ScanResult("approve", ai_result=verdict)
+    )
+    service = ScanService()
+
+    _scan(service, git_repo, picked)
+    _, counters = _scan(service, git_repo, "HEAD")
+
+    assert counters["files_indexed"] == 0
@@ -0,0 +1,47 @@
+"""Tests for ``IgnoreMatcher`` against ``pathspec`` (same answers, always)."""
+
+import random
+import warnings
+
+import pathspec
+import pytest
+
+from benchmarks.bench_ignore import _random_path, _random_pattern
+from src.ignore_matcher import IgnoreMatcher
+
+
+def _spec(lines):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return pathspec.PathSpec.from_lines("gitwildmatch", lines)
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("seed", range(5))
+def test_random_specs_match_pathspec(seed: int) -> None:
+    rnd = random.Random(seed)
+    for _ in range(300):
+        lines = [_random_pattern(rnd) for _ in range(rnd.randrange(1, 8))]
+        matcher, spec = IgnoreMatcher(lines), _spec(lines)
+        for _ in range(40):
+            path = _random_path(rnd)
+            assert matcher.match_file(path) == spec.match_file(path), (lines, path)
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize(
+    "lines, path, ignored",
+    [
+        (["vendor/", "!vendor/modules.txt"], "vendor/modules.txt", False),
+        (["vendor/", "!vendor/modules.txt"], "vendor/x/modules.txt", True),
+        (["/build"], "src/build/out.o", False),
+        (["/build"], "build/out.o", True),
+        (["*.min.js"], "web/a.min.js", True),
+        (["dist/"], "dist", False),
+        (["**/generated/**"], "api/generated/v1/a.go", True),
+        (["node_modules", "!node_modules/keep.js"], "node_modules/keep.js", False),
+    ],
+)
+def test_known_cases(lines, path: str, ignored: bool) -> None:
+    assert IgnoreMatcher(lines).match_file(path) is ignored
+    assert _spec(lines).match_file(path) is ignored
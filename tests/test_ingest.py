@@ -0,0 +1,214 @@
+"""Tests for the raw/patch pairing of ``GitManager.read_changes``."""
+
+import json
+
+import pytest
+
+from src.ingest import GitManager
+from src.pipeline import ScanOptions, ScanService
+from src.telemetry import Telemetry
+from tests.conftest import CONFIG, SECRET, GitRepo
+
+
+@pytest.fixture
+def typechange_repo(git_repo: GitRepo) -> GitRepo:
+    """Symlink -> file change sorted before an edit with a secret and a lockfile."""
+    repo = git_repo
+    repo.write("target.txt", "target\n")
+    repo.symlink("a_link", "target.txt")
+    repo.write("b.py", "x = 1\n")
+    repo.write("c.lock", "v1\n")
+    repo.commit("init")
+
+    (repo / "a_link").unlink()
+    repo.write("a_link", "now a regular file\n")
+    repo.write("b.py", "x = 1\n" + SECRET)
+    repo.write("c.lock", "v2\n")
+    repo.stage()
+    return repo
+
+
+def _read(repo: GitRepo):
+    changes = GitManager(str(repo), environ={}).read_changes(
+        is_ignored=lambda path: path.endswith(".lock")
+    )
+    return changes, list(changes.hunks)
+
+
+def test_typechange_keeps_later_files_aligned(typechange_repo: GitRepo) -> None:
+    changes, hunks = _read(typechange_repo)
+
+    assert [c.status for c in changes.changes] == ["T", "M", "M"]
+    assert changes.targets == ["a_link", "b.py"]
+    by_path = {}
+    for hunk in hunks:
+        by_path.setdefault(hunk.path, []).extend(hunk.lines)
+    assert set(by_path) == {"a_link", "b.py"}
+    assert "+" + SECRET.rstrip("\n") in by_path["b.py"]
+    # Los dos bloques del typechange van con su propia ruta
+    assert "+now a regular file" in by_path["a_link"]
+    assert not any("v2" in line for line in by_path["b.py"])
+
+
+def test_typechange_scan_blocks_secret(typechange_repo: GitRepo) -> None:
+    regex_result, _ = ScanService().scan(
+        str(typechange_repo),
+        CONFIG,
+        ScanOptions(cache=False),
+        Telemetry(),
+        policy_cache=False,
+        environ={},
+    )
+
+    assert regex_result is not None and regex_result.status == "block"
+    assert {v["file"] for v in regex_result.violations} == {"b.py"}
+
+
+def test_noprefix_config_does_not_break_pairing(typechange_repo: GitRepo) -> None:
+    typechange_repo.git("config", "diff.noprefix", "true")
+
+    _, hunks = _read(typechange_repo)
+
+    assert {hunk.path for hunk in hunks} == {"a_link", "b.py"}
+
+
+def test_quoted_paths_keep_exact_raw_path(typechange_repo: GitRepo) -> None:
+    typechange_repo.write("dañado.py", SECRET)
+    typechange_repo.write("with space.py", SECRET)
+    typechange_repo.stage()
+
+    _, hunks = _read(typechange_repo)
+
+    assert [h.path for h in hunks if h.lines[0].startswith("diff --git")] == [
+        "a_link",
+        "a_link",
+        "b.py",
+        "dañado.py",
+        "with space.py",
+    ]
+
+
+def _ci_manager(repo: GitRepo, base: str, head: str) -> GitManager:
+    event = repo.path.parent / "event.json"
+    event.write_text(
+        json.dumps({"pull_request": {"base": {"sha": base}, "head": {"sha": head}}})
+    )
+    return GitManager(
+        str(repo),
+        environ={"GITHUB_ACTIONS": "true", "GITHUB_EVENT_PATH": str(event)},
+    )
+
+
+@pytest.fixture
+def pr_repo(git_repo: GitRepo) -> GitRepo:
+    """A feature branch behind main, which gained a file after the fork."""
+    repo = git_repo
+    repo.write("app.py", "x = 1\n")
+    repo.commit("init")
+    repo.git("checkout", "-qb", "feature")
+    repo.write("feature.py", "y = 2\n")
+    repo.commit("feature")
+    repo.git("checkout", "-q", "main")
+    repo.write("upstream.py", "a = 1\nb = 2\n")
+    repo.commit("upstream")
+    return repo
+
+
+def test_pr_is_diffed_from_the_merge_base(pr_repo: GitRepo) -> None:
+    fork = pr_repo.git("merge-base", "main", "feature")
+    manager = _ci_manager(
+        pr_repo,
+        pr_repo.git("rev-parse", "main"),
+        pr_repo.git("rev-parse", "feature"),
+    )
+
+    changes = manager.read_changes()
+
+    assert changes.targets == ["feature.py"]
+    assert manager.merge_base.sha == fork
+    assert manager.merge_base[2:] == (1, 2)
+
+
+def test_unrelated_histories_fall_back_to_base_head(pr_repo: GitRepo) -> None:
+    pr_repo.git("checkout", "-q", "--orphan", "other")
+    (pr_repo / "feature.py").write_text("y = 2\n")
+    pr_repo.git("add", "-A")
+    pr_repo.git("commit", "-qm", "orphan")
+    manager = _ci_manager(
+        pr_repo, pr_repo.git("rev-parse", "main"), pr_repo.git("rev-parse", "other")
+    )
+
+    changes = manager.read_changes()
+
+    assert manager.merge_base.sha == ""
+    assert [c.path for c in changes.changes] == ["feature.py"]
+
+
+@pytest.fixture
+def move_repo(git_repo: GitRepo) -> GitRepo:
+    """Committed files to move: two sources and one under an ignored path."""
+    repo = git_repo
+    body = "".join(f"line_{i} = {i}\n" for i in range(20))
+    repo.write("pure.py", body)
+    repo.write("edited.py", body.replace("line", "item"))
+    repo.write("vendor/lib.py", body.replace("line", "lib") + SECRET)
+    repo.commit("init")
+    repo.git("mv", "pure.py", "moved.py")
+    repo.git("mv", "edited.py", "renamed.py")
+    repo.write("renamed.py", body.replace("line", "item") + SECRET)
+    repo.git("mv", "vendor/lib.py", "lib.py")
+    repo.stage()
+    return repo
+
+
+def _read_moves(repo: GitRepo, threshold: int = 50):
+    changes = GitManager(str(repo), environ={}).read_changes(
+        is_ignored=lambda path: path.startswith("vendor/"),
+        rename_threshold=threshold,
+    )
+    added = {}
+    for hunk in changes.hunks:
+        added.setdefault(hunk.path, []).extend(
+            line for line in hunk.lines if line.startswith("+") and line[:4] != "+++ "
+        )
+    return changes, added
+
+
+def test_pure_moves_are_not_scanned(move_repo: GitRepo) -> None:
+    changes, added = _read_moves(move_repo)
+
+    assert [(c.status, c.old_path, c.path) for c in changes.moved] == [
+        ("R100", "pure.py", "moved.py")
+    ]
+    assert sorted(changes.targets) == ["lib.py", "renamed.py"]
+    # Un rename editado solo trae sus líneas nuevas
+    assert added["renamed.py"] == ["+" + SECRET.rstrip("\n")]
+    # Sacado de una ruta ignorada: se escanea entero
+    assert len(added["lib.py"]) == 21
+
+
+def test_rename_detection_can_be_disabled(move_repo: GitRepo) -> None:
+    changes, added = _read_moves(move_repo, threshold=0)
+
+    assert changes.moved == []
+    assert {c.status for c in changes.changes} == {"A", "D"}
+    assert len(added["moved.py"]) == 20
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_non_ascii_path_is_reported_unquoted(
+    secret_repo: GitRepo, stream: bool
+) -> None:
+    secret_repo.write("café.py", SECRET)
+    secret_repo.stage()
+
+    regex_result, _ = ScanService().scan(
+        str(secret_repo),
+        CONFIG,
+        ScanOptions(stream=stream, cache=False),
+        Telemetry(),
+        policy_cache=False,
+        environ={},
+    )
+
+    assert {v["file"] for v in regex_result.violations} == {"app.py", "café.py"}
@@ -0,0 +1,73 @@
+"""Tests for the single-pass multi-pattern engine (``src.matcher``)."""
+
+import random
+import re
+
+import pytest
+
+from src.matcher import MultiPatternEngine, findall_value, literal_prefix
+
+RULES = [
+    {"name": "AWS", "pattern": re.compile(r"AKIA[0-9A-Z]{16}")},
+    {"name": "GitHub", "pattern": re.compile(r"ghp_[A-Za-z0-9]{36}")},
+    {"name": "Slack", "pattern": re.compile(r"xox[baprs]-[0-9a-zA-Z-]{10,}")},
+    {"name": "Groups", "pattern": re.compile(r"(sk_live_)([0-9a-z]{8})")},
+    {"name": "Fallback", "pattern": re.compile(r"[Pp]assword\s*=\s*\S+")},
+    {"name": "Nocase", "pattern": re.compile(r"secret_key", re.I)},
+]
+
+
+@pytest.mark.parametrize(
+    "pattern, prefix",
+    [
+        (r"AKIA[0-9A-Z]{16}", "AKIA"),
+        (r"-----BEGIN (RSA )?PRIVATE KEY", "-----BEGIN "),
+        (r"[Pp]assword", ""),
+        (r"(?:ab|cd)x", ""),
+        (r"^token", ""),
+    ],
+)
+def test_literal_prefix(pattern: str, prefix: str) -> None:
+    assert literal_prefix(re.compile(pattern)) == prefix
+    assert literal_prefix(re.compile(pattern, re.I)) == ""
+
+
+def _findall(text: str):
+    return [
+        (idx, value)
+        for idx, rule in enumerate(RULES)
+        for value in rule["pattern"].findall(text)
+    ]
+
+
+def test_engine_matches_findall_on_random_text() -> None:
+    engine = MultiPatternEngine(RULES)
+    assert engine.prefiltered_rules == 3
+    rnd = random.Random(0)
+    pieces = [
+        "AKIA",
+        "ABCDEFGHIJKLMNOP",
+        "ghp_",
+        "a" * 36,
+        "xoxb-",
+        "xoxox",
+        "1234567890",
+        "sk_live_",
+        "abcd1234",
+        "password = hunter2",
+        "SECRET_KEY",
+        " ",
+        "\n",
+    ]
+    for _ in range(200):
+        text = "".join(rnd.choice(pieces) for _ in range(rnd.randrange(1, 30)))
+        found = [(idx, findall_value(m)) for idx, m in engine.scan(text)]
+        assert found == _findall(text), text
+
+
+def test_overlapping_prefix_occurrences_are_not_missed() -> None:
+    engine = MultiPatternEngine(RULES)
+    text = "xoxoxb-1234567890abc"
+
+    assert [(idx, findall_value(m)) for idx, m in engine.scan(text)] == _findall(text)
+    assert _findall(text)
@@ -0,0 +1,85 @@
+"""Tests for the runtime rule budget (``src.regex_guard``)."""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from src.regex_guard import GuardConfig, RuleGuard
+from src.security import SecurityPolicy
+
+# (a+)+$ retrocede exponencialmente ante una racha de "a" sin final válido
+CATASTROPHIC = "a" * 40 + "!"
+SPECS = [
+    {"name": "Nested", "pattern": r"(a+)+$", "flags": 0},
+    {"name": "Key", "pattern": r"key_(\d+)", "flags": 0},
+]
+
+
+def test_guard_config_validation() -> None:
+    assert GuardConfig.from_config({}) == GuardConfig()
+    config = GuardConfig.from_config({"rules": "all", "rule_timeout_ms": "50"})
+    assert config == GuardConfig("all", 50.0)
+    assert GuardConfig.from_config(config.to_config()) == config
+    with pytest.raises(ValueError, match="rules must be one of"):
+        GuardConfig.from_config({"rules": "some"})
+    with pytest.raises(ValueError, match="rule_timeout_ms"):
+        GuardConfig.from_config({"rule_timeout_ms": 0})
+
+
+def test_guard_returns_matches_with_positions() -> None:
+    guard = RuleGuard(SPECS, [0, 1], timeout_ms=2000)
+    timings = {}
+    try:
+        matches, skipped = guard.run("x key_12 key_3 aaa", set(), timings)
+    finally:
+        guard.close()
+
+    assert matches == [(0, "aaa", 15, 18), (1, "12", 2, 8), (1, "3", 9, 14)]
+    assert skipped == [] and set(timings) == {0, 1}
+
+
+def test_overrunning_rule_is_aborted_once_per_scan() -> None:
+    guard = RuleGuard(SPECS, [0, 1], timeout_ms=200)
+    skip = set()
+    timings = {}
+    try:
+        matches, skipped = guard.run(f"key_7 {CATASTROPHIC}", skip, timings)
+        # La regla abortada no se vuelve a evaluar en el mismo escaneo
+        later, later_skipped = guard.run("key_8 aaa", skip)
+    finally:
+        guard.close()
+
+    assert skipped == [0] and skip == {0}
+    assert matches == [(1, "7", 0, 5)]
+    assert timings[0] == pytest.approx(0.2)
+    assert guard.aborts == {0: 1}
+    assert later == [(1, "8", 0, 5)] and later_skipped == [0]
+
+
+def test_policy_reports_aborted_rule_and_keeps_scanning(tmp_path: Path) -> None:
+    config = tmp_path / "opsguard.yml"
+    config.write_text(
+        "blocklist:\n"
+        '  - name: "Nested"\n'
+        '    pattern: "(a+)+$"\n'
+        '  - name: "Plain"\n'
+        '    pattern: "secret_value"\n'
+        "regex_guard:\n"
+        "  rules: risky\n"
+        "  rule_timeout_ms: 200\n"
+    )
+    policy = SecurityPolicy(str(config))
+    diff = (
+        "diff --git a/a.py b/a.py\n+++ b/a.py\n@@ -0,0 +1,2 @@\n"
+        f'+{CATASTROPHIC}\n+x = "secret_value"\n'
+    )
+
+    findings = policy.scan_diff(diff)
+
+    assert policy.guarded_rules == [0]
+    assert [(f["rule"], f["line"], f.get("aborted")) for f in findings] == [
+        ("Nested", "?", True),
+        ("Plain", 2, None),
+    ]
+    assert re.search(r"Rule aborted: exceeded 200 ms", findings[0]["type"])
@@ -0,0 +1,54 @@
+"""Tests for the blocklist regex linter (``src.regex_lint``)."""
+
+import re
+
+import pytest
+
+from src.regex_lint import lint_pattern, profile_rule, pump_inputs, risky_rules
+
+
+@pytest.mark.parametrize(
+    "pattern, kind, severity",
+    [
+        (r"(a+)+$", "nested-quantifier", "exponential"),
+        (r"(\w+\s?)+$", "nested-quantifier", "exponential"),
+        (r"(\w+|\d+)+$", "ambiguous-alternation", "exponential"),
+        (r"\w+\d+x", "overlapping-repeats", "polynomial"),
+    ],
+)
+def test_lint_flags_backtracking_constructs(
+    pattern: str, kind: str, severity: str
+) -> None:
+    issues = lint_pattern(re.compile(pattern))
+
+    assert (kind, severity) in {(issue.kind, issue.severity) for issue in issues}
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [r"AKIA[0-9A-Z]{16}", r"ghp_[A-Za-z0-9]{36}", r"password\s*=\s*\S+", r"[a-z]+:"],
+)
+def test_lint_accepts_linear_patterns(pattern: str) -> None:
+    assert lint_pattern(re.compile(pattern)) == []
+
+
+def test_risky_rules_and_pump_inputs() -> None:
+    rules = [
+        {"name": "ok", "pattern": re.compile(r"AKIA[0-9A-Z]{16}")},
+        {"name": "bad", "pattern": re.compile(r"(a+)+$")},
+    ]
+
+    assert risky_rules(rules) == [1]
+    prefix, pump, suffix = pump_inputs(rules[1]["pattern"])[0]
+    assert pump == "a" and not re.fullmatch(r"a", suffix)
+
+
+def test_profile_classifies_catastrophic_and_linear_rules() -> None:
+    bad = profile_rule("bad", re.compile(r"(a+)+$"), timeout=1.0, benign_chars=1000)
+    good = profile_rule(
+        "good", re.compile(r"AKIA[0-9A-Z]{16}"), timeout=5.0, benign_chars=1000
+    )
+
+    assert bad.status == "catastrophic" and bad.issues
+    assert good.status == "ok" and good.issues == []
+    assert good.ms_per_mb is not None
@@ -0,0 +1,71 @@
+"""Tests for the gate telemetry (``src.telemetry``)."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.telemetry import JSONL_FILENAME, OPENMETRICS_FILENAME, Telemetry
+
+
+def test_stages_accumulate_and_record_errors(monkeypatch) -> None:
+    monkeypatch.delenv("OPSGUARD_TELEMETRY_DIR", raising=False)
+    telemetry = Telemetry()
+    with telemetry.stage("scan"):
+        pass
+    with telemetry.stage("scan"):
+        pass
+    with pytest.raises(RuntimeError):
+        with telemetry.stage("ai"):
+            raise RuntimeError("boom")
+    telemetry.count("bytes", 10)
+    telemetry.count("bytes", 5)
+    telemetry.outcome = "block"
+
+    data = telemetry.record(exit_code=1)["telemetry"]
+
+    assert set(data["stages_ms"]) == {"scan", "ai"}
+    assert data["stage_status"] == {"scan": "success", "ai": "error"}
+    assert data["counters"] == {"bytes": 15}
+    assert (data["status"], data["exit_code"]) == ("block", 1)
+    assert "rules" not in data
+    assert telemetry.flush(1) is None
+
+
+def test_flush_appends_jsonl_and_writes_openmetrics(tmp_path: Path) -> None:
+    for outcome in ("approve", "block"):
+        telemetry = Telemetry(str(tmp_path))
+        telemetry.label("model", 'a"b')
+        telemetry.rule("AWS Access Key", "matches", 2)
+        telemetry.rule("AWS Access Key", "time_ms", 1500)
+        with telemetry.stage("regex_scan"):
+            pass
+        telemetry.outcome = outcome
+        telemetry.flush(0)
+
+    records = (tmp_path / JSONL_FILENAME).read_text().splitlines()
+    assert [json.loads(r)["telemetry"]["status"] for r in records] == [
+        "approve",
+        "block",
+    ]
+    assert json.loads(records[0])["telemetry"]["rules"]["AWS Access Key"] == {
+        "matches": 2,
+        "time_ms": 1500,
+    }
+
+    metrics = (tmp_path / OPENMETRICS_FILENAME).read_text()
+    assert metrics.endswith("# EOF\n")
+    assert 'model="a\\"b"' in metrics and 'status="block"' in metrics
+    assert 'stage="regex_scan"' in metrics
+    assert (
+        'opsguard_rule_match_seconds{model="a\\"b",rule="AWS Access Key",'
+        'status="block"} 1.5'
+    ) in metrics
+    assert "run_id" not in metrics
+
+
+def test_write_errors_do_not_raise(tmp_path: Path) -> None:
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+
+    assert Telemetry(str(blocker / "sub")).flush(0) is not None
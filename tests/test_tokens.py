@@ -0,0 +1,101 @@
+"""Tests for token counting and budget planning (``src.tokens``)."""
+
+from pathlib import Path
+
+import pytest
+
+from src import tokens
+from src.ai import AIBudgetError, AIEngine
+from src.backends import ALLOW_MOCK_ENV, AIBackend, BackendConfig
+from src.tokens import (
+    CONFIG,
+    DOCS,
+    MIN_PARTIAL_TOKENS,
+    SOURCE,
+    TESTS,
+    count_tokens,
+    file_priority,
+    plan_budget,
+)
+
+
+def _file_diff(path: str, lines: int) -> str:
+    body = "\n".join(f"+value_{i} = compute({i}, 'field_{i}')" for i in range(lines))
+    return (
+        f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+        f"@@ -0,0 +1,{lines} @@\n{body}\n"
+    )
+
+
+def test_approximate_count(monkeypatch) -> None:
+    monkeypatch.setattr(tokens, "_encoder", False)
+
+    assert tokens.tokenizer_name() == "approx"
+    assert count_tokens("") == 0
+    assert count_tokens("hello world") == 2
+    # Grupos de 3 dígitos y palabras largas (1 más cada 8 letras)
+    assert count_tokens("x = 1234567") == 5
+    assert count_tokens("internationalization") == 3
+
+
+def test_count_grows_with_text() -> None:
+    small, large = _file_diff("a.py", 10), _file_diff("a.py", 100)
+
+    assert 0 < count_tokens(small) < count_tokens(large)
+
+
+@pytest.mark.parametrize(
+    "path, priority",
+    [
+        ("src/app.py", SOURCE),
+        ("deploy/values.yaml", CONFIG),
+        ("Dockerfile", CONFIG),
+        ("tests/test_app.py", TESTS),
+        ("web/button.spec.ts", TESTS),
+        ("pkg/app_test.go", TESTS),
+        ("docs/guide.md", DOCS),
+    ],
+)
+def test_file_priority(path: str, priority: int) -> None:
+    assert file_priority(path) == priority
+
+
+def test_plan_packs_by_priority_and_cuts_at_lines() -> None:
+    files = {
+        "README.md": _file_diff("README.md", 5),
+        "tests/test_app.py": _file_diff("tests/test_app.py", 400),
+        "src/app.py": _file_diff("src/app.py", 5),
+    }
+    budget = count_tokens(files["src/app.py"]) + count_tokens(files["README.md"]) + 600
+
+    plan = plan_budget(files, budget)
+
+    assert list(plan.files) == ["src/app.py", "tests/test_app.py"]
+    assert plan.partial == ["tests/test_app.py"]
+    assert plan.left_out == ["README.md"]
+    head = plan.files["tests/test_app.py"]
+    assert files["tests/test_app.py"].startswith(head) and head.endswith("\n")
+    assert plan.tokens == sum(count_tokens(text) for text in plan.files.values())
+    assert plan.tokens <= budget
+
+
+def test_plan_leaves_out_files_below_the_partial_minimum() -> None:
+    files = {"a.py": _file_diff("a.py", 5), "b.py": _file_diff("b.py", 200)}
+    budget = count_tokens(files["a.py"]) + MIN_PARTIAL_TOKENS - 1
+
+    plan = plan_budget(files, budget)
+
+    assert list(plan.files) == ["a.py"]
+    assert plan.left_out == ["b.py"] and plan.partial == []
+
+
+def test_cost_cap_refuses_before_sending(monkeypatch) -> None:
+    monkeypatch.setenv(ALLOW_MOCK_ENV, "1")
+    backend = AIBackend(BackendConfig(kind="mock", mock_latency_ms=0.0))
+    calls = []
+    monkeypatch.setattr(backend, "create", lambda **kwargs: calls.append(kwargs))
+    engine = AIEngine(backend=backend, max_cost=0.0)
+
+    with pytest.raises(AIBudgetError, match="exceeds the per-scan cap"):
+        engine.analyze_diff(_file_diff("app.py", 50))
+    assert calls == []
@@ -0,0 +1,84 @@
+"""Tests for the full-tree scan (``src.tree_scan``)."""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from src.ingest import GitIngestError, GitManager
+from src.security import SecurityPolicy
+from src.telemetry import Telemetry
+from src.tree_scan import blob_id, scan_tree
+from tests.conftest import CONFIG, SECRET, GitRepo
+
+
+@pytest.fixture(scope="module")
+def policy() -> SecurityPolicy:
+    return SecurityPolicy(CONFIG)
+
+
+@pytest.fixture
+def repo(git_repo: GitRepo) -> GitRepo:
+    """A secret in two identical files, a binary, an ignored file and a symlink."""
+    git_repo.write("a.py", "x = 1\n" + SECRET)
+    git_repo.write("b.py", "x = 1\n" + SECRET)
+    git_repo.write("clean.py", "y = 2\n")
+    git_repo.write("image.bin", b"\0" + SECRET.encode())
+    git_repo.write("dist/bundle.js", SECRET)
+    git_repo.symlink("link.py", "a.py")
+    git_repo.commit("init")
+    return git_repo
+
+
+def _scan(repo: GitRepo, policy: SecurityPolicy, rev=None):
+    return scan_tree(
+        GitManager(str(repo), environ={}),
+        policy,
+        lambda path: path.startswith("dist/"),
+        Telemetry(),
+        rev=rev,
+        read_workers=2,
+    )
+
+
+def _located(result):
+    return [(v["file"], v["line"]) for v in result.violations]
+
+
+def test_blob_id_matches_git(tmp_path: Path) -> None:
+    path = tmp_path / "f.txt"
+    path.write_bytes(b"hello\n")
+
+    expected = subprocess.run(
+        ["git", "hash-object", str(path)], capture_output=True, text=True
+    ).stdout.strip()
+    assert blob_id(b"hello\n") == expected
+
+
+def test_commit_tree_scans_each_blob_once(repo: GitRepo, policy) -> None:
+    result = _scan(repo, policy, rev="HEAD")
+
+    assert _located(result) == [("a.py", 2), ("b.py", 2)]
+    # Los symlinks de un commit no se listan
+    assert result.files == 5 and result.ignored == 1
+    assert result.duplicates == 1 and result.skipped == 1
+    assert result.scanned == 2
+
+
+def test_worktree_matches_commit_and_sees_untracked_files(
+    repo: GitRepo, policy
+) -> None:
+    committed = _scan(repo, policy, rev="HEAD")
+    (repo / "new.py").write_text(SECRET)
+
+    result = _scan(repo, policy)
+
+    assert _located(result) == _located(committed) + [("new.py", 1)]
+    # El symlink se lista pero no se lee
+    assert result.files == 7 and result.skipped == 2
+    assert result.duplicates == 1
+
+
+def test_unknown_revision(repo: GitRepo, policy) -> None:
+    with pytest.raises(GitIngestError, match="Failed to list the tree"):
+        _scan(repo, policy, rev="no-such-rev")
@@ -0,0 +1,77 @@
+"""Tests for the local risk triage (``src.triage``)."""
+
+from src.security import SecurityPolicy
+from src.triage import Triage, TriageConfig
+from tests.conftest import CONFIG
+
+TRIAGE = Triage(TriageConfig(enabled=True))
+
+
+def _diff(path: str, removed=(), added=()) -> str:
+    body = [f"-{line}" for line in removed] + [f"+{line}" for line in added]
+    return f"diff --git a/{path} b/{path}\n@@ -1 +1 @@\n" + "\n".join(body) + "\n"
+
+
+def test_removed_permission_check_is_sent() -> None:
+    risk = TRIAGE.score_file(
+        "shop/views.py",
+        _diff(
+            "shop/views.py",
+            removed=[
+                "    if not request.user.is_admin:",
+                "        raise PermissionDenied",
+            ],
+        ),
+    )
+
+    assert risk.send
+    assert "removed guards: access denial, permission check" in risk.reasons
+
+
+def test_moved_guard_is_not_a_removal() -> None:
+    guard = "    if not request.user.is_admin:"
+    risk = TRIAGE.score_file(
+        "shop/views.py",
+        _diff(
+            "shop/views.py", removed=[guard, "    x = 1"], added=["    x = 2", guard]
+        ),
+    )
+
+    assert not any(reason.startswith("removed guards") for reason in risk.reasons)
+    assert not risk.send
+
+
+def test_removed_auth_decorator_is_sent() -> None:
+    risk = TRIAGE.score_file(
+        "shop/views.py", _diff("shop/views.py", removed=["@login_required"])
+    )
+
+    assert risk.send
+
+
+def test_jwt_without_signature_verification_is_sent() -> None:
+    line = 'claims = jwt.decode(token, options={"verify_signature": False})'
+    risk = TRIAGE.score_file("shop/api.py", _diff("shop/api.py", added=[line]))
+
+    assert risk.send
+    assert "sinks: token/signature verification" in risk.reasons
+
+
+def test_weak_hash_is_sent() -> None:
+    line = "digest = hashlib.md5(password.encode()).hexdigest()"
+    risk = TRIAGE.score_file("shop/users.py", _diff("shop/users.py", added=[line]))
+
+    assert risk.send
+
+
+def test_small_plain_edit_is_approved() -> None:
+    risk = TRIAGE.score_file(
+        "shop/views.py", _diff("shop/views.py", removed=["x = 1"], added=["x = 2"])
+    )
+
+    assert not risk.send
+    assert risk.reasons == ["source file"]
+
+
+def test_repo_policy_keeps_triage_opt_in() -> None:
+    assert not SecurityPolicy(CONFIG).triage_config.enabled